@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Benchmark of reading CSV records for import
+
+Generated CSV data is read into records, and then into msgpack.gz, through
+:meth:`tdclient.api.API.prepare_file` with the default converters, which
+look up and guess the type of every value, and with ``compiled=True``, which
+chooses a converter per column once from a sample of rows.
+
+Usage::
+
+    python benchmarks/bench_csv.py --rows 500000
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import time
+
+from tdclient import api
+
+
+def make_csv(num_rows: int) -> bytes:
+    stream = io.StringIO()
+    writer = csv.writer(stream)
+    writer.writerow(["time", "user", "count", "score", "active", "comment"])
+    for i in range(num_rows):
+        writer.writerow(
+            [1700000000 + i, f"user{i % 1000}", i % 97, i * 0.5, i % 2 == 0, ""]
+        )
+    return stream.getvalue().encode("utf-8")
+
+
+def read_records(td: api.API, data: bytes, **kwargs: object) -> float:
+    started_at = time.perf_counter()
+    with contextlib.closing(td._read_file(io.BytesIO(data), "csv", **kwargs)) as items:
+        for _ in items:
+            pass
+    return time.perf_counter() - started_at
+
+
+def prepare_file(td: api.API, data: bytes, **kwargs: object) -> float:
+    started_at = time.perf_counter()
+    td.prepare_file(io.BytesIO(data), "csv", **kwargs).close()
+    return time.perf_counter() - started_at
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_csv(args.rows)
+    td = api.API("APIKEY")
+    print(f"input size: {len(data) / 1024**2:.1f} MiB, {args.rows} rows")
+    for name, bench in (("read", read_records), ("read + pack", prepare_file)):
+        for compiled in (False, True):
+            elapsed = min(
+                bench(td, data, compiled=compiled) for _ in range(args.repeat)
+            )
+            print(
+                f"{name:<12s} compiled={compiled!s:<5s} "
+                f"{elapsed:7.3f}s {args.rows / elapsed:12,.0f} rows/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""Benchmark of importing a large CSV file over HTTP
+
+A local HTTP server accepts `/v3/table/import` requests, and a generated CSV
+file is imported through :meth:`tdclient.api.API.import_file`, first as a
+single part converted on one core, then in chunks converted on a process pool
+and uploaded concurrently.
+
+Usage::
+
+    python benchmarks/bench_import.py --rows 2000000 --chunk-size 16 --processes 4
+"""
+
+import argparse
+import csv
+import http.server
+import os
+import tempfile
+import threading
+import time
+
+from tdclient import api
+
+
+def make_csv(path: str, num_rows: int) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["time", "user", "score", "comment"])
+        for i in range(num_rows):
+            writer.writerow([1700000000 + i, f"user{i % 1000}", i * 0.5, f"row {i}"])
+
+
+def serve() -> http.server.ThreadingHTTPServer:
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_PUT(self) -> None:
+            remaining = int(self.headers["Content-Length"])
+            while 0 < remaining:
+                remaining -= len(self.rfile.read(min(remaining, 1024**2)))
+            body = b'{"elapsed_time": 0.0}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(endpoint: str, path: str, **kwargs: object) -> float:
+    td = api.API("APIKEY", endpoint=endpoint)
+    try:
+        started_at = time.perf_counter()
+        td.import_file("db", "table", "csv", path, **kwargs)
+        return time.perf_counter() - started_at
+    finally:
+        td.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk-size", type=int, default=8, help="MiB")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    server = serve()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/"
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "input.csv")
+        make_csv(path, args.rows)
+        size = os.path.getsize(path)
+        print(f"input size: {size / 1024**2:.1f} MiB, {args.rows} rows")
+        try:
+            elapsed = run(endpoint, path)
+            print(
+                f"single part      {elapsed:7.3f}s {size / elapsed / 1024**2:7.1f} MiB/s"
+            )
+            elapsed = run(
+                endpoint,
+                path,
+                chunk_size=args.chunk_size * 1024**2,
+                num_processes=args.processes,
+                num_threads=args.threads,
+            )
+            print(
+                f"chunks x{args.processes:<2d} procs "
+                f"{elapsed:7.3f}s {size / elapsed / 1024**2:7.1f} MiB/s"
+            )
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
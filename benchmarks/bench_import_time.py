@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""Benchmark of the time to import tdclient
+
+``python -X importtime`` is run in fresh interpreters for each statement, and
+the cumulative time of the modules imported by the statement is reported with
+the modules which took longest. ``import tdclient`` is expected to load only
+the package itself, while the first access to ``tdclient.Client`` loads the API
+modules and HTTP, but neither asyncio nor numpy.
+
+With ``--json`` the results are also written to a file, so that CI can keep
+them to track the import time across commits, and ``--max-ms`` exits with an
+error when ``import tdclient`` takes longer.
+
+Usage::
+
+    python benchmarks/bench_import_time.py --repeat 10 --json import-time.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Any
+
+STATEMENTS = {
+    "import tdclient": "import tdclient",
+    "tdclient.Client": "import tdclient; tdclient.Client",
+    "tdclient.AsyncClient": "import tdclient; tdclient.AsyncClient",
+}
+
+#: modules loaded by the interpreter itself, whose times are not counted
+BASELINE = "pass"
+
+
+def importtime(statement: str) -> dict[str, tuple[int, int]]:
+    """Return the microseconds taken by the modules imported by a statement
+
+    Args:
+        statement (str): Python statement run by a fresh interpreter
+
+    Returns:
+        dict: pairs of the time taken by the module itself and the time of the
+        module including its imports, by module name. The latter is 0 for
+        modules imported by another one, so that times are counted once.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        # modules are indented by two more spaces for every level of nesting
+        nested = name.startswith("   ")
+        times[name.strip()] = (int(self_us), 0 if nested else int(cumulative_us))
+    return times
+
+
+def measure(statement: str, repeat: int, top: int) -> dict[str, Any]:
+    baseline = set(importtime(BASELINE))
+    totals: list[float] = []
+    slowest: dict[str, int] = {}
+    for _ in range(repeat):
+        times = {
+            name: us
+            for name, us in importtime(statement).items()
+            if name not in baseline
+        }
+        totals.append(sum(cumulative for _, cumulative in times.values()) / 1000)
+        for name, (self_us, _) in times.items():
+            slowest[name] = min(slowest.get(name, self_us), self_us)
+    return {
+        "min_ms": min(totals),
+        "median_ms": statistics.median(totals),
+        "modules": len(slowest),
+        "slowest": {
+            name: us / 1000
+            for name, us in sorted(slowest.items(), key=lambda item: -item[1])[:top]
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--json", help="file to write the results to")
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        help="fail if the median time of `import tdclient` exceeds this",
+    )
+    args = parser.parse_args()
+
+    results: dict[str, Any] = {}
+    for label, statement in STATEMENTS.items():
+        result = measure(statement, args.repeat, args.top)
+        results[label] = result
+        print(
+            f"{label}: {result['median_ms']:.1f} ms median, "
+            f"{result['min_ms']:.1f} ms min, {result['modules']} modules"
+        )
+        for name, ms in result["slowest"].items():
+            print(f"  {name:<40s} {ms:7.2f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    median = results["import tdclient"]["median_ms"]
+    if args.max_ms is not None and args.max_ms < median:
+        sys.exit(f"import tdclient took {median:.1f} ms, more than {args.max_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""Benchmark of decoding a large msgpack job result over HTTP
+
+A local HTTP server serves a msgpack result with a limited bandwidth and small
+socket buffers, and the result is read through
+:meth:`tdclient.api.API.job_result_format_each` with and without
+``prefetch_chunks``. The consumer blocks periodically as an application
+writing rows elsewhere would. Without read-ahead, the transfer stalls while
+the consumer is busy; with read-ahead, network reads overlap with decoding
+and consumption, so the elapsed time approaches ``max(transfer, consume)``
+instead of ``transfer + consume``.
+
+Usage::
+
+    python benchmarks/bench_job_result.py --rows 2000000 --bandwidth 50 --prefetch 0 4 16
+"""
+
+import argparse
+import http.server
+import socket
+import threading
+import time
+
+import msgpack
+
+from tdclient import api
+
+WRITE_SIZE = 64 * 1024
+
+
+def make_body(num_rows: int) -> bytes:
+    packer = msgpack.Packer()
+    return b"".join(
+        packer.pack([i, f"user{i % 1000}", i * 0.5, "2026-01-01 00:00:00 UTC"])
+        for i in range(num_rows)
+    )
+
+
+def serve(
+    body: bytes, bandwidth: float, buffer_size: int
+) -> http.server.ThreadingHTTPServer:
+    delay = WRITE_SIZE / (bandwidth * 1024**2) if 0 < bandwidth else 0
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self) -> None:
+            super().setup()
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_size)
+
+        def do_GET(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-msgpack")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            for offset in range(0, len(body), WRITE_SIZE):
+                self.wfile.write(body[offset : offset + WRITE_SIZE])
+                if delay:
+                    time.sleep(delay)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(
+    endpoint: str, prefetch_chunks: int, consumer_delay: float, buffer_size: int
+) -> tuple[int, float]:
+    socket_options = [(socket.SOL_SOCKET, socket.SO_RCVBUF, buffer_size)]
+    td = api.API("APIKEY", endpoint=endpoint, socket_options=socket_options)
+    try:
+        started_at = time.perf_counter()
+        num_rows = 0
+        for _ in td.job_result_format_each(
+            "12345", "msgpack", prefetch_chunks=prefetch_chunks
+        ):
+            num_rows += 1
+            if consumer_delay and num_rows % 10000 == 0:
+                time.sleep(consumer_delay)
+        return num_rows, time.perf_counter() - started_at
+    finally:
+        td.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument(
+        "--bandwidth", type=float, default=50, help="MiB/s, 0 for unlimited"
+    )
+    parser.add_argument(
+        "--consumer-delay",
+        type=float,
+        default=0.01,
+        help="seconds the consumer blocks every 10000 rows, e.g. writing to a database",
+    )
+    parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=256 * 1024,
+        help="socket buffer size in bytes, which bounds the bytes in flight"
+        " like the TCP window of a remote connection does",
+    )
+    parser.add_argument("--prefetch", type=int, nargs="+", default=[0, 2, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    body = make_body(args.rows)
+    server = serve(body, args.bandwidth, args.buffer_size)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/"
+    print(f"result size: {len(body) / 1024**2:.1f} MiB, {args.rows} rows")
+    try:
+        for prefetch_chunks in args.prefetch:
+            elapsed = min(
+                run(endpoint, prefetch_chunks, args.consumer_delay, args.buffer_size)[1]
+                for _ in range(args.repeat)
+            )
+            print(
+                f"prefetch_chunks={prefetch_chunks:<3d} "
+                f"{elapsed:7.3f}s {args.rows / elapsed:12,.0f} rows/s"
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""Benchmark of decoding large JSON API responses and json job results
+
+Bodies shaped like the responses of `/v3/table/list` and `/v3/job/list` are
+decoded as :meth:`tdclient.api.API.checked_json` did before codecs
+(``json.loads(body.decode("utf-8"))``) and with every available
+:class:`tdclient.json_codec.JSONCodec`. They are also parsed incrementally with
+:func:`tdclient.json_codec.iter_array_items` as the ``*_each`` listing methods
+do. A json job result is split into rows
+through ``codecs.getreader`` as before, and on raw bytes with
+:func:`tdclient.json_codec.iter_lines`.
+
+Usage::
+
+    python benchmarks/bench_json.py --tables 20000 --jobs 100000 --rows 500000
+"""
+
+import argparse
+import codecs
+import functools
+import io
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+from tdclient import json_codec
+
+
+def make_tables(num_tables: int) -> bytes:
+    schema = json.dumps([[f"col{i}", "string"] for i in range(20)])
+    tables = [
+        {
+            "id": i,
+            "name": f"table_{i}",
+            "estimated_storage_size": i * 1024,
+            "counter_updated_at": None,
+            "last_log_timestamp": "2026-01-01T00:00:00Z",
+            "type": "log",
+            "count": i * 100,
+            "expire_days": None,
+            "created_at": "2026-01-01 00:00:00 UTC",
+            "updated_at": "2026-01-02 00:00:00 UTC",
+            "schema": schema,
+        }
+        for i in range(num_tables)
+    ]
+    return json.dumps({"database": "db", "tables": tables}).encode("utf-8")
+
+
+def make_jobs(num_jobs: int) -> bytes:
+    jobs = [
+        {
+            "status": "success",
+            "cpu_time": 496570,
+            "result_size": 24,
+            "duration": 262,
+            "job_id": str(10000000 + i),
+            "created_at": "2026-01-01 12:00:18 UTC",
+            "updated_at": "2026-01-01 12:04:42 UTC",
+            "start_at": "2026-01-01 12:00:19 UTC",
+            "end_at": "2026-01-01 12:04:41 UTC",
+            "query": f"SELECT COUNT(1) FROM www_access WHERE code = {i}",
+            "type": "presto",
+            "priority": 0,
+            "retry_limit": 0,
+            "result": "",
+            "url": f"https://console.treasuredata.com/jobs/{10000000 + i}",
+            "user_name": "owner",
+            "hive_result_schema": '[["_col0", "bigint"]]',
+            "organization": None,
+            "database": "sample_datasets",
+        }
+        for i in range(num_jobs)
+    ]
+    return json.dumps({"count": num_jobs, "jobs": jobs}).encode("utf-8")
+
+
+def make_rows(num_rows: int) -> bytes:
+    return b"".join(
+        json.dumps([i, f"user{i % 1000}", i * 0.5, "2026-01-01 00:00:00 UTC"]).encode()
+        + b"\n"
+        for i in range(num_rows)
+    )
+
+
+def stream_items(body: bytes, key: str) -> None:
+    size = json_codec.STREAM_CHUNK_SIZE
+    chunks = (body[i : i + size] for i in range(0, len(body), size))
+    for _ in json_codec.iter_array_items(chunks, key):
+        pass
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    elapsed = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        elapsed.append(time.perf_counter() - started_at)
+    return min(elapsed)
+
+
+def report(label: str, size: int, elapsed: float, baseline: float) -> None:
+    print(
+        f"  {label:<24s} {elapsed * 1000:9.1f} ms "
+        f"{size / 1024**2 / elapsed:8.1f} MiB/s {baseline / elapsed:6.2f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=20000)
+    parser.add_argument("--jobs", type=int, default=100000)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    codecs_available = [json_codec.get_codec("json")]
+    if json_codec.orjson is not None:
+        codecs_available.append(json_codec.get_codec("orjson"))
+    else:
+        print("orjson is not installed; only the json module is measured")
+
+    for name, key, body in [
+        (f"list_tables ({args.tables} tables)", "tables", make_tables(args.tables)),
+        (f"list_jobs ({args.jobs} jobs)", "jobs", make_jobs(args.jobs)),
+    ]:
+        print(f"{name}: {len(body) / 1024**2:.1f} MiB")
+        baseline = measure(
+            lambda body=body: json.loads(body.decode("utf-8")), args.repeat
+        )
+        report("json.loads(str)", len(body), baseline, baseline)
+        for codec in codecs_available:
+            elapsed = measure(functools.partial(codec.loads, body), args.repeat)
+            report(f"{codec.name}.loads(bytes)", len(body), elapsed, baseline)
+        elapsed = measure(functools.partial(stream_items, body, key), args.repeat)
+        report("iter_array_items", len(body), elapsed, baseline)
+
+    body = make_rows(args.rows)
+    print(f"json result ({args.rows} rows): {len(body) / 1024**2:.1f} MiB")
+
+    def chunks() -> list[bytes]:
+        return [body[i : i + 1024**2] for i in range(0, len(body), 1024**2)]
+
+    def read_lines() -> None:
+        for row in codecs.getreader("utf-8")(io.BytesIO(body)):
+            json.loads(row)
+
+    baseline = measure(read_lines, args.repeat)
+    report("getreader + json.loads", len(body), baseline, baseline)
+    for codec in codecs_available:
+
+        def split_lines(codec: json_codec.JSONCodec = codec) -> None:
+            for line in json_codec.iter_lines(chunks()):
+                codec.loads(line)
+
+        elapsed = measure(split_lines, args.repeat)
+        report(f"iter_lines + {codec.name}", len(body), elapsed, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+"""Benchmark suite of the client against a local fake Treasure Data API
+
+The client talks to :class:`tdclient.fake_server.FakeServer` over real sockets,
+so that HTTP, retries, decoding and uploads are measured end to end:
+
+- ``result.*``: rows/s of reading a job result, streamed in msgpack and json,
+  read ahead, and downloaded by ranges to a temporary file or in memory
+- ``import.*``: MB/s of `import_data` and of bulk import part uploads
+- ``metadata.*``: requests/s of job status and listings from concurrent threads
+
+The server can add latency, limit bandwidth and fail requests at random, to
+see how the client behaves under realistic conditions. Results are written as
+JSON with ``--json``, and compared with a previous run by ``--baseline``, which
+exits with an error if a benchmark is slower by more than ``--max-regression``.
+
+Usage::
+
+    python benchmarks/bench_suite.py --json bench.json
+    python benchmarks/bench_suite.py --baseline bench.json --max-regression 0.2
+    python benchmarks/bench_suite.py --latency 0.05 --bandwidth 20 --failure-rate 0.05
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from tdclient import api, retry, version
+from tdclient.fake_server import FakeServer
+
+SCHEMA = [
+    ["id", "bigint"],
+    ["name", "varchar"],
+    ["value", "double"],
+    ["time", "varchar"],
+]
+
+
+def make_rows(num_rows: int) -> list[list[Any]]:
+    return [
+        [i, f"user{i % 1000}", i * 0.5, "2026-01-01 00:00:00 UTC"]
+        for i in range(num_rows)
+    ]
+
+
+class Suite:
+    """Benchmarks sharing a fake server
+
+    Each benchmark returns the amount of work done, e.g. rows, and the
+    throughput is the amount divided by the elapsed time.
+    """
+
+    def __init__(self, server: FakeServer, args: argparse.Namespace) -> None:
+        self.server = server
+        self.args = args
+        server.add_table("bench", "events")
+        for i in range(args.tables):
+            server.add_table("bench", f"table{i}")
+        self.job_id = server.add_job(make_rows(args.rows), SCHEMA)
+        self.payload = b"\x00" * int(args.import_mb * 1024**2)
+        self.benchmarks: dict[str, tuple[str, Callable[[api.API], float]]] = {
+            "result.msgpack": ("rows/s", self.result("msgpack")),
+            "result.msgpack_prefetch": (
+                "rows/s",
+                self.result("msgpack", prefetch_chunks=4),
+            ),
+            "result.json": ("rows/s", self.result("json")),
+            "result.range_download": (
+                "rows/s",
+                self.result("msgpack", store_tmpfile=True),
+            ),
+            "result.memory_budget": (
+                "rows/s",
+                self.result("msgpack", memory_budget=16 * 1024**2),
+            ),
+            "import.import_data": ("MB/s", self.import_data),
+            "import.bulk_import_upload_part": ("MB/s", self.upload_part),
+            "metadata.job_status": (
+                "requests/s",
+                self.requests(lambda td: td.job_status(self.job_id)),
+            ),
+            "metadata.list_databases": (
+                "requests/s",
+                self.requests(lambda td: td.list_databases()),
+            ),
+            "metadata.list_tables": (
+                "requests/s",
+                self.requests(lambda td: td.list_tables("bench")),
+            ),
+        }
+
+    def result(self, format: str, **kwargs: Any) -> Callable[[api.API], float]:
+        def run(td: api.API) -> float:
+            num_rows = 0
+            for _ in td.job_result_format_each(self.job_id, format, **kwargs):
+                num_rows += 1
+            return num_rows
+
+        return run
+
+    def import_data(self, td: api.API) -> float:
+        td.import_data("bench", "events", "msgpack.gz", self.payload, len(self.payload))
+        self.server.imports.clear()
+        return len(self.payload) / 1e6
+
+    def upload_part(self, td: api.API) -> float:
+        self.server.bulk_imports.clear()
+        self.server.bulk_import_parts.clear()
+        td.create_bulk_import("bench", "bench", "events")
+        td.bulk_import_upload_part("bench", "part", self.payload, len(self.payload))
+        return len(self.payload) / 1e6
+
+    def requests(self, call: Callable[[api.API], Any]) -> Callable[[api.API], float]:
+        def run(td: api.API) -> float:
+            with ThreadPoolExecutor(self.args.concurrency) as executor:
+                list(executor.map(lambda _: call(td), range(self.args.requests)))
+            return self.args.requests
+
+        return run
+
+    def run(self, name: str) -> dict[str, Any]:
+        unit, benchmark = self.benchmarks[name]
+        throughputs: list[float] = []
+        for _ in range(self.args.repeat):
+            td = api.API(
+                "APIKEY",
+                endpoint=self.server.endpoint,
+                maxsize=self.args.concurrency,
+                retry_policy=retry.RetryPolicy(initial_delay=0.01, max_delay=0.1),
+            )
+            try:
+                started_at = time.perf_counter()
+                amount = benchmark(td)
+                throughputs.append(amount / (time.perf_counter() - started_at))
+            finally:
+                td.close()
+        return {
+            "unit": unit,
+            "value": statistics.median(throughputs),
+            "min": min(throughputs),
+            "max": max(throughputs),
+        }
+
+
+def compare(
+    results: dict[str, Any], baseline: dict[str, Any], max_regression: float
+) -> list[str]:
+    """Return the benchmarks slower than the baseline by more than a ratio"""
+    regressions: list[str] = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None or previous["unit"] != result["unit"]:
+            continue
+        change = result["value"] / previous["value"] - 1
+        print(f"  {name:<34s} {change:+7.1%}")
+        if change < -max_regression:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--import-mb", type=float, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tables", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0, help="seconds")
+    parser.add_argument(
+        "--bandwidth", type=float, default=0, help="MiB/s, 0 for unlimited"
+    )
+    parser.add_argument("--failure-rate", type=float, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--only", nargs="+", default=[], help="run benchmarks with these prefixes"
+    )
+    parser.add_argument("--json", help="file to write the results to")
+    parser.add_argument("--baseline", help="results of a previous run to compare")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+    # retries of injected failures are expected
+    logging.getLogger("tdclient").setLevel(logging.ERROR)
+
+    server = FakeServer(
+        latency=args.latency,
+        bandwidth=args.bandwidth * 1024**2 or None,
+        failure_rate=args.failure_rate,
+        seed=0,
+    )
+    results: dict[str, Any] = {}
+    with server:
+        suite = Suite(server, args)
+        for name in suite.benchmarks:
+            if args.only and not name.startswith(tuple(args.only)):
+                continue
+            result = results[name] = suite.run(name)
+            print(f"{name:<36s} {result['value']:14,.1f} {result['unit']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "tdclient": version.__version__,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "options": vars(args),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        print(f"change from {args.baseline}:")
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            sys.exit(f"slower by more than {args.max_regression:.0%}: {regressions}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,51 @@
 import datetime
+import importlib
 import time
-from typing import Any
-
-from tdclient import client, connection, errors, version
-
-__version__ = version.__version__
-
-Client = client.Client
-
-
-def connect(*args: Any, **kwargs: Any) -> connection.Connection:
+from typing import TYPE_CHECKING, Any
+
+from tdclient import errors
+
+if TYPE_CHECKING:
+    from tdclient import connection
+    from tdclient.async_client import AsyncClient as AsyncClient
+    from tdclient.client import Client as Client
+    from tdclient.version import __version__ as __version__
+
+# Clients are imported on first access, so that importing the package does not
+# load HTTP, asyncio and the API modules until they are used. The version is
+# read from the package metadata, which is slow as well.
+_LAZY_ATTRIBUTES = {
+    "Client": "tdclient.client",
+    "AsyncClient": "tdclient.async_client",
+    "__version__": "tdclient.version",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is not None:
+        value = getattr(importlib.import_module(module_name), name)
+    elif not name.startswith("_"):
+        # submodules, e.g. `tdclient.api`, are imported on first access too
+        try:
+            value = importlib.import_module(f"{__name__}.{name}")
+        except ModuleNotFoundError as error:
+            if error.name != f"{__name__}.{name}":
+                raise
+            raise AttributeError(
+                f"module {__name__!r} has no attribute {name!r}"
+            ) from None
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+def connect(*args: Any, **kwargs: Any) -> "connection.Connection":
     """Returns a DBAPI compatible connection object
 
     Args:
@@ -18,12 +54,15 @@ def connect(*args: Any, **kwargs: Any) -> connection.Connection:
         result_url (str): result output URL
         priority (str): job priority
         retry_limit (int): job retry limit
-        wait_interval (int): job wait interval to check status
+        wait_interval (int): job wait interval to check status. By default,
+            intervals grow from 0.5 to 10 seconds.
         wait_callback (callable): a callback to be called on every ticks of job wait
 
     Returns:
          :class:`tdclient.connection.Connection`
     """
+    from tdclient import connection
+
     return connection.Connection(*args, **kwargs)
 
 
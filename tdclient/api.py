@@ -3,56 +3,115 @@
 import contextlib
 import csv
 import email.utils
-import gzip
+import functools
 import http.client
 import io
-import json
 import logging
 import os
 import ssl
-import tempfile
+import threading
 import time
 import urllib.parse as urlparse
+import weakref
 from array import array
-from collections.abc import Iterator
-from typing import IO, Any, cast
+from collections.abc import Callable, Generator, Iterable, Iterator
+from typing import IO, TYPE_CHECKING, Any, cast
 
 import msgpack
 import urllib3
+from urllib3.connection import HTTPConnection
 
 from tdclient import errors, version
 from tdclient.bulk_import_api import BulkImportAPI
 from tdclient.connector_api import ConnectorAPI
 from tdclient.database_api import DatabaseAPI
 from tdclient.export_api import ExportAPI
+from tdclient.http_pool import (
+    DEFAULT_MAXSIZE,
+    CountingHTTPConnectionPool,
+    CountingHTTPSConnectionPool,
+    PoolStats,
+    idle_connections,
+    keepalive_socket_options,
+)
 from tdclient.import_api import ImportAPI
-from tdclient.job_api import JobAPI
+from tdclient.instrumentation import (
+    HookList,
+    Hooks,
+    MetricsCollector,
+    RequestInfo,
+    route_template,
+)
+from tdclient.job_api import DEFAULT_JOB_CACHE_SIZE, FinishedJobCache, JobAPI
+from tdclient.json_codec import (
+    STREAM_CHUNK_SIZE,
+    JSONCodec,
+    get_codec,
+    iter_array_items,
+)
+from tdclient.rate_limit import RateLimiter, route_family
 from tdclient.result_api import ResultAPI
+from tdclient.result_cache import ResultCache
+from tdclient.retry import THROTTLED_STATUS, RetryBudget, RetryPolicy
 from tdclient.schedule_api import ScheduleAPI
 from tdclient.server_status_api import ServerStatusAPI
 from tdclient.table_api import TableAPI
-from tdclient.types import BytesOrStream, DataFormat, FileLike, StreamBody
+from tdclient.types import BytesOrStream, DataFormat, FileLike, JSONBackend, StreamBody
 from tdclient.user_api import UserAPI
 from tdclient.util import (
     csv_dict_record_reader,
     csv_text_record_reader,
     normalized_msgpack,
+    read_csv_batches,
     read_csv_records,
     validate_record,
 )
 
-try:
-    import certifi  # type: ignore[reportMissingImports]
-except ImportError:
-    certifi = None
+if TYPE_CHECKING:
+    from tdclient.query_cache import QueryCache
 
 log = logging.getLogger(__name__)
 
+
 APIError = errors.APIError
 AuthError = errors.AuthError
 ForbiddenError = errors.ForbiddenError
 AlreadyExistsError = errors.AlreadyExistsError
 NotFoundError = errors.NotFoundError
+DownloadError = errors.DownloadError
+
+#: errors of an attempt which are retried
+RETRYABLE_ERRORS = (
+    OSError,
+    urllib3.exceptions.TimeoutStateError,
+    urllib3.exceptions.TimeoutError,
+    urllib3.exceptions.PoolError,
+    http.client.IncompleteRead,
+)
+
+
+def is_retryable_status(status: int) -> bool:
+    """Tell whether a response with the status may succeed if retried"""
+    return 500 <= status or status == THROTTLED_STATUS
+
+
+def _body_size(body: StreamBody, headers: dict[str, str] | None) -> int:
+    if headers is not None and "content-length" in headers:
+        return int(headers["content-length"])
+    if isinstance(body, array):
+        return len(body) * body.itemsize
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    return 0
+
+
+def _default_ca_certs() -> str | None:
+    # certifi loads importlib.resources, so it is imported by the first client
+    try:
+        import certifi  # type: ignore[reportMissingImports]
+    except ImportError:
+        return None
+    return certifi.where()
 
 
 class API(
@@ -77,7 +136,30 @@ class API(
         headers (dict): custom HTTP headers.
         retry_post_requests (bool): Specify whether allowing API client to retry POST requests. `False` by default.
         max_cumul_retry_delay (int): maximum retry limit in seconds. 600 seconds by default.
+        retry_policy (:class:`tdclient.retry.RetryPolicy`): policy of retries of GET, POST and DELETE requests.
+            By default, delays start from 5 seconds and double up to `max_cumul_retry_delay`, with a
+            :class:`tdclient.retry.RetryBudget` shared by the requests of this instance.
         http_proxy (str): HTTP proxy setting. if `None` is given, `HTTP_PROXY` will be used if available.
+        rate_limiter (:class:`tdclient.rate_limit.RateLimiter`): limits of the rate and the number of
+            requests in flight by route family. Requests are not limited by default.
+        max_concurrency (int): number of requests expected to be sent at once, e.g. the number of threads
+            downloading a job result. It sizes the connection pool of each host unless `maxsize` is given.
+            8 by default.
+        tcp_keepalive (int): send TCP keep-alive probes on connections idle for this number of seconds,
+            so that pooled connections are not dropped silently. Disabled by default.
+        job_cache_size (int): number of finished jobs whose details are kept to answer `show_job` and
+            `job_status` without a request. 1024 by default. 0 disables it.
+        json_codec (str or :class:`tdclient.json_codec.JSONCodec`): library decoding JSON responses and
+            encoding JSON requests. "auto" by default, which uses `orjson` if it is installed.
+        hooks (list of :class:`tdclient.instrumentation.Hooks`): called on every attempt of a request,
+            retry and closed response, in addition to the collector of :meth:`metrics`.
+        result_cache (str or :class:`tdclient.result_cache.ResultCache`): directory keeping the results
+            of successful jobs, which are then read from disk by the result methods in msgpack format
+            and by `job_result_columns` and `download_job_result`. Disabled by default.
+        query_cache (:class:`tdclient.query_cache.QueryCache`): reuses the job of an identical query issued
+            recently in `query` instead of issuing a new one. Disabled by default.
+        **kwargs: options of `urllib3.PoolManager`, e.g. `timeout`, `maxsize` for the number of connections
+            kept per host, or `block` to wait for a free connection instead of opening one more than `maxsize`.
     """
 
     DEFAULT_ENDPOINT = "https://api.treasuredata.com/"
@@ -92,6 +174,15 @@ class API(
         retry_post_requests: bool = False,
         max_cumul_retry_delay: int = 600,
         http_proxy: str | None = None,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: RateLimiter | None = None,
+        max_concurrency: int | None = None,
+        tcp_keepalive: int | None = None,
+        job_cache_size: int = DEFAULT_JOB_CACHE_SIZE,
+        json_codec: JSONCodec | JSONBackend = "auto",
+        hooks: Iterable[Hooks] | None = None,
+        result_cache: ResultCache | str | None = None,
+        query_cache: "QueryCache | None" = None,
         **kwargs: Any,
     ) -> None:
         headers = {} if headers is None else headers
@@ -117,8 +208,10 @@ class API(
             self._endpoint = self.DEFAULT_ENDPOINT
 
         pool_options = dict(kwargs)
-        if "ca_certs" not in pool_options and certifi:
-            pool_options["ca_certs"] = certifi.where()
+        if "ca_certs" not in pool_options:
+            ca_certs = _default_ca_certs()
+            if ca_certs is not None:
+                pool_options["ca_certs"] = ca_certs
 
         if pool_options.get("ca_certs") is not None:
             pool_options["cert_reqs"] = ssl.CERT_REQUIRED
@@ -126,32 +219,121 @@ class API(
         if "timeout" not in pool_options:
             pool_options["timeout"] = 60
 
+        if "maxsize" not in pool_options:
+            pool_options["maxsize"] = (
+                DEFAULT_MAXSIZE if max_concurrency is None else max(1, max_concurrency)
+            )
+
+        if tcp_keepalive is not None:
+            socket_options = pool_options.get("socket_options")
+            if socket_options is None:
+                socket_options = HTTPConnection.default_socket_options
+            pool_options["socket_options"] = list(
+                socket_options
+            ) + keepalive_socket_options(tcp_keepalive)
+
+        self._pool_stats = PoolStats()
         self.http = self._init_http(
             http_proxy if http_proxy else os.getenv("HTTP_PROXY"), **pool_options
         )
         self._retry_post_requests = retry_post_requests
-        self._max_cumul_retry_delay = max_cumul_retry_delay
+        if retry_policy is None:
+            retry_policy = RetryPolicy(
+                max_cumul_delay=max_cumul_retry_delay, budget=RetryBudget()
+            )
+        self._retry_policy = retry_policy
+        self._rate_limiter = rate_limiter
+        self._max_cumul_retry_delay = retry_policy.max_cumul_delay
+        self._finished_jobs = FinishedJobCache(job_cache_size)
+        self._json = get_codec(json_codec)
+        if isinstance(result_cache, str):
+            result_cache = ResultCache(result_cache)
+        self._result_cache = result_cache
+        self._query_cache = query_cache
+        self._metrics = MetricsCollector()
+        self._hooks = HookList([self._metrics, *(hooks or ())])
+        # attempts of the responses not closed yet, to report their bytes
+        self._transfers: weakref.WeakKeyDictionary[Any, RequestInfo] = (
+            weakref.WeakKeyDictionary()
+        )
+        # rate limiter slots of the responses not closed yet
+        self._slots: weakref.WeakKeyDictionary[Any, Callable[[], None]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._transfers_lock = threading.Lock()
         self._headers = {key.lower(): value for (key, value) in headers.items()}
 
     @property
     def apikey(self) -> str | None:
         return self._apikey
 
+    @property
+    def retry_policy(self) -> RetryPolicy:
+        """the :class:`tdclient.retry.RetryPolicy` of requests"""
+        return self._retry_policy
+
+    @property
+    def json_codec(self) -> JSONCodec:
+        """the :class:`tdclient.json_codec.JSONCodec` of requests and responses"""
+        return self._json
+
     @property
     def endpoint(self) -> str:
         assert self._endpoint is not None  # Always set in __init__
         return self._endpoint
 
+    @property
+    def result_cache(self) -> ResultCache | None:
+        """the :class:`tdclient.result_cache.ResultCache` of job results, or `None`"""
+        return self._result_cache
+
+    @property
+    def query_cache(self) -> "QueryCache | None":
+        """the :class:`tdclient.query_cache.QueryCache` of queries, or `None`"""
+        return self._query_cache
+
+    @property
+    def finished_jobs(self) -> FinishedJobCache:
+        """the :class:`tdclient.job_api.FinishedJobCache` of finished jobs"""
+        return self._finished_jobs
+
+    @property
+    def hooks(self) -> HookList:
+        """the :class:`tdclient.instrumentation.Hooks` called on requests"""
+        return self._hooks
+
+    def metrics(self, reset: bool = False) -> dict[str, dict[str, Any]]:
+        """Return the latencies, bytes, retries and errors of requests so far
+
+        Args:
+            reset (bool): start collecting again from zero
+
+        Returns:
+            dict: metrics by method and route, e.g.
+            "GET /v3/job/status/{job_id}". See
+            :meth:`tdclient.instrumentation.MetricsCollector.snapshot`.
+        """
+        return self._metrics.snapshot(reset)
+
     def _init_http(
         self, http_proxy: str | None = None, **kwargs: Any
     ) -> urllib3.PoolManager | urllib3.ProxyManager:
         if http_proxy is None:
-            return urllib3.PoolManager(**kwargs)
+            http = urllib3.PoolManager(**kwargs)
+        elif http_proxy.startswith("http://"):
+            http = self._init_http_proxy(http_proxy, **kwargs)
         else:
-            if http_proxy.startswith("http://"):
-                return self._init_http_proxy(http_proxy, **kwargs)
-            else:
-                return self._init_http_proxy(f"http://{http_proxy}", **kwargs)
+            http = self._init_http_proxy(f"http://{http_proxy}", **kwargs)
+        # pools count requests and connections for pool_stats()
+        http.pool_classes_by_scheme = {  # type: ignore[assignment]
+            "http": functools.partial(
+                CountingHTTPConnectionPool, stats=self._pool_stats
+            ),
+            "https": functools.partial(
+                CountingHTTPSConnectionPool, stats=self._pool_stats
+            ),
+        }
+        return http
 
     def _init_http_proxy(self, http_proxy: str, **kwargs: Any) -> urllib3.ProxyManager:
         pool_options = dict(kwargs)
@@ -163,6 +345,44 @@ class API(
             pool_options["proxy_headers"] = urllib3.make_headers(proxy_basic_auth=auth)
         return urllib3.ProxyManager(f"{scheme}://{netloc}", **pool_options)
 
+    def pool_stats(self) -> dict[str, int]:
+        """Return statistics of the connection pools
+
+        Counters are cumulative since the API was created, so that the ratio of
+        reused connections can be watched over time.
+
+        Returns:
+            dict: with the following keys:
+
+            - "maxsize": number of connections kept per host
+            - "pools": number of hosts with a pool
+            - "open": number of connections in use or idle in the pools
+            - "in_use": number of connections taken by requests in progress
+            - "idle": number of open connections waiting in the pools
+            - "requests": number of requests sent
+            - "reused": number of requests sent on an already open connection
+            - "new_connections": number of connections opened
+            - "tls_handshakes": number of connections opened with TLS
+            - "discarded": number of connections closed because their pool
+              was full. Raise `max_concurrency` if it keeps growing.
+        """
+        stats = self._pool_stats.as_dict()
+        pools = self.http.pools
+        idle = 0
+        num_pools = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                num_pools += 1
+                idle += idle_connections(pool)
+        return {
+            "maxsize": self.http.connection_pool_kw.get("maxsize", 1),
+            "pools": num_pools,
+            "open": stats["in_use"] + idle,
+            "idle": idle,
+            **stats,
+        }
+
     def get(
         self,
         path: str,
@@ -175,73 +395,24 @@ class API(
         url, headers = self.build_request(path=path, headers=headers, **kwargs)
 
         log.debug(
-            "REST GET call:\n  headers: %s\n  path: %s\n  params: %s",
-            repr(headers),
-            repr(path),
-            repr(params),
+            "REST GET call:\n  headers: %r\n  path: %r\n  params: %r",
+            headers,
+            path,
+            params,
         )
 
-        # up to 7 retries with exponential (base 2) back-off starting at 'retry_delay'
-        retry_delay = 5
-        cumul_retry_delay = 0
-
         # for both exceptions and 500+ errors retrying is enabled by default.
-        # The total number of retries cumulatively should not exceed 10 minutes / 600 seconds
-        response = None
-        while True:
-            try:
-                response = self.send_request(
-                    "GET",
-                    url,
-                    fields=params,
-                    headers=headers,
-                    decode_content=True,
-                    preload_content=False,
-                )
-                # retry if the HTTP error code is 500 or higher and we did not run out of retrying attempts
-                if response.status < 500:
-                    break
-                else:
-                    log.warning(
-                        "Error %d: %s. Retrying after %d seconds... (cumulative: %d/%d)",
-                        response.status,
-                        response.data,
-                        retry_delay,
-                        cumul_retry_delay,
-                        self._max_cumul_retry_delay,
-                    )
-            except (
-                OSError,
-                urllib3.exceptions.TimeoutStateError,
-                urllib3.exceptions.TimeoutError,
-                urllib3.exceptions.PoolError,
-                http.client.IncompleteRead,
-                TimeoutError,
-            ):
-                pass
-
-            if cumul_retry_delay <= self._max_cumul_retry_delay:
-                log.warning(
-                    "Retrying after %d seconds... (cumulative: %d/%d)",
-                    retry_delay,
-                    cumul_retry_delay,
-                    self._max_cumul_retry_delay,
-                )
-                time.sleep(retry_delay)
-                cumul_retry_delay += retry_delay
-                retry_delay *= 2
-            else:
-                raise APIError(
-                    f"Retrying stopped after {self._max_cumul_retry_delay} seconds. (cumulative: {cumul_retry_delay}/{self._max_cumul_retry_delay})"
-                )
+        response = self._send_with_retry(
+            "GET", url, True, fields=params, headers=headers, route=route_template(path)
+        )
 
         log.debug(
-            "REST GET response:\n  headers: %s\n  status: %d\n  body: <omitted>",
-            repr(dict(response.getheaders())),
+            "REST GET response:\n  headers: %r\n  status: %d\n  body: <omitted>",
+            response.headers,
             response.status,
         )
 
-        return contextlib.closing(response)
+        return self._closing(response)
 
     def post(
         self,
@@ -254,19 +425,14 @@ class API(
         url, headers = self.build_request(path=path, headers=headers, **kwargs)
 
         log.debug(
-            "REST POST call:\n  headers: %s\n  path: %s\n  params: %s",
-            repr(headers),
-            repr(path),
-            repr(params),
+            "REST POST call:\n  headers: %r\n  path: %r\n  params: %r",
+            headers,
+            path,
+            params,
         )
 
-        # up to 7 retries with exponential (base 2) back-off starting at 'retry_delay'
-        retry_delay = 5
-        cumul_retry_delay = 0
-
         # for both exceptions and 500+ errors retrying can be enabled by initialization
-        # parameter 'retry_post_requests'. The total number of retries cumulatively
-        # should not exceed 10 minutes / 600 seconds
+        # parameter 'retry_post_requests'.
 
         # use `params` as request parameter if it is a `dict`.
         # otherwise, use it as byte string of request body.
@@ -276,68 +442,23 @@ class API(
         else:
             body = params
 
-        response = None
-        while True:
-            try:
-                response = self.send_request(
-                    "POST",
-                    url,
-                    fields=fields,
-                    body=body,
-                    headers=headers,
-                    decode_content=True,
-                    preload_content=False,
-                )
-                # if the HTTP error code is 500 or higher and the user requested retrying
-                # on post request, attempt a retry
-                if response.status < 500:
-                    break
-                else:
-                    if not self._retry_post_requests:
-                        raise APIError(
-                            "Retrying stopped by retry_post_requests == False"
-                        )
-                    log.warning(
-                        "Error %d: %s. Retrying after %d seconds... (cumulative: %d/%d)",
-                        response.status,
-                        response.data,
-                        retry_delay,
-                        cumul_retry_delay,
-                        self._max_cumul_retry_delay,
-                    )
-            except (
-                OSError,
-                urllib3.exceptions.TimeoutStateError,
-                urllib3.exceptions.TimeoutError,
-                urllib3.exceptions.PoolError,
-            ):
-                if not self._retry_post_requests:
-                    raise APIError(
-                        "Retrying stopped by retry_post_requests == False"
-                    ) from None
-
-            if cumul_retry_delay <= self._max_cumul_retry_delay:
-                log.warning(
-                    "Retrying after %d seconds... (cumulative: %d/%d)",
-                    retry_delay,
-                    cumul_retry_delay,
-                    self._max_cumul_retry_delay,
-                )
-                time.sleep(retry_delay)
-                cumul_retry_delay += retry_delay
-                retry_delay *= 2
-            else:
-                raise APIError(
-                    f"Retrying stopped after {self._max_cumul_retry_delay} seconds. (cumulative: {cumul_retry_delay}/{self._max_cumul_retry_delay})"
-                )
+        response = self._send_with_retry(
+            "POST",
+            url,
+            self._retry_post_requests,
+            fields=fields,
+            body=body,
+            headers=headers,
+            route=route_template(path),
+        )
 
         log.debug(
-            "REST POST response:\n  headers: %s\n  status: %d\n  body: <omitted>",
-            repr(dict(response.getheaders())),
+            "REST POST response:\n  headers: %r\n  status: %d\n  body: <omitted>",
+            response.headers,
             response.status,
         )
 
-        return contextlib.closing(response)
+        return self._closing(response)
 
     def put(
         self,
@@ -354,9 +475,9 @@ class API(
         url, headers = self.build_request(path=path, headers=headers, **kwargs)
 
         log.debug(
-            "REST PUT call:\n  headers: %s\n  path: %s\n  body: <omitted>",
-            repr(headers),
-            repr(path),
+            "REST PUT call:\n  headers: %r\n  path: %r\n  body: <omitted>",
+            headers,
+            path,
         )
 
         stream: array[int] | IO[bytes]
@@ -382,35 +503,24 @@ class API(
             byte_data = cast("bytes | bytearray", bytes_or_stream)
             stream = array("b", byte_data)
 
-        response = None
-        try:
-            response = self.send_request(
-                "PUT",
-                url,
-                body=stream,
-                headers=headers,
-                decode_content=True,
-                preload_content=False,
-            )
-            if response.status < 500:
-                pass
-            else:
-                raise APIError("Error %d: %s", response.status, response.data)
-        except (
-            OSError,
-            urllib3.exceptions.TimeoutStateError,
-            urllib3.exceptions.TimeoutError,
-            urllib3.exceptions.PoolError,
-        ):
-            raise APIError(f"Error: {repr(response)}") from None
+        # 500+ errors and exceptions are retried unless the body is a file,
+        # which cannot be sent again.
+        response = self._send_with_retry(
+            "PUT",
+            url,
+            True,
+            body=stream,
+            headers=headers,
+            route=route_template(path),
+        )
 
         log.debug(
-            "REST PUT response:\n  headers: %s\n  status: %d\n  body: <omitted>",
-            repr(dict(response.getheaders())),
+            "REST PUT response:\n  headers: %r\n  status: %d\n  body: <omitted>",
+            response.headers,
             response.status,
         )
 
-        return contextlib.closing(response)
+        return self._closing(response)
 
     def delete(
         self,
@@ -423,71 +533,170 @@ class API(
         url, headers = self.build_request(path=path, headers=headers, **kwargs)
 
         log.debug(
-            "REST DELETE call:\n  headers: %s\n  path: %s\n  params: %s",
-            repr(headers),
-            repr(path),
-            repr(params),
+            "REST DELETE call:\n  headers: %r\n  path: %r\n  params: %r",
+            headers,
+            path,
+            params,
         )
 
-        # up to 7 retries with exponential (base 2) back-off starting at 'retry_delay'
-        retry_delay = 5
-        cumul_retry_delay = 0
-
         # for both exceptions and 500+ errors retrying is enabled by default.
-        # The total number of retries cumulatively should not exceed 10 minutes / 600 seconds
-        response = None
+        response = self._send_with_retry(
+            "DELETE",
+            url,
+            True,
+            fields=params,
+            headers=headers,
+            route=route_template(path),
+        )
+
+        log.debug(
+            "REST DELETE response:\n  headers: %r\n  status: %d\n  body: <omitted>",
+            response.headers,
+            response.status,
+        )
+
+        return self._closing(response)
+
+    def _send_with_retry(
+        self,
+        method: str,
+        url: str,
+        retry: bool,
+        fields: dict[str, Any] | None = None,
+        body: StreamBody = None,
+        headers: dict[str, str] | None = None,
+        route: str | None = None,
+    ) -> urllib3.BaseHTTPResponse:
+        """Send a request, retrying errors and 5xx or 429 responses by the retry policy"""
+        steps = self.retry_steps(
+            method, url, retry, resendable=not hasattr(body, "read"), route=route
+        )
+        value: Any = None
+        error: Exception | None = None
         while True:
             try:
-                response = self.send_request(
-                    "DELETE",
-                    url,
-                    fields=params,
-                    headers=headers,
-                    decode_content=True,
-                    preload_content=False,
-                )
-                # retry if the HTTP error code is 500 or higher and we did not run out of retrying attempts
-                if response.status < 500:
-                    break
+                step, arg = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            value = error = None
+            try:
+                if step == "send":
+                    value = self.send_request(
+                        method,
+                        url,
+                        fields=fields,
+                        body=body,
+                        headers=headers,
+                        route=route,
+                        decode_content=True,
+                        preload_content=False,
+                    )
+                elif step == "discard":
+                    value = self.discard_response(arg)
                 else:
-                    log.warning(
-                        "Error %d: %s. Retrying after %d seconds... (cumulative: %d/%d)",
-                        response.status,
-                        response.data,
-                        retry_delay,
-                        cumul_retry_delay,
-                        self._max_cumul_retry_delay,
+                    self._retry_policy.clock.sleep(arg)
+            except Exception as e:
+                error = e
+
+    def retry_steps(
+        self,
+        method: str,
+        url: str,
+        retry: bool,
+        resendable: bool = True,
+        route: str | None = None,
+    ) -> Generator[tuple[str, Any], Any, urllib3.BaseHTTPResponse]:
+        """Steps of a request retried by the retry policy, without their I/O
+
+        The loop is shared by :class:`API` and
+        :class:`tdclient.async_api.AsyncAPI`, which perform the steps yielded
+        as ``(step, argument)`` and send back their results:
+
+        - ``("send", None)``: send an attempt and send back its response
+        - ``("discard", response)``: read the body of a response which is not
+          returned, finish it and send back the body
+        - ``("sleep", delay)``: wait for `delay` seconds before a retry
+
+        Errors of the steps are thrown into the generator.
+
+        Args:
+            method (str): HTTP method
+            url (str): URL of the request
+            retry (bool): whether errors and 5xx responses may be retried
+            resendable (bool, optional): whether the body can be sent again.
+                Requests whose body is a stream are never retried.
+            route (str, optional): template of the route of the request
+
+        Returns:
+            the response to return, by :exc:`StopIteration`
+
+        Raises:
+            :class:`tdclient.errors.APIError`: if the request failed and
+                cannot be retried any more
+        """
+        policy = self._retry_policy
+        state = policy.start(method, url, route)
+        while True:
+            response = None
+            status = None
+            error = None
+            try:
+                response = yield ("send", None)
+                status = response.status
+                if not is_retryable_status(status):
+                    return response
+                if not (resendable and policy.should_retry(retry, status)):
+                    if status == THROTTLED_STATUS:
+                        return response
+                    data = yield ("discard", response)
+                    raise APIError(
+                        self._no_retry_message(method, status, repr(data)),
+                        status=status,
                     )
-            except (
-                OSError,
-                urllib3.exceptions.TimeoutStateError,
-                urllib3.exceptions.TimeoutError,
-                urllib3.exceptions.PoolError,
-            ):
-                pass
-
-            if cumul_retry_delay <= self._max_cumul_retry_delay:
-                log.warning(
-                    "Retrying after %d seconds... (cumulative: %d/%d)",
-                    retry_delay,
-                    cumul_retry_delay,
-                    self._max_cumul_retry_delay,
-                )
-                time.sleep(retry_delay)
-                cumul_retry_delay += retry_delay
-                retry_delay *= 2
-            else:
-                raise APIError(
-                    f"Retrying stopped after {self._max_cumul_retry_delay} seconds. (cumulative: {cumul_retry_delay}/{self._max_cumul_retry_delay})"
-                )
+                data = yield ("discard", response)
+                log.warning("Error %d: %s", status, data)
+            except RETRYABLE_ERRORS as e:
+                if not (resendable and policy.should_retry(retry, None)):
+                    raise APIError(self._no_retry_message(method, None, repr(e))) from e
+                error = e
+
+            delay = state.next_delay(
+                status,
+                None if response is None else response.headers,
+                error,
+            )
+            if state.last_attempt is not None:
+                self._hooks.on_retry(state.last_attempt)
+            log.warning(
+                "Retrying after %g seconds... (cumulative: %g/%g)",
+                delay,
+                state.cumul_delay - delay,
+                policy.max_cumul_delay,
+            )
+            yield ("sleep", delay)
 
-        log.debug(
-            "REST DELETE response:\n  headers: %s\n  status: %d\n  body: <omitted>",
-            repr(dict(response.getheaders())),
-            response.status,
-        )
+    def discard_response(self, response: urllib3.BaseHTTPResponse) -> bytes:
+        """Read the body of a response which is not returned to the caller
 
-        return contextlib.closing(response)
+        The response is finished by :meth:`finish_response` even if reading
+        fails.
+
+        Returns:
+            bytes: the body
+        """
+        try:
+            return response.data
+        finally:
+            response.release_conn()
+            self.finish_response(response)
+
+    @staticmethod
+    def _no_retry_message(method: str, status: int | None, detail: str) -> str:
+        if method == "POST":
+            return "Retrying stopped by retry_post_requests == False"
+        if status is not None:
+            return f"Error {status}: {detail}"
+        return f"Error: {detail}"
 
     def build_request(
         self,
@@ -534,14 +743,94 @@ class API(
         fields: dict[str, Any] | None = None,
         body: StreamBody = None,
         headers: dict[str, str] | None = None,
+        route: str | None = None,
         **kwargs: Any,
     ) -> urllib3.BaseHTTPResponse:
-        if body is None:
-            return self.http.request(
-                method, url, fields=fields, headers=headers, **kwargs
-            )
-
-        return self.http.urlopen(method, url, body=body, headers=headers, **kwargs)
+        """Send an attempt of a request, calling the hooks around it
+
+        Args:
+            route (str, optional): template of the route of the request in
+                metrics. It is guessed from `url` by default.
+            **kwargs: options of `urllib3.PoolManager.request`
+        """
+        if route is None:
+            route = route_template(url)
+        if self._rate_limiter is None:
+            return self._send(method, url, fields, body, headers, route, **kwargs)
+        release = self._rate_limiter.acquire(route_family(method, url, self._endpoint))
+        try:
+            response = self._send(method, url, fields, body, headers, route, **kwargs)
+        except BaseException:
+            release()
+            raise
+        # the request stays in flight until its body has been read, so that
+        # limits apply to downloads and uploads; the finalizer frees the slot
+        # of a response dropped without calling `finish_response`
+        with self._transfers_lock:
+            self._slots[response] = release
+        weakref.finalize(response, release)
+        return response
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        fields: dict[str, Any] | None,
+        body: StreamBody,
+        headers: dict[str, str] | None,
+        route: str,
+        **kwargs: Any,
+    ) -> urllib3.BaseHTTPResponse:
+        # the time waited for the rate limiter is not part of the latency
+        request = RequestInfo(method, url, route, _body_size(body, headers))
+        self._hooks.on_request_start(request)
+        try:
+            if body is None:
+                response = self.http.request(
+                    method, url, fields=fields, headers=headers, **kwargs
+                )
+            else:
+                response = self.http.urlopen(
+                    method, url, body=body, headers=headers, **kwargs
+                )
+        except BaseException as error:
+            request.elapsed = time.monotonic() - request.started_at
+            request.error = error
+            self._hooks.on_response(request)
+            raise
+        request.elapsed = time.monotonic() - request.started_at
+        request.status = response.status
+        self._hooks.on_response(request)
+        with self._transfers_lock:
+            self._transfers[response] = request
+        return response
+
+    def finish_response(self, response: urllib3.BaseHTTPResponse) -> None:
+        """Report the bytes transferred by a response once it is closed, and
+        free its slot of the rate limiter
+
+        It is called when the context managers returned by :meth:`get`,
+        :meth:`post`, :meth:`put` and :meth:`delete` exit. Callers of
+        :meth:`send_request` call it once they closed the response.
+        """
+        with self._transfers_lock:
+            request = self._transfers.pop(response, None)
+            release = self._slots.pop(response, None)
+        if release is not None:
+            release()
+        if request is not None:
+            received = int(response.tell())
+            self._hooks.on_bytes_transferred(request, request.bytes_sent, received)
+
+    @contextlib.contextmanager
+    def _closing(
+        self, response: urllib3.BaseHTTPResponse
+    ) -> Generator[urllib3.BaseHTTPResponse]:
+        try:
+            yield response
+        finally:
+            response.close()
+            self.finish_response(response)
 
     def raise_error(
         self, msg: str, res: urllib3.BaseHTTPResponse, body: bytes | str
@@ -549,20 +838,20 @@ class API(
         status_code = res.status
         s = body if isinstance(body, str) else body.decode("utf-8")
         if status_code == 404:
-            raise errors.NotFoundError(f"{msg}: {s}")
+            raise errors.NotFoundError(f"{msg}: {s}", status=status_code)
         elif status_code == 409:
-            raise errors.AlreadyExistsError(f"{msg}: {s}")
+            raise errors.AlreadyExistsError(f"{msg}: {s}", status=status_code)
         elif status_code == 401:
-            raise errors.AuthError(f"{msg}: {s}")
+            raise errors.AuthError(f"{msg}: {s}", status=status_code)
         elif status_code == 403:
-            raise errors.ForbiddenError(f"{msg}: {s}")
+            raise errors.ForbiddenError(f"{msg}: {s}", status=status_code)
         else:
-            raise errors.APIError(f"{status_code}: {msg}: {s}")
+            raise errors.APIError(f"{status_code}: {msg}: {s}", status=status_code)
 
     def checked_json(self, body: bytes, required: list[str]) -> dict[str, Any]:
         js = None
         try:
-            js = json.loads(body.decode("utf-8"))
+            js = self._json.loads(body)
         except ValueError as error:
             raise APIError(f"Unexpected API response: {error}: {repr(body)}") from error
         js = dict(js)
@@ -571,14 +860,47 @@ class API(
             raise APIError(f"Unexpected API response: {repr(missing)}: {repr(body)}")
         return js
 
+    def checked_json_items(
+        self, res: urllib3.BaseHTTPResponse, key: str | None
+    ) -> Iterator[Any]:
+        """Iterate over the items of a JSON array in a response as they arrive
+
+        Args:
+            res: a response whose body has not been read
+            key (str): name of the array in the top-level object of the body,
+                or `None` if the body is the array
+
+        Raises:
+            :class:`tdclient.errors.APIError`: if the body is not valid or does
+                not have `key`
+        """
+        try:
+            yield from iter_array_items(res.stream(STREAM_CHUNK_SIZE), key)
+        except ValueError as error:
+            raise APIError(f"Unexpected API response: {error}") from error
+
     def close(self) -> None:
         # urllib3 doesn't allow to close all connections immediately.
         # all connections in pool will be closed eventually during gc.
         self.http.clear()
 
-    def _prepare_file(
+    def prepare_file(
         self, file_like: FileLike, fmt: DataFormat, **kwargs: Any
     ) -> IO[bytes]:
+        """Convert a file into a temporary file in msgpack.gz format to upload
+
+        Args:
+            file_like (str or file-like): path or file-like object of the data
+            fmt (str): format of the data, e.g. "csv" or "json.gz"
+            **kwargs: passed to the reader of the format
+
+        Returns:
+            a temporary file at its beginning, which should be closed
+        """
+        # loaded by the first import of a file rather than with the package
+        import gzip
+        import tempfile
+
         fp = tempfile.TemporaryFile()
         with contextlib.closing(gzip.GzipFile(mode="wb", fileobj=fp)) as gz:
             packer = msgpack.Packer()
@@ -593,7 +915,12 @@ class API(
         fp.seek(0)
         return fp
 
+    # kept for callers of the former private name
+    _prepare_file = prepare_file
+
     def _read_file(self, file_like: FileLike, fmt: DataFormat, **kwargs: Any) -> Any:
+        import gzip
+
         compressed = fmt.endswith(".gz")
         fmt_str = str(fmt)
         if compressed:
@@ -630,7 +957,7 @@ class API(
     ) -> Iterator[dict[str, Any]]:
         # current impl doesn't tolerate any JSON parse error
         for s in file_like:
-            record = json.loads(s.decode("utf-8"))
+            record = self._json.loads(s)
             validate_record(record)
             yield record
 
@@ -642,8 +969,16 @@ class API(
         encoding: str = "utf-8",
         dtypes: dict[str, Any] | None = None,
         converters: dict[str, Any] | None = None,
+        compiled: bool = False,
+        sample_size: int = 1000,
         **kwargs: Any,
     ) -> Iterator[dict[str, Any]]:
+        if compiled:
+            rows = csv.reader(io.TextIOWrapper(file_like, encoding), dialect=dialect)
+            if columns is None:
+                columns = next(rows, cast("list[str]", []))
+            batches = read_csv_batches(rows, columns, dtypes, converters, sample_size)
+            return (record for batch in batches for record in batch)
         if columns is None:
             reader = csv_dict_record_reader(file_like, encoding, dialect)  # type: ignore[arg-type]
         else:
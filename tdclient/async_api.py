@@ -0,0 +1,980 @@
+#!/usr/bin/env python
+
+import asyncio
+import contextlib
+import functools
+import itertools
+import logging
+import os
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Literal, TypeVar
+
+import msgpack
+import urllib3
+
+from tdclient import errors
+from tdclient.api import API
+from tdclient.bulk_import_api import BulkImportAPI, parse_error_records
+from tdclient.instrumentation import route_template
+from tdclient.job_api import (
+    JobAPI,
+    JobRecord,
+    build_query_params,
+    parse_job_records,
+)
+from tdclient.json_codec import LineBuffer
+from tdclient.result_download import gunzip_chunks, read_blocks, unpack_chunks
+from tdclient.table_api import parse_tables
+from tdclient.types import (
+    BulkImportParams,
+    BytesOrStream,
+    ColumnOutput,
+    DataFormat,
+    FileLike,
+    Priority,
+    StreamBody,
+)
+from tdclient.util import create_url
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+#: number of rows of a cached job result decoded at once on the executor
+RESULT_BATCH_SIZE = 10000
+
+#: number of items of a listing read at once on the executor
+LIST_BATCH_SIZE = 100
+
+APIError = errors.APIError
+
+
+class AsyncResponse:
+    """Asynchronous view of a :class:`urllib3.BaseHTTPResponse`
+
+    Reading the body is done on the executor of :class:`AsyncAPI` so that
+    the event loop is never blocked by socket reads.
+    """
+
+    def __init__(self, api: "AsyncAPI", response: urllib3.BaseHTTPResponse) -> None:
+        self._api = api
+        self._response = response
+
+    @property
+    def response(self) -> urllib3.BaseHTTPResponse:
+        """the underlying :class:`urllib3.BaseHTTPResponse`"""
+        return self._response
+
+    @property
+    def status(self) -> int:
+        return self._response.status
+
+    @property
+    def headers(self) -> Any:
+        return self._response.headers
+
+    def getheaders(self) -> Any:
+        return self._response.headers
+
+    async def read(self) -> bytes:
+        """Read the whole response body"""
+        return await self._api.run_in_executor(self._response.read)
+
+    async def stream(self, amt: int = 2**16) -> AsyncIterator[bytes]:
+        """Yield the response body in chunks of at most `amt` bytes"""
+        chunks: Iterator[bytes] = self._response.stream(amt)
+
+        def next_chunk() -> bytes | None:
+            return next(chunks, None)
+
+        while True:
+            chunk = await self._api.run_in_executor(next_chunk)
+            if chunk is None:
+                break
+            yield chunk
+
+    def close(self) -> None:
+        self._response.release_conn()
+        self._response.close()
+        self._api.api.finish_response(self._response)
+
+
+class AsyncAPI:
+    """Asynchronous counterpart of :class:`tdclient.api.API`
+
+    Each HTTP exchange is executed on a dedicated thread pool, while retry
+    back-off and job polling are awaited on the event loop, so that a large
+    number of concurrent requests don't hold threads while waiting.
+
+    Request building, the retry loop, error handling and response parsing are
+    shared with :class:`tdclient.api.API`. Methods which stream listings or
+    download results in ranges (the ``*_each`` listings, :meth:`iter_jobs`,
+    :meth:`job_result_columns` and :meth:`download_job_result`) run the
+    methods of :class:`tdclient.api.API` on the executor, so their retries
+    wait on a thread of the executor instead of the event loop.
+
+    Args:
+        apikey (str): the API key of Treasure Data Service. If `None` is given, `TD_API_KEY` will be used if available.
+        retry_post_requests (bool): Specify whether allowing API client to retry POST requests. `False` by default.
+        max_cumul_retry_delay (int): maximum retry limit in seconds. 600 seconds by default.
+        max_workers (int): maximum number of threads performing HTTP exchanges. 16 by default.
+            It also sizes the connection pools unless `max_concurrency` or `maxsize` is given.
+        **kwargs: other arguments accepted by :class:`tdclient.api.API`
+    """
+
+    def __init__(
+        self,
+        apikey: str | None = None,
+        retry_post_requests: bool = False,
+        max_cumul_retry_delay: int = 600,
+        max_workers: int = 16,
+        **kwargs: Any,
+    ) -> None:
+        kwargs.setdefault("max_concurrency", max_workers)
+        self._api = API(
+            apikey,
+            retry_post_requests=retry_post_requests,
+            max_cumul_retry_delay=max_cumul_retry_delay,
+            **kwargs,
+        )
+        self._retry_post_requests = retry_post_requests
+        self._max_cumul_retry_delay = self._api.retry_policy.max_cumul_delay
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tdclient-async"
+        )
+
+    async def __aenter__(self) -> "AsyncAPI":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def api(self) -> API:
+        """the underlying :class:`tdclient.api.API`"""
+        return self._api
+
+    @property
+    def apikey(self) -> str | None:
+        return self._api.apikey
+
+    @property
+    def endpoint(self) -> str:
+        return self._api.endpoint
+
+    def metrics(self, reset: bool = False) -> dict[str, dict[str, Any]]:
+        """Return the metrics of requests. See :meth:`tdclient.api.API.metrics`"""
+        return self._api.metrics(reset)
+
+    async def run_in_executor(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a blocking callable on the executor of this instance"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args)
+        )
+
+    async def iterate_in_executor(
+        self, items: Iterator[T], batch_size: int
+    ) -> AsyncIterator[T]:
+        """Yield the items of a blocking iterator, read in batches on the executor
+
+        The iterator is closed when the iteration ends, or is stopped early.
+        """
+        try:
+            while True:
+                batch = await self.run_in_executor(
+                    lambda: list(itertools.islice(items, batch_size))
+                )
+                if not batch:
+                    break
+                for item in batch:
+                    yield item
+        finally:
+            close = getattr(items, "close", None)
+            if callable(close):
+                close()
+
+    async def send_request(
+        self,
+        method: str,
+        url: str,
+        fields: dict[str, Any] | None = None,
+        body: StreamBody = None,
+        headers: dict[str, str] | None = None,
+        route: str | None = None,
+        **kwargs: Any,
+    ) -> urllib3.BaseHTTPResponse:
+        return await self.run_in_executor(
+            functools.partial(
+                self._api.send_request,
+                method,
+                url,
+                fields=fields,
+                body=body,
+                headers=headers,
+                route=route,
+                **kwargs,
+            )
+        )
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        retry: bool,
+        fields: dict[str, Any] | None = None,
+        body: StreamBody = None,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> AsyncResponse:
+        url, headers = self._api.build_request(path=path, headers=headers, **kwargs)
+        route = route_template(path)
+
+        log.debug(
+            "REST %s call:\n  headers: %r\n  path: %r\n  params: %r",
+            method,
+            headers,
+            path,
+            fields,
+        )
+
+        # the retry loop of `API`, with delays awaited on the event loop
+        steps = self._api.retry_steps(
+            method, url, retry, resendable=not hasattr(body, "read"), route=route
+        )
+        value: Any = None
+        error: Exception | None = None
+        while True:
+            try:
+                step, arg = steps.send(value) if error is None else steps.throw(error)
+            except StopIteration as stop:
+                response = stop.value
+                break
+            value = error = None
+            try:
+                if step == "send":
+                    value = await self.send_request(
+                        method,
+                        url,
+                        fields=fields,
+                        body=body,
+                        headers=headers,
+                        route=route,
+                        decode_content=True,
+                        preload_content=False,
+                    )
+                elif step == "discard":
+                    value = await self.run_in_executor(self._api.discard_response, arg)
+                else:
+                    await asyncio.sleep(arg)
+            except Exception as e:
+                error = e
+
+        log.debug(
+            "REST %s response:\n  headers: %r\n  status: %d\n  body: <omitted>",
+            method,
+            response.headers,
+            response.status,
+        )
+        return AsyncResponse(self, response)
+
+    @contextlib.asynccontextmanager
+    async def get(
+        self,
+        path: str,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[AsyncResponse]:
+        headers = {} if headers is None else dict(headers)
+        headers["accept-encoding"] = "deflate, gzip"
+        res = await self._request(
+            "GET", path, True, fields=params, headers=headers, **kwargs
+        )
+        try:
+            yield res
+        finally:
+            res.close()
+
+    @contextlib.asynccontextmanager
+    async def post(
+        self,
+        path: str,
+        params: dict[str, Any] | bytes | None = None,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[AsyncResponse]:
+        # use `params` as request parameter if it is a `dict`.
+        # otherwise, use it as byte string of request body.
+        fields = params if isinstance(params, dict) else None
+        body = None if isinstance(params, dict) else params
+        res = await self._request(
+            "POST",
+            path,
+            self._retry_post_requests,
+            fields=fields,
+            body=body,
+            headers=headers,
+            **kwargs,
+        )
+        try:
+            yield res
+        finally:
+            res.close()
+
+    @contextlib.asynccontextmanager
+    async def put(
+        self,
+        path: str,
+        bytes_or_stream: BytesOrStream,
+        size: int,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[AsyncResponse]:
+        headers = {} if headers is None else dict(headers)
+        headers["content-length"] = str(size)
+        if "content-type" not in headers:
+            headers["content-type"] = "application/octet-stream"
+        if isinstance(bytes_or_stream, bytearray):
+            bytes_or_stream = bytes(bytes_or_stream)
+        res = await self._request(
+            "PUT", path, True, body=bytes_or_stream, headers=headers, **kwargs
+        )
+        try:
+            yield res
+        finally:
+            res.close()
+
+    @contextlib.asynccontextmanager
+    async def delete(
+        self,
+        path: str,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[AsyncResponse]:
+        res = await self._request(
+            "DELETE", path, True, fields=params, headers=headers, **kwargs
+        )
+        try:
+            yield res
+        finally:
+            res.close()
+
+    def raise_error(self, msg: str, res: AsyncResponse, body: bytes | str) -> None:
+        self._api.raise_error(msg, res.response, body)
+
+    def checked_json(self, body: bytes, required: list[str]) -> dict[str, Any]:
+        return self._api.checked_json(body, required)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self._api.close()
+
+    # Job API
+
+    async def list_jobs(
+        self,
+        _from: int = 0,
+        to: int | None = None,
+        status: str | None = None,
+        conditions: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Show the list of Jobs. See :meth:`tdclient.job_api.JobAPI.list_jobs`."""
+        records = await self.list_job_records(_from, to, status, conditions)
+        return [dict(record) for record in records]
+
+    async def list_job_records(
+        self,
+        _from: int = 0,
+        to: int | None = None,
+        status: str | None = None,
+        conditions: dict[str, Any] | None = None,
+    ) -> list[JobRecord]:
+        """Show the list of Jobs as read-only mappings.
+        See :meth:`tdclient.job_api.JobAPI.list_job_records`.
+        """
+        params: dict[str, Any] = {}
+        params["from"] = str(_from)
+        if to is not None:
+            params["to"] = str(to)
+        if status is not None:
+            params["status"] = str(status)
+        if conditions is not None:
+            params.update(conditions)
+        async with self.get("/v3/job/list", params) as res:
+            code, body = res.status, await res.read()
+            if code != 200:
+                self.raise_error("List jobs failed", res, body)
+            js = self.checked_json(body, ["jobs"])
+            return parse_job_records(js)
+
+    async def list_jobs_each(
+        self,
+        _from: int = 0,
+        to: int | None = None,
+        status: str | None = None,
+        conditions: dict[str, Any] | None = None,
+    ) -> AsyncIterator[JobRecord]:
+        """Iterate over a list of Jobs as they are received.
+        See :meth:`tdclient.job_api.JobAPI.list_jobs_each`.
+        """
+        records = self._api.list_jobs_each(_from, to, status, conditions)
+        async for record in self.iterate_in_executor(records, LIST_BATCH_SIZE):
+            yield record
+
+    async def iter_jobs(
+        self,
+        status: str | None = None,
+        page_size: int = 100,
+        prefetch: int = 2,
+        stop: Callable[[JobRecord], bool] | None = None,
+        conditions: dict[str, Any] | None = None,
+    ) -> AsyncIterator[JobRecord]:
+        """Iterate over Jobs from the newest while prefetching pages.
+        See :meth:`tdclient.job_api.JobAPI.iter_jobs`.
+        """
+        records = self._api.iter_jobs(
+            status=status,
+            page_size=page_size,
+            prefetch=prefetch,
+            stop=stop,
+            conditions=conditions,
+        )
+        async for record in self.iterate_in_executor(records, page_size):
+            yield record
+
+    async def show_job(self, job_id: str) -> dict[str, Any]:
+        """Return detailed information of a Job. See :meth:`tdclient.job_api.JobAPI.show_job`."""
+        finished_jobs = self._api.finished_jobs
+        cached = finished_jobs.show(job_id)
+        if cached is not None:
+            return cached
+        async with self.get(create_url("/v3/job/show/{job_id}", job_id=job_id)) as res:
+            code, body = res.status, await res.read()
+            if code != 200:
+                self.raise_error("Show job failed", res, body)
+            js = self.checked_json(body, ["status"])
+            return finished_jobs.parse(js, job_id)
+
+    async def job_status(self, job_id: str) -> str:
+        """Show job status. See :meth:`tdclient.job_api.JobAPI.job_status`."""
+        cached = self._api.finished_jobs.status(job_id)
+        if cached is not None:
+            return cached
+        async with self.get(
+            create_url("/v3/job/status/{job_id}", job_id=job_id)
+        ) as res:
+            code, body = res.status, await res.read()
+            if code != 200:
+                self.raise_error("Get job status failed", res, body)
+            js = self.checked_json(body, ["status"])
+            return js["status"]
+
+    async def job_result(self, job_id: str) -> list[dict[str, Any]]:
+        """Return the job result. See :meth:`tdclient.job_api.JobAPI.job_result`."""
+        return [row async for row in self.job_result_format_each(job_id, "msgpack")]
+
+    async def job_result_each(self, job_id: str) -> AsyncIterator[dict[str, Any]]:
+        """Yield a row of the job result. See :meth:`tdclient.job_api.JobAPI.job_result_each`."""
+        async for row in self.job_result_format_each(job_id, "msgpack"):
+            yield row
+
+    async def job_result_format(
+        self, job_id: str, format: str, header: bool = False
+    ) -> list[dict[str, Any]]:
+        """Return the job result with specified format.
+        See :meth:`tdclient.job_api.JobAPI.job_result_format`.
+        """
+        return [
+            row async for row in self.job_result_format_each(job_id, format, header)
+        ]
+
+    async def job_result_format_each(
+        self, job_id: str, format: str, header: bool = False
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield a row of the job result with specified format.
+        See :meth:`tdclient.job_api.JobAPI.job_result_format_each`.
+
+        Args:
+            job_id (str): job ID
+            format (str): Output format of the job result information.
+                "json" or "msgpack"
+            header (bool): Include Header info or not
+        """
+        if format != "msgpack":
+            format = "json"
+
+        if format == "msgpack" and self._api.result_cache is not None:
+            # the cache downloads and reads files with blocking calls
+            cached = await self.run_in_executor(self._api.open_cached_result, job_id)
+            if cached is not None:
+                with cached:
+                    rows = unpack_chunks(gunzip_chunks(read_blocks(cached)))
+                    async for row in self.iterate_in_executor(rows, RESULT_BATCH_SIZE):
+                        yield row
+                return
+
+        async with self.get(
+            create_url(
+                "/v3/job/result/{job_id}?format={format}&header={header}",
+                job_id=job_id,
+                format=format,
+                header=header,
+            )
+        ) as res:
+            if res.status != 200:
+                self.raise_error("Get job result failed", res, "")
+            if format == "msgpack":
+                unpacker = msgpack.Unpacker(raw=False, max_buffer_size=1000 * 1024**2)
+                async for chunk in res.stream(1024**2):
+                    unpacker.feed(chunk)
+                    for row in unpacker:
+                        yield row
+            else:
+                codec = self._api.json_codec
+                buf = LineBuffer()
+                async for chunk in res.stream(1024**2):
+                    for line in buf.feed(chunk):
+                        yield codec.loads(line)
+                for line in buf.flush():
+                    yield codec.loads(line)
+
+    async def job_result_columns(
+        self,
+        job_id: str,
+        batch_size: int = 65536,
+        output: ColumnOutput = "array",
+    ) -> AsyncIterator[Any]:
+        """Yield the job result as batches of columns.
+        See :meth:`tdclient.job_api.JobAPI.job_result_columns`.
+        """
+        batches = self._api.job_result_columns(job_id, batch_size, output)
+        async for batch in self.iterate_in_executor(batches, 1):
+            yield batch
+
+    async def download_job_result(
+        self, job_id: str, path: str, num_threads: int = 4, verify: bool = True
+    ) -> bool:
+        """Download the job result to the specified path.
+        See :meth:`tdclient.job_api.JobAPI.download_job_result`.
+        """
+        return await self.run_in_executor(
+            functools.partial(
+                self._api.download_job_result,
+                job_id,
+                path,
+                num_threads=num_threads,
+                verify=verify,
+            )
+        )
+
+    async def kill(self, job_id: str) -> str | None:
+        """Stop the specific job if it is running. See :meth:`tdclient.job_api.JobAPI.kill`."""
+        async with self.post(create_url("/v3/job/kill/{job_id}", job_id=job_id)) as res:
+            code, body = res.status, await res.read()
+            if code != 200:
+                self.raise_error("Kill job failed", res, body)
+            js = self.checked_json(body, [])
+            return js.get("former_status")
+
+    async def query(
+        self,
+        q: str,
+        type: Literal["hive", "presto", "trino", "bulkload"] = "hive",
+        db: str | None = None,
+        result_url: str | None = None,
+        priority: Priority | None = None,
+        retry_limit: int | None = None,
+        **kwargs: Any,
+    ) -> str:
+        """Create a job for given query. See :meth:`tdclient.job_api.JobAPI.query`."""
+        if self._api.query_cache is not None and result_url is None:
+            # waiting for identical queries in flight blocks, so the cache is
+            # consulted on the executor
+            return await self.run_in_executor(
+                functools.partial(
+                    self._api.query,
+                    q,
+                    type=type,
+                    db=db,
+                    priority=priority,
+                    retry_limit=retry_limit,
+                    **kwargs,
+                )
+            )
+        params = build_query_params(
+            q,
+            result_url=result_url,
+            priority=priority,
+            retry_limit=retry_limit,
+            job_priority=JobAPI.JOB_PRIORITY,
+            **kwargs,
+        )
+        async with self.post(
+            create_url("/v3/job/issue/{type}/{db}", type=type, db=db), params
+        ) as res:
+            code, body = res.status, await res.read()
+            if code != 200:
+                self.raise_error("Query failed", res, body)
+            js = self.checked_json(body, ["job_id"])
+            return str(js["job_id"])
+
+    # Table API
+
+    async def list_tables(self, db: str) -> dict[str, Any]:
+        """Gets the list of table in the database. See :meth:`tdclient.table_api.TableAPI.list_tables`."""
+        async with self.get(create_url("/v3/table/list/{db}", db=db)) as res:
+            code, body = res.status, await res.read()
+            if code != 200:
+                self.raise_error("List tables failed", res, body)
+            js = self.checked_json(body, ["tables"])
+            return parse_tables(js)
+
+    async def list_tables_each(self, db: str) -> AsyncIterator[dict[str, Any]]:
+        """Iterate over the tables in the database as they are received.
+        See :meth:`tdclient.table_api.TableAPI.list_tables_each`.
+        """
+        tables = self._api.list_tables_each(db)
+        async for table in self.iterate_in_executor(tables, LIST_BATCH_SIZE):
+            yield table
+
+    async def _post_ok(
+        self, msg: str, path: str, params: dict[str, Any] | None = None
+    ) -> bytes:
+        async with self.post(path, params) as res:
+            code, body = res.status, await res.read()
+            if code != 200:
+                self.raise_error(msg, res, body)
+            return body
+
+    async def create_log_table(self, db: str, table: str) -> bool:
+        """Create a new table in the database. See :meth:`tdclient.table_api.TableAPI.create_log_table`."""
+        await self._post_ok(
+            "Create log table failed",
+            create_url(
+                "/v3/table/create/{db}/{table}/{type}", db=db, table=table, type="log"
+            ),
+            {},
+        )
+        return True
+
+    async def swap_table(self, db: str, table1: str, table2: str) -> bool:
+        """Swap the two specified tables. See :meth:`tdclient.table_api.TableAPI.swap_table`."""
+        await self._post_ok(
+            "Swap tables failed",
+            create_url(
+                "/v3/table/swap/{db}/{table1}/{table2}",
+                db=db,
+                table1=table1,
+                table2=table2,
+            ),
+        )
+        return True
+
+    async def update_schema(self, db: str, table: str, schema_json: str) -> bool:
+        """Update the table schema. See :meth:`tdclient.table_api.TableAPI.update_schema`."""
+        await self._post_ok(
+            "Create schema table failed",
+            create_url("/v3/table/update-schema/{db}/{table}", db=db, table=table),
+            {"schema": schema_json},
+        )
+        return True
+
+    async def update_expire(self, db: str, table: str, expire_days: int) -> bool:
+        """Update the expire days of a table. See :meth:`tdclient.table_api.TableAPI.update_expire`."""
+        await self._post_ok(
+            "Update table expiration failed",
+            create_url("/v3/table/update/{db}/{table}", db=db, table=table),
+            {"expire_days": expire_days},
+        )
+        return True
+
+    async def delete_table(self, db: str, table: str) -> str:
+        """Delete the specified table. See :meth:`tdclient.table_api.TableAPI.delete_table`."""
+        body = await self._post_ok(
+            "Delete table failed",
+            create_url("/v3/table/delete/{db}/{table}", db=db, table=table),
+        )
+        js = self.checked_json(body, [])
+        return js.get("type", "?")
+
+    async def tail(self, db: str, table: str, count: int) -> list[dict[str, Any]]:
+        """Get the contents of the table in reverse order. See :meth:`tdclient.table_api.TableAPI.tail`."""
+        params = {"count": count, "format": "msgpack"}
+        async with self.get(
+            create_url("/v3/table/tail/{db}/{table}", db=db, table=table), params
+        ) as res:
+            if res.status != 200:
+                self.raise_error("Tail table failed", res, "")
+            unpacker = msgpack.Unpacker(raw=False)
+            result: list[dict[str, Any]] = []
+            async for chunk in res.stream():
+                unpacker.feed(chunk)
+                result.extend(unpacker)
+            return result
+
+    async def change_database(self, db: str, table: str, dest_db: str) -> bool:
+        """Move a table to another database. See :meth:`tdclient.table_api.TableAPI.change_database`."""
+        await self._post_ok(
+            "Change database failed",
+            create_url("/v3/table/change_database/{db}/{table}", db=db, table=table),
+            {"dest_database_name": dest_db},
+        )
+        return True
+
+    # Bulk import API
+
+    async def create_bulk_import(
+        self, name: str, db: str, table: str, params: BulkImportParams | None = None
+    ) -> bool:
+        """Create a bulk import session. See :meth:`tdclient.bulk_import_api.BulkImportAPI.create_bulk_import`."""
+        await self._post_ok(
+            "Create bulk import failed",
+            create_url(
+                "/v3/bulk_import/create/{name}/{db}/{table}",
+                name=name,
+                db=db,
+                table=table,
+            ),
+            {} if params is None else dict(params),
+        )
+        return True
+
+    async def delete_bulk_import(
+        self, name: str, params: dict[str, Any] | None = None
+    ) -> bool:
+        """Delete a bulk import session. See :meth:`tdclient.bulk_import_api.BulkImportAPI.delete_bulk_import`."""
+        await self._post_ok(
+            "Delete bulk import failed",
+            create_url("/v3/bulk_import/delete/{name}", name=name),
+            {} if params is None else params,
+        )
+        return True
+
+    async def show_bulk_import(self, name: str) -> dict[str, Any]:
+        """Show a bulk import session. See :meth:`tdclient.bulk_import_api.BulkImportAPI.show_bulk_import`."""
+        async with self.get(
+            create_url("/v3/bulk_import/show/{name}", name=name)
+        ) as res:
+            code, body = res.status, await res.read()
+            if code != 200:
+                self.raise_error("Show bulk import failed", res, body)
+            return self.checked_json(body, ["status"])
+
+    async def list_bulk_imports(
+        self, params: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        """List bulk import sessions. See :meth:`tdclient.bulk_import_api.BulkImportAPI.list_bulk_imports`."""
+        async with self.get(
+            "/v3/bulk_import/list", {} if params is None else params
+        ) as res:
+            code, body = res.status, await res.read()
+            if code != 200:
+                self.raise_error("List bulk imports failed", res, body)
+            js = self.checked_json(body, ["bulk_imports"])
+            return js["bulk_imports"]
+
+    async def list_bulk_imports_each(
+        self, params: dict[str, Any] | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Iterate over the available bulk imports as they are received.
+        See :meth:`tdclient.bulk_import_api.BulkImportAPI.list_bulk_imports_each`.
+        """
+        bulk_imports = self._api.list_bulk_imports_each(params)
+        async for bulk_import in self.iterate_in_executor(
+            bulk_imports, LIST_BATCH_SIZE
+        ):
+            yield bulk_import
+
+    async def list_bulk_import_parts(
+        self, name: str, params: dict[str, Any] | None = None
+    ) -> list[str]:
+        """List parts of a bulk import session.
+        See :meth:`tdclient.bulk_import_api.BulkImportAPI.list_bulk_import_parts`.
+        """
+        async with self.get(
+            create_url("/v3/bulk_import/list_parts/{name}", name=name),
+            {} if params is None else params,
+        ) as res:
+            code, body = res.status, await res.read()
+            if code != 200:
+                self.raise_error("List bulk import parts failed", res, body)
+            js = self.checked_json(body, ["parts"])
+            return js["parts"]
+
+    async def bulk_import_upload_part(
+        self, name: str, part_name: str, stream: BytesOrStream, size: int
+    ) -> None:
+        """Upload a part to a bulk import session.
+        See :meth:`tdclient.bulk_import_api.BulkImportAPI.bulk_import_upload_part`.
+        """
+        BulkImportAPI.validate_part_name(part_name)
+        async with self.put(
+            create_url(
+                "/v3/bulk_import/upload_part/{name}/{part_name}",
+                name=name,
+                part_name=part_name,
+            ),
+            stream,
+            size,
+        ) as res:
+            code, body = res.status, await res.read()
+            if code // 100 != 2:
+                self.raise_error("Upload a part failed", res, body)
+
+    async def bulk_import_upload_file(
+        self,
+        name: str,
+        part_name: str,
+        format: DataFormat,
+        file: FileLike,
+        **kwargs: Any,
+    ) -> None:
+        """Upload a file to a bulk import session.
+        See :meth:`tdclient.bulk_import_api.BulkImportAPI.bulk_import_upload_file`.
+        """
+        BulkImportAPI.validate_part_name(part_name)
+        fp = await self.run_in_executor(
+            functools.partial(self._api.prepare_file, file, format, **kwargs)
+        )
+        with contextlib.closing(fp):
+            size = os.fstat(fp.fileno()).st_size
+            await self.bulk_import_upload_part(name, part_name, fp, size)
+
+    async def bulk_import_delete_part(
+        self, name: str, part_name: str, params: dict[str, Any] | None = None
+    ) -> bool:
+        """Delete a part of a bulk import session.
+        See :meth:`tdclient.bulk_import_api.BulkImportAPI.bulk_import_delete_part`.
+        """
+        BulkImportAPI.validate_part_name(part_name)
+        async with self.post(
+            create_url(
+                "/v3/bulk_import/delete_part/{name}/{part_name}",
+                name=name,
+                part_name=part_name,
+            ),
+            {} if params is None else params,
+        ) as res:
+            code, body = res.status, await res.read()
+            if code // 100 != 2:
+                self.raise_error("Delete a part failed", res, body)
+            return True
+
+    async def freeze_bulk_import(
+        self, name: str, params: dict[str, Any] | None = None
+    ) -> bool:
+        """Freeze a bulk import session. See :meth:`tdclient.bulk_import_api.BulkImportAPI.freeze_bulk_import`."""
+        await self._post_ok(
+            "Freeze bulk import failed",
+            create_url("/v3/bulk_import/freeze/{name}", name=name),
+            {} if params is None else params,
+        )
+        return True
+
+    async def unfreeze_bulk_import(
+        self, name: str, params: dict[str, Any] | None = None
+    ) -> bool:
+        """Unfreeze a bulk import session.
+        See :meth:`tdclient.bulk_import_api.BulkImportAPI.unfreeze_bulk_import`.
+        """
+        await self._post_ok(
+            "Unfreeze bulk import failed",
+            create_url("/v3/bulk_import/unfreeze/{name}", name=name),
+            {} if params is None else params,
+        )
+        return True
+
+    async def perform_bulk_import(
+        self, name: str, params: dict[str, Any] | None = None
+    ) -> str:
+        """Perform a bulk import session. See :meth:`tdclient.bulk_import_api.BulkImportAPI.perform_bulk_import`."""
+        body = await self._post_ok(
+            "Perform bulk import failed",
+            create_url("/v3/bulk_import/perform/{name}", name=name),
+            {} if params is None else params,
+        )
+        js = self.checked_json(body, ["job_id"])
+        return str(js["job_id"])
+
+    async def commit_bulk_import(
+        self, name: str, params: dict[str, Any] | None = None
+    ) -> bool:
+        """Commit a bulk import session. See :meth:`tdclient.bulk_import_api.BulkImportAPI.commit_bulk_import`."""
+        await self._post_ok(
+            "Commit bulk import failed",
+            create_url("/v3/bulk_import/commit/{name}", name=name),
+            {} if params is None else params,
+        )
+        return True
+
+    async def bulk_import_error_records(
+        self, name: str, params: dict[str, Any] | None = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """List the error records of a bulk import session.
+        See :meth:`tdclient.bulk_import_api.BulkImportAPI.bulk_import_error_records`.
+        """
+        async with self.get(
+            create_url("/v3/bulk_import/error_records/{name}", name=name),
+            {} if params is None else params,
+        ) as res:
+            body = await res.read()
+            if res.status != 200:
+                self.raise_error("Failed to get bulk import error records", res, body)
+            for row in parse_error_records(body):
+                yield row
+
+    # Import API
+
+    async def import_data(
+        self,
+        db: str,
+        table: str,
+        format: DataFormat,
+        bytes_or_stream: BytesOrStream,
+        size: int,
+        unique_id: str | None = None,
+    ) -> float:
+        """Import data into Treasure Data Service. See :meth:`tdclient.import_api.ImportAPI.import_data`."""
+        if unique_id is not None:
+            path = create_url(
+                "/v3/table/import_with_id/{db}/{table}/{unique_id}/{format}",
+                db=db,
+                table=table,
+                unique_id=unique_id,
+                format=format,
+            )
+        else:
+            path = create_url(
+                "/v3/table/import/{db}/{table}/{format}",
+                db=db,
+                table=table,
+                format=format,
+            )
+        async with self.put(path, bytes_or_stream, size) as res:
+            code, body = res.status, await res.read()
+            if code // 100 != 2:
+                self.raise_error("Import failed", res, body)
+            js = self.checked_json(body, ["elapsed_time"])
+            return float(js["elapsed_time"])
+
+    async def import_file(
+        self,
+        db: str,
+        table: str,
+        format: DataFormat,
+        file: FileLike,
+        unique_id: str | None = None,
+        **kwargs: Any,
+    ) -> float:
+        """Import data from a file. See :meth:`tdclient.import_api.ImportAPI.import_file`."""
+        fp = await self.run_in_executor(
+            functools.partial(self._api.prepare_file, file, format, **kwargs)
+        )
+        with contextlib.closing(fp):
+            size = os.fstat(fp.fileno()).st_size
+            return await self.import_data(
+                db, table, "msgpack.gz", fp, size, unique_id=unique_id
+            )
@@ -0,0 +1,400 @@
+#!/usr/bin/env python
+
+import asyncio
+import itertools
+import json
+import time
+from collections.abc import AsyncIterator, Callable
+from typing import Any, Literal, cast
+
+from tdclient import async_api, errors
+from tdclient.job_api import JobRecord
+from tdclient.polling import DEFAULT_BACKOFF, Backoff
+from tdclient.types import (
+    BulkImportParams,
+    BytesOrStream,
+    ColumnOutput,
+    DataFormat,
+    FileLike,
+    Priority,
+    ResultFormat,
+)
+
+
+class AsyncClient:
+    """Asynchronous API Client for Treasure Data Service
+
+    Every method is a coroutine (or an asynchronous iterator) which mirrors the
+    method of the same name in :class:`tdclient.client.Client`. Since models are
+    bound to the synchronous client, results are returned as they are returned
+    by :class:`tdclient.async_api.AsyncAPI`.
+
+    Example:
+
+        .. code-block:: python
+
+            async with tdclient.AsyncClient() as td:
+                job_id = await td.query("sample_datasets", "SELECT 1", type="presto")
+                await td.wait(job_id)
+                async for row in td.job_result_each(job_id):
+                    print(row)
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._api = async_api.AsyncAPI(*args, **kwargs)
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def api(self) -> async_api.AsyncAPI:
+        """
+        an instance of :class:`tdclient.async_api.AsyncAPI`
+        """
+        return self._api
+
+    @property
+    def apikey(self) -> str | None:
+        """
+        API key string.
+        """
+        return self._api.apikey
+
+    async def query(
+        self,
+        db_name: str,
+        q: str,
+        result_url: str | None = None,
+        priority: Priority | None = None,
+        retry_limit: int | None = None,
+        type: str = "hive",
+        **kwargs: Any,
+    ) -> str:
+        """Run a query on specified database table.
+
+        Args:
+            db_name (str): name of a database
+            q (str): a query string
+            result_url (str): result output URL
+            priority (int or str): priority (e.g. "NORMAL", "HIGH", etc.)
+            retry_limit (int): retry limit
+            type (str): name of a query engine
+
+        Returns:
+            str: Job ID issued for the query
+
+        Raises:
+            ValueError: if unknown query type has been specified
+        """
+        if type not in ["hive", "pig", "impala", "presto", "trino"]:
+            raise ValueError(f"The specified query type is not supported: {type}")
+        query_type = cast(Literal["hive", "presto", "trino", "bulkload"], type)
+        return await self._api.query(
+            q,
+            type=query_type,
+            db=db_name,
+            result_url=result_url,
+            priority=priority,
+            retry_limit=retry_limit,
+            **kwargs,
+        )
+
+    async def jobs(
+        self,
+        _from: int | None = None,
+        to: int | None = None,
+        status: str | None = None,
+        conditions: dict[str, Any] | None = None,
+    ) -> list[dict[str, Any]]:
+        """List jobs
+
+        Returns:
+             a list of :class:`dict` which represents a job. See
+             :meth:`tdclient.api.API.list_jobs`.
+        """
+        return await self._api.list_jobs(_from or 0, to, status, conditions)
+
+    async def iter_jobs(
+        self,
+        status: str | None = None,
+        page_size: int = 100,
+        prefetch: int = 2,
+        stop: Callable[[JobRecord], bool] | None = None,
+        conditions: dict[str, Any] | None = None,
+    ) -> AsyncIterator[JobRecord]:
+        """Iterate over jobs from the newest while prefetching pages
+
+        Returns:
+             an asynchronous iterator of :class:`tdclient.job_api.JobRecord`.
+             See :meth:`tdclient.api.API.iter_jobs`.
+        """
+        async for record in self._api.iter_jobs(
+            status=status,
+            page_size=page_size,
+            prefetch=prefetch,
+            stop=stop,
+            conditions=conditions,
+        ):
+            yield record
+
+    async def job(self, job_id: str | int) -> dict[str, Any]:
+        """
+        Returns:
+             :class:`dict`: Detailed information of a job
+        """
+        return await self._api.show_job(str(job_id))
+
+    async def job_status(self, job_id: str | int) -> str:
+        """
+        Returns:
+             a string represents the status of the job ("success", "error", "killed", "queued", "running")
+        """
+        return await self._api.job_status(str(job_id))
+
+    async def wait(
+        self,
+        job_id: str | int,
+        timeout: float | None = None,
+        wait_interval: float | None = None,
+        backoff: Backoff | None = None,
+    ) -> str:
+        """Wait until the job has been finished without blocking the event loop
+
+        Args:
+            job_id (str): job id
+            timeout (float, optional): Timeout in seconds. No timeout by default.
+            wait_interval (float, optional): wait interval in second. By default, the
+                job is polled with intervals growing from 0.5 to 10 seconds.
+            backoff (:class:`tdclient.polling.Backoff`, optional): intervals used
+                when `wait_interval` is not given.
+
+        Returns:
+            str: the final status of the job ("success", "error" or "killed")
+
+        Raises:
+            :class:`tdclient.errors.WaitTimeoutError`: if `timeout` has passed
+        """
+        started_at = time.monotonic()
+        if wait_interval is None:
+            intervals = (backoff or DEFAULT_BACKOFF).intervals()
+        else:
+            intervals = itertools.repeat(float(wait_interval))
+        while True:
+            status = await self.job_status(job_id)
+            if status in ["success", "error", "killed"]:
+                return status
+            delay = next(intervals)
+            if timeout is not None:
+                remaining = timeout - (time.monotonic() - started_at)
+                if remaining <= 0:
+                    raise errors.WaitTimeoutError(
+                        f"Timed out after {timeout:g} seconds"
+                    )
+                delay = min(delay, remaining)
+            await asyncio.sleep(delay)
+
+    async def job_result(self, job_id: str | int) -> list[Any]:
+        """
+        Returns:
+             a list of each rows in result set
+        """
+        return await self._api.job_result(str(job_id))
+
+    async def job_result_each(self, job_id: str | int) -> AsyncIterator[dict[str, Any]]:
+        """
+        Returns:
+             an asynchronous iterator of result set
+        """
+        async for row in self._api.job_result_each(str(job_id)):
+            yield row
+
+    async def job_result_format(
+        self, job_id: str | int, format: ResultFormat, header: bool = False
+    ) -> list[Any]:
+        """
+        Returns:
+             a list of each rows in result set
+        """
+        return await self._api.job_result_format(str(job_id), format, header=header)
+
+    async def job_result_format_each(
+        self, job_id: str | int, format: ResultFormat, header: bool = False
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Returns:
+             an asynchronous iterator of rows in result set
+        """
+        async for row in self._api.job_result_format_each(
+            str(job_id), format, header=header
+        ):
+            yield row
+
+    async def job_result_columns(
+        self,
+        job_id: str | int,
+        batch_size: int = 65536,
+        output: ColumnOutput = "array",
+    ) -> AsyncIterator[Any]:
+        """
+        Returns:
+             an asynchronous iterator of batches of columns in result set.
+             See :meth:`tdclient.client.Client.job_result_columns`.
+        """
+        async for batch in self._api.job_result_columns(
+            str(job_id), batch_size=batch_size, output=output
+        ):
+            yield batch
+
+    async def download_job_result(
+        self, job_id: str | int, path: str, num_threads: int = 4, verify: bool = True
+    ) -> bool:
+        """Save the job result into a msgpack.gz file.
+        See :meth:`tdclient.client.Client.download_job_result`.
+        """
+        return await self._api.download_job_result(
+            str(job_id), path, num_threads=num_threads, verify=verify
+        )
+
+    async def kill(self, job_id: str | int) -> str | None:
+        """
+        Returns:
+             a string represents the status of killed job ("queued", "running")
+        """
+        return await self._api.kill(str(job_id))
+
+    async def tables(self, db_name: str) -> dict[str, Any]:
+        """List existing tables
+
+        Returns:
+            dict: Detailed table information keyed by table name.
+        """
+        return await self._api.list_tables(db_name)
+
+    async def create_log_table(self, db_name: str, table_name: str) -> bool:
+        return await self._api.create_log_table(db_name, table_name)
+
+    async def swap_table(
+        self, db_name: str, table_name1: str, table_name2: str
+    ) -> bool:
+        return await self._api.swap_table(db_name, table_name1, table_name2)
+
+    async def update_schema(
+        self, db_name: str, table_name: str, schema: list[list[str]]
+    ) -> bool:
+        """Updates the schema of a table. See :meth:`tdclient.client.Client.update_schema`."""
+        return await self._api.update_schema(db_name, table_name, json.dumps(schema))
+
+    async def update_expire(
+        self, db_name: str, table_name: str, expire_days: int
+    ) -> bool:
+        return await self._api.update_expire(db_name, table_name, expire_days)
+
+    async def delete_table(self, db_name: str, table_name: str) -> str:
+        return await self._api.delete_table(db_name, table_name)
+
+    async def tail(
+        self, db_name: str, table_name: str, count: int
+    ) -> list[dict[str, Any]]:
+        return await self._api.tail(db_name, table_name, count)
+
+    async def change_database(
+        self, db_name: str, table_name: str, new_db_name: str
+    ) -> bool:
+        return await self._api.change_database(db_name, table_name, new_db_name)
+
+    async def create_bulk_import(
+        self,
+        name: str,
+        database: str,
+        table: str,
+        params: BulkImportParams | None = None,
+    ) -> bool:
+        return await self._api.create_bulk_import(name, database, table, params)
+
+    async def delete_bulk_import(self, name: str) -> bool:
+        return await self._api.delete_bulk_import(name)
+
+    async def freeze_bulk_import(self, name: str) -> bool:
+        return await self._api.freeze_bulk_import(name)
+
+    async def unfreeze_bulk_import(self, name: str) -> bool:
+        return await self._api.unfreeze_bulk_import(name)
+
+    async def perform_bulk_import(self, name: str) -> str:
+        """
+        Returns:
+            str: Job ID
+        """
+        return await self._api.perform_bulk_import(name)
+
+    async def commit_bulk_import(self, name: str) -> bool:
+        return await self._api.commit_bulk_import(name)
+
+    async def bulk_import_error_records(
+        self, name: str
+    ) -> AsyncIterator[dict[str, Any]]:
+        async for row in self._api.bulk_import_error_records(name):
+            yield row
+
+    async def bulk_import(self, name: str) -> dict[str, Any]:
+        return await self._api.show_bulk_import(name)
+
+    async def bulk_imports(self) -> list[dict[str, Any]]:
+        return await self._api.list_bulk_imports()
+
+    async def bulk_import_upload_part(
+        self, name: str, part_name: str, bytes_or_stream: BytesOrStream, size: int
+    ) -> None:
+        return await self._api.bulk_import_upload_part(
+            name, part_name, bytes_or_stream, size
+        )
+
+    async def bulk_import_upload_file(
+        self,
+        name: str,
+        part_name: str,
+        format: DataFormat,
+        file: FileLike,
+        **kwargs: Any,
+    ) -> None:
+        return await self._api.bulk_import_upload_file(
+            name, part_name, format, file, **kwargs
+        )
+
+    async def bulk_import_delete_part(self, name: str, part_name: str) -> bool:
+        return await self._api.bulk_import_delete_part(name, part_name)
+
+    async def list_bulk_import_parts(self, name: str) -> list[str]:
+        return await self._api.list_bulk_import_parts(name)
+
+    async def import_data(
+        self,
+        db_name: str,
+        table_name: str,
+        format: DataFormat,
+        bytes_or_stream: BytesOrStream,
+        size: int,
+        unique_id: str | None = None,
+    ) -> float:
+        return await self._api.import_data(
+            db_name, table_name, format, bytes_or_stream, size, unique_id=unique_id
+        )
+
+    async def import_file(
+        self,
+        db_name: str,
+        table_name: str,
+        format: DataFormat,
+        file: FileLike,
+        unique_id: str | None = None,
+    ) -> float:
+        return await self._api.import_file(
+            db_name, table_name, format, file, unique_id=unique_id
+        )
+
+    def close(self) -> None:
+        """Close opened API connections."""
+        return self._api.close()
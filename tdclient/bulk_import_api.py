@@ -2,19 +2,22 @@
 
 import collections
 import contextlib
-import gzip
 import io
 import os
-from collections.abc import Iterator
+from collections.abc import Callable, Iterator
 from contextlib import AbstractContextManager
-from typing import IO, Any
+from typing import IO, TYPE_CHECKING, Any
 
 import msgpack
 import urllib3
 
+from tdclient.json_codec import JSONCodec
 from tdclient.types import BulkImportParams, BytesOrStream, DataFormat, FileLike
 from tdclient.util import create_url
 
+if TYPE_CHECKING:
+    from tdclient.parallel_import import ImportProgress
+
 
 class BulkImportAPI:
     """Enable bulk importing of data to the targeted database and table.
@@ -49,10 +52,16 @@ class BulkImportAPI:
         self, msg: str, res: urllib3.BaseHTTPResponse, body: bytes | str
     ) -> None: ...
     def checked_json(self, body: bytes, required: list[str]) -> dict[str, Any]: ...
-    def _prepare_file(
+    def checked_json_items(
+        self, res: urllib3.BaseHTTPResponse, key: str | None
+    ) -> Iterator[Any]: ...
+    def prepare_file(
         self, file_like: FileLike, fmt: DataFormat, **kwargs: Any
     ) -> IO[bytes]: ...
 
+    # Attributes from API class
+    _json: JSONCodec
+
     def create_bulk_import(
         self, name: str, db: str, table: str, params: BulkImportParams | None = None
     ) -> bool:
@@ -135,6 +144,25 @@ class BulkImportAPI:
             js = self.checked_json(body, ["bulk_imports"])
             return js["bulk_imports"]
 
+    def list_bulk_imports_each(
+        self, params: dict[str, Any] | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """Iterate over the available bulk imports as they are received
+
+        Unlike :meth:`list_bulk_imports`, the response is parsed incrementally,
+        so that memory does not grow with the number of bulk imports.
+
+        Args:
+            params (dict, optional): Extra parameters.
+        Yields:
+            dict: bulk import details
+        """
+        params = {} if params is None else params
+        with self.get("/v3/bulk_import/list", params) as res:
+            if res.status != 200:
+                self.raise_error("List bulk imports failed", res, res.read())
+            yield from self.checked_json_items(res, "bulk_imports")
+
     def list_bulk_import_parts(
         self, name: str, params: dict[str, Any] | None = None
     ) -> list[str]:
@@ -208,6 +236,10 @@ class BulkImportAPI:
         part_name: str,
         format: DataFormat,
         file: FileLike,
+        chunk_size: int | None = None,
+        num_processes: int | None = None,
+        num_threads: int = 4,
+        progress: "Callable[[ImportProgress], None] | None" = None,
         **kwargs: Any,
     ) -> None:
         """Upload a file with bulk import having the specified name.
@@ -218,6 +250,17 @@ class BulkImportAPI:
             format (str): Format name. {msgpack, json, csv, tsv}
             file (str or file-like): the name of a file, or a file-like object,
               containing the data
+            chunk_size (int, optional): when given, the input is split into chunks
+              of about this number of bytes, which are converted in parallel and
+              uploaded concurrently as parts named ``{part_name}_{index}``.
+              Uploading the same file again replaces the same parts.
+            num_processes (int, optional): number of processes converting chunks.
+              Default is the number of CPUs.
+            num_threads (int, optional): number of concurrent uploads of parts.
+              Default is 4.
+            progress (callable, optional): called with a
+              :class:`tdclient.parallel_import.ImportProgress` every time a part
+              has been uploaded
             **kwargs: Extra arguments.
 
         There is more documentation on `format`, `file` and `**kwargs` at
@@ -242,7 +285,29 @@ class BulkImportAPI:
            https://tdclient.readthedocs.io/en/latest/file_import_parameters.html
         """
         self.validate_part_name(part_name)
-        with contextlib.closing(self._prepare_file(file, format, **kwargs)) as fp:
+        if chunk_size is not None:
+
+            def upload(index: int, digest: str, data: bytes) -> None:
+                self.bulk_import_upload_part(
+                    name, f"{part_name}_{index}", data, len(data)
+                )
+
+            from tdclient.parallel_import import parallel_import
+
+            kwargs.setdefault("json_codec", self._json)
+
+            parallel_import(
+                file,
+                format,
+                upload,
+                chunk_size=chunk_size,
+                num_processes=num_processes,
+                num_threads=num_threads,
+                progress=progress,
+                **kwargs,
+            )
+            return
+        with contextlib.closing(self.prepare_file(file, format, **kwargs)) as fp:
             size = os.fstat(fp.fileno()).st_size
             return self.bulk_import_upload_part(name, part_name, fp, size)
 
@@ -375,8 +440,23 @@ class BulkImportAPI:
                 body = res.read()
                 self.raise_error("Failed to get bulk import error records", res, body)
 
-            body = io.BytesIO(res.read())
-            decompressor = gzip.GzipFile(fileobj=body)
+            yield from parse_error_records(res.read())
+
+
+def parse_error_records(body: bytes) -> Iterator[dict[str, Any]]:
+    """Decode the body of a `/v3/bulk_import/error_records` response
+
+    This is shared by :class:`BulkImportAPI` and
+    :class:`tdclient.async_api.AsyncAPI`.
+
+    Args:
+        body (bytes): the response body in msgpack.gz format
+
+    Yields:
+        Row of the data
+    """
+    import gzip
 
-            unpacker = msgpack.Unpacker(decompressor, raw=False)  # type: ignore[arg-type]
-            yield from unpacker
+    decompressor = gzip.GzipFile(fileobj=io.BytesIO(body))
+    unpacker = msgpack.Unpacker(decompressor, raw=False)  # type: ignore[arg-type]
+    yield from unpacker
@@ -1,10 +1,10 @@
 #!/usr/bin/env python
 
-import time
 from collections.abc import Callable, Iterator
 from typing import TYPE_CHECKING, Any
 
 from tdclient.model import Model
+from tdclient.polling import poll
 from tdclient.types import BytesOrStream, DataFormat, FileLike
 
 if TYPE_CHECKING:
@@ -111,7 +111,7 @@ class BulkImport(Model):
     def perform(
         self,
         wait: bool = False,
-        wait_interval: int = 5,
+        wait_interval: float | None = None,
         wait_callback: Callable[["Job"], None] | None = None,
         timeout: float | None = None,
     ) -> "Job":
@@ -119,7 +119,8 @@ class BulkImport(Model):
 
         Args:
             wait (bool, optional): Flag for wait bulk import job. Default `False`
-            wait_interval (int, optional): wait interval in second. Default `5`.
+            wait_interval (int, optional): wait interval in second. By default, the
+                job is polled with growing intervals. See :meth:`tdclient.models.Job.wait`.
             wait_callback (callable, optional): A callable to be called on every tick of
                 wait interval.
             timeout (int, optional): Timeout in seconds. No timeout by default.
@@ -138,18 +139,28 @@ class BulkImport(Model):
         return job
 
     def commit(
-        self, wait: bool = False, wait_interval: int = 5, timeout: float | None = None
+        self,
+        wait: bool = False,
+        wait_interval: float | None = None,
+        timeout: float | None = None,
     ) -> bool:
-        """Commit bulk import"""
+        """Commit bulk import
+
+        Args:
+            wait (bool, optional): Flag for wait until the session has been
+                committed. Default `False`
+            wait_interval (int, optional): wait interval in second. By default, the
+                session is polled with growing intervals.
+            timeout (int, optional): Timeout in seconds. No timeout by default.
+        """
         response = self._client.commit_bulk_import(self.name)
         if wait:
-            started_at = time.time()
-            while self._status != self.STATUS_COMMITTED:
-                if timeout is None or abs(time.time() - started_at) < timeout:
-                    time.sleep(wait_interval)
-                else:
-                    raise RuntimeError("timeout")  # TODO: throw proper error
-                self.update()
+            poll(
+                lambda: self._status == self.STATUS_COMMITTED,
+                timeout=timeout,
+                wait_interval=wait_interval,
+                callback=self.update,
+            )
         else:
             self.update()
         return response
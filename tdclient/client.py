@@ -1,14 +1,18 @@
 #!/usr/bin/env python
 
+import contextlib
 import datetime
 import json
-from collections.abc import Iterator
+from collections.abc import Callable, Iterable, Iterator
 from typing import Any, Literal, cast
 
 from tdclient import api, models
+from tdclient.job_watcher import JobWatcher
+from tdclient.metadata_cache import MetadataCache
 from tdclient.types import (
     BulkImportParams,
     BytesOrStream,
+    ColumnOutput,
     DataFormat,
     ExportParams,
     FileLike,
@@ -20,10 +24,23 @@ from tdclient.types import (
 
 
 class Client:
-    """API Client for Treasure Data Service"""
-
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
+    """API Client for Treasure Data Service
+
+    Args:
+        metadata_ttl (float, optional): cache listings of databases and tables
+            for this number of seconds, so that :meth:`database` and
+            :meth:`table` look names up without a request each time. See
+            :class:`tdclient.metadata_cache.MetadataCache`. Disabled by default.
+        *args, **kwargs: arguments of :class:`tdclient.api.API`
+    """
+
+    def __init__(
+        self, *args: Any, metadata_ttl: float | None = None, **kwargs: Any
+    ) -> None:
         self._api = api.API(*args, **kwargs)
+        self._metadata_cache = (
+            None if metadata_ttl is None else MetadataCache(metadata_ttl)
+        )
 
     def __enter__(self) -> "Client":
         return self
@@ -50,6 +67,34 @@ class Client:
         """
         return self._api.apikey
 
+    @property
+    def metadata_cache(self) -> MetadataCache | None:
+        """
+        the :class:`tdclient.metadata_cache.MetadataCache` of listings of databases
+        and tables, or `None` if disabled
+        """
+        return self._metadata_cache
+
+    def invalidate_metadata(self, db_name: str | None = None) -> None:
+        """Drop cached listings of databases and tables
+
+        Args:
+            db_name (str, optional): drop only the tables of this database, besides
+                the listing of databases
+        """
+        if self._metadata_cache is not None:
+            self._metadata_cache.invalidate(db_name)
+
+    def _list_databases(self) -> dict[str, Any]:
+        if self._metadata_cache is None:
+            return self.api.list_databases()
+        return self._metadata_cache.databases(self.api.list_databases)
+
+    def _list_tables(self, db_name: str) -> dict[str, Any]:
+        if self._metadata_cache is None:
+            return self.api.list_tables(db_name)
+        return self._metadata_cache.tables(db_name, self.api.list_tables)
+
     def server_status(self) -> str:
         """
         Returns:
@@ -65,7 +110,9 @@ class Client:
         Returns:
              `True` if success
         """
-        return self.api.create_database(db_name, **kwargs)
+        result = self.api.create_database(db_name, **kwargs)
+        self.invalidate_metadata(db_name)
+        return result
 
     def delete_database(self, db_name: str) -> bool:
         """
@@ -75,14 +122,16 @@ class Client:
         Returns:
              `True` if success
         """
-        return self.api.delete_database(db_name)
+        result = self.api.delete_database(db_name)
+        self.invalidate_metadata(db_name)
+        return result
 
     def databases(self) -> list[models.Database]:
         """
         Returns:
             a list of :class:`tdclient.models.Database`
         """
-        databases = self.api.list_databases()
+        databases = self._list_databases()
         return [
             models.Database(self, db_name, **kwargs)
             for (db_name, kwargs) in databases.items()
@@ -96,10 +145,9 @@ class Client:
         Returns:
              :class:`tdclient.models.Database`
         """
-        databases = self.api.list_databases()
-        for name, kwargs in databases.items():
-            if name == db_name:
-                return models.Database(self, name, **kwargs)
+        databases = self._list_databases()
+        if db_name in databases:
+            return models.Database(self, db_name, **databases[db_name])
         raise api.NotFoundError(f"Database '{db_name}' does not exist")
 
     def create_log_table(self, db_name: str, table_name: str) -> bool:
@@ -111,7 +159,9 @@ class Client:
         Returns:
              `True` if success
         """
-        return self.api.create_log_table(db_name, table_name)
+        result = self.api.create_log_table(db_name, table_name)
+        self.invalidate_metadata(db_name)
+        return result
 
     def swap_table(self, db_name: str, table_name1: str, table_name2: str) -> bool:
         """
@@ -123,7 +173,9 @@ class Client:
         Returns:
             `True` if success
         """
-        return self.api.swap_table(db_name, table_name1, table_name2)
+        result = self.api.swap_table(db_name, table_name1, table_name2)
+        self.invalidate_metadata(db_name)
+        return result
 
     def update_schema(
         self, db_name: str, table_name: str, schema: list[list[str]]
@@ -151,7 +203,9 @@ class Client:
         Returns:
              `True` if success
         """
-        return self.api.update_schema(db_name, table_name, json.dumps(schema))
+        result = self.api.update_schema(db_name, table_name, json.dumps(schema))
+        self.invalidate_metadata(db_name)
+        return result
 
     def update_expire(self, db_name: str, table_name: str, expire_days: int) -> bool:
         """Set expiration date to a table
@@ -164,7 +218,9 @@ class Client:
         Returns:
              `True` if success
         """
-        return self.api.update_expire(db_name, table_name, expire_days)
+        result = self.api.update_expire(db_name, table_name, expire_days)
+        self.invalidate_metadata(db_name)
+        return result
 
     def delete_table(self, db_name: str, table_name: str) -> str:
         """Delete a table
@@ -176,7 +232,9 @@ class Client:
         Returns:
              a string represents the type of deleted table
         """
-        return self.api.delete_table(db_name, table_name)
+        result = self.api.delete_table(db_name, table_name)
+        self.invalidate_metadata(db_name)
+        return result
 
     def tables(self, db_name: str) -> list[models.Table]:
         """List existing tables
@@ -187,7 +245,7 @@ class Client:
         Returns:
              a list of :class:`tdclient.models.Table`
         """
-        m = self.api.list_tables(db_name)
+        m = self._list_tables(db_name)
         return [
             models.Table(self, db_name, table_name, **kwargs)
             for (table_name, kwargs) in m.items()
@@ -205,10 +263,9 @@ class Client:
         Raises:
             tdclient.api.NotFoundError: if the table doesn't exist
         """
-        tables = self.tables(db_name)
-        for table in tables:
-            if table.table_name == table_name:
-                return table
+        tables = self._list_tables(db_name)
+        if table_name in tables:
+            return models.Table(self, db_name, table_name, **tables[table_name])
         raise api.NotFoundError(f"Table '{db_name}.{table_name}' does not exist")
 
     def tail(
@@ -247,7 +304,10 @@ class Client:
         Returns:
             bool: `True` if succeeded.
         """
-        return self.api.change_database(db_name, table_name, new_db_name)
+        result = self.api.change_database(db_name, table_name, new_db_name)
+        self.invalidate_metadata(db_name)
+        self.invalidate_metadata(new_db_name)
+        return result
 
     def query(
         self,
@@ -312,9 +372,52 @@ class Client:
         Returns:
              a list of :class:`tdclient.models.Job`
         """
-        results = self.api.list_jobs(_from or 0, to, status, conditions)
+        results = self.api.list_job_records(_from or 0, to, status, conditions)
 
-        return [job_from_dict(self, d) for d in results]
+        return [models.Job.from_record(self, record) for record in results]
+
+    def iter_jobs(
+        self,
+        status: str | None = None,
+        page_size: int = 100,
+        prefetch: int = 2,
+        stop: Callable[[models.Job], bool] | None = None,
+        conditions: dict[str, Any] | None = None,
+    ) -> Iterator[models.Job]:
+        """Iterate over jobs from the newest while prefetching pages
+
+        Example:
+
+            .. code-block:: python
+
+                cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=7)
+                for job in td.iter_jobs(stop=lambda job: job.created_at < cutoff):
+                    ...
+
+        Args:
+            status (str, optional): Filter by given status. {"queued", "running", "success", "error"}
+            page_size (int, optional): number of jobs in a page. Default is 100.
+            prefetch (int, optional): number of pages requested ahead of the
+                current one. Default is 2.
+            stop (callable, optional): called with every job before it is
+                yielded. Iteration stops, without yielding the job, once it
+                returns `True`.
+            conditions (dict[str, Any], optional): See :meth:`jobs`.
+
+        Yields:
+             :class:`tdclient.models.Job`
+
+        See :meth:`tdclient.api.API.iter_jobs`.
+        """
+        records = self.api.iter_jobs(
+            status=status, page_size=page_size, prefetch=prefetch, conditions=conditions
+        )
+        with contextlib.closing(records):
+            for record in records:
+                job = models.Job.from_record(self, record)
+                if stop is not None and stop(job):
+                    return
+                yield job
 
     def job(self, job_id: str | int) -> models.Job:
         """Get a job from `job_id`
@@ -328,6 +431,20 @@ class Client:
         d = self.api.show_job(str(job_id))
         return job_from_dict(self, d, job_id=job_id)
 
+    def watch_jobs(
+        self, jobs: Iterable[models.Job | str | int] = (), **kwargs: Any
+    ) -> JobWatcher:
+        """Watch many jobs with a single scheduler until they finish
+
+        Args:
+            jobs (iterable, optional): jobs or job IDs to watch
+            **kwargs: options of :class:`tdclient.job_watcher.JobWatcher`
+
+        Returns:
+             :class:`tdclient.job_watcher.JobWatcher`
+        """
+        return JobWatcher(self, jobs, **kwargs)
+
     def job_status(self, job_id: str | int) -> str:
         """
         Args:
@@ -378,6 +495,8 @@ class Client:
         header: bool = False,
         store_tmpfile: bool = False,
         num_threads: int = 4,
+        prefetch_chunks: int = 0,
+        memory_budget: int | None = None,
     ) -> Iterator[dict[str, Any]]:
         """
         Args:
@@ -387,7 +506,15 @@ class Client:
             store_tmpfile (bool, optional): store result to a temporary file.
                 Works only when fmt is "msgpack". Default is False.
             num_threads (int, optional): number of threads to download result.
-                Works only when store_tmpfile is True. Default is 4.
+                Works only when store_tmpfile is True or memory_budget is given.
+                Default is 4.
+            prefetch_chunks (int, optional): number of 1 MiB chunks read ahead by a
+                background thread while rows are decoded. Works only when fmt is
+                "msgpack" and store_tmpfile is False. Default is 0.
+            memory_budget (int, optional): download ranges of the result in
+                parallel, holding at most this number of bytes in memory instead of
+                storing them to a temporary file. Works only when fmt is "msgpack".
+                Default is None.
 
 
         Returns:
@@ -399,22 +526,57 @@ class Client:
             header=header,
             store_tmpfile=store_tmpfile,
             num_threads=num_threads,
+            prefetch_chunks=prefetch_chunks,
+            memory_budget=memory_budget,
+        )
+
+    def job_result_columns(
+        self,
+        job_id: str | int,
+        batch_size: int = 65536,
+        output: ColumnOutput = "array",
+    ) -> Iterator[Any]:
+        """
+        Args:
+            job_id (str): job id
+            batch_size (int, optional): maximum number of rows in a batch.
+                Default: 65536
+            output (str, optional): "array", "numpy" or "arrow". Default: "array"
+
+        Returns:
+             an iterator of batches of columns in result set.
+             See :func:`tdclient.columnar.decode_columns`.
+        """
+        yield from self.api.job_result_columns(
+            str(job_id), batch_size=batch_size, output=output
         )
 
     def download_job_result(
-        self, job_id: str | int, path: str, num_threads: int = 4
+        self, job_id: str | int, path: str, num_threads: int = 4, verify: bool = True
     ) -> bool:
         """Save the job result into a msgpack.gz file.
+
+        A download interrupted by a failure resumes from the ranges recorded in
+        ``{path}.manifest`` when this is called again with the same job id.
+
         Args:
             job_id (str): job id
             path (str): path to save the result
             num_threads (int, optional): number of threads to download the result.
                 Default: 4
+            verify (bool, optional): verify the gzip integrity of the downloaded
+                file. Default: True
 
         Returns:
              `True` if success
+
+        Raises:
+            :class:`tdclient.errors.DownloadError`: if the download failed or the
+                downloaded file is broken
         """
-        return self.api.download_job_result(str(job_id), path, num_threads=num_threads)
+        return self.api.download_job_result(
+            str(job_id), path, num_threads=num_threads, verify=verify
+        )
 
     def kill(self, job_id: str | int) -> str | None:
         """
@@ -609,7 +771,8 @@ class Client:
             format (str): format of data type (e.g. "msgpack", "json", "csv", "tsv")
             file (str or file-like): the name of a file, or a file-like object,
               containing the data
-            **kwargs: extra arguments.
+            **kwargs: extra arguments, e.g. ``chunk_size`` to upload a large file
+              in parallel parts. See :meth:`tdclient.api.API.bulk_import_upload_file`.
 
         There is more documentation on `format`, `file` and `**kwargs` at
         `file import parameters`_.
@@ -881,6 +1044,7 @@ class Client:
         format: DataFormat,
         file: FileLike,
         unique_id: str | None = None,
+        **kwargs: Any,
     ) -> float:
         """Import data into Treasure Data Service, from an existing file on filesystem.
 
@@ -893,12 +1057,14 @@ class Client:
             format (str): format of data type (e.g. "msgpack", "json")
             file (str or file-like): a name of a file, or a file-like object contains the data
             unique_id (str): a unique identifier of the data
+            **kwargs: extra arguments of :meth:`tdclient.api.API.import_file`,
+                e.g. ``chunk_size`` to import a large file in parallel
 
         Returns:
              float represents the elapsed time to import data
         """
         return self.api.import_file(
-            db_name, table_name, format, file, unique_id=unique_id
+            db_name, table_name, format, file, unique_id=unique_id, **kwargs
         )
 
     def results(self) -> list[models.Result]:
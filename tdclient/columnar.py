@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+
+import array
+import functools
+import importlib
+import re
+from collections.abc import Iterator
+from typing import IO, Any
+
+import msgpack
+import urllib3
+
+from tdclient.types import ColumnOutput
+
+
+@functools.cache
+def _optional_module(name: str) -> Any:
+    """Import an optional dependency on first use
+
+    numpy and pyarrow take longer to import than the rest of the package, so
+    they are loaded only when a batch is converted to them. Modules are typed
+    loosely as their stubs may be missing.
+
+    Args:
+        name (str): name of the module, e.g. "numpy"
+
+    Returns:
+        the module, or None if it is not installed
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+#: `array.array` type codes of column types in ``hive_result_schema``
+TYPECODES = {
+    "tinyint": "q",
+    "smallint": "q",
+    "int": "q",
+    "integer": "q",
+    "bigint": "q",
+    "float": "d",
+    "real": "d",
+    "double": "d",
+    "boolean": "b",
+}
+
+_TYPE_NAME = re.compile(r"^\s*([a-zA-Z_]+)")
+
+
+def column_typecode(type_name: str) -> str | None:
+    """Return the `array.array` type code to store a column of the type
+
+    Args:
+        type_name (str): type of a column in ``hive_result_schema``,
+            e.g. "bigint" or "varchar(10)"
+
+    Returns:
+        str or None: a type code, or None if values are stored as Python objects
+    """
+    m = _TYPE_NAME.match(type_name)
+    return TYPECODES.get(m.group(1).lower()) if m else None
+
+
+def column_names(names: list[str]) -> list[str]:
+    """Make column names unique by suffixing duplicates with ``.1``, ``.2``, ..."""
+    seen: dict[str, int] = {}
+    unique: list[str] = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        unique.append(name)
+    return unique
+
+
+class _Column:
+    """Values of a column in a batch
+
+    Values are appended to an `array.array` while they fit its type code. Null
+    values are stored as zero and their positions are recorded separately. A
+    value which does not fit turns the column into a list of Python objects.
+    """
+
+    __slots__ = ("typecode", "values", "nulls")
+
+    def __init__(self, typecode: str | None) -> None:
+        self.typecode = typecode
+        self.values: array.array[Any] | list[Any] = (
+            [] if typecode is None else array.array(typecode)
+        )
+        self.nulls: list[int] = []
+
+    def append_slow(self, value: Any) -> None:
+        if value is None and self.typecode is not None:
+            self.nulls.append(len(self.values))
+            self.values.append(0)
+            return
+        if self.typecode is not None:
+            self.to_objects()
+        self.values.append(value)
+
+    def to_objects(self) -> None:
+        values = self.values.tolist() if isinstance(self.values, array.array) else []
+        for i in self.nulls:
+            values[i] = None
+        self.typecode = None
+        self.values = values
+        self.nulls = []
+
+    def to_array(self) -> "array.array[Any] | list[Any]":
+        if self.nulls:
+            self.to_objects()
+        return self.values
+
+    def to_numpy(self) -> Any:
+        numpy = _optional_module("numpy")
+        if self.typecode is None:
+            objects = numpy.empty(len(self.values), dtype=object)
+            objects[:] = self.values
+            return objects
+        dtype = {"q": numpy.int64, "d": numpy.float64, "b": numpy.int8}[self.typecode]
+        values = numpy.frombuffer(self.values, dtype=dtype)
+        if self.typecode == "b":
+            values = values.view(numpy.bool_)
+        if not self.nulls:
+            return values
+        mask = numpy.zeros(len(values), dtype=numpy.bool_)
+        mask[self.nulls] = True
+        return numpy.ma.MaskedArray(values, mask=mask)
+
+    def to_arrow(self) -> Any:
+        pyarrow = _optional_module("pyarrow")
+        if self.typecode is None:
+            return pyarrow.array(self.values)
+        arrow_type = {
+            "q": pyarrow.int64(),
+            "d": pyarrow.float64(),
+            "b": pyarrow.bool_(),
+        }[self.typecode]
+        if self.typecode == "b":
+            values = [None if v is None else bool(v) for v in self.to_array()]
+            return pyarrow.array(values, type=arrow_type)
+        if self.nulls:
+            return pyarrow.array(self.to_array(), type=arrow_type)
+        return pyarrow.Array.from_buffers(
+            arrow_type, len(self.values), [None, pyarrow.py_buffer(self.values)]
+        )
+
+
+def decode_columns(
+    stream: IO[bytes] | urllib3.BaseHTTPResponse,
+    schema: list[list[str]] | None,
+    batch_size: int = 65536,
+    output: ColumnOutput = "array",
+) -> Iterator[Any]:
+    """Decode rows in msgpack format into batches of columns
+
+    Values are unpacked one by one from the stream and appended to typed column
+    buffers without building a list per row.
+
+    Args:
+        stream: a file-like object of msgpack-encoded rows
+        schema (list): ``hive_result_schema`` of the result, a list of pairs of
+            a column name and a type. If it is empty, columns are named after
+            their positions and stored as Python objects.
+        batch_size (int): maximum number of rows in a batch
+        output (str): type of batches to yield
+
+            - "array": a :class:`dict` from a column name to an
+              :class:`array.array` for integer, floating point and boolean
+              columns, or to a :class:`list` for other columns and for columns
+              which have null in the batch.
+            - "numpy": a :class:`dict` from a column name to a
+              :class:`numpy.ndarray`, which is a :class:`numpy.ma.MaskedArray`
+              if the column has null in the batch.
+            - "arrow": a :class:`pyarrow.RecordBatch`
+
+    Yields:
+        batches of at most `batch_size` rows
+    """
+    if output == "numpy" and _optional_module("numpy") is None:
+        raise ImportError("numpy is required for output='numpy'")
+    if output == "arrow" and _optional_module("pyarrow") is None:
+        raise ImportError("pyarrow is required for output='arrow'")
+    if output not in ("array", "numpy", "arrow"):
+        raise ValueError(f"Unknown output: {output}")
+
+    unpacker = msgpack.Unpacker(
+        stream,  # type: ignore[arg-type]
+        raw=False,
+        max_buffer_size=1000 * 1024**2,  # type: ignore[arg-type]
+    )
+    try:
+        width = unpacker.read_array_header()
+    except msgpack.OutOfData:
+        return
+    if schema:
+        names = column_names([str(column[0]) for column in schema])
+        typecodes = [column_typecode(str(column[1])) for column in schema]
+    else:
+        names = [f"_c{i}" for i in range(width)]
+        typecodes: list[str | None] = [None] * width
+    if width != len(names):
+        raise ValueError(f"Expected {len(names)} columns but got {width}")
+
+    while width is not None:
+        columns = [_Column(typecode) for typecode in typecodes]
+        appends = [column.values.append for column in columns]
+        size = 0
+        while True:
+            for i in range(width):
+                value = unpacker.unpack()
+                try:
+                    appends[i](value)
+                except (TypeError, OverflowError):
+                    columns[i].append_slow(value)
+                    appends[i] = columns[i].values.append
+            size += 1
+            try:
+                width = unpacker.read_array_header()
+            except msgpack.OutOfData:
+                width = None
+                break
+            if width != len(names):
+                raise ValueError(f"Expected {len(names)} columns but got {width}")
+            if batch_size <= size:
+                break
+        yield _to_batch(names, columns, output)
+
+
+def _to_batch(names: list[str], columns: list[_Column], output: ColumnOutput) -> Any:
+    if output == "numpy":
+        return {
+            name: column.to_numpy() for name, column in zip(names, columns, strict=True)
+        }
+    if output == "arrow":
+        return _optional_module("pyarrow").RecordBatch.from_arrays(
+            [column.to_arrow() for column in columns], names=names
+        )
+    return {
+        name: column.to_array() for name, column in zip(names, columns, strict=True)
+    }
@@ -19,8 +19,12 @@ class Connection:
         result_url: str | None = None,
         priority: Priority | None = None,
         retry_limit: int | None = None,
-        wait_interval: int | None = None,
+        wait_interval: float | None = None,
         wait_callback: Callable[["Cursor"], None] | None = None,
+        wait_timeout: float | None = None,
+        stream: bool | None = None,
+        arraysize: int | None = None,
+        prefetch_chunks: int | None = None,
         **kwargs: Any,
     ) -> None:
         cursor_kwargs: dict[str, Any] = dict()
@@ -38,6 +42,14 @@ class Connection:
             cursor_kwargs["wait_interval"] = wait_interval
         if wait_callback is not None:
             cursor_kwargs["wait_callback"] = wait_callback
+        if wait_timeout is not None:
+            cursor_kwargs["wait_timeout"] = wait_timeout
+        if stream is not None:
+            cursor_kwargs["stream"] = stream
+        if arraysize is not None:
+            cursor_kwargs["arraysize"] = arraysize
+        if prefetch_chunks is not None:
+            cursor_kwargs["prefetch_chunks"] = prefetch_chunks
         self._api = api.API(**kwargs)
         self._cursor_kwargs = cursor_kwargs
 
@@ -1,11 +1,12 @@
 #!/usr/bin/env python
 
-import json
+from collections.abc import Iterator
 from contextlib import AbstractContextManager
 from typing import Any
 
 import urllib3
 
+from tdclient.json_codec import JSONCodec
 from tdclient.types import BytesOrStream
 from tdclient.util import create_url, normalize_connector_config
 
@@ -50,6 +51,12 @@ class ConnectorAPI:
         self, msg: str, res: urllib3.BaseHTTPResponse, body: bytes
     ) -> None: ...
     def checked_json(self, body: bytes, required: list[str]) -> dict[str, Any]: ...
+    def checked_json_items(
+        self, res: urllib3.BaseHTTPResponse, key: str | None
+    ) -> Iterator[Any]: ...
+
+    # Attributes from API class
+    _json: JSONCodec
 
     def connector_guess(self, job: dict[str, Any] | bytes) -> dict[str, Any]:
         """Guess the Data Connector configuration
@@ -114,7 +121,7 @@ class ConnectorAPI:
         headers = {"content-type": "application/json; charset=utf-8"}
         if isinstance(job, dict):
             job = {"config": normalize_connector_config(job)}
-            payload = json.dumps(job).encode("utf-8")
+            payload = self._json.dumps(job)
         else:
             # Not checking the format. Assuming the right format
             payload = job
@@ -135,7 +142,7 @@ class ConnectorAPI:
              :class:`dict`
         """
         headers = {"content-type": "application/json; charset=utf-8"}
-        payload = json.dumps(job).encode("utf-8")
+        payload = self._json.dumps(job)
         with self.post("/v3/bulk_loads/preview", payload, headers=headers) as res:
             code, body = res.status, res.read()
             if code != 200:
@@ -157,7 +164,7 @@ class ConnectorAPI:
         params = dict(job)
         params["database"] = db
         params["table"] = table
-        payload = json.dumps(params).encode("utf-8")
+        payload = self._json.dumps(params)
         with self.post(
             create_url("/v3/job/issue/bulkload/{db}", db=db), payload, headers=headers
         ) as res:
@@ -178,7 +185,23 @@ class ConnectorAPI:
             if code != 200:
                 self.raise_error("DataConnectorSession list retrieve failed", res, body)
             # cannot use `checked_json` since `GET /v3/bulk_loads` returns an array
-            return json.loads(body.decode("utf-8"))
+            return self._json.loads(body)
+
+    def connector_list_each(self) -> Iterator[dict[str, Any]]:
+        """Iterate over the available Data Connector sessions as they are received
+
+        Unlike :meth:`connector_list`, the response is parsed incrementally, so
+        that memory does not grow with the number of sessions.
+
+        Yields:
+             :class:`dict`: a Data Connector session
+        """
+        with self.get("/v3/bulk_loads") as res:
+            if res.status != 200:
+                self.raise_error(
+                    "DataConnectorSession list retrieve failed", res, res.read()
+                )
+            yield from self.checked_json_items(res, None)
 
     def connector_create(
         self,
@@ -228,7 +251,7 @@ class ConnectorAPI:
         params["name"] = name
         params["database"] = database
         params["table"] = table
-        payload = json.dumps(params).encode("utf-8")
+        payload = self._json.dumps(params)
         with self.post("/v3/bulk_loads", payload, headers=headers) as res:
             code, body = res.status, res.read()
             if code != 200:
@@ -266,7 +289,7 @@ class ConnectorAPI:
              :class:`dict`
         """
         headers = {"content-type": "application/json; charset=utf-8"}
-        payload = json.dumps(job).encode("utf-8")
+        payload = self._json.dumps(job)
         with self.put(
             create_url("/v3/bulk_loads/{name}", name=name),
             payload,
@@ -314,7 +337,7 @@ class ConnectorAPI:
                     res,
                     body,
                 )
-            return json.loads(body.decode("utf-8"))
+            return self._json.loads(body)
 
     def connector_run(self, name: str, **kwargs: Any) -> dict[str, Any]:
         """Create a job to execute Data Connector session.
@@ -333,7 +356,7 @@ class ConnectorAPI:
              :class:`dict`
         """
         headers = {"content-type": "application/json; charset=utf-8"}
-        payload = json.dumps(kwargs).encode("utf-8")
+        payload = self._json.dumps(kwargs)
         with self.post(
             create_url("/v3/bulk_loads/{name}/jobs", name=name),
             payload,
@@ -1,32 +1,67 @@
 #!/usr/bin/env python
 
-import time
-from collections.abc import Callable
+import itertools
+from collections.abc import Callable, Iterator
 from typing import TYPE_CHECKING, Any
 
 from tdclient import errors
+from tdclient.polling import poll
 
 if TYPE_CHECKING:
     from tdclient.api import API
 
 
 class Cursor:
+    """DB-API 2.0 cursor
+
+    By default, the whole result of a query is fetched when the job finishes.
+    With ``stream=True``, rows are read from the result while they are fetched,
+    so that the first row is available immediately and memory usage does not
+    grow with the size of the result. ``rowcount`` is -1 in that mode until all
+    rows have been fetched.
+
+    Args:
+        api (:class:`tdclient.api.API`): API to issue queries with
+        wait_interval (int, optional): seconds between polls of the job status.
+            By default, the job is polled with intervals growing from 0.5 to 10
+            seconds.
+        wait_callback (callable, optional): called with the cursor on every poll
+        wait_timeout (float, optional): seconds to wait for a job to finish before
+            raising :class:`tdclient.errors.WaitTimeoutError`. No timeout by
+            default.
+        stream (bool, optional): fetch rows lazily from the result. Default is False.
+        arraysize (int, optional): number of rows fetched by :meth:`fetchmany`
+            without size when ``stream`` is True. Default is 1.
+        prefetch_chunks (int, optional): number of 1 MiB chunks of the result read
+            ahead on a background thread when ``stream`` is True. Default is 0.
+        **kwargs: passed to :meth:`tdclient.api.API.query`
+    """
+
     def __init__(
         self,
         api: "API",
-        wait_interval: int = 5,
+        wait_interval: float | None = None,
         wait_callback: Callable[["Cursor"], None] | None = None,
+        wait_timeout: float | None = None,
+        stream: bool = False,
+        arraysize: int = 1,
+        prefetch_chunks: int = 0,
         **kwargs: Any,
     ) -> None:
         self._api = api
         self._query_kwargs = kwargs
         self._executed: str | None = None  # Job ID
         self._rows: list[Any] | None = None
+        self._row_iter: Iterator[Any] | None = None
         self._rownumber = 0
         self._rowcount = -1
         self._description: list[Any] = []
         self.wait_interval = wait_interval
         self.wait_callback = wait_callback
+        self.wait_timeout = wait_timeout
+        self.stream = stream
+        self.arraysize = arraysize
+        self.prefetch_chunks = prefetch_chunks
 
     @property
     def api(self) -> "API":
@@ -44,8 +79,16 @@ class Cursor:
         raise errors.NotSupportedError
 
     def close(self) -> None:
+        self._close_rows()
         self._api.close()
 
+    def _close_rows(self) -> None:
+        if self._row_iter is not None:
+            close = getattr(self._row_iter, "close", None)
+            if callable(close):
+                close()
+            self._row_iter = None
+
     def execute(self, query: str, args: dict[str, Any] | None = None) -> str | None:
         if args is not None:
             if not isinstance(args, dict):  # type: ignore[reportUnnecessaryIsInstance]
@@ -53,6 +96,7 @@ class Cursor:
                     "args must be a dict for named placeholders"
                 )
             query = query.format(**args)
+        self._close_rows()
         self._executed = self._api.query(query, **self._query_kwargs)
         self._rows = None
         self._rownumber = 0
@@ -75,24 +119,35 @@ class Cursor:
     def _do_execute(self) -> None:
         self._check_executed()
         assert self._executed is not None
-        if self._rows is None:
-            status = self._api.job_status(self._executed)
-            if status == "success":
-                self._rows = self._api.job_result(self._executed)
-                self._rownumber = 0
-                self._rowcount = len(self._rows)
-                job = self._api.show_job(self._executed)
-                self._description = self._result_description(
-                    job.get("hive_result_schema", [])
+        if self._rows is None and self._row_iter is None:
+            job_id = self._executed
+
+            def finished() -> bool:
+                status = self._api.job_status(job_id)
+                if status in ["error", "killed"]:
+                    raise errors.InternalError(f"job error: {job_id}: {status}")
+                return status == "success"
+
+            wait_callback = self.wait_callback
+            poll(
+                finished,
+                timeout=self.wait_timeout,
+                wait_interval=self.wait_interval,
+                callback=(lambda: wait_callback(self)) if wait_callback else None,
+            )
+            if self.stream:
+                self._row_iter = self._api.job_result_format_each(
+                    job_id, "msgpack", prefetch_chunks=self.prefetch_chunks
                 )
+                self._rowcount = -1
             else:
-                if status in ["error", "killed"]:
-                    raise errors.InternalError(f"job error: {self._executed}: {status}")
-                else:
-                    time.sleep(self.wait_interval)
-                    if callable(self.wait_callback):
-                        self.wait_callback(self)
-                    return self._do_execute()
+                self._rows = self._api.job_result(job_id)
+                self._rowcount = len(self._rows)
+            self._rownumber = 0
+            job = self._api.show_job(job_id)
+            self._description = self._result_description(
+                job.get("hive_result_schema", [])
+            )
 
     def _result_description(
         self, result_schema: list[Any] | None
@@ -107,47 +162,70 @@ class Cursor:
         """
         Fetch the next row of a query result set, returning a single sequence, or `None` when no more data is available.
         """
-        self._check_executed()
-        assert self._rows is not None
-        if self._rownumber < self._rowcount:
-            row = self._rows[self._rownumber]
-            self._rownumber += 1
-            return row
-        else:
-            return None
+        rows = self._fetch(1)
+        return rows[0] if rows else None
 
     def fetchmany(self, size: int | None = None) -> list[Any]:
         """
         Fetch the next set of rows of a query result, returning a sequence of sequences (e.g. a list of tuples).
         An empty sequence is returned when no more rows are available.
+
+        With ``stream=True``, the number of rows to fetch is `size`, or :attr:`arraysize` if it is not given,
+        and fewer rows are returned when not as many rows are available. Otherwise, all remaining rows are
+        fetched if `size` is not given, and :class:`tdclient.errors.InternalError` is raised if fewer than
+        `size` rows are available.
         """
+        if self.stream:
+            return self._fetch(self.arraysize if size is None else size)
         if size is None:
             return self.fetchall()
-        else:
-            self._check_executed()
-            assert self._rows is not None
-            if self._rownumber + size - 1 < self._rowcount:
-                rows = self._rows[self._rownumber : self._rownumber + size]
-                self._rownumber += size
-                return rows
-            else:
-                raise errors.InternalError(
-                    f"index out of bound ({self._rownumber} out of {self._rowcount})"
-                )
+        self._check_executed()
+        if self._rownumber + size - 1 < self._rowcount:
+            return self._fetch(size)
+        raise errors.InternalError(
+            f"index out of bound ({self._rownumber} out of {self._rowcount})"
+        )
 
     def fetchall(self) -> list[Any]:
         """
         Fetch all (remaining) rows of a query result, returning them as a sequence of sequences (e.g. a list of tuples).
         Note that the cursor's arraysize attribute can affect the performance of this operation.
         """
+        return self._fetch(None)
+
+    def __iter__(self) -> "Cursor":
+        return self
+
+    def __next__(self) -> Any:
+        rows = self._fetch(1)
+        if not rows:
+            raise StopIteration
+        return rows[0]
+
+    def _fetch(self, size: int | None) -> list[Any]:
         self._check_executed()
-        assert self._rows is not None
-        if self._rownumber < self._rowcount:
-            rows = self._rows[self._rownumber :]
-            self._rownumber = self._rowcount
+        if self._row_iter is not None:
+            rows = list(
+                self._row_iter
+                if size is None
+                else itertools.islice(self._row_iter, size)
+            )
+            self._rownumber += len(rows)
+            if size is None or len(rows) < size:
+                self._rowcount = self._rownumber
+                self._close_rows()
             return rows
-        else:
+        if self._rows is None:
+            # all rows of a streaming result have been fetched
             return []
+        end = (
+            self._rowcount
+            if size is None
+            else min(self._rownumber + size, self._rowcount)
+        )
+        rows = self._rows[self._rownumber : end]
+        self._rownumber = max(self._rownumber, end)
+        return rows
 
     def nextset(self) -> None:
         raise errors.NotSupportedError
@@ -9,9 +9,16 @@ class ParameterValidationError(Exception):
 
 # Generic API error
 class APIError(Exception):
-    """Base exception for API-related errors."""
+    """Base exception for API-related errors.
 
-    pass
+    Attributes:
+        status (int): HTTP status of the response which caused the error, or
+            `None` if it was not caused by a response
+    """
+
+    def __init__(self, *args: object, status: int | None = None) -> None:
+        super().__init__(*args)
+        self.status = status
 
 
 # 401 API errors
@@ -42,6 +49,23 @@ class NotFoundError(APIError):
     pass
 
 
+# Incomplete or corrupted downloads
+class DownloadError(APIError):
+    """Exception raised when a job result cannot be downloaded completely."""
+
+    pass
+
+
+# Timeouts of waiting for jobs and bulk imports
+class WaitTimeoutError(TimeoutError, RuntimeError):
+    """Exception raised when a job or a bulk import is not ready before a timeout.
+
+    It is also a :class:`RuntimeError`, which was raised before.
+    """
+
+    pass
+
+
 # PEP 0249 errors
 class Error(Exception):
     """Base class for database-related errors (PEP 249)."""
@@ -0,0 +1,791 @@
+#!/usr/bin/env python
+
+import csv
+import email.parser
+import gzip
+import http.server
+import io
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse as urlparse
+from collections.abc import Callable, Iterable
+from typing import Any
+
+import msgpack
+
+#: size of the blocks in which request and response bodies are transferred
+BLOCK_SIZE = 64 * 1024
+
+#: schema of the results of queries not registered by `FakeServer.add_result`
+DEFAULT_SCHEMA: list[list[str]] = [["_c0", "bigint"]]
+
+_Response = tuple[int, dict[str, str], bytes]
+
+
+def _format_date(t: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime(t))
+
+
+def _json_response(obj: Any, status: int = 200) -> _Response:
+    return (status, {"Content-Type": "application/json"}, json.dumps(obj).encode())
+
+
+def _error(status: int, message: str) -> _Response:
+    return _json_response({"error": message, "message": message}, status)
+
+
+def encode_result(rows: Iterable[Any], format: str, header: list[str] | None) -> bytes:
+    """Encode rows of a job result as the API does
+
+    Args:
+        rows (iterable): rows of the result, each a list of values
+        format (str): "msgpack", "msgpack.gz", "json", "csv" or "tsv"
+        header (list of str): column names written as the first row of "csv"
+            and "tsv" results, or `None`
+
+    Returns:
+        bytes: the encoded result
+    """
+    if format in ("msgpack", "msgpack.gz"):
+        packer = msgpack.Packer()
+        data = b"".join(packer.pack(row) for row in rows)
+        if format == "msgpack.gz":
+            data = gzip.compress(data, compresslevel=1, mtime=0)
+        return data
+    if format == "json":
+        return b"".join(json.dumps(row).encode() + b"\n" for row in rows)
+    if format in ("csv", "tsv"):
+        buf = io.StringIO()
+        writer = csv.writer(
+            buf, delimiter="," if format == "csv" else "\t", lineterminator="\n"
+        )
+        if header is not None:
+            writer.writerow(header)
+        writer.writerows(rows)
+        return buf.getvalue().encode()
+    raise ValueError(f"unsupported result format: {format!r}")
+
+
+class FakeJob:
+    """A job of :class:`FakeServer`
+
+    Jobs are "running" for `duration` seconds after they are issued and
+    "success" afterwards, unless `status` is set explicitly.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        type: str,
+        database: str,
+        query: str,
+        rows: list[Any],
+        schema: list[list[str]],
+        duration: float = 0.0,
+        status: str | None = None,
+    ) -> None:
+        self.job_id = job_id
+        self.type = type
+        self.database = database
+        self.query = query
+        self.rows = rows
+        self.schema = schema
+        self.duration = duration
+        self.status = status
+        self.created_at = time.time()
+        self._results: dict[str, bytes] = {}
+
+    def current_status(self) -> str:
+        if self.status is not None:
+            return self.status
+        if time.time() < self.created_at + self.duration:
+            return "running"
+        return "success"
+
+    def result(self, format: str, header: bool = False) -> bytes:
+        key = f"{format}:{header}"
+        data = self._results.get(key)
+        if data is None:
+            names = [column[0] for column in self.schema] if header else None
+            data = self._results[key] = encode_result(self.rows, format, names)
+        return data
+
+    def to_dict(self) -> dict[str, Any]:
+        status = self.current_status()
+        finished = status in ("success", "error", "killed")
+        end_at = self.created_at + self.duration if finished else None
+        return {
+            "job_id": self.job_id,
+            "type": self.type,
+            "database": self.database,
+            "query": self.query,
+            "status": status,
+            "url": f"https://console.treasuredata.com/jobs/{self.job_id}",
+            "created_at": _format_date(self.created_at),
+            "updated_at": _format_date(end_at or self.created_at),
+            "start_at": _format_date(self.created_at),
+            "end_at": None if end_at is None else _format_date(end_at),
+            "duration": None if end_at is None else int(self.duration),
+            "cpu_time": None,
+            "result_size": len(self.result("msgpack.gz")) if finished else None,
+            "num_records": len(self.rows) if finished else None,
+            "hive_result_schema": json.dumps(self.schema),
+            "result": "",
+            "priority": 0,
+            "retry_limit": 0,
+            "user_name": "fake",
+            "organization": None,
+            "debug": {"cmdout": "", "stderr": ""},
+            "linked_result_export_job_id": None,
+            "result_export_target_job_id": None,
+        }
+
+
+class FakeRequest:
+    """A request received by :class:`FakeServer`"""
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+        route: str,
+        params: dict[str, str],
+    ) -> None:
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.route = route
+        self.params = params
+        url = urlparse.urlsplit(path)
+        self.query = dict(urlparse.parse_qsl(url.query))
+
+    def form(self) -> dict[str, str]:
+        """Return the fields of a urlencoded or multipart form body"""
+        content_type = self.headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = email.parser.BytesParser().parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + self.body
+            )
+            fields: dict[str, str] = {}
+            for part in message.get_payload():  # type: ignore[reportUnknownVariableType]
+                name = part.get_param("name", header="content-disposition")  # type: ignore[reportUnknownMemberType]
+                payload = part.get_payload(decode=True)  # type: ignore[reportUnknownMemberType]
+                fields[str(name)] = bytes(payload).decode()  # type: ignore[reportUnknownArgumentType]
+            return fields
+        return dict(urlparse.parse_qsl(self.body.decode()))
+
+
+class FakeServer:
+    """In-process fake of the Treasure Data API for tests and benchmarks
+
+    A threaded HTTP server on a local port implements, in memory, the
+    endpoints of jobs (issue, status, show, list, kill and results with
+    ``Range`` support), databases and tables (list and create), table imports
+    and bulk imports. Clients are pointed at it by `endpoint`:
+
+    .. code-block:: python
+
+        with FakeServer(latency=0.05, bandwidth=10 * 1024**2) as server:
+            server.add_table("db", "table")
+            server.add_result("SELECT 1", [[1]])
+            client = tdclient.Client("APIKEY", endpoint=server.endpoint)
+            job = client.query("db", "SELECT 1")
+
+    Failures are injected by `failure_rate` at random, or deterministically by
+    :meth:`fail_next`. A failure is answered with `failure_status`, or by
+    closing the connection without a response when it is `None`.
+
+    Args:
+        latency (float): seconds waited before answering each request
+        bandwidth (float, optional): bytes per second at which each request
+            and response body is transferred. Unlimited by default.
+        failure_rate (float): fraction of requests which fail at random
+        failure_status (int, optional): status of failed requests. Default is
+            503.
+        failure_routes (iterable of str, optional): route templates, e.g.
+            "/v3/job/result/{job_id}", to which random failures are limited
+        job_duration (float): seconds issued jobs are running
+        seed (int, optional): seed of the random failures
+    """
+
+    _ROUTES: list[tuple[str, str]] = [
+        ("POST", "/v3/job/issue/{type}/{db}"),
+        ("GET", "/v3/job/status/{job_id}"),
+        ("GET", "/v3/job/show/{job_id}"),
+        ("GET", "/v3/job/result/{job_id}"),
+        ("GET", "/v3/job/list"),
+        ("POST", "/v3/job/kill/{job_id}"),
+        ("GET", "/v3/database/list"),
+        ("POST", "/v3/database/create/{db}"),
+        ("GET", "/v3/table/list/{db}"),
+        ("POST", "/v3/table/create/{db}/{table}/{type}"),
+        ("PUT", "/v3/table/import/{db}/{table}/{format}"),
+        ("PUT", "/v3/table/import_with_id/{db}/{table}/{unique_id}/{format}"),
+        ("POST", "/v3/bulk_import/create/{name}/{db}/{table}"),
+        ("POST", "/v3/bulk_import/delete/{name}"),
+        ("GET", "/v3/bulk_import/show/{name}"),
+        ("GET", "/v3/bulk_import/list"),
+        ("GET", "/v3/bulk_import/list_parts/{name}"),
+        ("PUT", "/v3/bulk_import/upload_part/{name}/{part_name}"),
+        ("POST", "/v3/bulk_import/delete_part/{name}/{part_name}"),
+        ("POST", "/v3/bulk_import/freeze/{name}"),
+        ("POST", "/v3/bulk_import/unfreeze/{name}"),
+        ("POST", "/v3/bulk_import/perform/{name}"),
+        ("POST", "/v3/bulk_import/commit/{name}"),
+    ]
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        bandwidth: float | None = None,
+        failure_rate: float = 0.0,
+        failure_status: int | None = 503,
+        failure_routes: Iterable[str] | None = None,
+        job_duration: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.failure_routes = None if failure_routes is None else set(failure_routes)
+        self.job_duration = job_duration
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._failures: list[tuple[str | None, int | None]] = []
+        self._routes = [
+            (
+                method,
+                template,
+                re.compile(
+                    "^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", template) + "$"
+                ),
+                getattr(self, "_" + re.sub(r"\W+", "_", template[4:]).strip("_")),
+            )
+            for method, template in self._ROUTES
+        ]
+        #: results of queries by query string, as pairs of rows and schema
+        self.results: dict[str, tuple[list[Any], list[list[str]]]] = {}
+        self.jobs: dict[str, FakeJob] = {}
+        #: tables by name by database name
+        self.databases: dict[str, dict[str, dict[str, Any]]] = {}
+        #: imported data as tuples of database, table, format and body
+        self.imports: list[tuple[str, str, str, bytes]] = []
+        self.bulk_imports: dict[str, dict[str, Any]] = {}
+        #: uploaded parts by part name by bulk import name
+        self.bulk_import_parts: dict[str, dict[str, bytes]] = {}
+        #: received requests as pairs of method and path
+        self.requests: list[tuple[str, str]] = []
+        self._server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), _make_handler(self)
+        )
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def endpoint(self) -> str:
+        """URL of the server, to be given as `endpoint` of clients"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host!s}:{port}/"
+
+    def start(self) -> "FakeServer":
+        """Start serving requests on a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, args=(0.01,), daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving requests and close the listening socket"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def add_database(self, db: str) -> None:
+        """Create a database if it does not exist"""
+        with self._lock:
+            self.databases.setdefault(db, {})
+
+    def add_table(
+        self, db: str, table: str, schema: list[list[str]] | None = None
+    ) -> None:
+        """Create a table, and its database if it does not exist"""
+        with self._lock:
+            self._create_table(db, table, "log", schema or [])
+
+    def add_result(
+        self, query: str, rows: list[Any], schema: list[list[str]] | None = None
+    ) -> None:
+        """Register the result of jobs issued for a query
+
+        Jobs of other queries have empty results.
+
+        Args:
+            query (str): query string
+            rows (list): rows of the result, each a list of values
+            schema (list, optional): pairs of column name and type
+        """
+        with self._lock:
+            self.results[query] = (rows, schema or DEFAULT_SCHEMA)
+
+    def add_job(
+        self,
+        rows: list[Any],
+        schema: list[list[str]] | None = None,
+        status: str | None = None,
+        type: str = "presto",
+        db: str = "sample_datasets",
+        query: str = "",
+    ) -> str:
+        """Create a finished job holding a result
+
+        Args:
+            rows (list): rows of the result, each a list of values
+            schema (list, optional): pairs of column name and type
+            status (str, optional): status of the job. "success" by default.
+            type (str): type of the job
+            db (str): database of the job
+            query (str): query of the job
+
+        Returns:
+            str: ID of the job
+        """
+        with self._lock:
+            job = self._create_job(type, db, query, rows, schema, 0.0)
+            job.status = status
+            return job.job_id
+
+    def fail_next(
+        self, count: int = 1, status: int | None = 503, route: str | None = None
+    ) -> None:
+        """Fail the next requests
+
+        Args:
+            count (int): number of requests to fail
+            status (int, optional): status of the responses, or `None` to close
+                connections without a response
+            route (str, optional): fail only requests of this route template,
+                e.g. "/v3/job/result/{job_id}"
+        """
+        with self._lock:
+            self._failures.extend([(route, status)] * count)
+
+    def _create_job(
+        self,
+        type: str,
+        db: str,
+        query: str,
+        rows: list[Any] | None,
+        schema: list[list[str]] | None,
+        duration: float,
+    ) -> FakeJob:
+        # called with the lock held
+        if rows is None:
+            rows, schema = self.results.get(query, ([], schema))
+        job_id = str(next(self._job_ids))
+        job = self.jobs[job_id] = FakeJob(
+            job_id, type, db, query, rows, schema or DEFAULT_SCHEMA, duration
+        )
+        return job
+
+    def _create_table(
+        self, db: str, table: str, type: str, schema: list[list[str]]
+    ) -> None:
+        # called with the lock held
+        now = _format_date(time.time())
+        self.databases.setdefault(db, {})[table] = {
+            "id": sum(len(tables) for tables in self.databases.values()) + 1,
+            "name": table,
+            "type": type,
+            "count": 0,
+            "estimated_storage_size": 0,
+            "schema": json.dumps(schema),
+            "created_at": now,
+            "updated_at": now,
+            "counter_updated_at": None,
+            "last_log_timestamp": None,
+            "expire_days": None,
+            "delete_protected": False,
+            "include_v": True,
+        }
+
+    def _failure(self, route: str) -> tuple[bool, int | None]:
+        with self._lock:
+            for i, (failure_route, status) in enumerate(self._failures):
+                if failure_route is None or failure_route == route:
+                    del self._failures[i]
+                    return (True, status)
+            if 0 < self.failure_rate and (
+                self.failure_routes is None or route in self.failure_routes
+            ):
+                if self._random.random() < self.failure_rate:
+                    return (True, self.failure_status)
+        return (False, None)
+
+    def _dispatch(
+        self, method: str, path: str
+    ) -> tuple[str, dict[str, str], Callable[[FakeRequest], _Response]] | None:
+        url_path = urlparse.urlsplit(path).path
+        for route_method, template, pattern, handler in self._routes:
+            if route_method != method:
+                continue
+            m = pattern.match(url_path)
+            if m is not None:
+                params = {k: urlparse.unquote(v) for k, v in m.groupdict().items()}
+                return (template, params, handler)
+        return None
+
+    def _job(self, request: FakeRequest) -> FakeJob | None:
+        return self.jobs.get(request.params["job_id"])
+
+    # jobs
+
+    def _job_issue_type_db(self, request: FakeRequest) -> _Response:
+        form = request.form()
+        with self._lock:
+            if request.params["db"] not in self.databases:
+                return _error(404, f"Database '{request.params['db']}' not found")
+            job = self._create_job(
+                request.params["type"],
+                request.params["db"],
+                form.get("query", ""),
+                None,
+                None,
+                self.job_duration,
+            )
+        return _json_response({"job_id": job.job_id, "database": job.database})
+
+    def _job_status_job_id(self, request: FakeRequest) -> _Response:
+        job = self._job(request)
+        if job is None:
+            return _error(404, "Job not found")
+        m = job.to_dict()
+        keys = ("job_id", "status", "created_at", "updated_at", "start_at", "end_at")
+        status = {k: m[k] for k in keys}
+        status.update(
+            cpu_time=m["cpu_time"],
+            result_size=m["result_size"],
+            num_records=m["num_records"],
+            duration=m["duration"],
+        )
+        return _json_response(status)
+
+    def _job_show_job_id(self, request: FakeRequest) -> _Response:
+        job = self._job(request)
+        if job is None:
+            return _error(404, "Job not found")
+        return _json_response(job.to_dict())
+
+    def _job_result_job_id(self, request: FakeRequest) -> _Response:
+        job = self._job(request)
+        if job is None:
+            return _error(404, "Job not found")
+        if job.current_status() != "success":
+            return _error(422, f"Job {job.job_id} is not finished")
+        format = request.query.get("format", "json")
+        header = request.query.get("header", "").lower() == "true"
+        try:
+            data = job.result(format, header)
+        except ValueError as error:
+            return _error(400, str(error))
+        headers = {"Content-Type": "application/octet-stream"}
+        range_header = request.headers.get("range")
+        if range_header is None:
+            return (200, headers, data)
+        m = re.fullmatch(r"bytes=(\d+)-(\d*)", range_header.strip())
+        if m is None or len(data) <= int(m.group(1)):
+            headers["Content-Range"] = f"bytes */{len(data)}"
+            return (416, headers, b"")
+        start = int(m.group(1))
+        end = min(int(m.group(2) or len(data) - 1), len(data) - 1)
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+        return (206, headers, data[start : end + 1])
+
+    def _job_list(self, request: FakeRequest) -> _Response:
+        with self._lock:
+            jobs = [job.to_dict() for job in reversed(self.jobs.values())]
+        status = request.query.get("status")
+        if status is not None:
+            jobs = [job for job in jobs if job["status"] == status]
+        start = int(request.query.get("from", 0))
+        end = request.query.get("to")
+        jobs = jobs[start : None if end is None else int(end) + 1]
+        return _json_response(
+            {"count": len(jobs), "from": start, "to": end, "jobs": jobs}
+        )
+
+    def _job_kill_job_id(self, request: FakeRequest) -> _Response:
+        job = self._job(request)
+        if job is None:
+            return _error(404, "Job not found")
+        former_status = job.current_status()
+        if former_status == "running":
+            job.status = "killed"
+        return _json_response({"job_id": job.job_id, "former_status": former_status})
+
+    # databases and tables
+
+    def _database_list(self, request: FakeRequest) -> _Response:
+        now = _format_date(time.time())
+        with self._lock:
+            databases = [
+                {
+                    "name": name,
+                    "count": sum(t["count"] for t in tables.values()),
+                    "created_at": now,
+                    "updated_at": now,
+                    "permission": "administrator",
+                    "delete_protected": False,
+                }
+                for name, tables in self.databases.items()
+            ]
+        return _json_response({"databases": databases})
+
+    def _database_create_db(self, request: FakeRequest) -> _Response:
+        db = request.params["db"]
+        with self._lock:
+            if db in self.databases:
+                return _error(409, f"Database '{db}' already exists")
+            self.databases[db] = {}
+        return _json_response({"database": db})
+
+    def _table_list_db(self, request: FakeRequest) -> _Response:
+        db = request.params["db"]
+        with self._lock:
+            if db not in self.databases:
+                return _error(404, f"Database '{db}' not found")
+            tables = list(self.databases[db].values())
+        return _json_response({"database": db, "tables": tables})
+
+    def _table_create_db_table_type(self, request: FakeRequest) -> _Response:
+        db, table = request.params["db"], request.params["table"]
+        with self._lock:
+            if db not in self.databases:
+                return _error(404, f"Database '{db}' not found")
+            if table in self.databases[db]:
+                return _error(409, f"Table '{table}' already exists")
+            self._create_table(db, table, request.params["type"], [])
+        return _json_response(
+            {"database": db, "table": table, "type": request.params["type"]}
+        )
+
+    def _table_import_db_table_format(self, request: FakeRequest) -> _Response:
+        db, table = request.params["db"], request.params["table"]
+        started_at = time.monotonic()
+        with self._lock:
+            if table not in self.databases.get(db, {}):
+                return _error(404, f"Table '{db}.{table}' not found")
+            self.imports.append((db, table, request.params["format"], request.body))
+        return _json_response(
+            {
+                "database": db,
+                "table": table,
+                "elapsed_time": time.monotonic() - started_at,
+            }
+        )
+
+    _table_import_with_id_db_table_unique_id_format = _table_import_db_table_format
+
+    # bulk imports
+
+    def _bulk_import(self, request: FakeRequest) -> dict[str, Any] | None:
+        return self.bulk_imports.get(request.params["name"])
+
+    def _bulk_import_create_name_db_table(self, request: FakeRequest) -> _Response:
+        name, db, table = (request.params[k] for k in ("name", "db", "table"))
+        with self._lock:
+            if table not in self.databases.get(db, {}):
+                return _error(404, f"Table '{db}.{table}' not found")
+            if name in self.bulk_imports:
+                return _error(409, f"Bulk import '{name}' already exists")
+            self.bulk_imports[name] = {
+                "name": name,
+                "database": db,
+                "table": table,
+                "status": "uploading",
+                "upload_frozen": False,
+                "job_id": None,
+                "valid_parts": None,
+                "error_parts": None,
+                "valid_records": None,
+                "error_records": None,
+            }
+            self.bulk_import_parts[name] = {}
+        return _json_response({"bulk_import": name})
+
+    def _bulk_import_delete_name(self, request: FakeRequest) -> _Response:
+        name = request.params["name"]
+        with self._lock:
+            if self.bulk_imports.pop(name, None) is None:
+                return _error(404, f"Bulk import '{name}' not found")
+            del self.bulk_import_parts[name]
+        return _json_response({"bulk_import": name})
+
+    def _bulk_import_show_name(self, request: FakeRequest) -> _Response:
+        with self._lock:
+            bulk_import = self._bulk_import(request)
+            if bulk_import is None:
+                return _error(404, "Bulk import not found")
+            return _json_response(bulk_import)
+
+    def _bulk_import_list(self, request: FakeRequest) -> _Response:
+        with self._lock:
+            return _json_response({"bulk_imports": list(self.bulk_imports.values())})
+
+    def _bulk_import_list_parts_name(self, request: FakeRequest) -> _Response:
+        name = request.params["name"]
+        with self._lock:
+            if name not in self.bulk_imports:
+                return _error(404, f"Bulk import '{name}' not found")
+            parts = sorted(self.bulk_import_parts[name])
+        return _json_response({"name": name, "parts": parts})
+
+    def _bulk_import_upload_part_name_part_name(
+        self, request: FakeRequest
+    ) -> _Response:
+        name = request.params["name"]
+        with self._lock:
+            bulk_import = self._bulk_import(request)
+            if bulk_import is None:
+                return _error(404, f"Bulk import '{name}' not found")
+            if bulk_import["upload_frozen"]:
+                return _error(409, f"Bulk import '{name}' is frozen")
+            self.bulk_import_parts[name][request.params["part_name"]] = request.body
+        return _json_response({"name": name, "part_name": request.params["part_name"]})
+
+    def _bulk_import_delete_part_name_part_name(
+        self, request: FakeRequest
+    ) -> _Response:
+        name = request.params["name"]
+        with self._lock:
+            parts = self.bulk_import_parts.get(name, {})
+            if parts.pop(request.params["part_name"], None) is None:
+                return _error(404, "Bulk import part not found")
+        return _json_response({"name": name, "part_name": request.params["part_name"]})
+
+    def _set_upload_frozen(self, request: FakeRequest, frozen: bool) -> _Response:
+        with self._lock:
+            bulk_import = self._bulk_import(request)
+            if bulk_import is None:
+                return _error(404, "Bulk import not found")
+            bulk_import["upload_frozen"] = frozen
+        return _json_response({"bulk_import": request.params["name"]})
+
+    def _bulk_import_freeze_name(self, request: FakeRequest) -> _Response:
+        return self._set_upload_frozen(request, True)
+
+    def _bulk_import_unfreeze_name(self, request: FakeRequest) -> _Response:
+        return self._set_upload_frozen(request, False)
+
+    def _bulk_import_perform_name(self, request: FakeRequest) -> _Response:
+        with self._lock:
+            bulk_import = self._bulk_import(request)
+            if bulk_import is None:
+                return _error(404, "Bulk import not found")
+            job = self._create_job(
+                "bulk_import", bulk_import["database"], "", [], None, self.job_duration
+            )
+            parts = self.bulk_import_parts[bulk_import["name"]]
+            bulk_import.update(
+                status="ready",
+                job_id=job.job_id,
+                valid_parts=len(parts),
+                error_parts=0,
+                valid_records=0,
+                error_records=0,
+            )
+        return _json_response({"job_id": job.job_id})
+
+    def _bulk_import_commit_name(self, request: FakeRequest) -> _Response:
+        with self._lock:
+            bulk_import = self._bulk_import(request)
+            if bulk_import is None:
+                return _error(404, "Bulk import not found")
+            bulk_import["status"] = "committed"
+        return _json_response({"bulk_import": request.params["name"]})
+
+
+def _make_handler(fake: FakeServer) -> type[http.server.BaseHTTPRequestHandler]:
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # small responses are not delayed by waiting for ACKs of their headers
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _throttle(self, size: int) -> None:
+            if fake.bandwidth:
+                time.sleep(size / fake.bandwidth)
+
+        def _read_body(self) -> bytes:
+            remaining = int(self.headers.get("content-length") or 0)
+            blocks: list[bytes] = []
+            while 0 < remaining:
+                block = self.rfile.read(min(remaining, BLOCK_SIZE))
+                if not block:
+                    break
+                blocks.append(block)
+                remaining -= len(block)
+                self._throttle(len(block))
+            return b"".join(blocks)
+
+        def _write(self, response: _Response) -> None:
+            status, headers, body = response
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            view = memoryview(body)
+            for offset in range(0, len(body), BLOCK_SIZE):
+                self.wfile.write(view[offset : offset + BLOCK_SIZE])
+                self._throttle(min(BLOCK_SIZE, len(body) - offset))
+
+        def _handle(self) -> None:
+            with fake._lock:  # type: ignore[reportPrivateUsage]
+                fake.requests.append((self.command, self.path))
+            dispatched = fake._dispatch(self.command, self.path)  # type: ignore[reportPrivateUsage]
+            route = self.path if dispatched is None else dispatched[0]
+            failed, status = fake._failure(route)  # type: ignore[reportPrivateUsage]
+            if failed and status is None:
+                # drop the connection as a reset by a proxy would
+                self.close_connection = True
+                return
+            body = self._read_body()
+            if fake.latency:
+                time.sleep(fake.latency)
+            if failed and status is not None:
+                response = _error(status, "Injected failure")
+            elif dispatched is None:
+                response = _error(404, f"Unknown endpoint: {self.command} {self.path}")
+            else:
+                template, params, handler = dispatched
+                headers = {k.lower(): v for (k, v) in self.headers.items()}
+                request = FakeRequest(
+                    self.command, self.path, headers, body, template, params
+                )
+                response = handler(request)
+            self._write(response)
+
+        do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    return Handler
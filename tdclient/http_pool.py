@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+import socket
+import threading
+from typing import Any
+
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+#: connections kept per host when no concurrency is declared
+DEFAULT_MAXSIZE = 8
+
+
+class PoolStats:
+    """Counters of connections shared by the pools of an :class:`tdclient.api.API`
+
+    Attributes:
+        requests (int): number of requests sent
+        reused (int): number of requests sent on an already open connection
+        new_connections (int): number of connections opened
+        tls_handshakes (int): number of connections opened with TLS
+        discarded (int): number of connections closed because their pool was full
+        in_use (int): number of connections taken out of the pools
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.reused = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.discarded = 0
+        self.in_use = 0
+
+    def count_request(self, conn: HTTPConnection, tls: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            if conn.is_closed:
+                self.new_connections += 1
+                if tls:
+                    self.tls_handshakes += 1
+            else:
+                self.reused += 1
+
+    def count_checkout(self, delta: int) -> None:
+        with self._lock:
+            self.in_use += delta
+
+    def count_discard(self) -> None:
+        with self._lock:
+            self.discarded += 1
+
+    def as_dict(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "reused": self.reused,
+                "new_connections": self.new_connections,
+                "tls_handshakes": self.tls_handshakes,
+                "discarded": self.discarded,
+                "in_use": self.in_use,
+            }
+
+
+class CountingPoolMixin(HTTPConnectionPool):
+    """Counting of :class:`CountingHTTPConnectionPool` and
+    :class:`CountingHTTPSConnectionPool` into a :class:`PoolStats`"""
+
+    #: whether connections of the pool are opened with TLS
+    tls = False
+
+    def __init__(self, *args: Any, stats: PoolStats, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+
+    def _get_conn(self, timeout: float | None = None) -> Any:
+        conn = super()._get_conn(timeout)
+        self.stats.count_checkout(1)
+        return conn
+
+    def _put_conn(self, conn: Any) -> None:
+        self.stats.count_checkout(-1)
+        if conn is not None and self.pool is not None and self.pool.full():
+            self.stats.count_discard()
+        super()._put_conn(conn)
+
+    def _validate_conn(self, conn: Any) -> None:
+        # HTTPS connections are opened here, so check before connecting
+        self.stats.count_request(conn, self.tls)
+        super()._validate_conn(conn)
+
+
+class CountingHTTPConnectionPool(CountingPoolMixin, HTTPConnectionPool):
+    """:class:`urllib3.HTTPConnectionPool` updating a :class:`PoolStats`"""
+
+
+class CountingHTTPSConnectionPool(CountingPoolMixin, HTTPSConnectionPool):
+    """:class:`urllib3.HTTPSConnectionPool` updating a :class:`PoolStats`"""
+
+    tls = True
+
+
+def idle_connections(pool: HTTPConnectionPool) -> int:
+    """Return the number of open connections waiting in a pool"""
+    queue = pool.pool
+    if queue is None:
+        return 0
+    with queue.mutex:
+        conns = list(queue.queue)
+    return sum(1 for conn in conns if conn is not None and not conn.is_closed)
+
+
+def keepalive_socket_options(idle: int) -> list[tuple[int, int, int]]:
+    """Return socket options enabling TCP keep-alive probes
+
+    Pooled connections idle behind NAT or load balancers may be dropped
+    silently. Probes keep them open, or detect them dropped before reuse.
+
+    Args:
+        idle (int): seconds of idleness before probes are sent, also used as
+            the interval between probes where the platform allows setting it
+
+    Returns:
+        list: socket options to add to `socket_options` of a pool
+    """
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # TCP_KEEPIDLE on Linux, TCP_KEEPALIVE on macOS
+    keepidle = getattr(socket, "TCP_KEEPIDLE", getattr(socket, "TCP_KEEPALIVE", None))
+    if keepidle is not None:
+        options.append((socket.IPPROTO_TCP, keepidle, idle))
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, idle))
+    return options
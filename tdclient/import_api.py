@@ -2,14 +2,19 @@
 
 import contextlib
 import os
+from collections.abc import Callable
 from contextlib import AbstractContextManager
-from typing import IO, Any
+from typing import IO, TYPE_CHECKING, Any
 
 import urllib3
 
+from tdclient.json_codec import JSONCodec
 from tdclient.types import BytesOrStream, DataFormat, FileLike
 from tdclient.util import create_url
 
+if TYPE_CHECKING:
+    from tdclient.parallel_import import ImportProgress
+
 
 class ImportAPI:
     """Import data into Treasure Data Service.
@@ -30,10 +35,13 @@ class ImportAPI:
         self, msg: str, res: urllib3.BaseHTTPResponse, body: bytes
     ) -> None: ...
     def checked_json(self, body: bytes, required: list[str]) -> dict[str, Any]: ...
-    def _prepare_file(
+    def prepare_file(
         self, file_like: FileLike, fmt: DataFormat, **kwargs: Any
     ) -> IO[bytes]: ...
 
+    # Attributes from API class
+    _json: JSONCodec
+
     def import_data(
         self,
         db: str,
@@ -90,6 +98,10 @@ class ImportAPI:
         format: DataFormat,
         file: FileLike,
         unique_id: str | None = None,
+        chunk_size: int | None = None,
+        num_processes: int | None = None,
+        num_threads: int = 4,
+        progress: "Callable[[ImportProgress], None] | None" = None,
         **kwargs: Any,
     ) -> float:
         """Import data into Treasure Data Service, from an existing file on filesystem.
@@ -104,11 +116,47 @@ class ImportAPI:
             format (str): format of data type (e.g. "msgpack", "json")
             file (str or file-like): a name of a file, or a file-like object contains the data
             unique_id (str): a unique identifier of the data
+            chunk_size (int, optional): when given, the input is split into chunks of
+                about this number of bytes, which are converted in parallel and
+                imported concurrently as separate imports. Each chunk is imported
+                with a unique ID derived from `unique_id`, the position and the
+                content of the chunk, so that importing the same file again does
+                not duplicate records of chunks which have been imported.
+            num_processes (int, optional): number of processes converting chunks.
+                Default is the number of CPUs.
+            num_threads (int, optional): number of concurrent imports of chunks.
+                Default is 4.
+            progress (callable, optional): called with a
+                :class:`tdclient.parallel_import.ImportProgress` every time a
+                chunk has been imported
 
         Returns:
              float represents the elapsed time to import data
         """
-        with contextlib.closing(self._prepare_file(file, format, **kwargs)) as fp:
+        if chunk_size is not None:
+
+            def upload(index: int, digest: str, data: bytes) -> float:
+                return self.import_data(
+                    db, table, "msgpack.gz", data, len(data), unique_id=digest
+                )
+
+            from tdclient.parallel_import import parallel_import
+
+            kwargs.setdefault("json_codec", self._json)
+
+            elapsed = parallel_import(
+                file,
+                format,
+                upload,
+                chunk_size=chunk_size,
+                salt=unique_id or "",
+                num_processes=num_processes,
+                num_threads=num_threads,
+                progress=progress,
+                **kwargs,
+            )
+            return sum(elapsed)
+        with contextlib.closing(self.prepare_file(file, format, **kwargs)) as fp:
             size = os.fstat(fp.fileno()).st_size
             return self.import_data(
                 db, table, "msgpack.gz", fp, size, unique_id=unique_id
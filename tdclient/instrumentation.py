@@ -0,0 +1,390 @@
+#!/usr/bin/env python
+
+import bisect
+import importlib
+import logging
+import threading
+import time
+import urllib.parse as urlparse
+from collections.abc import Iterable
+from typing import Any
+
+from tdclient.retry import RetryAttempt
+
+log = logging.getLogger(__name__)
+
+#: upper bounds in seconds of the buckets of latency histograms
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    float("inf"),
+)
+
+
+def route_template(path: str) -> str:
+    """Return the template of the route of a request path or URL
+
+    Paths made by :func:`tdclient.util.create_url` keep their template, e.g.
+    "/v3/job/status/{job_id}". Numeric segments of other paths are replaced by
+    "{}", so that routes are not told apart by job IDs.
+
+    Args:
+        path (str): path or URL of the request
+
+    Returns:
+        str: the template without the query string
+    """
+    template = getattr(path, "template", None)
+    if template is None:
+        segments = urlparse.urlparse(path).path.split("/")
+        template = "/".join("{}" if s.isdigit() else s for s in segments)
+    return template.split("?", 1)[0]
+
+
+class RequestInfo:
+    """Description of an attempt of a request passed to :class:`Hooks`
+
+    Attributes:
+        method (str): HTTP method
+        url (str): URL of the request
+        route (str): template of the route of the request, e.g.
+            "/v3/job/status/{job_id}"
+        bytes_sent (int): size of the request body, or 0 if it is not known
+            before sending it, e.g. for form fields
+        started_at (float): `time.monotonic()` when the attempt started
+        elapsed (float): seconds until the headers of the response were
+            received or the attempt failed, or `None` until then
+        status (int): status of the response, or `None`
+        error (Exception): error raised by the attempt, or `None`
+    """
+
+    __slots__ = (
+        "method",
+        "url",
+        "route",
+        "bytes_sent",
+        "started_at",
+        "elapsed",
+        "status",
+        "error",
+    )
+
+    def __init__(self, method: str, url: str, route: str, bytes_sent: int) -> None:
+        self.method = method
+        self.url = url
+        self.route = route
+        self.bytes_sent = bytes_sent
+        self.started_at = time.monotonic()
+        self.elapsed: float | None = None
+        self.status: int | None = None
+        self.error: BaseException | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} {self.method} {self.route} "
+            f"status={self.status} elapsed={self.elapsed}>"
+        )
+
+
+class Hooks:
+    """Callbacks on the requests of :class:`tdclient.api.API`
+
+    Methods do nothing by default and are overridden by subclasses. They are
+    called on the thread sending the request, so they should return quickly.
+    Exceptions raised by them are logged and ignored.
+    """
+
+    def on_request_start(self, request: RequestInfo) -> None:
+        """Called before an attempt of a request is sent"""
+
+    def on_response(self, request: RequestInfo) -> None:
+        """Called when the headers of the response of an attempt are received,
+        or when the attempt failed, with `elapsed`, `status` and `error` set
+        """
+
+    def on_retry(self, attempt: RetryAttempt) -> None:
+        """Called before waiting for a retry of a failed attempt"""
+
+    def on_bytes_transferred(
+        self, request: RequestInfo, sent: int, received: int
+    ) -> None:
+        """Called when the response of an attempt is closed
+
+        Args:
+            request (:class:`RequestInfo`): the attempt
+            sent (int): bytes of the request body
+            received (int): bytes of the response body read from the
+                connection, before decompression
+        """
+
+
+class HookList(Hooks):
+    """Hooks calling a list of hooks in order"""
+
+    def __init__(self, hooks: Iterable[Hooks]) -> None:
+        self.hooks = list(hooks)
+
+    def _call(self, name: str, *args: Any) -> None:
+        for hook in self.hooks:
+            try:
+                getattr(hook, name)(*args)
+            except Exception:
+                log.exception("Exception in %s hook", name)
+
+    def on_request_start(self, request: RequestInfo) -> None:
+        self._call("on_request_start", request)
+
+    def on_response(self, request: RequestInfo) -> None:
+        self._call("on_response", request)
+
+    def on_retry(self, attempt: RetryAttempt) -> None:
+        self._call("on_retry", attempt)
+
+    def on_bytes_transferred(
+        self, request: RequestInfo, sent: int, received: int
+    ) -> None:
+        self._call("on_bytes_transferred", request, sent, received)
+
+
+class _RouteMetrics:
+    __slots__ = (
+        "requests",
+        "latency_sum",
+        "latency_max",
+        "buckets",
+        "bytes_sent",
+        "bytes_received",
+        "retries",
+        "errors",
+    )
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.errors: dict[str, int] = {}
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket of the quantile, or the maximum if lower
+        rank = q * self.requests
+        count = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.buckets, strict=True):
+            count += n
+            if rank <= count:
+                return min(bound, self.latency_max)
+        return self.latency_max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "latency": {
+                "sum": self.latency_sum,
+                "max": self.latency_max,
+                "p50": self.quantile(0.5),
+                "p90": self.quantile(0.9),
+                "p99": self.quantile(0.99),
+                "buckets": {
+                    bound: n
+                    for bound, n in zip(LATENCY_BUCKETS, self.buckets, strict=True)
+                },
+            },
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "retries": self.retries,
+            "errors": dict(self.errors),
+        }
+
+
+class MetricsCollector(Hooks):
+    """Hooks keeping metrics of requests in memory, by method and route
+
+    Every :class:`tdclient.api.API` has one, read by
+    :meth:`tdclient.api.API.metrics`. Latencies are the times until the
+    headers of responses are received, in histograms of
+    :data:`LATENCY_BUCKETS`. Errors are counted by the class of the raised
+    exception, or by the status of responses of 400 or more.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], _RouteMetrics] = {}
+
+    def _route(self, method: str, route: str) -> _RouteMetrics:
+        # called with the lock held
+        metrics = self._routes.get((method, route))
+        if metrics is None:
+            metrics = self._routes[method, route] = _RouteMetrics()
+        return metrics
+
+    def on_response(self, request: RequestInfo) -> None:
+        elapsed = request.elapsed or 0.0
+        error = None
+        if request.error is not None:
+            error = type(request.error).__name__
+        elif request.status is not None and 400 <= request.status:
+            error = f"HTTP {request.status}"
+        with self._lock:
+            metrics = self._route(request.method, request.route)
+            metrics.requests += 1
+            metrics.latency_sum += elapsed
+            metrics.latency_max = max(metrics.latency_max, elapsed)
+            metrics.buckets[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+            if error is not None:
+                metrics.errors[error] = metrics.errors.get(error, 0) + 1
+
+    def on_retry(self, attempt: RetryAttempt) -> None:
+        route = route_template(attempt.url) if attempt.route is None else attempt.route
+        with self._lock:
+            self._route(attempt.method, route).retries += 1
+
+    def on_bytes_transferred(
+        self, request: RequestInfo, sent: int, received: int
+    ) -> None:
+        with self._lock:
+            metrics = self._route(request.method, request.route)
+            metrics.bytes_sent += sent
+            metrics.bytes_received += received
+
+    def snapshot(self, reset: bool = False) -> dict[str, dict[str, Any]]:
+        """Return the metrics collected so far
+
+        Args:
+            reset (bool): start collecting again from zero
+
+        Returns:
+            dict: metrics by "METHOD route", e.g. "GET /v3/job/status/{job_id}",
+            with the keys "requests", "latency" ("sum", "max", estimates of the
+            "p50", "p90" and "p99" quantiles, and "buckets" of counts by upper
+            bound), "bytes_sent", "bytes_received", "retries" and "errors"
+            (counts by error class)
+        """
+        with self._lock:
+            snapshot = {
+                f"{method} {route}": metrics.snapshot()
+                for (method, route), metrics in sorted(self._routes.items())
+            }
+            if reset:
+                self._routes.clear()
+        return snapshot
+
+
+class OpenTelemetryHooks(Hooks):
+    """Hooks recording requests as OpenTelemetry spans and metrics
+
+    A client span is started for every attempt, and the duration, body sizes
+    and retries of requests are recorded by instruments of the meter, with the
+    method, route and status as attributes. It requires `opentelemetry-api`.
+
+    Example:
+
+        .. code-block:: python
+
+            td = tdclient.Client(hooks=[OpenTelemetryHooks()])
+
+    Args:
+        tracer (optional): OpenTelemetry tracer. The tracer named "tdclient" of
+            the global tracer provider by default.
+        meter (optional): OpenTelemetry meter. The meter named "tdclient" of the
+            global meter provider by default.
+    """
+
+    def __init__(self, tracer: Any = None, meter: Any = None) -> None:
+        # opentelemetry is optional, and typed loosely as it may be missing
+        try:
+            metrics: Any = importlib.import_module("opentelemetry.metrics")
+            trace: Any = importlib.import_module("opentelemetry.trace")
+        except ImportError:
+            raise ImportError(
+                "opentelemetry-api is required for OpenTelemetryHooks"
+            ) from None
+        self._trace = trace
+        self._tracer: Any = trace.get_tracer("tdclient") if tracer is None else tracer
+        meter = metrics.get_meter("tdclient") if meter is None else meter
+        self._duration: Any = meter.create_histogram(
+            "http.client.request.duration",
+            unit="s",
+            description="Time until the headers of responses are received",
+        )
+        self._sent: Any = meter.create_counter(
+            "tdclient.bytes_sent", unit="By", description="Bytes of request bodies"
+        )
+        self._received: Any = meter.create_counter(
+            "tdclient.bytes_received",
+            unit="By",
+            description="Bytes of response bodies",
+        )
+        self._retries: Any = meter.create_counter(
+            "tdclient.retries", description="Retries of failed requests"
+        )
+        self._lock = threading.Lock()
+        self._spans: dict[int, Any] = {}
+
+    @staticmethod
+    def _attributes(request: RequestInfo) -> dict[str, Any]:
+        attributes: dict[str, Any] = {
+            "http.request.method": request.method,
+            "http.route": request.route,
+        }
+        if request.status is not None:
+            attributes["http.response.status_code"] = request.status
+        if request.error is not None:
+            attributes["error.type"] = type(request.error).__name__
+        return attributes
+
+    def on_request_start(self, request: RequestInfo) -> None:
+        span = self._tracer.start_span(
+            f"{request.method} {request.route}",
+            kind=self._trace.SpanKind.CLIENT,
+            attributes={
+                "http.request.method": request.method,
+                "http.route": request.route,
+                "url.full": request.url,
+            },
+        )
+        with self._lock:
+            self._spans[id(request)] = span
+
+    def on_response(self, request: RequestInfo) -> None:
+        attributes = self._attributes(request)
+        self._duration.record(request.elapsed or 0.0, attributes)
+        with self._lock:
+            span = self._spans.pop(id(request), None)
+        if span is None:
+            return
+        if request.status is not None:
+            span.set_attribute("http.response.status_code", request.status)
+        if request.error is not None:
+            span.record_exception(request.error)
+        if request.error is not None or (
+            request.status is not None and 500 <= request.status
+        ):
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        span.end()
+
+    def on_retry(self, attempt: RetryAttempt) -> None:
+        route = route_template(attempt.url) if attempt.route is None else attempt.route
+        self._retries.add(
+            1, {"http.request.method": attempt.method, "http.route": route}
+        )
+
+    def on_bytes_transferred(
+        self, request: RequestInfo, sent: int, received: int
+    ) -> None:
+        attributes = self._attributes(request)
+        self._sent.add(sent, attributes)
+        self._received.add(received, attributes)
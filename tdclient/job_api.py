@@ -1,25 +1,131 @@
 #!/usr/bin/env python
 
-import codecs
-import gzip
+import collections
 import json
 import logging
 import os
-import tempfile
-from collections.abc import Iterator
-from concurrent.futures import ThreadPoolExecutor
+import threading
+from collections.abc import Callable, Generator, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import AbstractContextManager
-from typing import Any, Literal
+from typing import IO, TYPE_CHECKING, Any, Literal, cast
 
 import msgpack
 import urllib3
 
-from tdclient.types import Priority
-from tdclient.util import create_url, get_or_else, parse_date
+from tdclient.columnar import decode_columns
+from tdclient.json_codec import JSONCodec, iter_lines
+from tdclient.result_download import (
+    BLOCK_SIZE,
+    DEFAULT_CHUNK_SIZE,
+    RangeDownload,
+    check_gzip,
+    gunzip_chunks,
+    read_blocks,
+    unpack_chunks,
+)
+from tdclient.types import ColumnOutput, Priority
+from tdclient.util import create_url, get_or_else, parse_date, read_ahead
+
+if TYPE_CHECKING:
+    from tdclient.query_cache import QueryCache
+    from tdclient.result_cache import ResultCache
 
 log = logging.getLogger(__name__)
 
 
+#: statuses of jobs which will not change any more
+FINISHED_STATUSES = frozenset(("success", "error", "killed"))
+
+#: number of finished jobs kept by :class:`FinishedJobCache` when not specified
+DEFAULT_JOB_CACHE_SIZE = 1024
+
+
+class FinishedJobCache:
+    """LRU cache of the details of finished jobs by job ID
+
+    The details of a job do not change once it has finished, so
+    :meth:`JobAPI.show_job` and :meth:`JobAPI.job_status` answer from this cache
+    instead of requesting them again, for every :class:`tdclient.models.Job` of
+    the same API.
+
+    Args:
+        maxsize (int, optional): number of jobs kept. Default is 1024. 0
+            disables the cache.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_JOB_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._jobs: collections.OrderedDict[str, dict[str, Any]] = (
+            collections.OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        """Return a copy of the details of a finished job, or `None` if missing"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                self.misses += 1
+                return None
+            self._jobs.move_to_end(job_id)
+            self.hits += 1
+            return dict(job)
+
+    def put(self, job_id: str, job: dict[str, Any]) -> None:
+        """Keep the details of a job if it has finished"""
+        if self.maxsize < 1 or job.get("status") not in FINISHED_STATUSES:
+            return
+        with self._lock:
+            self._jobs[job_id] = dict(job)
+            self._jobs.move_to_end(job_id)
+            while self.maxsize < len(self._jobs):
+                self._jobs.popitem(last=False)
+
+    def show(self, job_id: str) -> dict[str, Any] | None:
+        """Return the details of a finished job as :meth:`JobAPI.show_job` does
+
+        Returns:
+            dict: the details with `job_id` as given, or `None` if missing
+        """
+        job = self.get(str(job_id))
+        if job is not None:
+            job["job_id"] = job_id
+        return job
+
+    def status(self, job_id: str) -> str | None:
+        """Return the status of a finished job, or `None` if missing"""
+        job = self.get(str(job_id))
+        return None if job is None else job["status"]
+
+    def parse(self, js: dict[str, Any], job_id: str) -> dict[str, Any]:
+        """Parse a `/v3/job/show` response with :func:`parse_job`, keeping the
+        job if it has finished
+
+        This is shared by :class:`JobAPI` and :class:`tdclient.async_api.AsyncAPI`.
+
+        Args:
+            js (dict): the decoded body
+            job_id (str): job ID
+
+        Returns:
+            dict: Detailed information of the job
+        """
+        job = parse_job(js, job_id=job_id)
+        self.put(str(job_id), job)
+        return job
+
+    def clear(self) -> None:
+        """Drop all jobs"""
+        with self._lock:
+            self._jobs.clear()
+
+
 class JobAPI:
     """Access to Job API
 
@@ -44,6 +150,17 @@ class JobAPI:
         self, msg: str, res: urllib3.BaseHTTPResponse, body: bytes | str
     ) -> None: ...
     def checked_json(self, body: bytes, required: list[str]) -> dict[str, Any]: ...
+    def checked_json_items(
+        self, res: urllib3.BaseHTTPResponse, key: str | None
+    ) -> Iterator[Any]: ...
+
+    # Attributes from API class
+    _finished_jobs: FinishedJobCache
+    _json: JSONCodec
+    _result_cache: "ResultCache | None"
+    _query_cache: "QueryCache | None"
+    _apikey: str | None
+    _endpoint: str | None
 
     JOB_PRIORITY: dict[str, int] = {
         "VERY LOW": -2,
@@ -76,7 +193,30 @@ class JobAPI:
                 Avoid using this parameter as it can be dangerous.
 
         Returns:
-             a list of :class:`dict` which represents a job
+             a list of :class:`dict` which represents a job, with the same keys
+             as :meth:`show_job`
+        """
+        return [
+            dict(record)
+            for record in self.list_job_records(_from, to, status, conditions)
+        ]
+
+    def list_job_records(
+        self,
+        _from: int = 0,
+        to: int | None = None,
+        status: str | None = None,
+        conditions: dict[str, Any] | None = None,
+    ) -> list["JobRecord"]:
+        """Show the list of Jobs as read-only mappings decoded when they are read
+
+        Unlike :meth:`list_jobs`, dates and `hive_result_schema` are decoded
+        only when they are read, so that listing many jobs costs little more
+        than decoding the response. Arguments are the same.
+
+        Returns:
+             a list of :class:`JobRecord`, read-only mappings with the same keys
+             and values as :meth:`list_jobs`
         """
         params: dict[str, Any] = {}
         params["from"] = str(_from)
@@ -91,51 +231,116 @@ class JobAPI:
             if code != 200:
                 self.raise_error("List jobs failed", res, body)
             js = self.checked_json(body, ["jobs"])
-            jobs: list[dict[str, Any]] = []
-            for m in js["jobs"]:
-                if m.get("result") is not None and 0 < len(str(m["result"])):
-                    result = m["result"]
-                else:
-                    result = None
-                if m.get("hive_result_schema") is not None and 0 < len(
-                    str(m["hive_result_schema"])
-                ):
-                    hive_result_schema = json.loads(m["hive_result_schema"])
+            return parse_job_records(js)
+
+    def list_jobs_each(
+        self,
+        _from: int = 0,
+        to: int | None = None,
+        status: str | None = None,
+        conditions: dict[str, Any] | None = None,
+    ) -> Iterator["JobRecord"]:
+        """Iterate over a list of Jobs as they are received
+
+        Unlike :meth:`list_jobs`, the response is parsed incrementally, so that
+        memory does not grow with the number of jobs. Arguments are the same.
+
+        Yields:
+             :class:`JobRecord` which represents a job
+        """
+        params: dict[str, Any] = {}
+        params["from"] = str(_from)
+        if to is not None:
+            params["to"] = str(to)
+        if status is not None:
+            params["status"] = str(status)
+        if conditions is not None:
+            params.update(conditions)
+        with self.get("/v3/job/list", params) as res:
+            if res.status != 200:
+                self.raise_error("List jobs failed", res, res.read())
+            for m in self.checked_json_items(res, "jobs"):
+                yield JobRecord(m)
+
+    def iter_jobs(
+        self,
+        status: str | None = None,
+        page_size: int = 100,
+        prefetch: int = 2,
+        stop: Callable[["JobRecord"], bool] | None = None,
+        conditions: dict[str, Any] | None = None,
+    ) -> Generator["JobRecord"]:
+        """Iterate over Jobs from the newest, reading pages of :meth:`list_job_records`
+
+        Up to `prefetch` pages after the current one are requested in the
+        background, so that reading many pages takes about one round trip per
+        `prefetch + 1` pages. A job which moved to the next page because jobs
+        were issued in the meantime is yielded once.
+
+        Example:
+
+            .. code-block:: python
+
+                cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=7)
+                for job in td.api.iter_jobs(stop=lambda job: job["created_at"] < cutoff):
+                    ...
+
+        Args:
+            status (str, optional): Filter by given status. {"queued", "running", "success", "error"}
+            page_size (int, optional): number of jobs in a page. Default is 100.
+            prefetch (int, optional): number of pages requested ahead of the
+                current one. Default is 2. 0 reads pages one by one.
+            stop (callable, optional): called with every job before it is
+                yielded. Iteration stops, without yielding the job, once it
+                returns `True`.
+            conditions (dict[str, Any], optional): See :meth:`list_jobs`.
+
+        Yields:
+             :class:`JobRecord` which represents a job
+        """
+        if page_size < 1:
+            raise ValueError(f"page_size must be at least 1: {page_size}")
+        if prefetch < 0:
+            raise ValueError(f"prefetch must not be negative: {prefetch}")
+
+        def fetch(_from: int) -> list[JobRecord]:
+            return self.list_job_records(
+                _from, _from + page_size - 1, status, conditions
+            )
+
+        executor = None
+        if 0 < prefetch:
+            executor = ThreadPoolExecutor(
+                max_workers=prefetch, thread_name_prefix="tdclient-jobs"
+            )
+        pages: collections.deque[Future[list[JobRecord]]] = collections.deque()
+        _from = 0
+        previous: set[str] = set()
+        try:
+            while True:
+                if executor is None:
+                    page = fetch(_from)
+                    _from += page_size
                 else:
-                    hive_result_schema = None
-                start_at = get_or_else(m, "start_at")
-                end_at = get_or_else(m, "end_at")
-                created_at = get_or_else(m, "created_at")
-                updated_at = get_or_else(m, "updated_at")
-                job = {
-                    "job_id": m.get("job_id"),
-                    "type": m.get("type", "?"),
-                    "url": m.get("url"),
-                    "query": m.get("query"),
-                    "status": m.get("status"),
-                    "debug": m.get("debug"),
-                    "start_at": parse_date(start_at) if start_at else None,
-                    "end_at": parse_date(end_at) if end_at else None,
-                    "created_at": parse_date(created_at) if created_at else None,
-                    "updated_at": parse_date(updated_at) if updated_at else None,
-                    "cpu_time": m.get("cpu_time"),
-                    "result_size": m.get(
-                        "result_size"
-                    ),  # compressed result size in msgpack.gz format
-                    "result": result,
-                    "result_url": m.get("result_url"),
-                    "hive_result_schema": hive_result_schema,
-                    "priority": m.get("priority"),
-                    "retry_limit": m.get("retry_limit"),
-                    "org_name": None,
-                    "database": m.get("database"),
-                    "num_records": m.get("num_records"),
-                    "user_name": m.get("user_name"),
-                    "linked_result_export_job_id": m.get("linked_result_export_job_id"),
-                    "result_export_target_job_id": m.get("result_export_target_job_id"),
-                }
-                jobs.append(job)
-            return jobs
+                    while len(pages) <= prefetch:
+                        pages.append(executor.submit(fetch, _from))
+                        _from += page_size
+                    page = pages.popleft().result()
+                job_ids: set[str] = set()
+                for job in page:
+                    job_id = str(job["job_id"])
+                    job_ids.add(job_id)
+                    if job_id in previous:
+                        continue
+                    if stop is not None and stop(job):
+                        return
+                    yield job
+                if len(page) < page_size:
+                    return
+                previous = job_ids
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
 
     def show_job(self, job_id: str) -> dict[str, Any]:
         """Return detailed information of a Job.
@@ -144,56 +349,19 @@ class JobAPI:
             job_id (str): job ID
 
         Returns:
-             :class:`dict`: Detailed information of a job
+             :class:`dict`: Detailed information of a job. Those of finished
+             jobs are kept in an LRU cache and returned without a request.
         """
+        cached = self._finished_jobs.show(job_id)
+        if cached is not None:
+            return cached
         # use v3/job/status instead of v3/job/show to poll finish of a job
         with self.get(create_url("/v3/job/show/{job_id}", job_id=job_id)) as res:
             code, body = res.status, res.read()
             if code != 200:
                 self.raise_error("Show job failed", res, body)
             js = self.checked_json(body, ["status"])
-            if js.get("result") is not None and 0 < len(str(js["result"])):
-                result = js["result"]
-            else:
-                result = None
-            if js.get("hive_result_schema") is not None and 0 < len(
-                str(js["hive_result_schema"])
-            ):
-                hive_result_schema = json.loads(js["hive_result_schema"])
-            else:
-                hive_result_schema = None
-            start_at = get_or_else(js, "start_at")
-            end_at = get_or_else(js, "end_at")
-            created_at = get_or_else(js, "created_at")
-            updated_at = get_or_else(js, "updated_at")
-            job = {
-                "job_id": job_id,
-                "type": js.get("type", "?"),
-                "url": js.get("url"),
-                "query": js.get("query"),
-                "status": js.get("status"),
-                "debug": js.get("debug"),
-                "start_at": parse_date(start_at) if start_at else None,
-                "end_at": parse_date(end_at) if end_at else None,
-                "created_at": parse_date(created_at) if created_at else None,
-                "updated_at": parse_date(updated_at) if updated_at else None,
-                "cpu_time": js.get("cpu_time"),
-                "result_size": js.get(
-                    "result_size"
-                ),  # compressed result size in msgpack.gz format
-                "result": result,
-                "result_url": js.get("result_url"),
-                "hive_result_schema": hive_result_schema,
-                "priority": js.get("priority"),
-                "retry_limit": js.get("retry_limit"),
-                "org_name": None,
-                "database": js.get("database"),
-                "num_records": js.get("num_records"),
-                "user_name": js.get("user_name"),
-                "linked_result_export_job_id": js.get("linked_result_export_job_id"),
-                "result_export_target_job_id": js.get("result_export_target_job_id"),
-            }
-            return job
+            return self._finished_jobs.parse(js, job_id)
 
     def job_status(self, job_id: str) -> str:
         """Show job status
@@ -203,6 +371,9 @@ class JobAPI:
         Returns:
              The status information of the given job id at last execution.
         """
+        cached = self._finished_jobs.status(job_id)
+        if cached is not None:
+            return cached
         with self.get(create_url("/v3/job/status/{job_id}", job_id=job_id)) as res:
             code, body = res.status, res.read()
             if code != 200:
@@ -263,6 +434,8 @@ class JobAPI:
         header: bool = False,
         store_tmpfile: bool = False,
         num_threads: int = 4,
+        prefetch_chunks: int = 0,
+        memory_budget: int | None = None,
     ) -> Iterator[dict[str, Any]]:
         """Yield a row of the job result with specified format.
 
@@ -275,8 +448,20 @@ class JobAPI:
             store_tmpfile (bool): Download job result as a temporary file or not. Default is False.
                 It works only when format is "msgpack".
                 "True" or "False"
-            num_threads (int): Number of threads to download the job result when store_tmpfile is True.
-                Default is 4.
+                Ranges of the result are downloaded in parallel and written at their
+                offsets in the file, and rows are yielded as soon as the leading
+                ranges are complete.
+            num_threads (int): Number of threads to download the job result when
+                store_tmpfile is True or memory_budget is given. Default is 4.
+            prefetch_chunks (int): Number of 1 MiB chunks of the result read ahead by a
+                background thread while rows are decoded, so that network reads and
+                decoding overlap. Works only when format is "msgpack" and
+                store_tmpfile is False. Default is 0, reading and decoding on the
+                calling thread.
+            memory_budget (int): Download ranges of the job result in parallel
+                without a temporary file, holding at most this number of bytes of
+                downloaded ranges in memory. Works only when format is "msgpack"
+                and store_tmpfile is False. Default is None.
         Yields:
              The query result of the specified job in.
         """
@@ -289,21 +474,39 @@ class JobAPI:
         if format != "msgpack":
             format = "json"
 
-        if store_tmpfile:
+        if format == "msgpack":
+            cached = self.open_cached_result(job_id, num_threads)
+            if cached is not None:
+                with cached:
+                    yield from unpack_chunks(gunzip_chunks(read_blocks(cached)))
+                return
+
+        if store_tmpfile or memory_budget is not None:
             if format != "msgpack":
-                raise ValueError("store_tmpfile works only when format is msgpack")
+                raise ValueError(
+                    "store_tmpfile and memory_budget work only when format is msgpack"
+                )
+
+            import tempfile
 
             with tempfile.TemporaryDirectory() as tempdir:
-                path = os.path.join(tempdir, f"{job_id}.msgpack.gz")
-                self.download_job_result(job_id, path, num_threads)
-                with gzip.GzipFile(path, "rb") as f:
-                    unpacker = msgpack.Unpacker(
-                        f,  # type: ignore[arg-type]
-                        raw=False,
-                        max_buffer_size=1000 * 1024**2,  # type: ignore[arg-type]
+                path = None
+                chunk_size = DEFAULT_CHUNK_SIZE
+                if store_tmpfile:
+                    path = os.path.join(tempdir, f"{job_id}.msgpack.gz")
+                elif memory_budget is not None:
+                    chunk_size = min(
+                        chunk_size,
+                        max(BLOCK_SIZE, memory_budget // max(1, num_threads)),
                     )
-                    for row in unpacker:
-                        yield row
+                with self._job_result_download(
+                    job_id,
+                    path,
+                    num_threads=num_threads,
+                    chunk_size=chunk_size,
+                    memory_budget=memory_budget,
+                ) as download:
+                    yield from unpack_chunks(gunzip_chunks(download.chunks()))
             return
 
         with self.get(
@@ -319,87 +522,164 @@ class JobAPI:
                 self.raise_error("Get job result failed", res, "")
             if format == "msgpack":
                 unpacker = msgpack.Unpacker(raw=False, max_buffer_size=1000 * 1024**2)
-                for chunk in res.stream(1024**2):
+                chunks: Iterator[bytes] = res.stream(1024**2)
+                if 0 < prefetch_chunks:
+                    chunks = read_ahead(chunks, prefetch_chunks)
+                for chunk in chunks:
                     unpacker.feed(chunk)
-                    for row in unpacker:
-                        yield row
+                    yield from unpacker
             elif format == "json":
-                for row in codecs.getreader("utf-8")(res):
-                    yield json.loads(row)
+                for line in iter_lines(res.stream(1024**2)):
+                    yield self._json.loads(line)
             else:
                 yield res.read()
 
-    def download_job_result(self, job_id: str, path: str, num_threads: int = 4) -> bool:
+    def job_result_columns(
+        self,
+        job_id: str,
+        batch_size: int = 65536,
+        output: ColumnOutput = "array",
+    ) -> Iterator[Any]:
+        """Yield the job result as batches of columns.
+
+        The result is decoded directly into typed column buffers according to
+        ``hive_result_schema`` of the job, which takes far less memory than a
+        list per row for numeric results.
+
+        Args:
+            job_id (str): Job ID
+            batch_size (int): Maximum number of rows in a batch. Default is 65536.
+            output (str): "array" for a :class:`dict` of :class:`array.array`
+                (or :class:`list` for other types or columns with null), "numpy"
+                for a :class:`dict` of :class:`numpy.ndarray`, or "arrow" for a
+                :class:`pyarrow.RecordBatch`. See
+                :func:`tdclient.columnar.decode_columns`. Default is "array".
+
+        Yields:
+            Batches of columns of the result
+        """
+        schema = self.show_job(job_id)["hive_result_schema"]
+        cached = self.open_cached_result(job_id)
+        if cached is not None:
+            import gzip
+
+            with cached, gzip.GzipFile(fileobj=cached) as stream:
+                yield from decode_columns(
+                    cast(IO[bytes], stream), schema, batch_size, output
+                )
+            return
+        with self.get(
+            create_url(
+                "/v3/job/result/{job_id}?format={format}&header={header}",
+                job_id=job_id,
+                format="msgpack",
+                header=False,
+            )
+        ) as res:
+            code = res.status
+            if code != 200:
+                self.raise_error("Get job result failed", res, "")
+            yield from decode_columns(res, schema, batch_size, output)
+
+    def download_job_result(
+        self, job_id: str, path: str, num_threads: int = 4, verify: bool = True
+    ) -> bool:
         """Download the job result to the specified path.
 
+        Ranges of the result are downloaded in parallel and retried on transient
+        failures. Completed ranges are recorded in ``{path}.manifest`` while the
+        download is in progress, so that calling this again after a failure
+        downloads only the missing ranges. The manifest is removed once the
+        size of the file has been verified.
+
         Args:
             job_id (int): Job ID
             path (str): Path to save the job result
             num_threads (int): Number of threads to download the job result. Default is 4.
+            verify (bool): Decompress the downloaded file to verify the gzip CRC
+                and length in addition to the file size. Default is True.
+
+        Raises:
+            :class:`tdclient.errors.DownloadError`: if the download failed or the
+                downloaded file is broken
         """
+        cached = self.open_cached_result(job_id, num_threads)
+        if cached is not None:
+            import shutil
+
+            with cached, open(path, "wb") as f:
+                shutil.copyfileobj(cached, f, BLOCK_SIZE)
+            return True
+        with self._job_result_download(
+            job_id, path, num_threads, resume_key=str(job_id)
+        ) as download:
+            download.verify(check_gzip if verify else None)
+        return True
+
+    def open_cached_result(self, job_id: str, num_threads: int = 4) -> IO[bytes] | None:
+        """Open the result of a successful job in the result cache
+
+        The result is downloaded into the cache first if it is missing.
+
+        Args:
+            job_id (str): job ID
+            num_threads (int): Number of threads to download the result with.
+                Default is 4.
 
+        Returns:
+            a file of the result in msgpack.gz format, or `None` if the API has
+            no result cache or the job has not succeeded
+        """
+        cache = self._result_cache
+        if cache is None:
+            return None
+        job = self.show_job(job_id)
+        size = job.get("result_size")
+        if job.get("status") != "success" or size is None:
+            return None
+
+        def download(path: str) -> None:
+            with self._job_result_download(job_id, path, num_threads) as download:
+                download.verify(check_gzip)
+
+        return cache.open(str(job_id), size, download)
+
+    def _job_result_download(
+        self,
+        job_id: str,
+        path: str | None,
+        num_threads: int = 4,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        memory_budget: int | None = None,
+        resume_key: str | None = None,
+    ) -> RangeDownload:
         # Format should be msgpack.gz because file size of job is compressed in msgpack.gz format.
-        file_size = self.show_job(job_id)["result_size"]
+        file_size = self.show_job(job_id)["result_size"] or 0
         url = create_url(
             "/v3/job/result/{job_id}?format={format}",
             job_id=job_id,
             format="msgpack.gz",
         )
 
-        def get_chunk(
-            url: str, start: int, end: int
-        ) -> AbstractContextManager[urllib3.BaseHTTPResponse]:
-            chunk_headers = {"Range": f"bytes={start}-{end}"}
-
-            response = self.get(url, headers=chunk_headers)
-            return response
-
-        def download_chunk(
-            url: str, start: int, end: int, index: int, file_name: str
-        ) -> bool:
-            with get_chunk(url, start, end) as response:
-                if response.status == 206:  # Partial content (range supported)
-                    with open(f"{file_name}.part{index}", "wb") as f:
-                        for chunk in response.stream(1024):
-                            f.write(chunk)
-                    return True
-                else:
-                    log.warning(
-                        f"Unexpected response status: {response.status}. Body: {response.data}"
+        def fetch(start: int, end: int) -> Iterator[bytes]:
+            with self.get(url, headers={"Range": f"bytes={start}-{end}"}) as res:
+                if res.status != 206:  # Partial content (range supported)
+                    self.raise_error(
+                        "Get job result failed",
+                        res,
+                        res.read() if 400 <= res.status else f"bytes={start}-{end}",
                     )
-                    return False
-
-        def combine_chunks(file_name: str, total_parts: int) -> None:
-            with open(file_name, "wb") as final_file:
-                for i in range(total_parts):
-                    with open(f"{file_name}.part{i}", "rb") as part_file:
-                        final_file.write(part_file.read())
-                    os.remove(f"{file_name}.part{i}")
-
-        def download_file_multithreaded(
-            url: str,
-            file_name: str,
-            file_size: int,
-            num_threads: int = 4,
-            chunk_size: int = 100 * 1024**2,
-        ) -> None:
-            start = 0
-            part_index = 0
-
-            with ThreadPoolExecutor(max_workers=num_threads) as executor:
-                while start < file_size:
-                    end = min(start + chunk_size - 1, file_size - 1)
-                    executor.submit(
-                        download_chunk, url, start, end, part_index, file_name
-                    )
-
-                    start += chunk_size
-                    part_index += 1
-
-            combine_chunks(file_name, part_index)
-
-        download_file_multithreaded(url, path, file_size, num_threads=num_threads)
-        return True
+                yield from res.stream(BLOCK_SIZE)
+
+        return RangeDownload(
+            fetch,
+            file_size,
+            path=path,
+            num_threads=num_threads,
+            chunk_size=chunk_size,
+            memory_budget=memory_budget,
+            resume_key=resume_key,
+        )
 
     def kill(self, job_id: str) -> str | None:
         """Stop the specific job if it is running.
@@ -443,25 +723,41 @@ class JobAPI:
             **kwargs: Extra options.
 
         Returns:
-            str: Job ID issued for the query
+            str: Job ID issued for the query, or of an identical query issued
+            recently if the client has a query cache
         """
-        params: dict[str, Any] = {"query": q}
-        params.update(kwargs)
-        if result_url is not None:
-            params["result"] = result_url
-        if priority is not None:
-            priority_value: int
-            if not isinstance(priority, int):
-                priority_name = str(priority).upper()
-                if priority_name in self.JOB_PRIORITY:
-                    priority_value = self.JOB_PRIORITY[priority_name]
-                else:
-                    raise ValueError(f"unknown job priority: {priority_name}")
-            else:
-                priority_value = priority
-            params["priority"] = priority_value
-        if retry_limit is not None:
-            params["retry_limit"] = retry_limit
+        cache = self._query_cache
+        if cache is not None and result_url is None:
+            key = cache.key(f"{self._endpoint}\0{self._apikey}", q, type, db, kwargs)
+            return cache.get_or_issue(
+                key,
+                lambda: self._issue_query(
+                    q, type, db, result_url, priority, retry_limit, **kwargs
+                ),
+                lambda job_id: self.job_status(job_id) not in ("error", "killed"),
+            )
+        return self._issue_query(
+            q, type, db, result_url, priority, retry_limit, **kwargs
+        )
+
+    def _issue_query(
+        self,
+        q: str,
+        type: str,
+        db: str | None,
+        result_url: str | None,
+        priority: Priority | None,
+        retry_limit: int | None,
+        **kwargs: Any,
+    ) -> str:
+        params = build_query_params(
+            q,
+            result_url=result_url,
+            priority=priority,
+            retry_limit=retry_limit,
+            job_priority=self.JOB_PRIORITY,
+            **kwargs,
+        )
         with self.post(
             create_url("/v3/job/issue/{type}/{db}", type=type, db=db), params
         ) as res:
@@ -470,3 +766,167 @@ class JobAPI:
                 self.raise_error("Query failed", res, body)
             js = self.checked_json(body, ["job_id"])
             return str(js["job_id"])
+
+
+#: keys of the job objects returned by :class:`JobAPI`, in order
+JOB_KEYS = (
+    "job_id",
+    "type",
+    "url",
+    "query",
+    "status",
+    "debug",
+    "start_at",
+    "end_at",
+    "created_at",
+    "updated_at",
+    "cpu_time",
+    "result_size",  # compressed result size in msgpack.gz format
+    "result",
+    "result_url",
+    "hive_result_schema",
+    "priority",
+    "retry_limit",
+    "org_name",
+    "database",
+    "num_records",
+    "user_name",
+    "linked_result_export_job_id",
+    "result_export_target_job_id",
+)
+
+_DATE_KEYS = frozenset(("start_at", "end_at", "created_at", "updated_at"))
+
+_UNPARSED = object()
+
+
+class JobRecord(Mapping[str, Any]):
+    """Read-only job object of an API response, decoded when values are read
+
+    It holds the object decoded from `/v3/job/list` as is, and has the same keys
+    and values as the :class:`dict` returned by :func:`parse_job`. Dates are
+    parsed and `hive_result_schema` is decoded from JSON only when they are
+    read, so that listing many jobs costs little more than decoding the
+    response.
+
+    Args:
+        m (dict): a job object decoded from `/v3/job/show` or `/v3/job/list`
+        job_id (str, optional): job ID to use instead of ``m["job_id"]``
+    """
+
+    __slots__ = ("_raw", "_job_id", "_schema")
+
+    def __init__(self, m: dict[str, Any], job_id: str | None = None) -> None:
+        self._raw = m
+        self._job_id = job_id
+        self._schema: Any = _UNPARSED
+
+    @property
+    def raw(self) -> dict[str, Any]:
+        """the job object of the API response. It must not be modified."""
+        return self._raw
+
+    def __getitem__(self, key: str) -> Any:
+        m = self._raw
+        if key == "job_id":
+            return m.get("job_id") if self._job_id is None else self._job_id
+        if key in _DATE_KEYS:
+            value = get_or_else(m, key)
+            return parse_date(value) if value else None
+        if key == "hive_result_schema":
+            if self._schema is _UNPARSED:
+                schema = m.get("hive_result_schema")
+                if schema is not None and 0 < len(str(schema)):
+                    self._schema = json.loads(schema)
+                else:
+                    self._schema = None
+            return self._schema
+        if key == "result":
+            result = m.get("result")
+            return result if result is not None and 0 < len(str(result)) else None
+        if key == "type":
+            return m.get("type", "?")
+        if key == "org_name":
+            return None
+        if key in JOB_KEYS:
+            return m.get(key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(JOB_KEYS)
+
+    def __len__(self) -> int:
+        return len(JOB_KEYS)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} job_id={self['job_id']!r}>"
+
+
+def parse_job(m: dict[str, Any], job_id: str | None = None) -> dict[str, Any]:
+    """Convert a job object in an API response into a :class:`dict`
+
+    This is shared by :class:`JobAPI` and :class:`tdclient.async_api.AsyncAPI`.
+
+    Args:
+        m (dict): a job object decoded from `/v3/job/show` or `/v3/job/list`
+        job_id (str, optional): job ID to use instead of ``m["job_id"]``
+
+    Returns:
+         :class:`dict`: Detailed information of a job
+    """
+    return dict(JobRecord(m, job_id=job_id))
+
+
+def parse_job_records(js: dict[str, Any]) -> list[JobRecord]:
+    """Convert the body of a `/v3/job/list` response into job objects
+
+    This is shared by :class:`JobAPI` and :class:`tdclient.async_api.AsyncAPI`.
+
+    Args:
+        js (dict): the decoded body, which has "jobs"
+
+    Returns:
+        a list of :class:`JobRecord`
+    """
+    return [JobRecord(m) for m in js["jobs"]]
+
+
+def build_query_params(
+    q: str,
+    result_url: str | None = None,
+    priority: Priority | None = None,
+    retry_limit: int | None = None,
+    job_priority: dict[str, int] = JobAPI.JOB_PRIORITY,
+    **kwargs: Any,
+) -> dict[str, Any]:
+    """Build request parameters of `/v3/job/issue`
+
+    Args:
+        q (str): Query string.
+        result_url (str): Result output URL.
+        priority (int or str): Job priority.
+        retry_limit (int): Automatic retry count.
+        job_priority (dict): mapping from priority name to its number
+        **kwargs: Extra options.
+
+    Returns:
+        dict: request parameters
+    """
+    params: dict[str, Any] = {"query": q}
+    params.update(kwargs)
+    if result_url is not None:
+        params["result"] = result_url
+    if priority is not None:
+        priority_value: int
+        if not isinstance(priority, int):
+            priority_name = str(priority).upper()
+            if priority_name in job_priority:
+                priority_value = job_priority[priority_name]
+            else:
+                raise ValueError(f"unknown job priority: {priority_name}")
+        else:
+            priority_value = priority
+        params["priority"] = priority_value
+    if retry_limit is not None:
+        params["retry_limit"] = retry_limit
+    return params
@@ -1,11 +1,13 @@
 #!/usr/bin/env python
 
+import datetime
 import time
 import warnings
-from collections.abc import Callable, Iterator
+from collections.abc import Callable, Iterator, Mapping
 from typing import TYPE_CHECKING, Any
 
 from tdclient.model import Model
+from tdclient.polling import Backoff, poll
 
 if TYPE_CHECKING:
     from tdclient.client import Client
@@ -53,7 +55,13 @@ class Schema:
 
 
 class Job(Model):
-    """Job on Treasure Data Service"""
+    """Job on Treasure Data Service
+
+    Statuses read from the API are reused for :attr:`status_ttl` seconds, so
+    that checking :meth:`finished`, :meth:`success` and the like many times in
+    a row takes a single request. Once a job has finished, its status and
+    details do not change any more, and they are not requested again.
+    """
 
     STATUS_QUEUED = "queued"
     STATUS_BOOTING = "booting"
@@ -65,6 +73,10 @@ class Job(Model):
 
     JOB_PRIORITY = {-2: "VERY LOW", -1: "LOW", 0: "NORMAL", 1: "HIGH", 2: "VERY HIGH"}
 
+    #: seconds the status of a job which has not finished is reused. It may be
+    #: set on the class or on an instance; 0 reads it on every check.
+    status_ttl: float = 1.0
+
     def __init__(
         self, client: "Client", job_id: str, type: str, query: str | None, **kwargs: Any
     ) -> None:
@@ -74,22 +86,49 @@ class Job(Model):
         self._query = query
         self._feed(kwargs)
 
-    def _feed(self, data: dict[str, Any] | None = None) -> None:
+    @classmethod
+    def from_record(
+        cls, client: "Client", data: Mapping[str, Any], job_id: str | None = None
+    ) -> "Job":
+        """Create a job from a job object of :class:`tdclient.api.API`
+
+        Dates and `hive_result_schema` are read from `data` when they are
+        accessed, so that a :class:`tdclient.job_api.JobRecord` decodes them
+        only if needed.
+
+        Args:
+            client (:class:`tdclient.client.Client`): a client of the job
+            data (mapping): a job object returned by
+                :meth:`tdclient.api.API.list_job_records` or
+                :meth:`tdclient.api.API.show_job`
+            job_id (str, optional): job ID to use instead of ``data["job_id"]``
+
+        Returns:
+             :class:`Job`
+        """
+        job = cls.__new__(cls)
+        Model.__init__(job, client)
+        job._job_id = data["job_id"] if job_id is None else job_id
+        job._type = data["type"]
+        job._query = data["query"]
+        job._feed(data)
+        return job
+
+    def _feed(self, data: Mapping[str, Any] | None = None) -> None:
         data = {} if data is None else data
+        # dates and the result schema are read from it when accessed
+        self._data = data
+        # monotonic time when the status was read from the API
+        self._status_read_at: float | None = None
+        # whether the details were read after the job finished
+        self._final = False
         self._url: str | None = data.get("url")
         self._status: str | None = data.get("status")
         self._debug: dict[str, Any] | None = data.get("debug")
-        self._start_at: str | None = data.get("start_at")
-        self._end_at: str | None = data.get("end_at")
-        self._created_at: str | None = data.get("created_at")
-        self._updated_at: str | None = data.get("updated_at")
         self._cpu_time: float | None = data.get("cpu_time")
         self._result: str | None = data.get("result")
         self._result_size: int | None = data.get("result_size")
         self._result_url: str | None = data.get("result_url")
-        self._hive_result_schema: list[list[str]] | None = data.get(
-            "hive_result_schema"
-        )
         self._priority: int | None = data.get("priority")
         self._retry_limit: int | None = data.get("retry_limit")
         self._org_name: str | None = data.get("org_name")
@@ -107,6 +146,8 @@ class Job(Model):
         """Update all fields of the job"""
         data = self._client.api.show_job(self._job_id)
         self._feed(data)
+        self._status_read_at = time.monotonic()
+        self._final = self._status in self.FINISHED_STATUS
 
     def _update_status(self) -> None:
         warnings.warn(
@@ -117,9 +158,14 @@ class Job(Model):
         self.update()
 
     def _update_progress(self) -> None:
-        """Update `_status` field of the job if it's not finished"""
-        if self._status not in self.FINISHED_STATUS:
+        """Update `_status` field of the job if it's not finished nor fresh"""
+        if self._status not in self.FINISHED_STATUS and not self._status_fresh():
             self._status = self._client.job_status(self._job_id)
+            self._status_read_at = time.monotonic()
+
+    def _status_fresh(self) -> bool:
+        read_at = self._status_read_at
+        return read_at is not None and time.monotonic() - read_at < self.status_ttl
 
     @property
     def id(self) -> str:
@@ -154,7 +200,27 @@ class Job(Model):
     @property
     def result_schema(self) -> list[list[str]] | None:
         """an array of array represents the type of result columns (Hive specific) (e.g. [["_c1", "string"], ["_c2", "bigint"]])"""
-        return self._hive_result_schema
+        return self._data.get("hive_result_schema")
+
+    @property
+    def start_at(self) -> datetime.datetime | None:
+        """a :class:`datetime.datetime` when the job started"""
+        return self._data.get("start_at")
+
+    @property
+    def end_at(self) -> datetime.datetime | None:
+        """a :class:`datetime.datetime` when the job finished"""
+        return self._data.get("end_at")
+
+    @property
+    def created_at(self) -> datetime.datetime | None:
+        """a :class:`datetime.datetime` when the job was issued"""
+        return self._data.get("created_at")
+
+    @property
+    def updated_at(self) -> datetime.datetime | None:
+        """a :class:`datetime.datetime` when the job was updated last"""
+        return self._data.get("updated_at")
 
     @property
     def priority(self) -> str:
@@ -203,25 +269,34 @@ class Job(Model):
     def wait(
         self,
         timeout: float | None = None,
-        wait_interval: int = 5,
+        wait_interval: float | None = None,
         wait_callback: Callable[["Job"], None] | None = None,
+        backoff: Backoff | None = None,
     ) -> None:
         """Sleep until the job has been finished
 
         Args:
             timeout (int, optional): Timeout in seconds. No timeout by default.
-            wait_interval (int, optional): wait interval in second. Default 5 seconds.
+            wait_interval (int, optional): wait interval in second. By default, the
+                job is polled with intervals growing from 0.5 to 10 seconds.
             wait_callback (callable, optional): A callable to be called on every tick of
                 wait interval.
+            backoff (:class:`tdclient.polling.Backoff`, optional): intervals used
+                when `wait_interval` is not given.
         """
-        started_at = time.time()
-        while not self.finished():
-            if timeout is None or abs(time.time() - started_at) < timeout:
-                time.sleep(wait_interval)
-                if callable(wait_callback):
-                    wait_callback(self)
-            else:
-                raise RuntimeError("timeout")  # TODO: throw proper error
+
+        def finished() -> bool:
+            # every tick reads the status however fresh it is
+            self._status_read_at = None
+            return self.finished()
+
+        poll(
+            finished,
+            timeout=timeout,
+            wait_interval=wait_interval,
+            callback=(lambda: wait_callback(self)) if callable(wait_callback) else None,
+            backoff=backoff,
+        )
         self.update()
 
     def kill(self) -> str | None:
@@ -244,7 +319,7 @@ class Job(Model):
         Returns:
              str: a string represents the status of the job ("success", "error", "killed", "queued", "running")
         """
-        if self._query is not None and not self.finished():
+        if self._query is not None and not self.finished() and not self._status_fresh():
             self.update()
         return self._status
 
@@ -261,7 +336,8 @@ class Job(Model):
         if not self.success():
             raise ValueError("result is not ready")
         else:
-            self.update()
+            if not self._final:
+                self.update()
             if self._result is None:
                 for row in self._client.job_result_each(self._job_id):
                     yield row
@@ -286,7 +362,8 @@ class Job(Model):
         if not self.success():
             raise ValueError("result is not ready")
         else:
-            self.update()
+            if not self._final:
+                self.update()
             if self._result is None:
                 for row in self._client.job_result_format_each(
                     self._job_id,
@@ -0,0 +1,356 @@
+#!/usr/bin/env python
+
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from tdclient import errors
+from tdclient.job_model import Job
+from tdclient.polling import DEFAULT_BACKOFF, Backoff
+from tdclient.result_download import is_retryable
+from tdclient.types import ReturnWhen
+
+if TYPE_CHECKING:
+    from tdclient.client import Client
+
+log = logging.getLogger(__name__)
+
+#: maximum number of pages of `/v3/job/list` read to find watched jobs at a tick
+LIST_MAX_PAGES = 10
+
+
+class JobWatcher:
+    """Watch many jobs with a single scheduler until they finish
+
+    Instead of a blocking loop per job, a scheduler thread polls all pending
+    jobs at every tick. Statuses are requested on a shared thread pool, or read
+    from pages of `/v3/job/list` when many jobs are pending, which takes one
+    request per page instead of one per job. Finished jobs are updated with
+    their details before they are reported.
+
+    Example:
+
+        .. code-block:: python
+
+            with td.watch_jobs(job_ids) as watcher:
+                for job in watcher.as_completed():
+                    if job.success():
+                        rows = list(job.result())
+
+    Args:
+        client (:class:`tdclient.client.Client`): a client to poll jobs with
+        jobs (iterable, optional): jobs or job IDs to watch
+        max_workers (int, optional): number of threads requesting job statuses.
+            Default is 8.
+        wait_interval (float, optional): fixed interval between ticks in seconds.
+            By default, intervals follow `backoff`.
+        backoff (:class:`tdclient.polling.Backoff`, optional): intervals between
+            ticks when `wait_interval` is not given. They start over when jobs
+            are added to a watcher with no pending job.
+        list_threshold (int, optional): read statuses from `/v3/job/list` when
+            at least this number of jobs are pending. Jobs not found in the
+            first pages are polled one by one. Default is 50. `None` disables it.
+        page_size (int, optional): number of jobs in a page of `/v3/job/list`.
+            Default is 100.
+        callback (callable, optional): called with every finished
+            :class:`tdclient.models.Job` on the scheduler thread
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        jobs: Iterable[Job | str | int] = (),
+        max_workers: int = 8,
+        wait_interval: float | None = None,
+        backoff: Backoff | None = None,
+        list_threshold: int | None = 50,
+        page_size: int = 100,
+        callback: Callable[[Job], None] | None = None,
+    ) -> None:
+        self._client = client
+        self.max_workers = max_workers
+        self.wait_interval = wait_interval
+        self.backoff = backoff
+        self.list_threshold = list_threshold
+        self.page_size = page_size
+        self._callback = callback
+        self._cond = threading.Condition()
+        self._pending: dict[str, Job] = {}
+        self._owned: set[str] = set()
+        self._callbacks: dict[str, list[Callable[[Job], None]]] = {}
+        self._done: list[Job] = []
+        self._errors: dict[str, BaseException] = {}
+        self._reset = False
+        self._closed = False
+        self._executor: ThreadPoolExecutor | None = None
+        self._scheduler: threading.Thread | None = None
+        for job in jobs:
+            self.add(job)
+
+    def __enter__(self) -> "JobWatcher":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: object,
+    ) -> None:
+        self.close()
+
+    def add(
+        self, job: Job | str | int, callback: Callable[[Job], None] | None = None
+    ) -> Job:
+        """Start watching a job
+
+        Args:
+            job (:class:`tdclient.models.Job` or str): a job or a job ID. When an
+                ID is given, a job is built from the details of the finished job.
+            callback (callable, optional): called with the job when it finishes
+
+        Returns:
+            :class:`tdclient.models.Job`: the job being watched. It is a
+            placeholder which knows only the ID when an ID is given.
+        """
+        owned = not isinstance(job, Job)
+        if isinstance(job, Job):
+            job_id = str(job.job_id)
+        else:
+            job_id = str(job)
+            job = Job(self._client, job_id, "?", None)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("JobWatcher is closed")
+            if callback is not None:
+                self._callbacks.setdefault(job_id, []).append(callback)
+            if job_id in self._pending:
+                return self._pending[job_id]
+            if not self._pending:
+                self._reset = True
+            if owned:
+                self._owned.add(job_id)
+            self._pending[job_id] = job
+            self._cond.notify_all()
+            if self._scheduler is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="tdclient-job-watcher",
+                )
+                self._scheduler = threading.Thread(
+                    target=self._run, name="tdclient-job-watcher", daemon=True
+                )
+                self._scheduler.start()
+        return job
+
+    @property
+    def pending(self) -> list[Job]:
+        """jobs which have not finished yet"""
+        with self._cond:
+            return list(self._pending.values())
+
+    @property
+    def done(self) -> list[Job]:
+        """finished jobs in the order they have been noticed"""
+        with self._cond:
+            return list(self._done)
+
+    @property
+    def errors(self) -> dict[str, BaseException]:
+        """errors which stopped watching jobs, e.g. for unknown job IDs, by job ID"""
+        with self._cond:
+            return dict(self._errors)
+
+    def as_completed(self, timeout: float | None = None) -> Iterator[Job]:
+        """Yield jobs as they finish
+
+        Jobs which have already finished are yielded first. Jobs added while
+        iterating are also waited for.
+
+        Args:
+            timeout (float, optional): deadline in seconds from now. No timeout
+                by default.
+
+        Yields:
+            :class:`tdclient.models.Job`: a finished job
+
+        Raises:
+            :class:`tdclient.errors.WaitTimeoutError`: if `timeout` has passed
+                before all jobs finish
+            :class:`tdclient.errors.APIError`: if a job could not be polled
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        index = 0
+        while True:
+            with self._cond:
+                while index == len(self._done) and self._pending and not self._closed:
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise errors.WaitTimeoutError(
+                                f"Timed out after {timeout:g} seconds"
+                            )
+                    self._cond.wait(remaining)
+                if index == len(self._done):
+                    return
+                job = self._done[index]
+                error = self._errors.get(job.job_id)
+            index += 1
+            if error is not None:
+                raise error
+            yield job
+
+    def wait(
+        self, timeout: float | None = None, return_when: ReturnWhen = "ALL_COMPLETED"
+    ) -> tuple[list[Job], list[Job]]:
+        """Wait until watched jobs finish
+
+        Args:
+            timeout (float, optional): maximum time to wait in seconds. No timeout
+                by default.
+            return_when (str, optional): when to return
+
+                - "FIRST_COMPLETED": when any job finishes
+                - "FIRST_ERROR": when any job finishes with an error, is killed
+                  or cannot be polled, or when all jobs finish
+                - "ALL_COMPLETED": when all jobs finish
+
+        Returns:
+            tuple: a list of finished jobs and a list of pending jobs. Unlike
+            :meth:`as_completed`, errors of jobs which could not be polled are
+            not raised; see :attr:`errors`.
+        """
+        if return_when not in ("FIRST_COMPLETED", "FIRST_ERROR", "ALL_COMPLETED"):
+            raise ValueError(f"Unknown return_when: {return_when}")
+
+        def ready() -> bool:
+            if not self._pending or self._closed:
+                return True
+            if return_when == "FIRST_COMPLETED":
+                return 0 < len(self._done)
+            if return_when == "FIRST_ERROR":
+                return 0 < len(self._errors) or any(
+                    not job.success() for job in self._done
+                )
+            return False
+
+        with self._cond:
+            self._cond.wait_for(ready, timeout)
+            return list(self._done), list(self._pending.values())
+
+    def close(self) -> None:
+        """Stop watching jobs and shut the threads down"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            scheduler, executor = self._scheduler, self._executor
+        if scheduler is not None and scheduler is not threading.current_thread():
+            scheduler.join()
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _intervals(self) -> Iterator[float]:
+        if self.wait_interval is not None:
+            return itertools.repeat(float(self.wait_interval))
+        return (self.backoff or DEFAULT_BACKOFF).intervals()
+
+    def _run(self) -> None:
+        intervals = self._intervals()
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._reset:
+                    intervals = self._intervals()
+                    self._reset = False
+                self._cond.wait_for(lambda: self._closed, next(intervals))
+                if self._closed:
+                    return
+                pending = dict(self._pending)
+            try:
+                self._tick(pending)
+            except Exception:
+                log.exception("Failed to poll jobs")
+
+    def _tick(self, pending: dict[str, Job]) -> None:
+        remaining = pending
+        if self.list_threshold is not None and self.list_threshold <= len(pending):
+            try:
+                remaining = self._tick_list(pending)
+            except Exception as error:
+                if not is_retryable(error):
+                    raise
+                log.warning("Failed to list jobs: %s", error)
+        assert self._executor is not None
+        for job_id, job, error in self._executor.map(self._check, remaining.items()):
+            if job is not None or error is not None:
+                self._finish(job_id, job, error)
+
+    def _tick_list(self, pending: dict[str, Job]) -> dict[str, Job]:
+        """Read statuses from pages of `/v3/job/list` and return jobs not found"""
+        remaining = dict(pending)
+        ids = [int(job_id) for job_id in remaining if job_id.isdigit()]
+        oldest = min(ids) if len(ids) == len(remaining) else None
+        _from = 0
+        for _ in range(LIST_MAX_PAGES):
+            page = self._client.api.list_job_records(_from, _from + self.page_size - 1)
+            for data in page:
+                job_id = str(data["job_id"])
+                job = remaining.pop(job_id, None)
+                if job is not None and data["status"] in Job.FINISHED_STATUS:
+                    self._finish(job_id, self._resolve(job, data), None)
+            if not remaining or len(page) < self.page_size:
+                break
+            page_ids = [str(data["job_id"]) for data in page]
+            if oldest is not None and all(job_id.isdigit() for job_id in page_ids):
+                # job IDs increase, so older pages do not have watched jobs
+                if min(int(job_id) for job_id in page_ids) < oldest:
+                    break
+            _from += self.page_size
+        return remaining
+
+    def _check(
+        self, item: tuple[str, Job]
+    ) -> tuple[str, Job | None, BaseException | None]:
+        job_id, job = item
+        try:
+            status = self._client.job_status(job_id)
+            if status not in Job.FINISHED_STATUS:
+                return job_id, None, None
+            return job_id, self._resolve(job, self._client.api.show_job(job_id)), None
+        except Exception as error:
+            if is_retryable(error):
+                log.warning("Failed to poll job %s: %s", job_id, error)
+                return job_id, None, None
+            return job_id, None, error
+
+    def _resolve(self, job: Job, data: Mapping[str, Any]) -> Job:
+        if job.job_id not in self._owned:
+            job._feed(data)  # type: ignore[reportPrivateUsage]
+            return job
+        return Job.from_record(self._client, data, job_id=job.job_id)
+
+    def _finish(
+        self, job_id: str, job: Job | None, error: BaseException | None
+    ) -> None:
+        with self._cond:
+            placeholder = self._pending.pop(job_id, None)
+            if placeholder is None:
+                return
+            job = placeholder if job is None else job
+            if error is not None:
+                self._errors[job_id] = error
+            self._done.append(job)
+            callbacks = self._callbacks.pop(job_id, [])
+            self._cond.notify_all()
+        if self._callback is not None:
+            callbacks.insert(0, self._callback)
+        for callback in callbacks:
+            try:
+                callback(job)
+            except Exception:
+                log.exception("Exception in callback for job %s", job_id)
@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+
+import codecs
+import json
+import re
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from tdclient.types import JSONBackend
+
+orjson: Any
+
+try:
+    import orjson  # type: ignore[reportMissingImports]
+except ImportError:
+    orjson = None
+
+
+class JSONCodec:
+    """Decoder and encoder of JSON with the standard `json` module
+
+    Documents are decoded from bytes as received, without decoding them to
+    :class:`str` first, and encoded to UTF-8 bytes as sent.
+    """
+
+    name = "json"
+
+    def loads(self, data: bytes | str) -> Any:
+        """Decode a JSON document
+
+        Raises:
+            ValueError: if `data` is not valid JSON
+        """
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode an object into a JSON document in UTF-8"""
+        return json.dumps(obj).encode("utf-8")
+
+
+class OrjsonCodec(JSONCodec):
+    """Decoder and encoder of JSON with `orjson`
+
+    Documents which `orjson` rejects but the standard `json` module accepts,
+    e.g. with integers of more than 64 bits or `NaN`, are handled by the
+    latter, so that results do not depend on the library installed.
+    """
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        if orjson is None:
+            raise RuntimeError("OrjsonCodec requires orjson, which is not installed")
+
+    def loads(self, data: bytes | str) -> Any:
+        assert orjson is not None
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return super().loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        assert orjson is not None
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            return super().dumps(obj)
+
+
+def get_codec(codec: "JSONCodec | JSONBackend" = "auto") -> JSONCodec:
+    """Return a JSON codec
+
+    Args:
+        codec (str or :class:`JSONCodec`): a codec, or the name of a library
+
+            - "auto": `orjson` if it is installed, otherwise `json` (default)
+            - "json": the standard `json` module
+            - "orjson": `orjson`, which must be installed
+
+    Returns:
+        :class:`JSONCodec`
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec == "auto":
+        return JSONCodec() if orjson is None else OrjsonCodec()
+    if codec == "json":
+        return JSONCodec()
+    if codec == "orjson":
+        return OrjsonCodec()
+    raise ValueError(f"Unknown JSON codec: {codec}")
+
+
+class LineBuffer:
+    """Split a stream of bytes into lines without decoding them
+
+    Only ``b"\\n"`` ends lines, so that line separators of Unicode allowed in
+    JSON strings do not split records. Blank lines are skipped.
+    """
+
+    def __init__(self) -> None:
+        # pieces of the incomplete last line, joined once it is ended
+        self._pieces: list[bytes] = []
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Add bytes and return the lines completed by them"""
+        self._pieces.append(chunk)
+        if b"\n" not in chunk:
+            return []
+        lines = b"".join(self._pieces).split(b"\n")
+        self._pieces = [lines.pop()]
+        return [line for line in lines if line.strip()]
+
+    def flush(self) -> list[bytes]:
+        """Return the last line if it is not ended by a line break"""
+        rest = b"".join(self._pieces)
+        self._pieces = []
+        return [rest] if rest.strip() else []
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Iterate over the lines of a stream of bytes. See :class:`LineBuffer`."""
+    buf = LineBuffer()
+    for chunk in chunks:
+        yield from buf.feed(chunk)
+    yield from buf.flush()
+
+
+#: size of the chunks of responses parsed by :class:`JSONArrayParser`
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]}"
+_STRUCTURAL = re.compile(r'[\\"\[\]{},:]')
+
+
+class _ValueScanner:
+    """Find the end of a JSON value in pieces of text without decoding it
+
+    The value has ended once a `,`, `:` or an unmatched `]` or `}` follows it
+    outside of strings.
+    """
+
+    def __init__(self) -> None:
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str, pos: int = 0) -> bool:
+        """Scan `text` from `pos` and tell whether the value has ended"""
+        if self._escape and pos < len(text):
+            self._escape = False
+            pos += 1
+        while True:
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                return False
+            char = match.group()
+            pos = match.end()
+            if self._in_string:
+                if char == "\\":
+                    if pos == len(text):
+                        self._escape = True
+                        return False
+                    pos += 1
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+            elif self._depth == 0:
+                return True
+            elif char in "]}":
+                self._depth -= 1
+
+
+class JSONArrayParser:
+    """Parse the items of a JSON array incrementally from chunks of bytes
+
+    Items are returned as soon as they are complete, so that memory holds a
+    chunk and an item instead of the whole document. The array is either the
+    document itself, or the value of `key` in a document which is an object.
+    Values before it in the object are skipped and the rest of the document
+    after it is ignored.
+
+    Args:
+        key (str, optional): name of the array in the top-level object. The
+            document is the array itself if `None` is given.
+    """
+
+    def __init__(self, key: str | None = None) -> None:
+        self.key = key
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        # an incomplete value is decoded again only after its end is found
+        self._scanner: _ValueScanner | None = None
+        self._pieces: list[str] = []
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """Add bytes and return the items completed by them
+
+        Raises:
+            ValueError: if the document is not valid
+        """
+        text = self._text.decode(chunk)
+        if self._scanner is not None:
+            self._pieces.append(text)
+            if not self._scanner.feed(text):
+                return []
+        self._append(text)
+        return self._parse(False)
+
+    def close(self) -> list[Any]:
+        """Return the last items at the end of the document
+
+        Raises:
+            ValueError: if the document is not valid, is truncated or does not
+                have `key`
+        """
+        text = self._text.decode(b"", final=True)
+        if self._scanner is not None:
+            self._pieces.append(text)
+        self._append(text)
+        items = self._parse(True)
+        if self._state != "done":
+            if self._state == "member":
+                raise ValueError(f"Missing key: {self.key!r}")
+            raise ValueError("Truncated JSON document")
+        return items
+
+    def _append(self, text: str) -> None:
+        if self._scanner is not None:
+            text = "".join(self._pieces)
+            self._scanner = None
+            self._pieces = []
+        self._buf = self._buf[self._pos :] + text
+        self._pos = 0
+
+    def _skip(self, pos: int) -> int:
+        buf = self._buf
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        return pos
+
+    def _value(self, pos: int, final: bool) -> tuple[Any, int] | None:
+        """Decode a value at `pos`, or return `None` if it may be incomplete"""
+        try:
+            value, end = self._decoder.raw_decode(self._buf, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return self._incomplete(pos)
+        # numbers may continue in the next chunk, e.g. "1" of "1.5"
+        if not final and (
+            end == len(self._buf)
+            or (isinstance(value, (int, float)) and self._buf[end] not in _DELIMITERS)
+        ):
+            return self._incomplete(pos)
+        return value, end
+
+    def _incomplete(self, pos: int) -> tuple[Any, int] | None:
+        """Wait for the end of the value at `pos` before decoding it again
+
+        Decoding it on every chunk would take time quadratic in its size.
+        """
+        scanner = _ValueScanner()
+        if scanner.feed(self._buf, pos):
+            # more bytes do not change a value which has ended
+            return self._value(pos, True)
+        self._scanner = scanner
+        return None
+
+    def _parse(self, final: bool) -> list[Any]:
+        items: list[Any] = []
+        buf = self._buf
+        while self._state != "done":
+            pos = self._skip(self._pos)
+            if len(buf) <= pos:
+                break
+            char = buf[pos]
+            if self._state == "start":
+                expected = "[" if self.key is None else "{"
+                if char != expected:
+                    raise ValueError(f"Expecting {expected!r}")
+                self._state = "first" if self.key is None else "member"
+                self._pos = pos + 1
+            elif self._state == "member":
+                if char == "}":
+                    break
+                if char == ",":
+                    pos = self._skip(pos + 1)
+                decoded = self._value(pos, final)
+                if decoded is None:
+                    break
+                name, pos = decoded
+                pos = self._skip(pos)
+                if len(buf) <= pos:
+                    break
+                if buf[pos] != ":":
+                    raise ValueError("Expecting ':'")
+                pos = self._skip(pos + 1)
+                if name == self.key:
+                    if len(buf) <= pos:
+                        break
+                    if buf[pos] != "[":
+                        raise ValueError("Expecting '['")
+                    self._state = "first"
+                    self._pos = pos + 1
+                    continue
+                decoded = self._value(pos, final)
+                if decoded is None:
+                    break
+                self._pos = decoded[1]
+            else:
+                if char == "]":
+                    self._state = "done"
+                    self._pos = pos + 1
+                    break
+                if self._state == "next":
+                    if char != ",":
+                        raise ValueError("Expecting ',' or ']'")
+                    pos = self._skip(pos + 1)
+                decoded = self._value(pos, final)
+                if decoded is None:
+                    break
+                items.append(decoded[0])
+                self._state = "next"
+                self._pos = decoded[1]
+        return items
+
+
+def iter_array_items(chunks: Iterable[bytes], key: str | None = None) -> Iterator[Any]:
+    """Iterate over the items of a JSON array. See :class:`JSONArrayParser`."""
+    parser = JSONArrayParser(key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
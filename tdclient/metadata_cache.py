@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+#: lifetime of cached listings in seconds when not specified
+DEFAULT_TTL = 300.0
+
+
+class MetadataCache:
+    """Cache of database and table listings indexed by name
+
+    Listings of `/v3/database/list` and `/v3/table/list/{db}` are kept for `ttl`
+    seconds as dictionaries keyed by name, so that looking up many databases
+    and tables takes one request per database instead of one per lookup.
+    :class:`tdclient.client.Client` invalidates entries changed through it;
+    changes made elsewhere are seen once entries expire, or after
+    :meth:`invalidate`.
+
+    Args:
+        ttl (float, optional): lifetime of listings in seconds. Default is 300.
+        clock (callable, optional): monotonic clock in seconds
+    """
+
+    def __init__(
+        self, ttl: float = DEFAULT_TTL, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._databases: tuple[float, dict[str, Any]] | None = None
+        self._tables: dict[str, tuple[float, dict[str, Any]]] = {}
+        # listings loaded before an invalidation must not be stored after it
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def databases(self, load: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        """Return the attributes of databases by name
+
+        Args:
+            load (callable): called to list databases when not cached
+
+        Returns:
+            dict: attributes of databases by name. It must not be modified.
+        """
+        now = self._clock()
+        with self._lock:
+            if self._databases is not None and now < self._databases[0]:
+                self.hits += 1
+                return self._databases[1]
+            self.misses += 1
+            generation = self._generation
+        databases = load()
+        with self._lock:
+            if generation == self._generation:
+                self._databases = (now + self.ttl, databases)
+        return databases
+
+    def tables(
+        self, db_name: str, load: Callable[[str], dict[str, Any]]
+    ) -> dict[str, Any]:
+        """Return the attributes of the tables of a database by name
+
+        Args:
+            db_name (str): name of a database
+            load (callable): called with `db_name` to list tables when not cached
+
+        Returns:
+            dict: attributes of tables by name. It must not be modified.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._tables.get(db_name)
+            if entry is not None and now < entry[0]:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+        tables = load(db_name)
+        with self._lock:
+            if generation == self._generation:
+                self._tables[db_name] = (now + self.ttl, tables)
+        return tables
+
+    def invalidate(self, db_name: str | None = None) -> None:
+        """Drop cached listings
+
+        Args:
+            db_name (str, optional): drop the listing of databases and the
+                listing of tables of this database. All listings are dropped if
+                `None` is given.
+        """
+        with self._lock:
+            self._generation += 1
+            self._databases = None
+            if db_name is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(db_name, None)
@@ -0,0 +1,508 @@
+#!/usr/bin/env python
+
+import contextlib
+import csv
+import gzip
+import hashlib
+import io
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import (
+    CancelledError,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import IO, Any, TypeVar, cast
+
+import msgpack
+
+from tdclient.json_codec import JSONCodec, get_codec
+from tdclient.result_download import is_retryable
+from tdclient.types import DataFormat, FileLike, JSONBackend
+from tdclient.util import (
+    csv_text_record_reader,
+    infer_csv_converters,
+    normalized_msgpack,
+    read_csv_batches,
+    read_csv_records,
+    validate_record,
+)
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+#: default size of chunks of the input in bytes
+DEFAULT_CHUNK_SIZE = 64 * 1024**2
+
+
+class ImportProgress:
+    """Progress of a parallel import, passed to the `progress` callback
+
+    Attributes:
+        parts (int): number of chunks read from the input so far
+        parts_done (int): number of chunks uploaded
+        bytes_read (int): bytes of the (uncompressed) input read so far
+        bytes_done (int): bytes of the input in uploaded chunks
+        bytes_uploaded (int): bytes of msgpack.gz uploaded
+        elapsed (float): seconds since the import started
+    """
+
+    __slots__ = (
+        "parts",
+        "parts_done",
+        "bytes_read",
+        "bytes_done",
+        "bytes_uploaded",
+        "elapsed",
+    )
+
+    def __init__(self) -> None:
+        self.parts = 0
+        self.parts_done = 0
+        self.bytes_read = 0
+        self.bytes_done = 0
+        self.bytes_uploaded = 0
+        self.elapsed = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """bytes of the input imported per second"""
+        return self.bytes_done / self.elapsed if 0 < self.elapsed else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"<ImportProgress parts={self.parts_done}/{self.parts} "
+            f"bytes={self.bytes_done}/{self.bytes_read} "
+            f"throughput={self.throughput / 1024**2:.1f}MiB/s>"
+        )
+
+
+def split_chunks(
+    stream: IO[bytes], fmt: str, chunk_size: int = DEFAULT_CHUNK_SIZE, **kwargs: Any
+) -> Iterator[bytes]:
+    """Split an uncompressed input into chunks of whole records
+
+    JSON, CSV and TSV inputs are cut at line ends. Line ends inside quoted
+    CSV/TSV fields are not cut at, as long as quotes are escaped by doubling
+    them. msgpack inputs are cut between objects.
+
+    Args:
+        stream: a file-like object of the input
+        fmt (str): "msgpack", "json", "csv" or "tsv"
+        chunk_size (int): size of reads from the input. A chunk is the records
+            which end in a read and the rest of the previous read, so that it is
+            about this size unless a record is larger.
+        **kwargs: options for the format, e.g. `dialect` of CSV
+
+    Yields:
+        bytes: a chunk of records
+    """
+    if fmt == "msgpack":
+        yield from _split_msgpack(stream, chunk_size)
+        return
+    quotechar: bytes | None = None
+    if fmt in ("csv", "tsv"):
+        dialect = kwargs.get("dialect", csv.excel_tab if fmt == "tsv" else csv.excel)
+        quotechar = _quotechar(dialect, kwargs.get("encoding", "utf-8"))
+    elif fmt != "json":
+        raise TypeError(f"unknown format: {fmt}")
+    rest = b""
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        block = rest + data
+        end = _last_record_end(block, quotechar)
+        if end == 0:
+            rest = block
+            continue
+        yield block[:end]
+        rest = block[end:]
+    if rest:
+        yield rest
+
+
+def _quotechar(dialect: Any, encoding: str) -> bytes | None:
+    if isinstance(dialect, str):
+        dialect = csv.get_dialect(dialect)
+    if dialect.quoting == csv.QUOTE_NONE or not dialect.quotechar:
+        return None
+    return dialect.quotechar.encode(encoding)
+
+
+def _last_record_end(block: bytes, quotechar: bytes | None) -> int:
+    pos = block.rfind(b"\n")
+    if quotechar is None:
+        return pos + 1
+    quotes = block.count(quotechar)
+    while 0 <= pos:
+        # a line end is out of quoted fields if an even number of quotes precede it
+        if (quotes - block.count(quotechar, pos)) % 2 == 0:
+            return pos + 1
+        pos = block.rfind(b"\n", 0, pos)
+    return 0
+
+
+def _split_msgpack(stream: IO[bytes], chunk_size: int) -> Iterator[bytes]:
+    unpacker = msgpack.Unpacker(max_buffer_size=max(100 * 1024**2, 2 * chunk_size))
+    buf = bytearray()
+    offset = 0
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        buf += data
+        unpacker.feed(data)
+        end = 0
+        while True:
+            try:
+                unpacker.skip()
+            except msgpack.OutOfData:
+                break
+            # `tell()` counts bytes of an incomplete object after OutOfData
+            end = unpacker.tell() - offset
+        if 0 < end:
+            yield bytes(buf[:end])
+            del buf[:end]
+            offset += end
+    if buf:
+        raise ValueError("msgpack input ends in the middle of an object")
+
+
+def _first_record(chunk: bytes, quotechar: bytes | None) -> int:
+    pos = chunk.find(b"\n")
+    while 0 <= pos:
+        if quotechar is None or chunk.count(quotechar, 0, pos) % 2 == 0:
+            return pos + 1
+        pos = chunk.find(b"\n", pos + 1)
+    return len(chunk)
+
+
+def read_chunk(
+    data: bytes,
+    fmt: str,
+    json_codec: JSONCodec | JSONBackend = "auto",
+    **kwargs: Any,
+) -> Iterator[dict[str, Any]]:
+    """Read records from a chunk made by :func:`split_chunks`
+
+    Args:
+        data (bytes): a chunk of records
+        fmt (str): "msgpack", "json", "csv" or "tsv"
+        json_codec (str or :class:`tdclient.json_codec.JSONCodec`): decoder of
+            JSON records. "auto" by default.
+        **kwargs: options for the format. `columns` is required for CSV and TSV.
+
+    Yields:
+        dict: a record
+    """
+    if fmt == "msgpack":
+        unpacker = msgpack.Unpacker(
+            io.BytesIO(data), raw=False, max_buffer_size=len(data)
+        )
+        for record in unpacker:
+            validate_record(record)
+            yield record
+    elif fmt == "json":
+        codec = get_codec(json_codec)
+        for line in io.BytesIO(data):
+            record = codec.loads(line)
+            validate_record(record)
+            yield record
+    else:
+        dialect = kwargs.get("dialect", csv.excel_tab if fmt == "tsv" else csv.excel)
+        if kwargs.get("compiled"):
+            rows = csv.reader(
+                io.TextIOWrapper(io.BytesIO(data), kwargs.get("encoding", "utf-8")),
+                dialect=dialect,
+            )
+            for batch in read_csv_batches(
+                rows,
+                kwargs["columns"],
+                kwargs.get("dtypes"),
+                kwargs.get("converters"),
+                kwargs.get("sample_size", 1000),
+            ):
+                yield from batch
+            return
+        reader = csv_text_record_reader(
+            io.BytesIO(data),
+            kwargs.get("encoding", "utf-8"),
+            dialect,
+            kwargs["columns"],
+        )
+        yield from read_csv_records(
+            reader, kwargs.get("dtypes"), kwargs.get("converters")
+        )
+
+
+def pack_chunk(data: bytes, fmt: str, salt: str, **kwargs: Any) -> tuple[str, bytes]:
+    """Convert a chunk of records into msgpack.gz
+
+    This runs in worker processes, so that chunks are converted in parallel.
+
+    Args:
+        data (bytes): a chunk of records
+        fmt (str): "msgpack", "json", "csv" or "tsv"
+        salt (str): mixed into the digest, e.g. the position of the chunk
+        **kwargs: options for the format
+
+    Returns:
+        tuple: an MD5 hex digest of `salt` and `data`, which identifies the chunk
+        across retries, and the chunk in msgpack.gz
+    """
+    digest = hashlib.md5(salt.encode("utf-8"))
+    digest.update(data)
+    out = io.BytesIO()
+    # mtime is fixed so that the same chunk is converted into the same bytes
+    with gzip.GzipFile(mode="wb", fileobj=out, mtime=0) as gz:
+        packer = msgpack.Packer()
+        for item in read_chunk(data, fmt, **kwargs):
+            try:
+                mp = packer.pack(item)
+            except (OverflowError, ValueError):
+                packer.reset()
+                mp = packer.pack(normalized_msgpack(item))
+            gz.write(mp)
+    return digest.hexdigest(), out.getvalue()
+
+
+def parallel_import(
+    file: FileLike,
+    format: DataFormat,
+    upload: Callable[[int, str, bytes], T],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    salt: str = "",
+    num_processes: int | None = None,
+    num_threads: int = 4,
+    retry_limit: int = 3,
+    retry_delay: float = 1,
+    progress: Callable[[ImportProgress], None] | None = None,
+    **kwargs: Any,
+) -> list[T]:
+    """Convert an input into msgpack.gz chunks in parallel and upload them
+
+    The input is read and split into chunks of whole records on the calling
+    thread. Chunks are converted on a process pool, and uploaded on a thread
+    pool as soon as they are converted. At most ``num_processes + num_threads``
+    chunks are held in memory at a time.
+
+    Args:
+        file (str or file-like): a name of a file, or a file-like object
+        format (str): format of the input, see `file import parameters`_
+        upload (callable): called with the index of a chunk, the digest of
+            `salt`, the index and the chunk, and the chunk in msgpack.gz. It
+            may be called again for the same chunk when it failed.
+        chunk_size (int, optional): size of chunks of the uncompressed input in
+            bytes. Default is 64MiB.
+        salt (str, optional): mixed into the digests of chunks
+        num_processes (int, optional): number of processes converting chunks.
+            Default is the number of CPUs. With 0, or if `kwargs` cannot be sent
+            to processes, e.g. with lambda converters, chunks are converted on a
+            thread instead.
+        num_threads (int, optional): number of concurrent uploads. Default is 4.
+        retry_limit (int, optional): number of retries of an upload. Default is 3.
+        retry_delay (float, optional): first delay in seconds before retrying an
+            upload, doubled on every retry. Default is 1.
+        progress (callable, optional): called with an :class:`ImportProgress`
+            every time a chunk is uploaded
+        **kwargs: options for the format, and `json_codec` decoding JSON
+            records. With ``compiled=True``, converters of CSV and TSV columns
+            are inferred once from the first chunk, so that every chunk is
+            read with the same types.
+
+    Returns:
+        list: the results of `upload` in order of chunks
+    """
+    fmt = str(format)
+    compressed = fmt.endswith(".gz")
+    if compressed:
+        fmt = fmt[: -len(".gz")]
+    if fmt not in ("msgpack", "json", "csv", "tsv"):
+        raise TypeError(f"unknown format: {format}")
+
+    with contextlib.ExitStack() as stack:
+        if hasattr(file, "read"):
+            stream = cast(IO[bytes], file)
+        else:
+            stream = stack.enter_context(open(cast("str | bytes", file), "rb"))
+        if compressed:
+            stream = cast(IO[bytes], stack.enter_context(gzip.GzipFile(fileobj=stream)))
+        chunks = split_chunks(stream, fmt, chunk_size, **kwargs)
+        if fmt in ("csv", "tsv") and kwargs.get("columns") is None:
+            chunks = _with_columns(chunks, fmt, kwargs)
+        if fmt in ("csv", "tsv") and kwargs.get("compiled"):
+            chunks = _with_converters(chunks, fmt, kwargs)
+        return _ImportPipeline(
+            upload, num_processes, num_threads, retry_limit, retry_delay, progress
+        ).run(chunks, fmt, salt, kwargs)
+
+
+def _with_columns(
+    chunks: Iterator[bytes], fmt: str, kwargs: dict[str, Any]
+) -> Iterator[bytes]:
+    """Take column names from the first row, and set them to `kwargs`"""
+    dialect = kwargs.get("dialect", csv.excel_tab if fmt == "tsv" else csv.excel)
+    encoding = kwargs.get("encoding", "utf-8")
+    for chunk in chunks:
+        if kwargs.get("columns") is None:
+            quotechar = _quotechar(dialect, encoding)
+            end = _first_record(chunk, quotechar)
+            header = chunk[:end].decode(encoding)
+            kwargs["columns"] = next(csv.reader(io.StringIO(header), dialect=dialect))
+            chunk = chunk[end:]
+            if not chunk:
+                continue
+        yield chunk
+
+
+def _with_converters(
+    chunks: Iterator[bytes], fmt: str, kwargs: dict[str, Any]
+) -> Iterator[bytes]:
+    """Infer converters of columns from the first chunk, and set them to `kwargs`
+
+    Chunks are converted separately, so types inferred from each chunk could
+    differ, and a column could be imported as int in some parts and as str in
+    others. Converters of all columns are given to the converters of chunks
+    instead.
+    """
+    dialect = kwargs.get("dialect", csv.excel_tab if fmt == "tsv" else csv.excel)
+    for index, chunk in enumerate(chunks):
+        if index == 0:
+            rows = csv.reader(
+                io.TextIOWrapper(io.BytesIO(chunk), kwargs.get("encoding", "utf-8")),
+                dialect=dialect,
+            )
+            sample = list(itertools.islice(rows, kwargs.get("sample_size", 1000)))
+            columns = kwargs["columns"]
+            funcs = infer_csv_converters(
+                columns, sample, kwargs.get("dtypes"), kwargs.get("converters")
+            )
+            kwargs["dtypes"] = None
+            kwargs["converters"] = dict(zip(columns, funcs, strict=True))
+        yield chunk
+
+
+class _ImportPipeline:
+    def __init__(
+        self,
+        upload: Callable[[int, str, bytes], Any],
+        num_processes: int | None,
+        num_threads: int,
+        retry_limit: int,
+        retry_delay: float,
+        progress: Callable[[ImportProgress], None] | None,
+    ) -> None:
+        self.upload = upload
+        self.num_processes = (
+            (os.cpu_count() or 1) if num_processes is None else num_processes
+        )
+        self.num_threads = num_threads
+        self.retry_limit = retry_limit
+        self.retry_delay = retry_delay
+        self.progress = progress
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(self.num_processes + num_threads)
+        self._failed = threading.Event()
+        self._state = ImportProgress()
+        self._started_at = time.time()
+
+    def run(
+        self, chunks: Iterator[bytes], fmt: str, salt: str, kwargs: dict[str, Any]
+    ) -> list[Any]:
+        uploads: list[Future[Any]] = []
+        with self._converter(kwargs) as converter:
+            with ThreadPoolExecutor(
+                max_workers=self.num_threads, thread_name_prefix="tdclient-import"
+            ) as uploader:
+                try:
+                    for index, chunk in enumerate(chunks):
+                        self._slots.acquire()
+                        if self._failed.is_set():
+                            break
+                        with self._lock:
+                            self._state.parts += 1
+                            self._state.bytes_read += len(chunk)
+                        converted = converter.submit(
+                            pack_chunk, chunk, fmt, f"{salt}:{index}", **kwargs
+                        )
+                        uploads.append(
+                            uploader.submit(self._upload, index, len(chunk), converted)
+                        )
+                finally:
+                    if self._failed.is_set():
+                        converter.shutdown(wait=True, cancel_futures=True)
+        for future in uploads:
+            error = future.exception()
+            if error is not None and not isinstance(error, CancelledError):
+                raise error
+        return [future.result() for future in uploads]
+
+    def _converter(self, kwargs: dict[str, Any]) -> Executor:
+        picklable = True
+        try:
+            pickle.dumps(kwargs)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            log.warning("Converting chunks on a thread as options cannot be pickled")
+            picklable = False
+        if self.num_processes == 0 or not picklable:
+            # the GIL is held while converting, so more threads would not help
+            return ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="tdclient-convert"
+            )
+        # fork() is unsafe in a process with threads, e.g. of the uploader
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        return ProcessPoolExecutor(max_workers=self.num_processes, mp_context=context)
+
+    def _upload(
+        self, index: int, size: int, converted: Future[tuple[str, bytes]]
+    ) -> Any:
+        try:
+            digest, data = converted.result()
+            result = self._upload_with_retry(index, digest, data)
+            self._report(size, len(data))
+            return result
+        except BaseException:
+            self._failed.set()
+            raise
+        finally:
+            self._slots.release()
+
+    def _upload_with_retry(self, index: int, digest: str, data: bytes) -> Any:
+        delay = self.retry_delay
+        retry = 0
+        while True:
+            try:
+                return self.upload(index, digest, data)
+            except Exception as error:
+                if not is_retryable(error) or self.retry_limit <= retry:
+                    raise
+                log.warning(
+                    "Retrying to upload part %d in %s seconds: %s", index, delay, error
+                )
+            time.sleep(delay)
+            delay *= 2
+            retry += 1
+
+    def _report(self, size: int, uploaded: int) -> None:
+        with self._lock:
+            state = self._state
+            state.parts_done += 1
+            state.bytes_done += size
+            state.bytes_uploaded += uploaded
+            state.elapsed = time.time() - self._started_at
+            log.info("Imported %r", state)
+            if self.progress is not None:
+                self.progress(state)
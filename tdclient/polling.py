@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+import itertools
+import random
+from collections.abc import Callable, Iterator
+
+from tdclient import errors
+from tdclient.retry import Clock
+
+
+class Backoff:
+    """Intervals between polls of a job or a bulk import session
+
+    Intervals start at `initial` seconds so that short jobs (e.g. Presto queries
+    finishing in a second) are noticed quickly, and grow by `multiplier` up to
+    `maximum` seconds so that long jobs are polled less often.
+
+    Args:
+        initial (float, optional): first interval in seconds. Default is 0.5.
+        maximum (float, optional): cap of intervals in seconds. Default is 10.
+        multiplier (float, optional): growth of intervals. Default is 1.5.
+        jitter (float, optional): randomize each interval by up to this fraction
+            of it, to spread polls of many waiters. Default is 0.
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.5,
+        maximum: float = 10.0,
+        multiplier: float = 1.5,
+        jitter: float = 0.0,
+    ) -> None:
+        self.initial = initial
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def intervals(self) -> Iterator[float]:
+        """Yield intervals in seconds endlessly"""
+        interval = self.initial
+        while True:
+            if self.jitter:
+                yield interval * (1 + random.uniform(-self.jitter, self.jitter))
+            else:
+                yield interval
+            interval = min(interval * self.multiplier, self.maximum)
+
+
+#: Back-off used when no fixed wait interval is given
+DEFAULT_BACKOFF = Backoff()
+
+
+def poll(
+    done: Callable[[], bool],
+    timeout: float | None = None,
+    wait_interval: float | None = None,
+    callback: Callable[[], None] | None = None,
+    backoff: Backoff | None = None,
+    clock: Clock | None = None,
+) -> None:
+    """Wait until `done` returns True
+
+    This is the polling loop shared by :meth:`tdclient.models.Job.wait`,
+    :class:`tdclient.cursor.Cursor` and :class:`tdclient.models.BulkImport`.
+
+    Args:
+        done (callable): returns True when waiting is over. It may raise to stop
+            waiting, e.g. when a job has failed.
+        timeout (float, optional): deadline in seconds from now. The last sleep is
+            shortened so as not to pass the deadline. No timeout by default.
+        wait_interval (float, optional): fixed interval between polls in seconds.
+            When it is not given, intervals follow `backoff`.
+        callback (callable, optional): called after every sleep
+        backoff (:class:`Backoff`, optional): intervals used when
+            `wait_interval` is not given. Default is :data:`DEFAULT_BACKOFF`.
+        clock (:class:`tdclient.retry.Clock`, optional): source of the monotonic
+            time of the deadline and of sleeps
+
+    Raises:
+        :class:`tdclient.errors.WaitTimeoutError`: if `timeout` has passed
+    """
+    clock = clock or Clock()
+    started_at = clock.monotonic()
+    if wait_interval is None:
+        intervals = (backoff or DEFAULT_BACKOFF).intervals()
+    else:
+        intervals = itertools.repeat(float(wait_interval))
+    while not done():
+        delay = next(intervals)
+        if timeout is not None:
+            remaining = timeout - (clock.monotonic() - started_at)
+            if remaining <= 0:
+                raise errors.WaitTimeoutError(f"Timed out after {timeout:g} seconds")
+            delay = min(delay, remaining)
+        clock.sleep(delay)
+        if callback is not None:
+            callback()
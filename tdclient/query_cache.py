@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Generator
+from typing import Any, Literal
+
+log = logging.getLogger(__name__)
+
+#: seconds for which the job of a query is reused when not specified
+DEFAULT_TTL = 60.0
+
+#: seconds after which a claim of a query not completed by its owner expires
+DEFAULT_LEASE = 60.0
+
+#: interval of checks for jobs issued by other processes in seconds
+POLL_INTERVAL = 0.05
+
+#: parameters of `/v3/job/issue` which do not change the result of a query
+IGNORED_PARAMS = frozenset(("priority", "retry_limit"))
+
+ClaimState = Literal["hit", "wait", "claimed"]
+
+# string literals, quoted identifiers and comments are kept verbatim, and line
+# comments keep their newline so that they do not swallow the following text
+_TOKEN = re.compile(
+    r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|--[^\n]*\n?|/\*.*?\*/|(\s+)""",
+    re.DOTALL,
+)
+
+
+def normalize_query(q: str) -> str:
+    """Return a query with insignificant differences removed
+
+    Runs of whitespace outside string literals, quoted identifiers and comments
+    are replaced by a space, and leading and trailing whitespace and semicolons
+    are stripped. Letter case is kept, since literals and some identifiers are
+    case sensitive.
+
+    Args:
+        q (str): query string
+
+    Returns:
+        str: the normalized query
+    """
+    normalized = _TOKEN.sub(lambda m: " " if m.group(1) else m.group(0), q)
+    return normalized.strip().rstrip(";").rstrip()
+
+
+def query_key(
+    identity: str, q: str, type: str, db: str | None, params: dict[str, Any]
+) -> str:
+    """Return the key of a query in a :class:`QueryCache`
+
+    Args:
+        identity (str): account of the query, e.g. the endpoint and the API key
+        q (str): query string, normalized by :func:`normalize_query`
+        type (str): query engine
+        db (str): database name
+        params (dict): other parameters of the job, except those in
+            :data:`IGNORED_PARAMS`
+
+    Returns:
+        str: a hexadecimal SHA-256 digest, which does not reveal the identity
+    """
+    material = {
+        "identity": identity,
+        "query": normalize_query(q),
+        "type": type,
+        "db": db,
+        "params": {k: v for k, v in params.items() if k not in IGNORED_PARAMS},
+    }
+    encoded = json.dumps(material, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class LocalBackend:
+    """Jobs of queries shared by the threads of a process"""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        # key -> (job ID or None while it is being issued, time)
+        self._entries: dict[str, tuple[str | None, float]] = {}
+
+    def claim(
+        self, key: str, now: float, ttl: float, lease: float
+    ) -> tuple[ClaimState, str | None]:
+        """Look up the job of a query, or claim the right to issue it
+
+        Returns:
+            tuple: ("hit", job ID) if a job issued less than `ttl` seconds ago
+            exists, ("wait", None) if another caller claimed the query less
+            than `lease` seconds ago, otherwise ("claimed", None)
+        """
+        with self._cond:
+            entry = self._entries.get(key)
+            if entry is not None:
+                job_id, at = entry
+                if job_id is not None and now - at < ttl:
+                    return ("hit", job_id)
+                if job_id is None and now - at < lease:
+                    return ("wait", None)
+            self._entries[key] = (None, now)
+            return ("claimed", None)
+
+    def complete(self, key: str, job_id: str, issued_at: float) -> None:
+        """Record the job issued for a claimed query"""
+        with self._cond:
+            self._entries[key] = (job_id, issued_at)
+            self._cond.notify_all()
+
+    def release(self, key: str) -> None:
+        """Give up a claim after issuing the query failed"""
+        with self._cond:
+            if self._entries.get(key, ("", 0))[0] is None:
+                del self._entries[key]
+            self._cond.notify_all()
+
+    def discard(self, key: str, job_id: str) -> None:
+        """Forget a job which must not be reused"""
+        with self._cond:
+            if self._entries.get(key, (None, 0))[0] == job_id:
+                del self._entries[key]
+
+    def wait(self, key: str, timeout: float) -> None:
+        """Wait until a claimed query has been issued or released"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._entries.get(key, ("", 0))[0] is not None, timeout
+            )
+
+    def clear(self) -> None:
+        with self._cond:
+            self._entries.clear()
+            self._cond.notify_all()
+
+
+class SQLiteBackend:
+    """Jobs of queries shared by processes through a SQLite database file
+
+    Every operation opens a short transaction on the file, so that processes
+    and threads can share it. Processes waiting for a query claimed by another
+    one check the file every :data:`POLL_INTERVAL` seconds.
+
+    Args:
+        path (str): path of the database file. It is created if missing.
+        timeout (float, optional): seconds to wait for a lock of the file.
+            Default is 30.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0) -> None:
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.timeout = timeout
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS queries"
+                " (key TEXT PRIMARY KEY, job_id TEXT, at REAL NOT NULL)"
+            )
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Generator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def claim(
+        self, key: str, now: float, ttl: float, lease: float
+    ) -> tuple[ClaimState, str | None]:
+        """See :meth:`LocalBackend.claim`"""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT job_id, at FROM queries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                job_id, at = row
+                if job_id is not None and now - at < ttl:
+                    return ("hit", str(job_id))
+                if job_id is None and now - at < lease:
+                    return ("wait", None)
+            conn.execute(
+                "INSERT OR REPLACE INTO queries (key, job_id, at) VALUES (?, NULL, ?)",
+                (key, now),
+            )
+            # drop entries which can no longer be hits nor claims
+            conn.execute(
+                "DELETE FROM queries WHERE at < ?", (now - max(ttl, lease) * 2,)
+            )
+            return ("claimed", None)
+
+    def complete(self, key: str, job_id: str, issued_at: float) -> None:
+        """See :meth:`LocalBackend.complete`"""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO queries (key, job_id, at) VALUES (?, ?, ?)",
+                (key, job_id, issued_at),
+            )
+
+    def release(self, key: str) -> None:
+        """See :meth:`LocalBackend.release`"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM queries WHERE key = ? AND job_id IS NULL", (key,))
+
+    def discard(self, key: str, job_id: str) -> None:
+        """See :meth:`LocalBackend.discard`"""
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM queries WHERE key = ? AND job_id = ?", (key, job_id)
+            )
+
+    def wait(self, key: str, timeout: float) -> None:
+        """Wait until a claimed query may have been issued or released"""
+        time.sleep(min(timeout, POLL_INTERVAL))
+
+    def clear(self) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM queries")
+
+
+class QueryCache:
+    """Reuse of the jobs of identical queries issued within a freshness window
+
+    Queries are identified by :func:`query_key`, from the normalized query,
+    the database, the engine and the other parameters of the job. A job issued
+    less than `ttl` seconds ago for the same query is returned instead of
+    issuing a new one, whether it is still running or has succeeded, unless it
+    has failed or been killed. Identical queries issued at once share the job
+    of the first one, which is issued once ("single-flight"): the others wait
+    until it has been issued, or until `lease` seconds have passed if the
+    caller issuing it disappeared.
+
+    :class:`tdclient.api.API` given a cache as `query_cache` reuses jobs in
+    :meth:`tdclient.api.API.query`, and so in :meth:`tdclient.client.Client.query`
+    and DB-API cursors. Queries exporting their results with `result_url` are
+    always issued, since exporting has side effects.
+
+    Example:
+
+        .. code-block:: python
+
+            cache = QueryCache(ttl=30, backend=SQLiteBackend("/tmp/td-queries.db"))
+            td = tdclient.Client(query_cache=cache)
+
+    Args:
+        ttl (float, optional): seconds for which the job of a query is reused.
+            Default is 60.
+        backend (optional): :class:`LocalBackend` to share jobs between the
+            threads of a process (default), or :class:`SQLiteBackend` to share
+            them between processes on a host
+        lease (float, optional): seconds after which a query being issued by
+            another caller is issued again. Default is 60.
+        clock (callable, optional): wall clock in seconds, shared by processes
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        backend: LocalBackend | SQLiteBackend | None = None,
+        lease: float = DEFAULT_LEASE,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl = ttl
+        self.backend = LocalBackend() if backend is None else backend
+        self.lease = lease
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(
+        self, identity: str, q: str, type: str, db: str | None, params: dict[str, Any]
+    ) -> str:
+        """Return the key of a query, see :func:`query_key`"""
+        return query_key(identity, q, type, db, params)
+
+    def get_or_issue(
+        self,
+        key: str,
+        issue: Callable[[], str],
+        reusable: Callable[[str], bool] = lambda job_id: True,
+    ) -> str:
+        """Return the job ID of a query, issuing it unless a job can be reused
+
+        Args:
+            key (str): key of the query, see :func:`query_key`
+            issue (callable): issues the query and returns the job ID
+            reusable (callable): whether a cached job may be reused, e.g. False
+                for failed jobs, which are then forgotten
+
+        Returns:
+            str: job ID
+        """
+        while True:
+            now = self._clock()
+            state, job_id = self.backend.claim(key, now, self.ttl, self.lease)
+            if state == "hit":
+                assert job_id is not None
+                if reusable(job_id):
+                    with self._lock:
+                        self.hits += 1
+                    log.debug("Reusing job %s of query %s", job_id, key)
+                    return job_id
+                self.backend.discard(key, job_id)
+            elif state == "claimed":
+                with self._lock:
+                    self.misses += 1
+                try:
+                    job_id = issue()
+                except BaseException:
+                    self.backend.release(key)
+                    raise
+                self.backend.complete(key, job_id, now)
+                return job_id
+            else:
+                self.backend.wait(key, self.lease)
+
+    def clear(self) -> None:
+        """Forget all jobs, so that the next queries are issued again"""
+        self.backend.clear()
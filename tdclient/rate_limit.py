@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse as urlparse
+from collections.abc import Callable, Generator, Mapping
+from typing import Any
+
+from tdclient.types import RouteFamily
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+#: interval of checks for slots freed by other processes in seconds
+POLL_INTERVAL = 0.05
+
+
+def route_family(method: str, url: str, base: str | None = None) -> RouteFamily:
+    """Return the family of the route of a request
+
+    Args:
+        method (str): HTTP method
+        url (str): URL or path of the request
+        base (str, optional): URL of the endpoint the request was sent to. Its
+            path, e.g. "/td" of "https://proxy.example.com/td/", is removed
+            from the path of the request before matching routes.
+
+    Returns:
+        str: one of "job_issue", "job_status", "result", "import", "list" and
+        "other"
+    """
+    path = urlparse.urlparse(url).path
+    if base is not None:
+        base_path = urlparse.urlparse(base).path.rstrip("/")
+        if base_path and path.startswith(base_path + "/"):
+            path = "/" + path[len(base_path) :].lstrip("/")
+    if path.startswith("/v3/job/issue/"):
+        return "job_issue"
+    if path.startswith(("/v3/job/status/", "/v3/job/show/")):
+        return "job_status"
+    if path.startswith("/v3/job/result/"):
+        return "result"
+    if method == "PUT" or path.startswith("/v3/table/import"):
+        return "import"
+    if path.endswith("/list") or "/list/" in path:
+        return "list"
+    return "other"
+
+
+class RouteLimit:
+    """Limits of the requests of a route family
+
+    Args:
+        rate (float, optional): requests started per second. Unlimited by default.
+        burst (int, optional): requests which may be started at once after an
+            idle period. Default is 1.
+        max_in_flight (int, optional): requests waiting for a response at once.
+            Unlimited by default.
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        burst: int = 1,
+        max_in_flight: int | None = None,
+    ) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError(f"rate must be positive: {rate}")
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1: {burst}")
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be at least 1: {max_in_flight}")
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(rate={self.rate!r}, burst={self.burst!r}, "
+            f"max_in_flight={self.max_in_flight!r})"
+        )
+
+
+def _take(
+    state: dict[str, Any], limit: RouteLimit, now: float, in_flight: int
+) -> float | None:
+    """Take a token and a slot from the state of a bucket if both are available
+
+    Returns 0 when taken, otherwise the seconds until a token is available, or
+    `None` when waiting for a slot.
+    """
+    if limit.max_in_flight is not None and limit.max_in_flight <= in_flight:
+        return None
+    if limit.rate is not None:
+        tokens = state.get("tokens", float(limit.burst))
+        updated = state.get("updated", now)
+        tokens = min(float(limit.burst), tokens + max(0.0, now - updated) * limit.rate)
+        state["updated"] = now
+        if tokens < 1.0:
+            state["tokens"] = tokens
+            return (1.0 - tokens) / limit.rate
+        state["tokens"] = tokens - 1.0
+    return 0.0
+
+
+class LocalBackend:
+    """Token buckets and in-flight counters shared by the threads of a process"""
+
+    def __init__(self) -> None:
+        self._states: dict[str, dict[str, Any]] = {}
+        self._in_flight: dict[str, int] = {}
+
+    def try_acquire(self, family: str, limit: RouteLimit) -> float | None:
+        """Start a request if limits allow it; called under the limiter lock
+
+        Returns:
+            float: 0 if the request may start, otherwise the seconds to wait
+            before trying again, or `None` to wait until a request finishes
+        """
+        in_flight = self._in_flight.get(family, 0)
+        state = self._states.setdefault(family, {})
+        wait = _take(state, limit, time.monotonic(), in_flight)
+        if wait == 0:
+            self._in_flight[family] = in_flight + 1
+        return wait
+
+    def release(self, family: str) -> None:
+        """Finish a request; called under the limiter lock"""
+        self._in_flight[family] = self._in_flight.get(family, 1) - 1
+
+
+class FileLockBackend:
+    """Token buckets and in-flight counters shared by processes through a file
+
+    The state is a small JSON file updated under an exclusive `flock`, so that
+    every process on a host started with the same `path` shares the limits.
+    Requests in flight are recorded by process ID, and those of processes which
+    no longer exist are ignored. Processes wait for slots freed by other
+    processes by checking the file every :data:`POLL_INTERVAL` seconds.
+
+    Args:
+        path (str): path of the state file. It is created if missing.
+    """
+
+    def __init__(self, path: str) -> None:
+        if fcntl is None:
+            raise RuntimeError("FileLockBackend requires fcntl, which is not available")
+        self.path = path
+
+    @contextlib.contextmanager
+    def _state(self) -> Generator[dict[str, Any]]:
+        assert fcntl is not None
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, "r+") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                data = f.read()
+                state: dict[str, Any] = {}
+                try:
+                    if data:
+                        state = json.loads(data)
+                except ValueError:
+                    log.warning("Resetting broken rate limit state in %s", self.path)
+                    state = {}
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def try_acquire(self, family: str, limit: RouteLimit) -> float | None:
+        me = str(os.getpid())
+        with self._state() as states:
+            state = states.setdefault(family, {})
+            in_flight: dict[str, int] = state.setdefault("in_flight", {})
+            for pid in list(in_flight):
+                if pid != me and not _alive(int(pid)):
+                    del in_flight[pid]
+            wait = _take(state, limit, time.time(), sum(in_flight.values()))
+            if wait == 0:
+                in_flight[me] = in_flight.get(me, 0) + 1
+        return POLL_INTERVAL if wait is None else wait
+
+    def release(self, family: str) -> None:
+        me = str(os.getpid())
+        with self._state() as states:
+            in_flight: dict[str, int] = states.get(family, {}).get("in_flight", {})
+            count = in_flight.get(me, 0) - 1
+            if 0 < count:
+                in_flight[me] = count
+            else:
+                in_flight.pop(me, None)
+
+
+def _noop() -> None:
+    pass
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RateLimiter:
+    """Rate and concurrency limits of requests by route family
+
+    Requests of a family without limits are sent at once. Others wait for a
+    token of the family's bucket and a free in-flight slot, in the order they
+    arrived, so that no caller is starved and none is rejected.
+    :class:`tdclient.api.API` holds the slot of a request until its response
+    is closed, so that `max_in_flight` bounds long result downloads and
+    uploads as well.
+
+    Example:
+
+        .. code-block:: python
+
+            limiter = RateLimiter({
+                "job_issue": RouteLimit(rate=2, burst=5),
+                "job_status": RouteLimit(rate=20, burst=20, max_in_flight=8),
+            })
+            td = tdclient.Client(rate_limiter=limiter)
+
+    Args:
+        limits (mapping): :class:`RouteLimit` by route family. See
+            :func:`route_family` for the families.
+        backend (optional): where limits are counted, shared by the threads
+            of this process by default. Pass a :class:`FileLockBackend` to share
+            them with other processes.
+    """
+
+    def __init__(
+        self,
+        limits: Mapping[RouteFamily, RouteLimit],
+        backend: LocalBackend | FileLockBackend | None = None,
+    ) -> None:
+        self.limits = dict(limits)
+        self.backend = LocalBackend() if backend is None else backend
+        self._cond = threading.Condition()
+        self._next_ticket: dict[str, int] = {}
+        self._serving: dict[str, int] = {}
+        self._abandoned: dict[str, set[int]] = {}
+
+    @contextlib.contextmanager
+    def limit(self, family: RouteFamily) -> Generator[None]:
+        """Wait for the turn of a request and hold its slot while it is in flight
+
+        Args:
+            family (str): route family of the request
+        """
+        release = self.acquire(family)
+        try:
+            yield
+        finally:
+            release()
+
+    def acquire(self, family: RouteFamily) -> Callable[[], None]:
+        """Wait for the turn of a request and take its slot
+
+        Args:
+            family (str): route family of the request
+
+        Returns:
+            callable: frees the slot. Calls after the first one do nothing.
+        """
+        limit = self.limits.get(family)
+        if limit is None:
+            return _noop
+        self._acquire(family, limit)
+        released = threading.Event()
+
+        def release() -> None:
+            with self._cond:
+                if released.is_set():
+                    return
+                released.set()
+                self.backend.release(family)
+                self._cond.notify_all()
+
+        return release
+
+    def _acquire(self, family: str, limit: RouteLimit) -> None:
+        with self._cond:
+            ticket = self._next_ticket.get(family, 0)
+            self._next_ticket[family] = ticket + 1
+            try:
+                while True:
+                    wait = None
+                    if self._serving.get(family, 0) == ticket:
+                        wait = self.backend.try_acquire(family, limit)
+                        if wait == 0:
+                            self._advance(family)
+                            return
+                    self._cond.wait(wait)
+            except BaseException:
+                if self._serving.get(family, 0) == ticket:
+                    self._advance(family)
+                else:
+                    self._abandoned.setdefault(family, set()).add(ticket)
+                raise
+
+    def _advance(self, family: str) -> None:
+        serving = self._serving.get(family, 0) + 1
+        abandoned = self._abandoned.get(family, set())
+        while serving in abandoned:
+            abandoned.discard(serving)
+            serving += 1
+        self._serving[family] = serving
+        self._cond.notify_all()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+
+import contextlib
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections.abc import Callable, Generator
+from typing import IO, Literal
+
+from tdclient import errors
+from tdclient.result_download import check_gzip, read_blocks
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+#: upper bound of the size of a cache directory in bytes when not specified
+DEFAULT_MAX_SIZE = 10 * 1024**3
+
+#: suffix of the files of cached results
+SUFFIX = ".msgpack.gz"
+
+#: age in seconds after which temporary files of interrupted downloads are removed
+STALE_AGE = 3600.0
+
+_SAFE_KEY = re.compile(r"[0-9A-Za-z_-]{1,128}")
+
+
+class ResultCache:
+    """Directory of job results in msgpack.gz format keyed by job ID
+
+    The result of a successful job never changes, so once it has been
+    downloaded it is read from the local file instead of the API. Results are
+    downloaded into a temporary file in the directory and renamed into place
+    once their gzip integrity has been verified, so that readers never see a
+    partial file. Downloads of a job are serialized by a lock file of the job,
+    so that processes sharing the directory download a result once, while the
+    results of other jobs are downloaded at the same time.
+
+    On every hit the size of the file is compared with the `result_size` of
+    the job, and with ``verify="gzip"`` the file is also decompressed entirely
+    before it is read. Broken files are removed and downloaded again.
+
+    Files are evicted in least recently read order once the directory holds
+    more than `max_size` bytes. A file being read by a process is not affected
+    by its eviction on POSIX systems, where removing an open file is allowed.
+
+    Example:
+
+        .. code-block:: python
+
+            td = tdclient.Client(result_cache=ResultCache("~/.cache/td-results"))
+
+    Args:
+        directory (str): directory of the cache. It is created if missing.
+        max_size (int, optional): maximum total size of cached results in
+            bytes. Default is 10 GiB.
+        verify (str, optional): check of cached files on every hit, "size"
+            (default) or "gzip"
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_size: int = DEFAULT_MAX_SIZE,
+        verify: Literal["size", "gzip"] = "size",
+    ) -> None:
+        if verify not in ("size", "gzip"):
+            raise ValueError(f"Unknown verify: {verify}")
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_size = max_size
+        self.verify = verify
+        os.makedirs(self.directory, exist_ok=True)
+        self._mutex = threading.Lock()
+        # job ID -> (lock, number of threads using it)
+        self._job_locks: dict[str, tuple[threading.Lock, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, job_id: str) -> str:
+        """Return the path of the cached result of a job"""
+        job_id = str(job_id)
+        if _SAFE_KEY.fullmatch(job_id) is None:
+            raise ValueError(f"Invalid job ID: {job_id!r}")
+        return os.path.join(self.directory, job_id + SUFFIX)
+
+    def get(self, job_id: str, size: int) -> IO[bytes] | None:
+        """Open the cached result of a job if it is valid
+
+        Args:
+            job_id (str): job ID
+            size (int): `result_size` of the job
+
+        Returns:
+            file: the result opened in binary mode, to be closed by the caller,
+            or `None` if it is not cached or broken
+        """
+        f = self._open_valid(job_id, size)
+        with self._mutex:
+            if f is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return f
+
+    def open(
+        self, job_id: str, size: int, download: Callable[[str], None]
+    ) -> IO[bytes]:
+        """Open the cached result of a job, downloading it if needed
+
+        Args:
+            job_id (str): job ID
+            size (int): `result_size` of the job
+            download (callable): called with a path to download the result to.
+                It must raise an error if the download failed.
+
+        Returns:
+            file: the result opened in binary mode, to be closed by the caller
+
+        Raises:
+            :class:`tdclient.errors.DownloadError`: if the downloaded file does
+                not have the expected size
+        """
+        f = self.get(job_id, size)
+        if f is not None:
+            return f
+        path = self.path(job_id)
+        with self._lock(job_id):
+            # another process may have downloaded it while waiting for the lock
+            f = self._open_valid(job_id, size)
+            if f is not None:
+                return f
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                download(tmp_path)
+                actual = os.path.getsize(tmp_path)
+                if actual != size:
+                    raise errors.DownloadError(
+                        f"Downloaded result has {actual} bytes instead of {size}"
+                    )
+                os.replace(tmp_path, path)
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+            f = open(path, "rb")
+        self.evict()
+        return f
+
+    def remove(self, job_id: str) -> None:
+        """Remove the cached result of a job if any"""
+        self._remove(self.path(job_id))
+
+    def clear(self) -> None:
+        """Remove all cached results"""
+        for path, _, _ in self._entries():
+            self._remove(path)
+
+    def size(self) -> int:
+        """Return the total size of cached results in bytes"""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """Remove the least recently read results beyond `max_size` bytes
+
+        Temporary files of downloads interrupted more than :data:`STALE_AGE`
+        seconds ago are also removed.
+        """
+        now = time.time()
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".tmp"):
+                    with contextlib.suppress(OSError):
+                        if entry.stat().st_mtime < now - STALE_AGE:
+                            self._remove(entry.path)
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_size:
+                break
+            log.debug("Evicting cached result %s", path)
+            self._remove(path)
+            total -= size
+
+    def _open_valid(self, job_id: str, size: int) -> IO[bytes] | None:
+        path = self.path(job_id)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            actual = os.fstat(f.fileno()).st_size
+            if actual != size:
+                raise errors.DownloadError(
+                    f"Cached result has {actual} bytes instead of {size}"
+                )
+            if self.verify == "gzip":
+                check_gzip(read_blocks(f))
+                f.seek(0)
+        except (errors.DownloadError, OSError, EOFError, zlib.error) as error:
+            f.close()
+            log.warning("Removing broken cached result of job %s: %s", job_id, error)
+            self._remove(path)
+            return None
+        # the modification time orders files for eviction
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return f
+
+    def _entries(self) -> list[tuple[str, int, float]]:
+        entries: list[tuple[str, int, float]] = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    @contextlib.contextmanager
+    def _lock(self, job_id: str) -> Generator[None]:
+        with self._job_lock(job_id):
+            if fcntl is None:
+                yield
+                return
+            lock_path = os.path.join(self.directory, f".lock.{job_id}")
+            while True:
+                fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                    # the previous holder removes the file once done, so the
+                    # lock is only valid if the file is still the same
+                    with contextlib.suppress(FileNotFoundError):
+                        if os.stat(lock_path).st_ino == os.fstat(fd).st_ino:
+                            break
+                except BaseException:
+                    os.close(fd)
+                    raise
+                os.close(fd)
+            try:
+                yield
+            finally:
+                # removed while locked, so that lock files do not accumulate
+                self._remove(lock_path)
+                os.close(fd)
+
+    @contextlib.contextmanager
+    def _job_lock(self, job_id: str) -> Generator[None]:
+        # threads of this process downloading the same job wait for each
+        # other before taking the file lock, which is held by the process
+        with self._mutex:
+            lock, users = self._job_locks.get(job_id, (threading.Lock(), 0))
+            self._job_locks[job_id] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._mutex:
+                lock, users = self._job_locks[job_id]
+                if users == 1:
+                    del self._job_locks[job_id]
+                else:
+                    self._job_locks[job_id] = (lock, users - 1)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as error:
+            # e.g. a file open by another process on Windows
+            log.debug("Failed to remove %s: %s", path, error)
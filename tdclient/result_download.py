@@ -0,0 +1,457 @@
+#!/usr/bin/env python
+
+import json
+import logging
+import os
+import threading
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any
+
+import msgpack
+import urllib3
+
+from tdclient import errors
+from tdclient.retry import THROTTLED_STATUS, RetryPolicy
+
+log = logging.getLogger(__name__)
+
+#: Size of a byte range requested by a single request
+DEFAULT_CHUNK_SIZE = 100 * 1024**2
+
+#: Size of blocks read from a response or from the downloaded file
+BLOCK_SIZE = 1024**2
+
+#: Suffix of the sidecar file recording completed ranges of a download
+MANIFEST_SUFFIX = ".manifest"
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether sending a request again may succeed after `error`
+
+    Connection and read errors, incomplete downloads, and responses with a 5xx
+    or 429 status are transient. Other errors, e.g. responses with a 4xx
+    status, fail the same way again.
+    """
+    if isinstance(error, errors.DownloadError):
+        return True
+    if isinstance(error, errors.APIError):
+        if error.status is not None:
+            return error.status == THROTTLED_STATUS or 500 <= error.status
+        # connection errors are wrapped after the retries of the client
+        cause = error.__cause__
+        return cause is not None and is_retryable(cause)
+    return isinstance(error, (OSError, EOFError, urllib3.exceptions.HTTPError))
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """Whether `error` broke the transfer of a response body
+
+    Unlike :func:`is_retryable`, :class:`tdclient.errors.APIError` other than
+    :class:`tdclient.errors.DownloadError` is excluded, since the client raises
+    it after its own retries of the request.
+    """
+    if isinstance(error, errors.DownloadError):
+        return True
+    if isinstance(error, errors.APIError):
+        return False
+    return isinstance(error, (OSError, EOFError, urllib3.exceptions.HTTPError))
+
+
+class RangeDownload:
+    """Download byte ranges of a result in parallel and read them back in order
+
+    Ranges are fetched by ``num_threads`` workers. When ``path`` is given, each
+    range is written directly at its offset in a file preallocated to ``size``
+    bytes, so that no combine pass over parts is needed. Otherwise ranges are
+    kept in memory, and workers do not run further than ``memory_budget`` bytes
+    ahead of the reader.
+
+    :meth:`chunks` yields the content in order as soon as the leading ranges
+    are complete, while the following ranges are still being downloaded.
+
+    A range whose transfer breaks, or which arrives incomplete, is downloaded
+    again up to ``retry_limit`` times with the back-off of ``retry_policy``.
+    Errors of the request itself, e.g. 5xx responses, are not retried again
+    here, since ``fetch`` raises them after the retries of the client.
+    When ``resume_key`` is given together with ``path``, completed ranges are
+    recorded in a sidecar manifest next to ``path``, so that a download started
+    again with the same key and size fetches only the missing ranges.
+
+    Args:
+        fetch (callable): ``fetch(start, end)`` returns an iterable of bytes of
+            the inclusive byte range ``start``-``end``
+        size (int): total size in bytes
+        path (str, optional): file to store the content into
+        num_threads (int, optional): number of workers. Default is 4.
+        chunk_size (int, optional): size of a range in bytes. Default is 100 MiB.
+        memory_budget (int, optional): maximum number of bytes held in memory
+            when ``path`` is not given. Default is ``num_threads * chunk_size``.
+        retry_limit (int, optional): number of retries of a range. Default is 3.
+        retry_delay (float, optional): seconds before the first retry of a range,
+            doubled on each retry. Default is 1. Ignored with `retry_policy`.
+        resume_key (str, optional): identity of the content recorded in the
+            manifest, e.g. a job ID. Default is None, without manifest.
+        retry_policy (:class:`tdclient.retry.RetryPolicy`, optional): delays
+            between retries of a range. Default is exponential delays from
+            `retry_delay` with full jitter.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int, int], Iterable[bytes]],
+        size: int,
+        path: str | None = None,
+        num_threads: int = 4,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        memory_budget: int | None = None,
+        retry_limit: int = 3,
+        retry_delay: float = 1,
+        resume_key: str | None = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> None:
+        self._fetch = fetch
+        self._size = size
+        self._path = path
+        self._num_threads = max(1, num_threads)
+        self._chunk_size = chunk_size
+        self._ranges = [
+            (start, min(start + chunk_size, size) - 1)
+            for start in range(0, size, chunk_size)
+        ]
+        if path is None:
+            budget = memory_budget or self._num_threads * chunk_size
+            self._window = max(1, budget // chunk_size)
+        else:
+            self._window = len(self._ranges)
+        self._retry_limit = retry_limit
+        self._retry_policy = retry_policy or RetryPolicy(
+            initial_delay=retry_delay, jitter="full"
+        )
+        self._resume_key = resume_key if path is not None else None
+        self._cond = threading.Condition()
+        self._next = 0
+        self._consumed = 0
+        self._done: set[int] = set()
+        self._parts: dict[int, bytes] = {}
+        self._error: BaseException | None = None
+        self._closed = False
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def ranges(self) -> list[tuple[int, int]]:
+        """Inclusive byte ranges to be downloaded"""
+        return self._ranges
+
+    @property
+    def manifest_path(self) -> str | None:
+        """Path of the sidecar manifest, or None if the download is not resumable"""
+        if self._path is None or self._resume_key is None:
+            return None
+        return self._path + MANIFEST_SUFFIX
+
+    def start(self) -> "RangeDownload":
+        """Preallocate the file, or load the manifest to resume, and start workers"""
+        if self._executor is not None:
+            return self
+        if self._path is not None:
+            resumed = self._load_manifest()
+            if resumed:
+                log.info(
+                    "Resuming download of %s: %d of %d ranges already completed",
+                    self._path,
+                    len(resumed),
+                    len(self._ranges),
+                )
+                self._done.update(resumed)
+            else:
+                with open(self._path, "wb") as f:
+                    f.truncate(self._size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._num_threads, thread_name_prefix="tdclient-download"
+        )
+        for _ in range(min(self._num_threads, len(self._ranges))):
+            self._executor.submit(self._work)
+        return self
+
+    def __enter__(self) -> "RangeDownload":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop workers. Ranges being downloaded are abandoned."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def wait(self) -> None:
+        """Wait until all ranges have been downloaded
+
+        Raises:
+            the first error raised while downloading a range
+        """
+        self.start()
+        with self._cond:
+            while len(self._done) < len(self._ranges) and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise self._error
+
+    def chunks(self) -> Iterator[bytes]:
+        """Yield the content in order while the download is in progress
+
+        Raises:
+            the first error raised while downloading a range
+        """
+        self.start()
+        for index, (start, end) in enumerate(self._ranges):
+            with self._cond:
+                while index not in self._done and self._error is None:
+                    self._cond.wait()
+                if self._error is not None:
+                    raise self._error
+                data = self._parts.pop(index, None)
+                self._consumed = index + 1
+                self._cond.notify_all()
+            if data is not None:
+                yield data
+            elif self._path is not None:
+                yield from self._read_file(start, end)
+
+    def verify(self, check: Callable[[Iterator[bytes]], None] | None = None) -> None:
+        """Verify the downloaded file and remove the manifest
+
+        The size of the file must be the expected size, and `check`, if given,
+        is called with the content and should raise if the content is broken.
+        If the verification fails, the manifest is removed as well, since it
+        cannot tell which range is broken.
+
+        Raises:
+            :class:`tdclient.errors.DownloadError`: if the verification failed
+        """
+        self.wait()
+        assert self._path is not None
+        try:
+            actual = os.path.getsize(self._path)
+            if actual != self._size:
+                raise errors.DownloadError(
+                    f"Downloaded file {self._path} has {actual} bytes, expected {self._size}"
+                )
+            if check is not None:
+                try:
+                    check(self.chunks())
+                except (OSError, EOFError, zlib.error) as error:
+                    raise errors.DownloadError(
+                        f"Downloaded file {self._path} is corrupted: {error}"
+                    ) from error
+        finally:
+            self._remove_manifest()
+
+    def _read_file(self, start: int, end: int) -> Iterator[bytes]:
+        assert self._path is not None
+        with open(self._path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while 0 < remaining:
+                block = f.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    raise EOFError(f"Unexpected end of {self._path} at {f.tell()}")
+                remaining -= len(block)
+                yield block
+
+    def _claim(self) -> int | None:
+        with self._cond:
+            while True:
+                if self._closed or self._error is not None:
+                    return None
+                while self._next in self._done:
+                    self._next += 1
+                if len(self._ranges) <= self._next:
+                    return None
+                if self._next < self._consumed + self._window:
+                    index = self._next
+                    self._next += 1
+                    return index
+                self._cond.wait()
+
+    def _work(self) -> None:
+        while True:
+            index = self._claim()
+            if index is None:
+                return
+            try:
+                self._download_with_retry(index)
+            except BaseException as error:
+                with self._cond:
+                    if self._error is None:
+                        self._error = error
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                if self._closed:
+                    return
+                self._done.add(index)
+                self._save_manifest()
+                self._cond.notify_all()
+
+    def _download_with_retry(self, index: int) -> None:
+        start, end = self._ranges[index]
+        state = self._retry_policy.start("GET", f"bytes={start}-{end}")
+        for attempt in range(self._retry_limit + 1):
+            try:
+                self._download(index)
+                return
+            except Exception as error:
+                if not is_transport_error(error) or self._closed:
+                    raise
+                if self._retry_limit <= attempt:
+                    raise errors.DownloadError(
+                        f"Failed to download bytes={start}-{end} after {attempt + 1} attempts: {error}"
+                    ) from error
+                delay = state.next_delay(error=error)
+                log.warning(
+                    "Failed to download bytes=%d-%d: %s: retrying after %g seconds",
+                    start,
+                    end,
+                    error,
+                    delay,
+                )
+                state.sleep(delay)
+
+    def _download(self, index: int) -> None:
+        start, end = self._ranges[index]
+        expected = end - start + 1
+        received = 0
+        if self._path is None:
+            blocks: list[bytes] = []
+            for block in self._fetch(start, end):
+                if self._closed:
+                    return
+                blocks.append(block)
+                received += len(block)
+            data = b"".join(blocks)
+        else:
+            data = None
+            with open(self._path, "r+b") as f:
+                f.seek(start)
+                for block in self._fetch(start, end):
+                    if self._closed:
+                        return
+                    received += len(block)
+                    if received <= expected:
+                        f.write(block)
+                if self._resume_key is not None:
+                    f.flush()
+                    os.fsync(f.fileno())
+        if received != expected:
+            raise errors.DownloadError(
+                f"Incomplete range bytes={start}-{end}: received {received} of {expected} bytes"
+                if received < expected
+                else f"Unexpected data beyond bytes={start}-{end}"
+            )
+        if data is not None:
+            with self._cond:
+                self._parts[index] = data
+
+    def _manifest(self) -> dict[str, Any]:
+        return {
+            "key": self._resume_key,
+            "size": self._size,
+            "chunk_size": self._chunk_size,
+        }
+
+    def _load_manifest(self) -> set[int]:
+        manifest_path = self.manifest_path
+        if manifest_path is None or self._path is None:
+            return set()
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            if os.path.getsize(self._path) != self._size:
+                return set()
+        except (OSError, ValueError):
+            return set()
+        completed = manifest.pop("completed", [])
+        if manifest != self._manifest():
+            log.info("Ignoring manifest %s of another download", manifest_path)
+            return set()
+        return {i for i in completed if 0 <= i < len(self._ranges)}
+
+    def _save_manifest(self) -> None:
+        # Called with the lock held. The manifest is replaced atomically so that
+        # an interrupted download never leaves a partially written manifest.
+        manifest_path = self.manifest_path
+        if manifest_path is None:
+            return
+        manifest = self._manifest()
+        manifest["completed"] = sorted(self._done)
+        import tempfile
+
+        fd, tmp = tempfile.mkstemp(
+            prefix=os.path.basename(manifest_path) + ".",
+            dir=os.path.dirname(manifest_path) or ".",
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(manifest, f)
+            os.replace(tmp, manifest_path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def _remove_manifest(self) -> None:
+        manifest_path = self.manifest_path
+        if manifest_path is not None and os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+
+def read_blocks(f: IO[bytes], block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """Yield the content of a binary file from its current position in blocks"""
+    while True:
+        block = f.read(block_size)
+        if not block:
+            return
+        yield block
+
+
+def gunzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decompress gzip content incrementally, including concatenated members
+
+    The CRC and the length recorded in each member are verified by zlib.
+    """
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    pending = False
+    for chunk in chunks:
+        while chunk:
+            pending = True
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+            if not decompressor.eof:
+                break
+            pending = False
+            chunk = decompressor.unused_data
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    if pending:
+        raise EOFError(
+            "Compressed file ended before the end-of-stream marker was reached"
+        )
+
+
+def check_gzip(chunks: Iterable[bytes]) -> None:
+    """Decompress gzip content entirely to verify its integrity"""
+    for _ in gunzip_chunks(chunks):
+        pass
+
+
+def unpack_chunks(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Yield objects decoded from msgpack content incrementally"""
+    unpacker = msgpack.Unpacker(raw=False, max_buffer_size=1000 * 1024**2)
+    for chunk in chunks:
+        unpacker.feed(chunk)
+        yield from unpacker
@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+
+import email.utils
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from tdclient import errors
+from tdclient.types import RetryJitter
+
+log = logging.getLogger(__name__)
+
+#: status of responses asking clients to slow down
+THROTTLED_STATUS = 429
+
+
+class Clock:
+    """Source of time of retries
+
+    Retries read and wait for time through a clock, so that tests can replace
+    it with a fake one instead of sleeping.
+    """
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class RetryBudget:
+    """Token bucket limiting retries of all requests of a client
+
+    Every request deposits `ratio` of a token and every retry withdraws a whole
+    token, so that retries stay a fraction of requests while the service fails,
+    instead of multiplying the load on it. Tokens are also added at
+    `per_second`, so that a client sending few requests can still retry.
+
+    Args:
+        capacity (float, optional): maximum number of tokens, which is also the
+            initial number. Default is 10.
+        ratio (float, optional): tokens deposited by a request. Default is 0.1.
+        per_second (float, optional): tokens added every second. Default is 0.5.
+        clock (:class:`Clock`, optional): source of time
+    """
+
+    def __init__(
+        self,
+        capacity: float = 10.0,
+        ratio: float = 0.1,
+        per_second: float = 0.5,
+        clock: Clock | None = None,
+    ) -> None:
+        self.capacity = capacity
+        self.ratio = ratio
+        self.per_second = per_second
+        self.clock = Clock() if clock is None else clock
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = self.clock.monotonic()
+
+    @property
+    def tokens(self) -> float:
+        """number of tokens available"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def deposit(self) -> None:
+        """Add tokens for a request"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Take a token for a retry
+
+        Returns:
+            bool: `False` if no token is left, in which case the request must
+            not be retried
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def _refill(self) -> None:
+        now = self.clock.monotonic()
+        elapsed = max(0.0, now - self._updated)
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.per_second)
+
+
+class RetryAttempt:
+    """Description of a retry passed to the `on_retry` hook of :class:`RetryPolicy`
+
+    Attributes:
+        method (str): HTTP method of the request
+        url (str): URL of the request
+        attempt (int): number of the retry, starting from 1
+        delay (float): seconds to wait before the retry
+        cumul_delay (float): seconds waited before the previous retries
+        status (int): status of the failed response, or `None` after an error
+        error (Exception): error raised by the failed attempt, or `None`
+        route (str): template of the route of the request, e.g.
+            "/v3/job/status/{job_id}", or `None` if it is not known
+    """
+
+    __slots__ = (
+        "method",
+        "url",
+        "attempt",
+        "delay",
+        "cumul_delay",
+        "status",
+        "error",
+        "route",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        attempt: int,
+        delay: float,
+        cumul_delay: float,
+        status: int | None,
+        error: BaseException | None,
+        route: str | None = None,
+    ) -> None:
+        self.method = method
+        self.url = url
+        self.attempt = attempt
+        self.delay = delay
+        self.cumul_delay = cumul_delay
+        self.status = status
+        self.error = error
+        self.route = route
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__} {self.method} {self.url} "
+            f"attempt={self.attempt} delay={self.delay:.3f} status={self.status}>"
+        )
+
+
+class RetryPolicy:
+    """Policy of retries of requests failed with an error or a 5xx or 429 status
+
+    Delays grow exponentially from `initial_delay`, and retrying stops once the
+    delays waited add up to more than `max_cumul_delay`. Responses with 429
+    status were not processed by the service, so they are retried even when
+    retrying is disabled for the request, e.g. for POST requests.
+
+    Example:
+
+        .. code-block:: python
+
+            policy = RetryPolicy(jitter="full", max_delay=60)
+            td = tdclient.Client(retry_policy=policy)
+
+    Args:
+        initial_delay (float, optional): delay before the first retry in seconds.
+            Default is 5.
+        multiplier (float, optional): factor between successive delays.
+            Default is 2.
+        max_delay (float, optional): upper bound of a delay. No bound by default.
+        max_cumul_delay (float, optional): stop retrying once the delays waited
+            add up to more than this number of seconds. Default is 600.
+        jitter (str, optional): randomization of delays, so that clients which
+            failed at once do not retry in lockstep
+
+            - "none": exactly the exponential delays (default)
+            - "full": a random delay between 0 and the exponential delay
+            - "decorrelated": a random delay between `initial_delay` and three
+              times the previous delay
+
+        retry_after (bool, optional): wait for the delay given by the
+            `Retry-After` header of 429 and 503 responses instead, bounded by
+            `max_delay`. Retrying stops if it exceeds what is left of
+            `max_cumul_delay`. Default is `True`.
+        retry_throttled (bool, optional): retry 429 responses. Default is `True`.
+            If `False`, they are returned as the other 4xx responses.
+        budget (:class:`RetryBudget`, optional): token bucket shared by the
+            requests using this policy. No budget by default.
+        on_retry (callable, optional): called with a :class:`RetryAttempt`
+            before waiting for every retry
+        clock (:class:`Clock`, optional): source of time
+        rand (:class:`random.Random`, optional): source of randomness of jitter
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = 5.0,
+        multiplier: float = 2.0,
+        max_delay: float | None = None,
+        max_cumul_delay: float = 600.0,
+        jitter: RetryJitter = "none",
+        retry_after: bool = True,
+        retry_throttled: bool = True,
+        budget: RetryBudget | None = None,
+        on_retry: Callable[[RetryAttempt], None] | None = None,
+        clock: Clock | None = None,
+        rand: random.Random | None = None,
+    ) -> None:
+        if jitter not in ("none", "full", "decorrelated"):
+            raise ValueError(f"Unknown jitter: {jitter}")
+        self.initial_delay = initial_delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.max_cumul_delay = max_cumul_delay
+        self.jitter = jitter
+        self.retry_after = retry_after
+        self.retry_throttled = retry_throttled
+        self.budget = budget
+        self.on_retry = on_retry
+        self.clock = Clock() if clock is None else clock
+        self.rand = random.Random() if rand is None else rand
+
+    def should_retry(self, retry: bool, status: int | None) -> bool:
+        """Tell whether a failed attempt may be retried
+
+        Args:
+            retry (bool): whether retrying is enabled for the request
+            status (int): status of the response, or `None` after an error
+        """
+        if status == THROTTLED_STATUS:
+            return self.retry_throttled
+        return retry
+
+    def start(self, method: str, url: str, route: str | None = None) -> "RetryState":
+        """Start the retries of a request
+
+        Args:
+            method (str): HTTP method
+            url (str): URL of the request
+            route (str, optional): template of the route of the request
+
+        Returns:
+            :class:`RetryState`: state to compute the delays of the retries
+        """
+        if self.budget is not None:
+            self.budget.deposit()
+        return RetryState(self, method, url, route)
+
+
+class RetryState:
+    """Retries of a single request, created by :meth:`RetryPolicy.start`"""
+
+    def __init__(
+        self, policy: RetryPolicy, method: str, url: str, route: str | None = None
+    ) -> None:
+        self.policy = policy
+        self.method = method
+        self.url = url
+        self.route = route
+        self.attempt = 0
+        self.cumul_delay = 0.0
+        #: the :class:`RetryAttempt` of the last call of :meth:`next_delay`
+        self.last_attempt: RetryAttempt | None = None
+        self._previous = policy.initial_delay
+
+    def next_delay(
+        self,
+        status: int | None = None,
+        headers: Mapping[str, Any] | None = None,
+        error: BaseException | None = None,
+    ) -> float:
+        """Return the delay before the next retry
+
+        Args:
+            status (int, optional): status of the failed response
+            headers (mapping, optional): headers of the failed response
+            error (Exception, optional): error raised by the failed attempt
+
+        Returns:
+            float: seconds to wait
+
+        Raises:
+            :class:`tdclient.errors.APIError`: if the delays waited already
+                exceed `max_cumul_delay`, if the delay asked by `Retry-After`
+                exceeds what is left of it, or if the retry budget is exhausted.
+                It has the `status` of the last response and is caused by the
+                last `error`.
+        """
+        policy = self.policy
+        if policy.max_cumul_delay < self.cumul_delay:
+            raise errors.APIError(
+                f"Retrying stopped after {policy.max_cumul_delay:g} seconds. (cumulative: {self.cumul_delay:g}/{policy.max_cumul_delay:g})",
+                status=status,
+            ) from error
+
+        delay = self._backoff()
+        if policy.retry_after and status in (THROTTLED_STATUS, 503):
+            retry_after = parse_retry_after(headers, policy.clock.time())
+            if retry_after is not None:
+                if policy.max_delay is not None:
+                    retry_after = min(policy.max_delay, retry_after)
+                remaining = policy.max_cumul_delay - self.cumul_delay
+                if retry_after > remaining:
+                    # waiting less than asked would be throttled again
+                    raise errors.APIError(
+                        f"Retrying stopped since Retry-After asks for {retry_after:g} seconds, more than the {remaining:g} seconds left. (cumulative: {self.cumul_delay:g}/{policy.max_cumul_delay:g})",
+                        status=status,
+                    ) from error
+                delay = retry_after
+
+        if policy.budget is not None and not policy.budget.withdraw():
+            raise errors.APIError(
+                f"Retrying stopped by retry budget after {self.attempt} retries",
+                status=status,
+            ) from error
+
+        self.attempt += 1
+        attempt = RetryAttempt(
+            self.method,
+            self.url,
+            self.attempt,
+            delay,
+            self.cumul_delay,
+            status,
+            error,
+            self.route,
+        )
+        self.last_attempt = attempt
+        if policy.on_retry is not None:
+            try:
+                policy.on_retry(attempt)
+            except Exception:
+                log.exception("Exception in on_retry hook")
+        self.cumul_delay += delay
+        return delay
+
+    def sleep(self, delay: float) -> None:
+        """Wait for a delay with the clock of the policy"""
+        self.policy.clock.sleep(delay)
+
+    def _backoff(self) -> float:
+        policy = self.policy
+        if policy.jitter == "decorrelated":
+            delay = policy.rand.uniform(policy.initial_delay, self._previous * 3)
+        else:
+            delay = policy.initial_delay * policy.multiplier**self.attempt
+        if policy.max_delay is not None:
+            delay = min(policy.max_delay, delay)
+        if policy.jitter == "decorrelated":
+            self._previous = delay
+        elif policy.jitter == "full":
+            return policy.rand.uniform(0, delay)
+        return delay
+
+
+def parse_retry_after(headers: Mapping[str, Any] | None, now: float) -> float | None:
+    """Parse the `Retry-After` header in seconds or in HTTP-date
+
+    Args:
+        headers (mapping): response headers. Names are matched as given and in
+            lower case.
+        now (float): current UNIX time to compare HTTP-date with
+
+    Returns:
+        float: seconds to wait, or `None` if the header is missing or invalid
+    """
+    if headers is None:
+        return None
+    value = headers.get("Retry-After", headers.get("retry-after"))
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - now)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 import json
+from collections.abc import Iterator
 from contextlib import AbstractContextManager
 from typing import Any
 
@@ -35,6 +36,9 @@ class TableAPI:
         self, msg: str, res: urllib3.BaseHTTPResponse, body: bytes | str
     ) -> None: ...
     def checked_json(self, body: bytes, required: list[str]) -> dict[str, Any]: ...
+    def checked_json_items(
+        self, res: urllib3.BaseHTTPResponse, key: str | None
+    ) -> Iterator[Any]: ...
 
     def list_tables(self, db: str) -> dict[str, Any]:
         """Gets the list of table in the database.
@@ -71,27 +75,25 @@ class TableAPI:
             if code != 200:
                 self.raise_error("List tables failed", res, body)
             js = self.checked_json(body, ["tables"])
-            result: dict[str, dict[str, Any]] = {}
-            for m in js["tables"]:
-                m = dict(m)
-                m["type"] = m.get("type", "?")
-                m["count"] = int(m.get("count", 0))
-                m["created_at"] = parse_date(
-                    get_or_else(m, "created_at", "1970-01-01T00:00:00Z")
-                )
-                m["updated_at"] = parse_date(
-                    get_or_else(m, "updated_at", "1970-01-01T00:00:00Z")
-                )
-                m["last_import"] = parse_date(
-                    get_or_else(m, "counter_updated_at", "1970-01-01T00:00:00Z")
-                )
-                m["last_log_timestamp"] = parse_date(
-                    get_or_else(m, "last_log_timestamp", "1970-01-01T00:00:00Z")
-                )
-                m["estimated_storage_size"] = int(m["estimated_storage_size"])
-                m["schema"] = json.loads(m.get("schema", "[]"))
-                result[m["name"]] = m
-            return result
+            return parse_tables(js)
+
+    def list_tables_each(self, db: str) -> Iterator[dict[str, Any]]:
+        """Iterate over the tables in the database as they are received
+
+        Unlike :meth:`list_tables`, the response is parsed incrementally, so
+        that memory does not grow with the number of tables.
+
+        Args:
+            db (str): Target database name.
+
+        Yields:
+            dict: Detailed table information. See :meth:`list_tables`.
+        """
+        with self.get(create_url("/v3/table/list/{db}", db=db)) as res:
+            if res.status != 200:
+                self.raise_error("List tables failed", res, res.read())
+            for m in self.checked_json_items(res, "tables"):
+                yield parse_table(m)
 
     def create_log_table(self, db: str, table: str) -> bool:
         """Create a new table in the database and registers it in PlazmaDB.
@@ -263,3 +265,48 @@ class TableAPI:
             if code != 200:
                 self.raise_error("Change database failed", res, body)
             return True
+
+
+def parse_table(m: dict[str, Any]) -> dict[str, Any]:
+    """Convert a table object in an API response into a :class:`dict`
+
+    This is shared by :class:`TableAPI` and :class:`tdclient.async_api.AsyncAPI`.
+
+    Args:
+        m (dict): a table object decoded from `/v3/table/list`
+
+    Returns:
+        dict: Detailed table information.
+    """
+    m = dict(m)
+    m["type"] = m.get("type", "?")
+    m["count"] = int(m.get("count", 0))
+    m["created_at"] = parse_date(get_or_else(m, "created_at", "1970-01-01T00:00:00Z"))
+    m["updated_at"] = parse_date(get_or_else(m, "updated_at", "1970-01-01T00:00:00Z"))
+    m["last_import"] = parse_date(
+        get_or_else(m, "counter_updated_at", "1970-01-01T00:00:00Z")
+    )
+    m["last_log_timestamp"] = parse_date(
+        get_or_else(m, "last_log_timestamp", "1970-01-01T00:00:00Z")
+    )
+    m["estimated_storage_size"] = int(m["estimated_storage_size"])
+    m["schema"] = json.loads(m.get("schema", "[]"))
+    return m
+
+
+def parse_tables(js: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Convert the body of a `/v3/table/list` response into tables by name
+
+    This is shared by :class:`TableAPI` and :class:`tdclient.async_api.AsyncAPI`.
+
+    Args:
+        js (dict): the decoded body, which has "tables"
+
+    Returns:
+        dict: Detailed table information by table name. See :func:`parse_table`.
+    """
+    result: dict[str, dict[str, Any]] = {}
+    for m in js["tables"]:
+        m = parse_table(m)
+        result[m["name"]] = m
+    return result
@@ -3,7 +3,9 @@
 
 import io
 import os
+import socket
 import tempfile
+import threading
 import time
 import urllib.parse as urlparse
 from array import array
@@ -12,7 +14,7 @@ from unittest import mock
 import pytest
 import urllib3
 
-from tdclient import api, version
+from tdclient import api, http_pool, version
 from tdclient.test.test_helper import *
 
 
@@ -165,6 +167,88 @@ def test_timeout():
         assert kwargs["timeout"] == 12345
 
 
+def test_default_pool_maxsize():
+    td = api.API("apikey")
+    assert td.http.connection_pool_kw["maxsize"] == 8
+    assert "block" not in td.http.connection_pool_kw
+
+
+def test_pool_maxsize_from_max_concurrency():
+    td = api.API("apikey", max_concurrency=16, block=True)
+    assert td.http.connection_pool_kw["maxsize"] == 16
+    assert td.http.connection_pool_kw["block"] is True
+    td = api.API("apikey", max_concurrency=16, maxsize=4)
+    assert td.http.connection_pool_kw["maxsize"] == 4
+
+
+def test_tcp_keepalive():
+    td = api.API("apikey", tcp_keepalive=30)
+    options = td.http.connection_pool_kw["socket_options"]
+    assert options[: len(urllib3.connection.HTTPConnection.default_socket_options)] == (
+        urllib3.connection.HTTPConnection.default_socket_options
+    )
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        assert (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30) in options
+
+
+def test_pool_stats():
+    def handler(method, path, headers, body):
+        return (200, {"content-type": "application/json"}, b'{"status": "ok"}')
+
+    with StubHTTPServer(handler) as server:
+        td = api.API("APIKEY", endpoint=server.endpoint, max_concurrency=2)
+        assert td.pool_stats()["open"] == 0
+        for _ in range(3):
+            assert td.server_status() == "ok"
+        stats = td.pool_stats()
+        td.close()
+    assert stats["maxsize"] == 2
+    assert stats["pools"] == 1
+    assert stats["requests"] == 3
+    assert stats["new_connections"] == 1
+    assert stats["reused"] == 2
+    assert stats["tls_handshakes"] == 0
+    assert stats["idle"] == 1
+    assert stats["in_use"] == 0
+    assert stats["open"] == 1
+
+
+def test_https_pool_counts_tls_handshakes():
+    stats = http_pool.PoolStats()
+    pool = http_pool.CountingHTTPSConnectionPool("api.example.com", stats=stats)
+    conn = mock.MagicMock(is_closed=True)
+    with mock.patch("urllib3.connectionpool.HTTPSConnectionPool._validate_conn"):
+        pool._validate_conn(conn)
+        conn.is_closed = False
+        pool._validate_conn(conn)
+    counts = stats.as_dict()
+    assert counts["new_connections"] == 1
+    assert counts["tls_handshakes"] == 1
+    assert counts["reused"] == 1
+
+
+def test_pool_stats_discarded():
+    started = threading.Barrier(3)
+
+    def handler(method, path, headers, body):
+        started.wait(5)
+        return (200, {"content-type": "application/json"}, b'{"status": "ok"}')
+
+    with StubHTTPServer(handler) as server:
+        td = api.API("APIKEY", endpoint=server.endpoint, max_concurrency=1)
+        threads = [threading.Thread(target=td.server_status) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = td.pool_stats()
+        td.close()
+    assert stats["new_connections"] == 3
+    assert stats["discarded"] == 2
+    assert stats["idle"] == 1
+
+
 def test_get_success():
     td = api.API("APIKEY")
     with mock.patch("time.sleep") as t_sleep:
@@ -338,6 +422,35 @@ def test_post_unicode_success():
         assert not t_sleep.called
 
 
+def test_retry_steps():
+    td = api.API("APIKEY")
+    steps = td.retry_steps("GET", "https://api.treasuredata.com/foo", retry=True)
+    assert next(steps) == ("send", None)
+    failure = make_raw_response(503, b"failure")
+    assert steps.send(failure) == ("discard", failure)
+    step, delay = steps.send(b"failure")
+    assert step == "sleep" and 0 < delay
+    assert steps.send(None) == ("send", None)
+    success = make_raw_response(200, b"success")
+    with pytest.raises(StopIteration) as stop:
+        steps.send(success)
+    assert stop.value.value is success
+
+
+def test_retry_steps_of_stream_body():
+    td = api.API("APIKEY")
+    steps = td.retry_steps(
+        "PUT", "https://api.treasuredata.com/foo", retry=True, resendable=False
+    )
+    assert next(steps) == ("send", None)
+    failure = make_raw_response(503, b"failure")
+    assert steps.send(failure) == ("discard", failure)
+    with pytest.raises(api.APIError) as error:
+        steps.send(b"failure")
+    assert error.value.status == 503
+    assert "Error 503: b'failure'" in str(error.value)
+
+
 def test_post_retry_success():
     td = api.API("APIKEY", retry_post_requests=True)
     with mock.patch("time.sleep") as t_sleep:
@@ -541,11 +654,50 @@ def test_put_file_without_fileno_unicode_success():
 
 def test_put_failure():
     td = api.API("APIKEY")
-    td.http.urlopen = mock.MagicMock()
-    td.http.urlopen.return_value = make_raw_response(500, b"error")
-    with pytest.raises(api.APIError) as error:
-        with td.put("/foo", b"body", 7) as response:
-            pass
+    with mock.patch("time.sleep") as t_sleep:
+        td.http.urlopen = mock.MagicMock()
+        td.http.urlopen.side_effect = lambda *args, **kwargs: make_raw_response(
+            500, b"error"
+        )
+        with pytest.raises(api.APIError) as error:
+            with td.put("/foo", b"body", 7) as response:
+                pass
+        assert t_sleep.called
+        assert error.value.status == 500
+
+
+def test_put_retry_success():
+    td = api.API("APIKEY")
+    with mock.patch("time.sleep") as t_sleep:
+        td.http.urlopen = mock.MagicMock()
+        responses = [
+            make_raw_response(503, b"failure"),
+            make_raw_response(200, b"success"),
+        ]
+        td.http.urlopen.side_effect = responses
+        with td.put("/foo", b"body", 4) as response:
+            assert response.status == 200
+            assert response.read() == b"success"
+        assert td.http.urlopen.call_count == 2
+        assert t_sleep.call_count == 1
+
+
+def test_put_file_with_fileno_never_retry():
+    td = api.API("APIKEY")
+    with mock.patch("time.sleep") as t_sleep:
+        td.http.urlopen = mock.MagicMock()
+        failure = make_raw_response(500, b"error")
+        failure.data = b"error"
+        td.http.urlopen.side_effect = [failure]
+        bytes_or_stream = tempfile.TemporaryFile()
+        bytes_or_stream.write(b"request body")
+        bytes_or_stream.seek(0)
+        with pytest.raises(api.APIError) as error:
+            with td.put("/foo", bytes_or_stream, 12):
+                pass
+        assert str(error.value) == "Error 500: b'error'"
+        assert error.value.status == 500
+        assert not t_sleep.called
 
 
 def test_delete_success():
@@ -680,6 +832,15 @@ def test_raise_error_4xx():
     td = api.API("APIKEY")
     with pytest.raises(api.APIError) as error:
         td.raise_error("msg", make_raw_response(402, b"payment required"), b"body")
+    assert error.value.status == 402
+
+
+def test_raise_error_has_status():
+    td = api.API("APIKEY")
+    for status in [401, 403, 404, 409, 422, 500]:
+        with pytest.raises(api.APIError) as error:
+            td.raise_error("msg", make_raw_response(status, b""), b"body")
+        assert error.value.status == status
 
 
 def test_checked_json_success():
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+
+import asyncio
+import json
+from unittest import mock
+
+import pytest
+
+from tdclient import async_api, async_client
+from tdclient.test.test_helper import *
+
+
+def setup_function(function):
+    unset_environ()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def json_response(obj, status=200):
+    return (status, {"content-type": "application/json"}, json.dumps(obj).encode())
+
+
+def test_query_and_status():
+    def handler(method, path, headers, body):
+        if path == "/v3/job/issue/presto/sample_datasets":
+            return json_response({"job_id": "12345"})
+        if path == "/v3/job/status/12345":
+            return json_response({"status": "running"})
+        return (404, {}, b"not found")
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            job_id = await td.query("SELECT 1", type="presto", db="sample_datasets")
+            status = await td.job_status(job_id)
+            return job_id, status
+
+    with StubHTTPServer(handler) as server:
+        job_id, status = run(scenario(server.endpoint))
+        method, path, headers, body = server.requests[0]
+        assert method == "POST"
+        assert headers["authorization"] == "TD1 APIKEY"
+        assert b"SELECT 1" in body
+    assert job_id == "12345"
+    assert status == "running"
+
+
+def test_concurrent_requests():
+    def handler(method, path, headers, body):
+        job_id = path.rsplit("/", 1)[-1]
+        return json_response({"status": "success", "job_id": job_id})
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            return await asyncio.gather(*[td.job_status(str(i)) for i in range(20)])
+
+    with StubHTTPServer(handler) as server:
+        statuses = run(scenario(server.endpoint))
+        assert len(server.requests) == 20
+    assert statuses == ["success"] * 20
+
+
+def test_show_job_shares_parsing():
+    def handler(method, path, headers, body):
+        return json_response(
+            {
+                "status": "success",
+                "type": "presto",
+                "created_at": "2015-02-09 11:44:25 UTC",
+                "hive_result_schema": '[["cnt", "bigint"]]',
+                "result": "",
+            }
+        )
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            return await td.show_job("12345")
+
+    with StubHTTPServer(handler) as server:
+        job = run(scenario(server.endpoint))
+    assert job["job_id"] == "12345"
+    assert job["hive_result_schema"] == [["cnt", "bigint"]]
+    assert job["created_at"].year == 2015
+    assert job["result"] is None
+
+
+def test_show_job_shares_finished_jobs():
+    def handler(method, path, headers, body):
+        return json_response({"status": "success", "type": "presto"})
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            await td.show_job("12345")
+            return td.api.show_job("12345"), await td.job_status("12345")
+
+    with StubHTTPServer(handler) as server:
+        job, status = run(scenario(server.endpoint))
+        assert len(server.requests) == 1
+    assert job["job_id"] == "12345"
+    assert status == "success"
+
+
+def test_job_result_each_msgpack():
+    rows = [[i, f"row{i}"] for i in range(1000)]
+
+    def handler(method, path, headers, body):
+        assert path == "/v3/job/result/12345?format=msgpack&header=False"
+        return (200, {}, msgpackb(rows))
+
+    async def scenario(endpoint):
+        async with async_client.AsyncClient("APIKEY", endpoint=endpoint) as td:
+            return [row async for row in td.job_result_each(12345)]
+
+    with StubHTTPServer(handler) as server:
+        assert run(scenario(server.endpoint)) == rows
+
+
+def test_job_result_format_each_json():
+    rows = [{"a": i} for i in range(10)]
+
+    def handler(method, path, headers, body):
+        return (200, {}, jsonb(rows))
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            return await td.job_result_format("12345", "json")
+
+    with StubHTTPServer(handler) as server:
+        assert run(scenario(server.endpoint)) == rows
+
+
+def test_get_retry_does_not_block_event_loop():
+    responses = [(503, {}, b"unavailable"), json_response({"status": "success"})]
+
+    def handler(method, path, headers, body):
+        return responses.pop(0)
+
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            with mock.patch("asyncio.sleep", side_effect=fake_sleep):
+                return await td.job_status("12345")
+
+    with StubHTTPServer(handler) as server:
+        with mock.patch("time.sleep") as t_sleep:
+            assert run(scenario(server.endpoint)) == "success"
+            assert not t_sleep.called
+    assert sleeps == [5]
+
+
+def test_post_never_retry():
+    def handler(method, path, headers, body):
+        return (500, {}, b"error")
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            await td.kill("12345")
+
+    with StubHTTPServer(handler) as server:
+        with pytest.raises(async_api.APIError):
+            run(scenario(server.endpoint))
+        assert len(server.requests) == 1
+
+
+def test_post_never_retry_finishes_response():
+    def handler(method, path, headers, body):
+        return (500, {}, b"error")
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            with mock.patch.object(
+                td.api, "finish_response", wraps=td.api.finish_response
+            ) as finish_response:
+                with pytest.raises(async_api.APIError) as error:
+                    await td.kill("12345")
+                return error.value, finish_response.call_count, td.metrics()
+
+    with StubHTTPServer(handler) as server:
+        error, finished, metrics = run(scenario(server.endpoint))
+    assert error.status == 500
+    assert finished == 1
+    assert metrics["POST /v3/job/kill/{job_id}"]["bytes_received"] == len(b"error")
+
+
+def test_post_retries_throttled_response():
+    responses = [(429, {"Retry-After": "2"}, b"slow down"), json_response({})]
+
+    def handler(method, path, headers, body):
+        return responses.pop(0)
+
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            with mock.patch("asyncio.sleep", side_effect=fake_sleep):
+                await td.kill("12345")
+
+    with StubHTTPServer(handler) as server:
+        run(scenario(server.endpoint))
+        assert len(server.requests) == 2
+    assert sleeps == [2]
+
+
+def test_raise_error():
+    def handler(method, path, headers, body):
+        return (404, {}, b"no such job")
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            await td.show_job("12345")
+
+    with StubHTTPServer(handler) as server:
+        with pytest.raises(async_api.errors.NotFoundError) as error:
+            run(scenario(server.endpoint))
+    assert error.value.args == ("Show job failed: no such job",)
+
+
+def test_import_data():
+    def handler(method, path, headers, body):
+        assert method == "PUT"
+        assert body == b"data"
+        return json_response({"elapsed_time": "3.5"})
+
+    async def scenario(endpoint):
+        async with async_client.AsyncClient("APIKEY", endpoint=endpoint) as td:
+            return await td.import_data("db", "tbl", "msgpack.gz", b"data", 4)
+
+    with StubHTTPServer(handler) as server:
+        assert run(scenario(server.endpoint)) == 3.5
+        assert server.requests[0][1] == "/v3/table/import/db/tbl/msgpack.gz"
+
+
+def test_client_wait():
+    statuses = ["queued", "running", "success"]
+
+    def handler(method, path, headers, body):
+        return json_response({"status": statuses.pop(0)})
+
+    async def scenario(endpoint):
+        async with async_client.AsyncClient("APIKEY", endpoint=endpoint) as td:
+            return await td.wait("12345", wait_interval=0)
+
+    with StubHTTPServer(handler) as server:
+        assert run(scenario(server.endpoint)) == "success"
+        assert len(server.requests) == 3
+
+
+def test_pool_sized_from_max_workers():
+    api = async_api.AsyncAPI("APIKEY", max_workers=32)
+    try:
+        assert api.api.http.connection_pool_kw["maxsize"] == 32
+    finally:
+        api.close()
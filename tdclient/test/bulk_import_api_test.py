@@ -69,6 +69,18 @@ def test_list_bulk_imports_failure():
     assert error.value.args == ("500: List bulk imports failed: error",)
 
 
+def test_list_bulk_imports_each():
+    td = api.API("APIKEY")
+    body = b"""
+        {"bulk_imports": [{"name": "foo", "status": "uploading"}, {"name": "bar", "status": "committed"}]}
+    """
+    td.get = mock.MagicMock(return_value=make_response(200, body))
+    bulk_imports = td.list_bulk_imports_each({"limit": 2})
+    assert next(bulk_imports) == {"name": "foo", "status": "uploading"}
+    assert [bulk_import["name"] for bulk_import in bulk_imports] == ["bar"]
+    td.get.assert_called_with("/v3/bulk_import/list", {"limit": 2})
+
+
 def test_list_bulk_import_parts_success():
     td = api.API("APIKEY")
     body = b"""
@@ -4,7 +4,7 @@ from unittest import mock
 
 import pytest
 
-from tdclient import api, client
+from tdclient import api, client, job_api
 from tdclient.test.test_helper import *
 
 
@@ -166,6 +166,92 @@ def test_table():
     assert table.table_name == "nasdaq"
 
 
+def test_table_not_found():
+    td = client.Client("APIKEY")
+    td._api = mock.MagicMock()
+    td._api.list_tables = mock.MagicMock(return_value={})
+    with pytest.raises(api.NotFoundError):
+        td.table("sample_datasets", "nasdaq")
+
+
+def cached_client(clock):
+    td = client.Client("APIKEY", metadata_ttl=60)
+    td._metadata_cache._clock = clock
+    td._api = mock.MagicMock()
+    td._api.list_databases = mock.MagicMock(
+        return_value={"db1": {"count": 1}, "db2": {"count": 2}}
+    )
+    td._api.list_tables = mock.MagicMock(
+        side_effect=lambda db: {
+            f"{db}_t{i}": {"type": "log", "schema": [], "count": i} for i in range(3)
+        }
+    )
+    return td
+
+
+def test_metadata_cache():
+    now = [0.0]
+    td = cached_client(lambda: now[0])
+    for db in ("db1", "db2"):
+        assert td.database(db).name == db
+        for i in range(3):
+            assert td.table(db, f"{db}_t{i}").count == i
+        # a table is looked up from its own database
+        table = td.table(db, f"{db}_t0")
+        assert table.permission is None
+    assert td.api.list_databases.call_count == 1
+    assert [c.args for c in td.api.list_tables.call_args_list] == [("db1",), ("db2",)]
+    assert len(td.tables("db1")) == 3
+    assert td.api.list_tables.call_count == 2
+    # listings are loaded again once expired
+    now[0] = 61.0
+    td.table("db1", "db1_t0")
+    td.database("db1")
+    assert td.api.list_tables.call_count == 3
+    assert td.api.list_databases.call_count == 2
+    with pytest.raises(api.NotFoundError):
+        td.table("db1", "missing")
+    assert td.api.list_tables.call_count == 3
+
+
+@pytest.mark.parametrize(
+    "method, args, invalidated",
+    [
+        ("create_log_table", ("db1", "t"), ["db1"]),
+        ("delete_table", ("db1", "t"), ["db1"]),
+        ("swap_table", ("db1", "t1", "t2"), ["db1"]),
+        ("update_schema", ("db1", "t", [["c", "string"]]), ["db1"]),
+        ("update_expire", ("db1", "t", 7), ["db1"]),
+        ("change_database", ("db1", "t", "db2"), ["db1", "db2"]),
+        ("create_database", ("db1",), ["db1"]),
+        ("delete_database", ("db1",), ["db1"]),
+    ],
+)
+def test_metadata_cache_invalidation(method, args, invalidated):
+    td = cached_client(lambda: 0.0)
+    for db in ("db1", "db2"):
+        td.table(db, f"{db}_t0")
+    td.database("db1")
+    getattr(td, method)(*args)
+    for db in ("db1", "db2"):
+        td.table(db, f"{db}_t0")
+    td.database("db1")
+    reloaded = [c.args[0] for c in td.api.list_tables.call_args_list[2:]]
+    assert reloaded == invalidated
+    assert td.api.list_databases.call_count == 2
+
+
+def test_metadata_cache_disabled():
+    td = client.Client("APIKEY")
+    assert td.metadata_cache is None
+    td._api = mock.MagicMock()
+    td._api.list_tables = mock.MagicMock(return_value={"t": {}})
+    td.table("db", "t")
+    td.table("db", "t")
+    assert td.api.list_tables.call_count == 2
+    td.invalidate_metadata()
+
+
 def test_tail():
     td = client.Client("APIKEY")
     td._api = mock.MagicMock()
@@ -217,12 +303,65 @@ def test_trino_query():
 def test_jobs():
     td = client.Client("APIKEY")
     td._api = mock.MagicMock()
-    td._api.list_jobs = mock.MagicMock(return_value=[])
+    td._api.list_job_records = mock.MagicMock(return_value=[])
     jobs = td.jobs(0, 3)
-    td.api.list_jobs.assert_called_with(0, 3, None, None)
+    td.api.list_job_records.assert_called_with(0, 3, None, None)
     assert len(jobs) == 0
 
 
+def test_jobs_from_records():
+    td = client.Client("APIKEY")
+    record = job_api.JobRecord(
+        {
+            "job_id": "12345",
+            "type": "presto",
+            "query": "SELECT 1",
+            "status": "success",
+            "start_at": "2015-02-09 11:44:27 UTC",
+            "hive_result_schema": '[["cnt", "bigint"]]',
+            "result_size": 22,
+        }
+    )
+    td._api = mock.MagicMock()
+    td._api.list_job_records = mock.MagicMock(return_value=[record])
+    with mock.patch("tdclient.job_api.parse_date") as parse_date:
+        (job,) = td.jobs()
+        assert not parse_date.called
+        job.start_at
+        assert parse_date.called
+    assert job.job_id == "12345"
+    assert job.type == "presto"
+    assert job.query == "SELECT 1"
+    assert job.result_size == 22
+    assert job.result_schema == [["cnt", "bigint"]]
+    assert job.start_at.year == 2015
+    assert job.end_at is None
+
+
+def test_iter_jobs():
+    td = client.Client("APIKEY")
+    records = [
+        job_api.JobRecord({"job_id": str(i), "type": "presto", "query": "SELECT 1"})
+        for i in range(5, 0, -1)
+    ]
+    closed = []
+
+    def iter_jobs(**kwargs):
+        try:
+            yield from records
+        finally:
+            closed.append(kwargs)
+
+    td._api = mock.MagicMock()
+    td._api.iter_jobs = iter_jobs
+    jobs = list(td.iter_jobs(status="error", stop=lambda job: job.job_id == "2"))
+    assert [job.job_id for job in jobs] == ["5", "4", "3"]
+    assert jobs[0].query == "SELECT 1"
+    assert closed == [
+        {"status": "error", "page_size": 100, "prefetch": 2, "conditions": None}
+    ]
+
+
 def test_job():
     td = client.Client("APIKEY")
     td._api = mock.MagicMock()
@@ -302,7 +441,13 @@ def test_job_result_format_each():
     for row in td.job_result_format_each("12345", "json"):
         result.append(row)
     td.api.job_result_format_each.assert_called_with(
-        "12345", "json", header=False, store_tmpfile=False, num_threads=4
+        "12345",
+        "json",
+        header=False,
+        store_tmpfile=False,
+        num_threads=4,
+        prefetch_chunks=0,
+        memory_budget=None,
     )
     assert result == rows
 
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+import array
+import io
+from unittest import mock
+
+import pytest
+
+from tdclient import api, columnar
+from tdclient.test.test_helper import *
+
+SCHEMA = [["id", "bigint"], ["score", "double"], ["name", "varchar"], ["ok", "boolean"]]
+
+
+def setup_function(function):
+    unset_environ()
+
+
+def rows_stream(rows):
+    return io.BytesIO(msgpackb(rows))
+
+
+def test_column_typecode():
+    assert columnar.column_typecode("bigint") == "q"
+    assert columnar.column_typecode("INTEGER") == "q"
+    assert columnar.column_typecode("double") == "d"
+    assert columnar.column_typecode("boolean") == "b"
+    assert columnar.column_typecode("varchar(10)") is None
+    assert columnar.column_typecode("array<bigint>") is None
+
+
+def test_column_names():
+    assert columnar.column_names(["a", "b", "a", "a"]) == ["a", "b", "a.1", "a.2"]
+
+
+def test_decode_columns_array():
+    rows = [[i, i * 0.5, f"name{i}", i % 2 == 0] for i in range(10)]
+    batches = list(columnar.decode_columns(rows_stream(rows), SCHEMA, batch_size=4))
+    assert [len(batch["id"]) for batch in batches] == [4, 4, 2]
+    assert batches[0]["id"] == array.array("q", [0, 1, 2, 3])
+    assert batches[0]["score"] == array.array("d", [0.0, 0.5, 1.0, 1.5])
+    assert batches[0]["name"] == ["name0", "name1", "name2", "name3"]
+    assert batches[0]["ok"] == array.array("b", [1, 0, 1, 0])
+
+
+def test_decode_columns_null_and_mismatched_values():
+    rows = [[1, None, "a", True], [None, 2.5, None, None], [1.5, 1.0, "c", "x"]]
+    (batch,) = columnar.decode_columns(rows_stream(rows), SCHEMA)
+    assert batch["id"] == [1, None, 1.5]
+    assert batch["score"] == [None, 2.5, 1.0]
+    assert batch["name"] == ["a", None, "c"]
+    assert batch["ok"] == [1, None, "x"]
+
+
+def test_decode_columns_without_schema():
+    rows = [[1, "a"], [2, "b"]]
+    (batch,) = columnar.decode_columns(rows_stream(rows), None)
+    assert batch == {"_c0": [1, 2], "_c1": ["a", "b"]}
+
+
+def test_decode_columns_empty():
+    assert list(columnar.decode_columns(io.BytesIO(b""), SCHEMA)) == []
+
+
+def test_decode_columns_unexpected_width():
+    with pytest.raises(ValueError):
+        list(columnar.decode_columns(rows_stream([[1, 2.0, "a", True], [1]]), SCHEMA))
+
+
+def test_decode_columns_unknown_output():
+    with pytest.raises(ValueError):
+        list(columnar.decode_columns(rows_stream([]), SCHEMA, output="pandas"))
+
+
+def test_decode_columns_numpy():
+    numpy = pytest.importorskip("numpy")
+    rows = [[1, 0.5, "a", True], [None, 1.5, "b", False]]
+    (batch,) = columnar.decode_columns(rows_stream(rows), SCHEMA, output="numpy")
+    assert batch["id"].dtype == numpy.int64
+    assert batch["id"].mask.tolist() == [False, True]
+    assert batch["score"].tolist() == [0.5, 1.5]
+    assert batch["name"].dtype == object
+    assert batch["ok"].tolist() == [True, False]
+
+
+def test_decode_columns_arrow():
+    pyarrow = pytest.importorskip("pyarrow")
+    rows = [[1, 0.5, "a", True], [None, 1.5, "b", False]]
+    (batch,) = columnar.decode_columns(rows_stream(rows), SCHEMA, output="arrow")
+    assert batch.schema.names == ["id", "score", "name", "ok"]
+    assert batch.schema.field("id").type == pyarrow.int64()
+    assert batch.to_pydict() == {
+        "id": [1, None],
+        "score": [0.5, 1.5],
+        "name": ["a", "b"],
+        "ok": [True, False],
+    }
+
+
+def test_job_result_columns():
+    td = api.API("APIKEY")
+    td.show_job = mock.MagicMock(return_value={"hive_result_schema": SCHEMA})
+    rows = [[i, float(i), str(i), True] for i in range(5)]
+    td.get = mock.MagicMock(return_value=make_response(200, msgpackb(rows)))
+    batches = list(td.job_result_columns("12345", batch_size=3))
+    td.get.assert_called_with("/v3/job/result/12345?format=msgpack&header=False")
+    assert [list(batch["id"]) for batch in batches] == [[0, 1, 2], [3, 4]]
@@ -34,6 +34,10 @@ def test_connection_with_cursor_options():
         retry_limit=3,
         wait_interval=5,
         wait_callback=repr,
+        wait_timeout=30,
+        stream=True,
+        arraysize=100,
+        prefetch_chunks=2,
     )
     with mock.patch("tdclient.connection.cursor.Cursor") as Cursor:
         td.cursor()
@@ -46,6 +50,10 @@ def test_connection_with_cursor_options():
         assert kwargs.get("retry_limit") == 3
         assert kwargs.get("wait_interval") == 5
         assert kwargs.get("wait_callback") == repr
+        assert kwargs.get("wait_timeout") == 30
+        assert kwargs.get("stream") is True
+        assert kwargs.get("arraysize") == 100
+        assert kwargs.get("prefetch_chunks") == 2
 
 
 def test_connection_close():
@@ -136,6 +136,18 @@ def test_connector_list_success():
     td.get.assert_called_with("/v3/bulk_loads")
 
 
+def test_connector_list_each():
+    td = api.API("APIKEY")
+    body = b'[{"name": "foo", "cron": null}, {"name": "bar", "cron": "@daily"}]'
+    td.get = mock.MagicMock(return_value=make_response(200, body))
+    sessions = list(td.connector_list_each())
+    td.get.assert_called_with("/v3/bulk_loads")
+    assert sessions == [
+        {"name": "foo", "cron": None},
+        {"name": "bar", "cron": "@daily"},
+    ]
+
+
 def test_connector_create_success():
     td = api.API("APIKEY")
     body = b"{}"
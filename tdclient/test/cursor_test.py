@@ -144,6 +144,34 @@ def test_do_execute_wait():
         ]
 
 
+def test_do_execute_wait_timeout():
+    td = cursor.Cursor(
+        mock.MagicMock(), db="sample_datasets", wait_interval=5, wait_timeout=10
+    )
+    td._executed = "42"
+    td.api.job_status = mock.MagicMock(return_value="running")
+    with mock.patch("time.monotonic", side_effect=[0.0, 8.0, 10.0]):
+        with mock.patch("time.sleep") as t_sleep:
+            with pytest.raises(errors.WaitTimeoutError):
+                td._do_execute()
+    assert [c.args[0] for c in t_sleep.call_args_list] == [2.0]
+    assert not td.api.job_result.called
+
+
+def test_do_execute_long_wait_does_not_recurse():
+    td = cursor.Cursor(mock.MagicMock(), db="sample_datasets")
+    td._executed = "42"
+    td.api.job_status = mock.MagicMock(side_effect=["running"] * 3000 + ["success"])
+    td.api.job_result = mock.MagicMock(return_value=[])
+    td.api.show_job = mock.MagicMock(return_value={"hive_result_schema": []})
+    with mock.patch("time.sleep") as t_sleep:
+        td._do_execute()
+    assert t_sleep.call_count == 3000
+    # polls start fast and back off
+    assert t_sleep.call_args_list[0].args[0] < 1
+    assert t_sleep.call_args_list[-1].args[0] == 10
+
+
 def test_result_description():
     td = cursor.Cursor(mock.MagicMock())
     assert td._result_description(None) == []
@@ -177,6 +205,76 @@ def test_fetchmany():
         td.fetchmany(1)
 
 
+def test_fetchmany_ignores_arraysize_without_stream():
+    td = cursor.Cursor(mock.MagicMock(), arraysize=2)
+    td._executed = "42"
+    td._rows = [["foo", 1], ["bar", 1], ["baz", 2]]
+    td._rownumber = 0
+    td._rowcount = len(td._rows)
+    assert td.fetchmany() == [["foo", 1], ["bar", 1], ["baz", 2]]
+
+
+def stream_cursor(rows, **kwargs):
+    td = cursor.Cursor(mock.MagicMock(), db="sample_datasets", stream=True, **kwargs)
+    td.api.query = mock.MagicMock(return_value="42")
+    td.api.job_status = mock.MagicMock(return_value="success")
+    td.api.show_job = mock.MagicMock(
+        return_value={"hive_result_schema": [["col0", "varchar"], ["col1", "long"]]}
+    )
+    fetched = []
+
+    def job_result_format_each(job_id, format, prefetch_chunks=0):
+        assert (job_id, format) == ("42", "msgpack")
+        for row in rows:
+            fetched.append(row)
+            yield row
+
+    td.api.job_result_format_each = mock.MagicMock(side_effect=job_result_format_each)
+    td.execute("SELECT 1")
+    return td, fetched
+
+
+def test_stream_fetchone_is_lazy():
+    rows = [["foo", 1], ["bar", 1], ["baz", 2]]
+    td, fetched = stream_cursor(rows, prefetch_chunks=4)
+    assert not td.api.job_result.called
+    td.api.job_result_format_each.assert_called_with("42", "msgpack", prefetch_chunks=4)
+    assert td.description[0][0] == "col0"
+    assert td.fetchone() == ["foo", 1]
+    assert fetched == [["foo", 1]]
+    assert td.rowcount == -1
+    assert td.fetchone() == ["bar", 1]
+    assert td.fetchone() == ["baz", 2]
+    assert td.fetchone() is None
+    assert td.rowcount == 3
+
+
+def test_stream_fetchmany_and_fetchall():
+    rows = [[i] for i in range(10)]
+    td, fetched = stream_cursor(rows, arraysize=4)
+    assert td.fetchmany() == rows[0:4]
+    assert len(fetched) == 4
+    assert td.fetchmany(3) == rows[4:7]
+    assert td.fetchall() == rows[7:]
+    assert td.fetchmany() == []
+    assert td.rowcount == 10
+
+
+def test_stream_fetchmany_partial_batch():
+    rows = [["foo", 1], ["bar", 1], ["baz", 2]]
+    td, fetched = stream_cursor(rows, arraysize=2)
+    assert td.fetchmany() == [["foo", 1], ["bar", 1]]
+    assert td.fetchmany(5) == [["baz", 2]]
+    assert td.fetchmany(5) == []
+
+
+def test_stream_iteration():
+    rows = [[i] for i in range(5)]
+    td, fetched = stream_cursor(rows)
+    assert list(td) == rows
+    assert td.rowcount == 5
+
+
 def test_fetchall():
     td = cursor.Cursor(mock.MagicMock())
     td._executed = "42"
@@ -7,7 +7,7 @@ from unittest import mock
 
 import pytest
 
-from tdclient import Client, api
+from tdclient import Client, api, util
 from tdclient.test.test_helper import gunzipb, make_response, msgunpackb
 from tdclient.util import read_csv_records
 
@@ -333,3 +333,78 @@ def test_bulk_import_dot_upload_file_supports_dtypes_and_converters():
             dtypes={"col1": "str", "col6": "str"},
             converters={"col2": float},
         )
+
+
+def test_infer_csv_converters():
+    columns = ["time", "i", "f", "mixed", "b", "s", "null", "any", "given"]
+    sample = [
+        ["100", "1", "1.5", "1", "true", "abc", "", "1", "01"],
+        ["200", "", "2", "2.5", "FALSE", "null", "null", "x", "02"],
+    ]
+    funcs = util.infer_csv_converters(columns, sample, dtypes={"given": "str"})
+    row = ["300", "3", "3", "3", "True", "10", "x", "true", "03"]
+    assert [f(v) for f, v in zip(funcs, row)] == [
+        300,
+        3,
+        3.0,
+        3.0,
+        True,
+        "10",
+        "x",
+        True,
+        "03",
+    ]
+    # values which do not fit the inferred type are guessed
+    assert funcs[1]("1.5") == 1.5
+    assert funcs[1]("null") is None
+    assert funcs[4]("none") is None
+    assert funcs[5]("None") is None
+
+
+def test_read_csv_batches():
+    rows = [["100", "0001", "abcd"], ["200", "0002", "efgh"], ["300", "0003", ""]]
+    batches = list(
+        util.read_csv_batches(
+            rows, ["time", "col1", "col2"], dtypes={"col1": "str"}, batch_size=2
+        )
+    )
+    assert batches == [
+        [
+            {"time": 100, "col1": "0001", "col2": "abcd"},
+            {"time": 200, "col1": "0002", "col2": "efgh"},
+            {"time": 300, "col1": "0003", "col2": None},
+        ]
+    ]
+    batches = list(
+        util.read_csv_batches(rows, ["time", "col1"], sample_size=1, batch_size=1)
+    )
+    assert [len(batch) for batch in batches] == [1, 1, 1]
+    assert batches[2] == [{"time": 300, "col1": 3}]
+
+
+def test_read_csv_batches_checks_time_column_once():
+    rows = [["1"]] * 10
+    with pytest.warns(RuntimeWarning) as record:
+        list(util.read_csv_batches(rows, ["col1"]))
+    assert len(record) == 1
+
+
+def test_import_file_compiled():
+    def import_data(db, table, format, stream, size, unique_id=None):
+        data = stream.read(size)
+        assert msgunpackb(gunzipb(data)) == [
+            {"time": 100, "col1": "0001", "col2": 10.0, "col3": 1.0, "col4": "abcd"},
+            {"time": 200, "col1": "0002", "col2": 20.0, "col3": 2.0, "col4": "efgh"},
+        ]
+
+    td = api.API("APIKEY")
+    td.import_data = import_data
+    td.import_file(
+        "db",
+        "table",
+        "csv",
+        BytesIO(DEFAULT_HEADER_BYTE_CSV),
+        dtypes={"col1": "str"},
+        converters={"col2": float},
+        compiled=True,
+    )
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+
+import asyncio
+import gzip
+import time
+
+import msgpack
+import pytest
+
+from tdclient import api, async_client, client, errors, retry
+from tdclient.fake_server import FakeServer, encode_result
+from tdclient.test.test_helper import *
+
+ROWS = [[i, f"user{i}", i * 0.5] for i in range(1000)]
+SCHEMA = [["id", "bigint"], ["name", "varchar"], ["value", "double"]]
+
+
+def setup_function(function):
+    unset_environ()
+
+
+@pytest.fixture
+def server():
+    with FakeServer() as server:
+        server.add_table("db", "table")
+        server.add_result("SELECT 1", ROWS, SCHEMA)
+        yield server
+
+
+def make_api(server, **kwargs):
+    return api.API("APIKEY", endpoint=server.endpoint, **kwargs)
+
+
+def test_encode_result():
+    data = encode_result([[1, "a"]], "msgpack.gz", None)
+    assert msgpack.unpackb(gzip.decompress(data)) == [1, "a"]
+    assert encode_result([[1, "a"]], "json", None) == b'[1, "a"]\n'
+    assert encode_result([[1, "a"]], "csv", ["x", "y"]) == b"x,y\n1,a\n"
+    with pytest.raises(ValueError):
+        encode_result([], "parquet", None)
+
+
+def test_query_and_result():
+    with FakeServer(job_duration=0.2) as server:
+        server.add_table("db", "table")
+        server.add_result("SELECT 1", ROWS, SCHEMA)
+        td = client.Client("APIKEY", endpoint=server.endpoint)
+        job = td.query("db", "SELECT 1", type="presto")
+        assert job.status() == "running"
+        job.wait(wait_interval=0.05)
+        assert job.status() == "success"
+        assert job.num_records == len(ROWS)
+        assert job.result_schema == SCHEMA
+        assert list(job.result()) == ROWS
+        assert list(td.api.job_result_format_each(job.job_id, "json")) == ROWS
+
+
+def test_query_of_unknown_database(server):
+    with pytest.raises(errors.NotFoundError):
+        make_api(server).query("SELECT 1", type="presto", db="no_such_db")
+
+
+def test_unregistered_query_has_empty_result(server):
+    td = make_api(server)
+    job_id = td.query("SELECT 2", type="presto", db="db")
+    assert td.job_result(job_id) == []
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"store_tmpfile": True}, {"memory_budget": 4096, "num_threads": 2}]
+)
+def test_range_download(server, kwargs):
+    job_id = server.add_job(ROWS, SCHEMA)
+    td = make_api(server)
+    rows = list(td.job_result_format_each(job_id, "msgpack", **kwargs))
+    assert rows == ROWS
+    ranges = [path for _, path in server.requests if "format=msgpack.gz" in path]
+    assert ranges
+
+
+def test_download_job_result(server, tmp_path):
+    job_id = server.add_job(ROWS, SCHEMA)
+    path = str(tmp_path / "result.msgpack.gz")
+    assert make_api(server).download_job_result(job_id, path, num_threads=3)
+    with open(path, "rb") as f:
+        assert f.read() == server.jobs[job_id].result("msgpack.gz")
+
+
+def test_range_requests(server):
+    job_id = server.add_job(ROWS, SCHEMA)
+    data = server.jobs[job_id].result("msgpack.gz")
+    td = make_api(server)
+    url = f"/v3/job/result/{job_id}?format=msgpack.gz"
+    with td.get(url, headers={"Range": "bytes=10-19"}) as res:
+        assert res.status == 206
+        assert res.headers["Content-Range"] == f"bytes 10-19/{len(data)}"
+        assert res.read() == data[10:20]
+    with td.get(url, headers={"Range": f"bytes={len(data)}-"}) as res:
+        assert res.status == 416
+
+
+def test_result_of_unfinished_job():
+    with FakeServer(job_duration=60) as server:
+        server.add_database("db")
+        td = make_api(server)
+        job_id = td.query("SELECT 1", type="presto", db="db")
+        with pytest.raises(errors.APIError):
+            td.job_result(job_id)
+        assert td.kill(job_id) == "running"
+        assert td.job_status(job_id) == "killed"
+
+
+def test_import(server):
+    td = make_api(server)
+    td.import_data("db", "table", "msgpack.gz", b"0123456789", 10)
+    td.import_data("db", "table", "msgpack.gz", b"abc", 3, unique_id="xyz")
+    assert server.imports == [
+        ("db", "table", "msgpack.gz", b"0123456789"),
+        ("db", "table", "msgpack.gz", b"abc"),
+    ]
+    with pytest.raises(errors.NotFoundError):
+        td.import_data("db", "no_such_table", "msgpack.gz", b"abc", 3)
+
+
+def test_bulk_import(server):
+    td = make_api(server)
+    td.create_bulk_import("session", "db", "table")
+    td.bulk_import_upload_part("session", "part1", b"0123456789", 10)
+    td.bulk_import_upload_part("session", "part2", b"abc", 3)
+    assert td.list_bulk_import_parts("session") == ["part1", "part2"]
+    td.bulk_import_delete_part("session", "part2")
+    td.freeze_bulk_import("session")
+    with pytest.raises(errors.AlreadyExistsError):
+        td.bulk_import_upload_part("session", "part3", b"abc", 3)
+    job_id = td.perform_bulk_import("session")
+    assert td.job_status(job_id) == "success"
+    td.commit_bulk_import("session")
+    assert td.show_bulk_import("session")["status"] == "committed"
+    assert [m["name"] for m in td.list_bulk_imports()] == ["session"]
+    assert server.bulk_import_parts == {"session": {"part1": b"0123456789"}}
+    td.delete_bulk_import("session")
+    assert td.list_bulk_imports() == []
+
+
+def test_list_endpoints(server):
+    td = make_api(server)
+    td.create_database("other")
+    td.create_log_table("other", "events")
+    assert sorted(td.list_databases()) == ["db", "other"]
+    assert list(td.list_tables("other")) == ["events"]
+    assert [m["name"] for m in td.list_tables_each("db")] == ["table"]
+    job_ids = [td.query("SELECT 1", type="presto", db="db") for _ in range(3)]
+    jobs = td.list_jobs(0, 1)
+    assert [job["job_id"] for job in jobs] == job_ids[::-1][:2]
+
+
+def test_unknown_endpoint(server):
+    with make_api(server).get("/v3/no/such/endpoint") as res:
+        assert res.status == 404
+
+
+class NoSleepClock(retry.Clock):
+    def sleep(self, seconds):
+        pass
+
+
+def test_fail_next(server):
+    td = make_api(server, retry_policy=retry.RetryPolicy(clock=NoSleepClock()))
+    server.fail_next(2, 503, route="/v3/database/list")
+    assert list(td.list_tables("db")) == ["table"]
+    assert list(td.list_databases()) == ["db"]
+    metrics = td.metrics()
+    assert metrics["GET /v3/database/list"]["retries"] == 2
+    assert metrics["GET /v3/database/list"]["errors"] == {"HTTP 503": 2}
+    assert metrics["GET /v3/table/list/{db}"]["errors"] == {}
+
+
+def test_random_failures_of_routes():
+    with FakeServer(
+        failure_rate=1.0, failure_routes=["/v3/job/status/{job_id}"], seed=0
+    ) as server:
+        shown, polled = server.add_job([]), server.add_job([])
+        policy = retry.RetryPolicy(max_cumul_delay=10, clock=NoSleepClock())
+        td = make_api(server, retry_policy=policy)
+        assert td.show_job(shown)["status"] == "success"
+        with pytest.raises(errors.APIError):
+            td.job_status(polled)
+
+
+def test_dropped_connections_are_retried(server):
+    server.fail_next(1, None)
+    assert list(make_api(server).list_databases()) == ["db"]
+    assert len(server.requests) == 2
+
+
+def test_latency_and_bandwidth():
+    with FakeServer(latency=0.1, bandwidth=512 * 1024) as server:
+        job_id = server.add_job([[b"x" * 1024] for _ in range(256)])
+        td = make_api(server)
+        started_at = time.monotonic()
+        assert len(td.job_result(job_id)) == 256
+        assert 0.6 <= time.monotonic() - started_at
+
+
+def test_async_client(server):
+    async def scenario():
+        async with async_client.AsyncClient("APIKEY", endpoint=server.endpoint) as td:
+            job_ids = await asyncio.gather(
+                *[td.api.query("SELECT 1", type="presto", db="db") for _ in range(4)]
+            )
+            return [await td.api.job_status(job_id) for job_id in job_ids]
+
+    assert asyncio.run(scenario()) == ["success"] * 4
+
+
+def test_async_streaming_methods(server, tmp_path):
+    job_id = server.add_job(ROWS, SCHEMA)
+    path = str(tmp_path / "result.msgpack.gz")
+
+    async def scenario():
+        async with async_client.AsyncClient("APIKEY", endpoint=server.endpoint) as td:
+            tables = [table async for table in td.api.list_tables_each("db")]
+            job_ids = [job["job_id"] async for job in td.iter_jobs()]
+            columns = [batch async for batch in td.job_result_columns(job_id)]
+            downloaded = await td.download_job_result(job_id, path, num_threads=2)
+            return tables, job_ids, columns, downloaded
+
+    tables, job_ids, columns, downloaded = asyncio.run(scenario())
+    assert [table["name"] for table in tables] == ["table"]
+    assert job_id in job_ids
+    assert [i for batch in columns for i in batch["id"]] == [row[0] for row in ROWS]
+    assert downloaded
+    with open(path, "rb") as f:
+        assert f.read() == server.jobs[job_id].result("msgpack.gz")
@@ -75,6 +75,13 @@ def test_import_file_msgpack_success():
     td.import_file("db", "table", "msgpack", stream)
 
 
+def test_prepare_file_keeps_former_name():
+    td = api.API("APIKEY")
+    data = [{"time": 1, "str": "value1"}]
+    with td._prepare_file(io.BytesIO(msgpackb(data)), "msgpack") as fp:
+        assert msgunpackb(gunzipb(fp.read())) == data
+
+
 def test_import_file_msgpack_bigint_as_string():
     td = api.API("APIKEY")
     data = [
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+
+import asyncio
+import json
+import logging
+from unittest import mock
+
+import pytest
+
+from tdclient import api, async_api, instrumentation, retry
+from tdclient.test.test_helper import *
+from tdclient.util import create_url
+
+
+def setup_function(function):
+    unset_environ()
+
+
+class RecordingHooks(instrumentation.Hooks):
+    def __init__(self):
+        self.calls = []
+
+    def on_request_start(self, request):
+        self.calls.append(("start", request.method, request.route))
+
+    def on_response(self, request):
+        self.calls.append(("response", request.status, type(request.error)))
+
+    def on_retry(self, attempt):
+        self.calls.append(("retry", attempt.attempt, attempt.route))
+
+    def on_bytes_transferred(self, request, sent, received):
+        self.calls.append(("bytes", sent, received))
+
+
+class FakeClock(retry.Clock):
+    def __init__(self):
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+def json_response(obj, status=200):
+    return (status, {"content-type": "application/json"}, json.dumps(obj).encode())
+
+
+@pytest.mark.parametrize(
+    "path, template",
+    [
+        (
+            create_url("/v3/job/status/{job_id}", job_id="12345"),
+            "/v3/job/status/{job_id}",
+        ),
+        (
+            create_url(
+                "/v3/job/result/{job_id}?format={format}", job_id=1, format="json"
+            ),
+            "/v3/job/result/{job_id}",
+        ),
+        ("/v3/job/list", "/v3/job/list"),
+        ("https://api.example.com/v3/job/show/12345?x=1", "/v3/job/show/{}"),
+    ],
+)
+def test_route_template(path, template):
+    assert instrumentation.route_template(path) == template
+
+
+def test_metrics_of_requests():
+    body = json.dumps({"status": "running"}).encode()
+
+    def handler(method, path, headers, body_):
+        if path.startswith("/v3/job/status/"):
+            return (200, {}, body)
+        return (404, {}, b"not found")
+
+    with StubHTTPServer(handler) as server:
+        td = api.API("APIKEY", endpoint=server.endpoint)
+        assert td.job_status("12345") == "running"
+        assert td.job_status("67890") == "running"
+        with pytest.raises(api.NotFoundError):
+            td.kill("12345")
+        with td.put("/v3/table/import/db/table/msgpack.gz", b"0123456789", 10):
+            pass
+
+    metrics = td.metrics()
+    assert sorted(metrics) == [
+        "GET /v3/job/status/{job_id}",
+        "POST /v3/job/kill/{job_id}",
+        "PUT /v3/table/import/db/table/msgpack.gz",
+    ]
+    status = metrics["GET /v3/job/status/{job_id}"]
+    assert status["requests"] == 2
+    assert status["bytes_received"] == 2 * len(body)
+    assert status["errors"] == {}
+    assert 0 < status["latency"]["sum"]
+    assert sum(status["latency"]["buckets"].values()) == 2
+    assert status["latency"]["p50"] <= status["latency"]["max"]
+    assert metrics["POST /v3/job/kill/{job_id}"]["errors"] == {"HTTP 404": 1}
+    assert metrics["PUT /v3/table/import/db/table/msgpack.gz"]["bytes_sent"] == 10
+
+    assert td.metrics(reset=True) == metrics
+    assert td.metrics() == {}
+
+
+def test_metrics_of_retries():
+    clock = FakeClock()
+    hooks = RecordingHooks()
+    td = api.API(
+        "APIKEY",
+        retry_policy=retry.RetryPolicy(initial_delay=1, clock=clock),
+        hooks=[hooks],
+    )
+    td.http.request = mock.MagicMock(
+        side_effect=[
+            make_raw_response(502, b"bad gateway"),
+            OSError("connection reset"),
+            make_raw_response(200, b'{"status": "success"}'),
+        ]
+    )
+    assert td.job_status("12345") == "success"
+    assert clock.sleeps == [1, 2]
+
+    route = "/v3/job/status/{job_id}"
+    metrics = td.metrics()[f"GET {route}"]
+    assert metrics["requests"] == 3
+    assert metrics["retries"] == 2
+    assert metrics["errors"] == {"HTTP 502": 1, "OSError": 1}
+    assert hooks.calls == [
+        ("start", "GET", route),
+        ("response", 502, type(None)),
+        ("bytes", 0, 0),
+        ("retry", 1, route),
+        ("start", "GET", route),
+        ("response", None, OSError),
+        ("retry", 2, route),
+        ("start", "GET", route),
+        ("response", 200, type(None)),
+        ("bytes", 0, 21),
+    ]
+
+
+def test_hook_errors_are_ignored(caplog):
+    class BrokenHooks(instrumentation.Hooks):
+        def on_request_start(self, request):
+            raise RuntimeError("broken")
+
+    td = api.API("APIKEY", hooks=[BrokenHooks()])
+    td.http.request = mock.MagicMock(
+        return_value=make_raw_response(200, b'{"status": "success"}')
+    )
+    with caplog.at_level(logging.ERROR, logger="tdclient.instrumentation"):
+        assert td.job_status("12345") == "success"
+    assert "Exception in on_request_start hook" in caplog.text
+    assert td.metrics()["GET /v3/job/status/{job_id}"]["requests"] == 1
+
+
+def test_debug_log_does_not_format_disabled_messages():
+    td = api.API("APIKEY")
+    response = make_raw_response(200, b'{"status": "success"}')
+    response.getheaders.side_effect = AssertionError("headers read")
+    td.http.request = mock.MagicMock(return_value=response)
+    headers = mock.MagicMock()
+    headers.__repr__ = mock.MagicMock(side_effect=AssertionError("headers formatted"))
+    response.headers = headers
+    assert td.job_status("12345") == "success"
+
+
+def test_async_metrics():
+    def handler(method, path, headers, body):
+        return json_response({"status": "running"})
+
+    async def scenario(endpoint):
+        async with async_api.AsyncAPI("APIKEY", endpoint=endpoint) as td:
+            await asyncio.gather(*[td.job_status(str(i)) for i in range(5)])
+            return td.metrics()
+
+    with StubHTTPServer(handler) as server:
+        metrics = asyncio.run(scenario(server.endpoint))
+    status = metrics["GET /v3/job/status/{job_id}"]
+    assert status["requests"] == 5
+    assert status["bytes_received"] == 5 * len(b'{"status": "running"}')
+
+
+def test_opentelemetry_hooks():
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter,
+    )
+
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    reader = InMemoryMetricReader()
+    meter_provider = MeterProvider(metric_readers=[reader])
+    hooks = instrumentation.OpenTelemetryHooks(
+        tracer=tracer_provider.get_tracer("test"),
+        meter=meter_provider.get_meter("test"),
+    )
+    td = api.API(
+        "APIKEY",
+        retry_policy=retry.RetryPolicy(clock=FakeClock()),
+        hooks=[hooks],
+    )
+    td.http.request = mock.MagicMock(
+        side_effect=[
+            make_raw_response(503, b"unavailable"),
+            make_raw_response(200, b'{"status": "success"}'),
+        ]
+    )
+    assert td.job_status("12345") == "success"
+
+    spans = exporter.get_finished_spans()
+    assert [span.name for span in spans] == [
+        "GET /v3/job/status/{job_id}",
+        "GET /v3/job/status/{job_id}",
+    ]
+    assert [span.attributes["http.response.status_code"] for span in spans] == [
+        503,
+        200,
+    ]
+    assert not spans[0].status.is_ok
+    names = {
+        metric.name
+        for resource in reader.get_metrics_data().resource_metrics
+        for scope in resource.scope_metrics
+        for metric in scope.metrics
+    }
+    assert names == {
+        "http.client.request.duration",
+        "tdclient.bytes_sent",
+        "tdclient.bytes_received",
+        "tdclient.retries",
+    }
+
+
+def test_opentelemetry_hooks_require_opentelemetry():
+    with mock.patch.dict("sys.modules", {"opentelemetry.metrics": None}):
+        with pytest.raises(ImportError):
+            instrumentation.OpenTelemetryHooks()
@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 
+import contextlib
 import datetime
 import json
 import tempfile
+import time
 import uuid
 from unittest import mock
 
@@ -10,7 +12,7 @@ import dateutil.tz
 import msgpack
 import pytest
 
-from tdclient import api
+from tdclient import api, job_api
 from tdclient.test.test_helper import *
 
 
@@ -51,6 +53,23 @@ def test_list_jobs_success():
     ]
 
 
+def test_list_jobs_returns_dicts():
+    td = api.API("APIKEY")
+    job = {
+        "job_id": "12345",
+        "type": "presto",
+        "status": "success",
+        "start_at": "2015-02-09 11:44:27 UTC",
+    }
+    body = json.dumps({"jobs": [job]}).encode("utf-8")
+    td.get = mock.MagicMock(return_value=make_response(200, body))
+    (record,) = td.list_jobs()
+    assert type(record) is dict
+    assert record == job_api.parse_job(job)
+    record["status"] = "error"
+    assert json.dumps(record, default=str)
+
+
 def test_list_jobs_failure():
     td = api.API("APIKEY")
     td.get = mock.MagicMock(return_value=make_response(500, b"error"))
@@ -59,6 +78,136 @@ def test_list_jobs_failure():
     assert error.value.args == ("500: List jobs failed: error",)
 
 
+def test_list_jobs_each():
+    td = api.API("APIKEY")
+    jobs = [{"job_id": str(i), "type": "presto", "status": "success"} for i in range(3)]
+    body = json.dumps({"count": 3, "jobs": jobs}).encode("utf-8")
+    td.get = mock.MagicMock(return_value=make_response(200, body))
+    records = list(td.list_jobs_each(0, 2, status="success"))
+    td.get.assert_called_with(
+        "/v3/job/list", {"from": "0", "to": "2", "status": "success"}
+    )
+    assert [record["job_id"] for record in records] == ["0", "1", "2"]
+    assert records[0] == job_api.parse_job(jobs[0])
+
+
+def test_list_job_records_are_lazy():
+    td = api.API("APIKEY")
+    job = {
+        "job_id": "12345",
+        "type": "presto",
+        "query": "SELECT 1",
+        "status": "success",
+        "result": "",
+        "start_at": "2015-02-09 11:44:27 UTC",
+        "end_at": "",
+        "hive_result_schema": '[["cnt", "bigint"]]',
+        "organization": None,
+    }
+    body = json.dumps({"jobs": [job]}).encode("utf-8")
+    td.get = mock.MagicMock(return_value=make_response(200, body))
+    with (
+        mock.patch("tdclient.job_api.parse_date") as parse_date,
+        mock.patch("tdclient.job_api.json.loads", wraps=json.loads) as loads,
+    ):
+        (record,) = td.list_job_records()
+        decoded = loads.call_count  # the response itself
+        assert record["status"] == "success"
+        assert not parse_date.called
+        assert loads.call_count == decoded
+        assert record["hive_result_schema"] == [["cnt", "bigint"]]
+        assert record["hive_result_schema"] is record["hive_result_schema"]
+        assert loads.call_count == decoded + 1
+    assert not hasattr(record, "__dict__")
+    assert record.raw is not None and record.raw["organization"] is None
+    # same keys and values as show_job
+    assert record == job_api.parse_job(job)
+    assert list(record) == list(job_api.parse_job(job))
+    assert record["end_at"] is None
+    assert record["result"] is None
+    with pytest.raises(KeyError):
+        record["organization"]
+
+
+def fake_job_pages(td, job_ids, delay=0.0):
+    """Serve `job_ids` from list_job_records with `to` included as the API does"""
+    calls = []
+
+    def list_job_records(_from, to, status=None, conditions=None):
+        calls.append((_from, to, status))
+        time.sleep(delay)
+        return [
+            job_api.JobRecord({"job_id": str(job_id), "type": "presto"})
+            for job_id in job_ids[_from : to + 1]
+        ]
+
+    td.list_job_records = list_job_records
+    return calls
+
+
+def test_iter_jobs():
+    td = api.API("APIKEY")
+    calls = fake_job_pages(td, list(range(25, 0, -1)))
+    jobs = list(td.iter_jobs(status="success", page_size=10, prefetch=0))
+    assert [job["job_id"] for job in jobs] == [str(i) for i in range(25, 0, -1)]
+    assert calls == [(0, 9, "success"), (10, 19, "success"), (20, 29, "success")]
+
+
+def test_iter_jobs_stop():
+    td = api.API("APIKEY")
+    calls = fake_job_pages(td, list(range(100, 0, -1)))
+    jobs = list(
+        td.iter_jobs(
+            page_size=10, prefetch=0, stop=lambda job: int(job["job_id"]) <= 85
+        )
+    )
+    assert [job["job_id"] for job in jobs] == [str(i) for i in range(100, 85, -1)]
+    assert len(calls) == 2
+
+
+def test_iter_jobs_skips_shifted_jobs():
+    td = api.API("APIKEY")
+    job_ids = list(range(20, 0, -1))
+    pages = []
+
+    def list_job_records(_from, to, status=None, conditions=None):
+        if pages:
+            # a job was issued after the first page was read
+            job_ids.insert(0, 21)
+        page = [job_api.JobRecord({"job_id": str(i)}) for i in job_ids[_from : to + 1]]
+        pages.append(page)
+        return page
+
+    td.list_job_records = list_job_records
+    jobs = list(td.iter_jobs(page_size=10, prefetch=0))
+    assert [job["job_id"] for job in jobs] == [str(i) for i in range(20, 0, -1)]
+
+
+def test_iter_jobs_prefetch():
+    td = api.API("APIKEY")
+    calls = fake_job_pages(td, list(range(60, 0, -1)), delay=0.05)
+    started_at = time.monotonic()
+    jobs = td.iter_jobs(page_size=10, prefetch=3)
+    assert next(jobs)["job_id"] == "60"
+    # the first page and the 3 following ones were requested at once
+    assert 4 <= len(calls)
+    assert len(list(jobs)) == 59
+    # 7 pages, the last one empty, in 2 rounds instead of 7
+    assert time.monotonic() - started_at < 0.3
+    assert (
+        sorted(call[0] for call in calls)
+        == [0, 10, 20, 30, 40, 50, 60, 70, 80, 90][: len(calls)]
+    )
+
+
+def test_iter_jobs_invalid_arguments():
+    td = api.API("APIKEY")
+    with pytest.raises(ValueError):
+        next(td.iter_jobs(page_size=0))
+    with pytest.raises(ValueError):
+        next(td.iter_jobs(prefetch=-1))
+
+
 def test_show_job_success():
     td = api.API("APIKEY")
     body = b"""
@@ -120,6 +269,58 @@ def test_show_job_success():
     assert job["database"] == "sample_datasets"
 
 
+def test_show_job_caches_finished_jobs():
+    td = api.API("APIKEY", job_cache_size=2)
+    running = b'{"job_id": "1", "type": "presto", "status": "running"}'
+    td.get = mock.MagicMock(side_effect=lambda path: make_response(200, running))
+    td.show_job("1")
+    td.show_job("1")
+    assert td.get.call_count == 2
+
+    def show(path):
+        job_id = path.rsplit("/", 1)[-1]
+        body = {"job_id": job_id, "type": "presto", "status": "success"}
+        return make_response(200, json.dumps(body).encode("utf-8"))
+
+    td.get = mock.MagicMock(side_effect=show)
+    job = td.show_job("1")
+    job["status"] = "modified"
+    assert td.show_job("1")["status"] == "success"
+    assert td.job_status("1") == "success"
+    assert td.get.call_count == 1
+    # the least recently used job is dropped
+    td.show_job("2")
+    td.show_job("3")
+    td.show_job("1")
+    assert td.get.call_count == 4
+    td.show_job("3")
+    assert td.get.call_count == 4
+
+
+def test_finished_job_cache_helpers():
+    cache = job_api.FinishedJobCache()
+    running = {"job_id": "1", "type": "presto", "status": "running"}
+    assert cache.parse(running, job_id="1")["status"] == "running"
+    assert cache.show("1") is None
+    assert cache.status("1") is None
+    finished = {"job_id": "2", "type": "presto", "status": "error"}
+    assert cache.parse(finished, job_id="2")["status"] == "error"
+    assert cache.status("2") == "error"
+    job = cache.show("2")
+    assert job is not None and job["job_id"] == "2"
+    job["status"] = "modified"
+    assert cache.status("2") == "error"
+
+
+def test_show_job_cache_disabled():
+    td = api.API("APIKEY", job_cache_size=0)
+    body = b'{"job_id": "1", "type": "presto", "status": "success"}'
+    td.get = mock.MagicMock(side_effect=lambda path: make_response(200, body))
+    td.show_job("1")
+    td.show_job("1")
+    assert td.get.call_count == 2
+
+
 def test_job_status_success():
     td = api.API("APIKEY")
     # TODO: should be replaced by wire dump
@@ -161,6 +362,26 @@ def test_job_result_each_success():
     assert result == rows
 
 
+def test_job_result_format_each_prefetch_chunks():
+    td = api.API("APIKEY")
+    rows = [[i, f"row{i}"] for i in range(100000)]
+    body = msgpackb(rows)
+    response = make_raw_response(200, body)
+
+    def stream(size=None):
+        while True:
+            chunk = response.read(1024)
+            if not chunk:
+                return
+            yield chunk
+
+    response.stream.side_effect = stream
+    td.get = mock.MagicMock(return_value=contextlib.closing(response))
+    result = list(td.job_result_format_each(12345, "msgpack", prefetch_chunks=4))
+    td.get.assert_called_with("/v3/job/result/12345?format=msgpack&header=False")
+    assert result == rows
+
+
 def test_job_result_json_success():
     td = api.API("APIKEY")
     rows = [["foo", 123], ["bar", 456], ["baz", 789]]
@@ -228,7 +449,7 @@ def test_job_result_msgpack_each_store_tmpfile_success():
             "priority": 1,
             "query": "SELECT COUNT(1) FROM nasdaq",
             "result": "",
-            "result_size": 22,
+            "result_size": 40,
             "retry_limit": 0,
             "start_at": "2015-02-09 11:44:27 UTC",
             "status": "success",
@@ -252,11 +473,55 @@ def test_job_result_msgpack_each_store_tmpfile_success():
     for row in td.job_result_format_each(12345, "msgpack", store_tmpfile=True):
         result.append(row)
     td.get.assert_called_with(
-        "/v3/job/result/12345?format=msgpack.gz", headers={"Range": "bytes=0-21"}
+        "/v3/job/result/12345?format=msgpack.gz", headers={"Range": "bytes=0-39"}
     )
     assert result == rows
 
 
+def range_result_handler(rows):
+    data = gzipb(msgpackb(rows))
+
+    def handler(method, path, headers, body):
+        if path == "/v3/job/show/12345":
+            js = {"status": "success", "type": "presto", "result_size": len(data)}
+            return (200, {}, json.dumps(js).encode())
+        assert path == "/v3/job/result/12345?format=msgpack.gz"
+        start, end = map(int, headers["range"][len("bytes=") :].split("-"))
+        return (206, {}, data[start : end + 1])
+
+    return data, handler
+
+
+@pytest.mark.parametrize("options", [{"store_tmpfile": True}, {"memory_budget": 0}])
+def test_job_result_msgpack_each_parallel_ranges(options):
+    rows = [[i, uuid.uuid4().hex] for i in range(100000)]
+    data, handler = range_result_handler(rows)
+    with StubHTTPServer(handler) as server:
+        td = api.API("APIKEY", endpoint=server.endpoint)
+        result = list(
+            td.job_result_format_each(12345, "msgpack", num_threads=2, **options)
+        )
+        ranges = [h["range"] for m, p, h, b in server.requests if "range" in h]
+    assert result == rows
+    if "memory_budget" in options:
+        assert len(ranges) == (len(data) + 1024**2 - 1) // 1024**2
+    else:
+        assert ranges == [f"bytes=0-{len(data) - 1}"]
+
+
+def test_job_result_msgpack_each_range_failure():
+    def handler(method, path, headers, body):
+        if path == "/v3/job/show/12345":
+            return (200, {}, b'{"status": "success", "result_size": 22}')
+        return (500, {}, b"error")
+
+    with StubHTTPServer(handler) as server:
+        td = api.API("APIKEY", endpoint=server.endpoint)
+        with mock.patch("time.sleep"):
+            with pytest.raises(api.APIError):
+                list(td.job_result_format_each(12345, "msgpack", store_tmpfile=True))
+
+
 def test_download_job_result():
     td = api.API("APIKEY")
     body = b"""
@@ -276,7 +541,7 @@ def test_download_job_result():
             "priority": 1,
             "query": "SELECT COUNT(1) FROM nasdaq",
             "result": "",
-            "result_size": 22,
+            "result_size": 60,
             "retry_limit": 0,
             "start_at": "2015-02-09 11:44:27 UTC",
             "status": "success",
@@ -301,7 +566,7 @@ def test_download_job_result():
         td.download_job_result(12345, temp)
         td.get.assert_any_call("/v3/job/show/12345")
         td.get.assert_any_call(
-            "/v3/job/result/12345?format=msgpack.gz", headers={"Range": "bytes=0-21"}
+            "/v3/job/result/12345?format=msgpack.gz", headers={"Range": "bytes=0-59"}
         )
         with open(temp, "rb") as f:
             result = msgunpackb(gunzipb(f.read()))
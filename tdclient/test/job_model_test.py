@@ -92,8 +92,8 @@ def test_job_wait_success():
     job = models.Job(client, "12345", "presto", "SELECT COUNT(1) FROM nasdaq")
     job.finished = mock.MagicMock(side_effect=[False, True])
     job.update = mock.MagicMock()
-    with mock.patch("time.time") as t_time:
-        t_time.side_effect = [1423570800.0, 1423570860.0, 1423570920.0, 1423570980.0]
+    with mock.patch("time.monotonic") as t_time:
+        t_time.side_effect = [100.0, 160.0, 220.0, 280.0]
         with mock.patch("time.sleep") as t_sleep:
             job.wait(timeout=120)
             assert t_sleep.called
@@ -107,8 +107,8 @@ def test_job_wait_failure():
     job = models.Job(client, "12345", "presto", "SELECT COUNT(1) FROM nasdaq")
     job.finished = mock.MagicMock(return_value=False)
     job.update = mock.MagicMock()
-    with mock.patch("time.time") as t_time:
-        t_time.side_effect = [1423570800.0, 1423570860.0, 1423570920.0, 1423570980.0]
+    with mock.patch("time.monotonic") as t_time:
+        t_time.side_effect = [100.0, 160.0, 220.0, 280.0]
         with mock.patch("time.sleep") as t_sleep:
             with pytest.raises(RuntimeError) as error:
                 job.wait(timeout=120)
@@ -364,6 +364,50 @@ def test_job_update_progress():
     assert not client.job_status.called
 
 
+def test_job_status_is_reused_while_fresh():
+    client = mock.MagicMock()
+    client.job_status = mock.MagicMock(return_value="running")
+    job = models.Job(client, "1", "hive", "SELECT COUNT(1) FROM nasdaq")
+    assert not job.finished()
+    assert not job.success()
+    assert job.running()
+    assert job.status() == "running"
+    assert client.job_status.call_count == 1
+    assert not client.api.show_job.called
+
+    job.status_ttl = 0
+    assert not job.finished()
+    assert job.running()
+    assert client.job_status.call_count == 3
+
+
+def test_job_wait_ignores_fresh_status():
+    client = mock.MagicMock()
+    client.job_status = mock.MagicMock(side_effect=["running", "running", "success"])
+    client.api.show_job = mock.MagicMock(return_value={"status": "success"})
+    job = models.Job(client, "1", "hive", "SELECT COUNT(1) FROM nasdaq")
+    job.status_ttl = 3600
+    assert job.running()
+    with mock.patch("time.sleep"):
+        job.wait(wait_interval=1)
+    assert job.success()
+    assert client.job_status.call_count == 3
+
+
+def test_job_finished_details_are_not_requested_again():
+    client = mock.MagicMock()
+    client.job_status = mock.MagicMock(return_value="success")
+    client.api.show_job = mock.MagicMock(
+        return_value={"status": "success", "result": [["foo", 1]]}
+    )
+    job = models.Job(client, "1", "hive", "SELECT COUNT(1) FROM nasdaq")
+    assert list(job.result()) == [["foo", 1]]
+    assert list(job.result()) == [["foo", 1]]
+    assert job.status() == "success"
+    assert client.job_status.call_count == 1
+    assert client.api.show_job.call_count == 1
+
+
 def test_job_update_status():
     client = mock.MagicMock()
     client.api.show_job = mock.MagicMock(
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+
+import threading
+from unittest import mock
+
+import pytest
+
+from tdclient import client, errors, job_watcher, models
+from tdclient.test.test_helper import *
+
+
+def setup_function(function):
+    unset_environ()
+
+
+def job_data(job_id, status):
+    return {
+        "job_id": job_id,
+        "type": "presto",
+        "query": f"SELECT {job_id}",
+        "status": status,
+        "result_size": 10,
+    }
+
+
+def make_client(statuses):
+    """Stub a client whose jobs finish after the given number of status polls"""
+    td = client.Client("APIKEY")
+    td._api = mock.MagicMock()
+    polls = {job_id: 0 for job_id in statuses}
+    lock = threading.Lock()
+
+    def job_status(job_id):
+        with lock:
+            polls[job_id] += 1
+            if statuses[job_id][0] <= polls[job_id]:
+                return statuses[job_id][1]
+            return "running"
+
+    def show_job(job_id):
+        return job_data(job_id, job_status(job_id))
+
+    td._api.job_status = mock.MagicMock(side_effect=job_status)
+    td._api.show_job = mock.MagicMock(side_effect=show_job)
+    return td
+
+
+def test_as_completed():
+    td = make_client({"1": (3, "success"), "2": (1, "success"), "3": (2, "error")})
+    with td.watch_jobs(["1", "2", "3"], wait_interval=0.001) as watcher:
+        jobs = list(watcher.as_completed(timeout=5))
+    assert [job.job_id for job in jobs] == ["2", "3", "1"]
+    assert [job.status() for job in jobs] == ["success", "error", "success"]
+    # jobs are built from the details of finished jobs
+    assert jobs[0].type == "presto"
+    assert jobs[0].result_size == 10
+
+
+def test_watch_job_objects():
+    td = make_client({"1": (2, "success")})
+    job = models.Job(td, "1", "hive", "SELECT 1")
+    with td.watch_jobs([job], wait_interval=0.001) as watcher:
+        assert list(watcher.as_completed(timeout=5)) == [job]
+    assert job.finished()
+    assert job.result_size == 10
+
+
+def test_wait_first_completed():
+    td = make_client({"1": (1, "success"), "2": (10**6, "success")})
+    with job_watcher.JobWatcher(td, ["1", "2"], wait_interval=0.001) as watcher:
+        done, not_done = watcher.wait(timeout=5, return_when="FIRST_COMPLETED")
+        assert [job.job_id for job in done] == ["1"]
+        assert [job.job_id for job in not_done] == ["2"]
+
+
+def test_wait_first_error():
+    td = make_client({"1": (1, "killed"), "2": (10**6, "success")})
+    with job_watcher.JobWatcher(td, ["1", "2"], wait_interval=0.001) as watcher:
+        done, not_done = watcher.wait(timeout=5, return_when="FIRST_ERROR")
+        assert [job.status() for job in done] == ["killed"]
+        assert len(not_done) == 1
+
+
+def test_wait_timeout():
+    td = make_client({"1": (10**6, "success")})
+    with job_watcher.JobWatcher(td, ["1"], wait_interval=0.001) as watcher:
+        done, not_done = watcher.wait(timeout=0.05)
+        assert done == []
+        assert [job.job_id for job in not_done] == ["1"]
+        with pytest.raises(RuntimeError):
+            list(watcher.as_completed(timeout=0.05))
+
+
+def test_wait_unknown_return_when():
+    td = make_client({})
+    with job_watcher.JobWatcher(td) as watcher:
+        with pytest.raises(ValueError):
+            watcher.wait(return_when="FIRST_EXCEPTION")
+
+
+def test_callbacks():
+    td = make_client({"1": (1, "success"), "2": (2, "success")})
+    finished = []
+    added = []
+    with job_watcher.JobWatcher(
+        td, wait_interval=0.001, callback=lambda job: finished.append(job.job_id)
+    ) as watcher:
+        watcher.add("1", callback=lambda job: 1 / 0)
+        watcher.add("2", callback=lambda job: added.append(job.job_id))
+        watcher.wait(timeout=5)
+    assert sorted(finished) == ["1", "2"]
+    assert added == ["2"]
+
+
+def test_unknown_job():
+    td = make_client({"1": (1, "success")})
+    td._api.job_status = mock.MagicMock(side_effect=errors.NotFoundError("no job"))
+    with job_watcher.JobWatcher(td, ["1"], wait_interval=0.001) as watcher:
+        done, not_done = watcher.wait(timeout=5)
+        assert [job.job_id for job in done] == ["1"]
+        assert isinstance(watcher.errors["1"], errors.NotFoundError)
+        with pytest.raises(errors.NotFoundError):
+            list(watcher.as_completed())
+
+
+def test_transient_error_is_retried():
+    td = make_client({"1": (1, "success")})
+    td._api.job_status = mock.MagicMock(
+        side_effect=[errors.APIError("500: error", status=500), "success"]
+    )
+    with job_watcher.JobWatcher(td, ["1"], wait_interval=0.001) as watcher:
+        done, not_done = watcher.wait(timeout=5)
+    assert watcher.errors == {}
+    assert [job.job_id for job in done] == ["1"]
+
+
+def test_client_error_is_not_retried():
+    td = make_client({"1": (1, "success")})
+    error = errors.APIError("400: bad request", status=400)
+    td._api.job_status = mock.MagicMock(side_effect=[error, "success"])
+    with job_watcher.JobWatcher(td, ["1"], wait_interval=0.001) as watcher:
+        watcher.wait(timeout=5)
+    assert watcher.errors == {"1": error}
+    assert td._api.job_status.call_count == 1
+
+
+def test_list_jobs_pages():
+    td = client.Client("APIKEY")
+    td._api = mock.MagicMock()
+    pages = {
+        0: [
+            job_data(str(i), "running" if i % 2 else "success")
+            for i in range(20, 10, -1)
+        ],
+        10: [job_data(str(i), "success") for i in range(10, 0, -1)],
+    }
+    td._api.list_job_records = mock.MagicMock(
+        side_effect=lambda _from, to: pages[_from]
+    )
+    td._api.job_status = mock.MagicMock(return_value="success")
+    td._api.show_job = mock.MagicMock(
+        side_effect=lambda job_id: job_data(job_id, "success")
+    )
+    ids = [str(i) for i in range(5, 21)] + ["99999"]
+    with job_watcher.JobWatcher(
+        td, ids, wait_interval=0.001, list_threshold=10, page_size=10
+    ) as watcher:
+        done, not_done = watcher.wait(timeout=5)
+    assert not_done == []
+    # the second page has jobs older than watched jobs, so no more pages are read
+    assert td.api.list_job_records.call_args_list[:2] == [
+        mock.call(0, 9),
+        mock.call(10, 19),
+    ]
+    # running jobs and jobs not listed are polled one by one once fewer jobs are pending
+    polled = {c.args[0] for c in td.api.job_status.call_args_list}
+    assert polled == {"11", "13", "15", "17", "19", "99999"}
+    # details of listed jobs are taken from the list
+    jobs = {job.job_id: job for job in done}
+    assert jobs["12"].type == "presto"
+    assert jobs["12"].result_size == 10
+    assert len(done) == len(ids)
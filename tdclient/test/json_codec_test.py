@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+import json
+import tracemalloc
+from unittest import mock
+
+import pytest
+
+from tdclient import api, json_codec
+from tdclient.test.test_helper import *
+
+
+def setup_function(function):
+    unset_environ()
+
+
+def test_get_codec():
+    assert type(json_codec.get_codec("json")) is json_codec.JSONCodec
+    codec = json_codec.JSONCodec()
+    assert json_codec.get_codec(codec) is codec
+    expected = "json" if json_codec.orjson is None else "orjson"
+    assert json_codec.get_codec().name == expected
+    with pytest.raises(ValueError):
+        json_codec.get_codec("simdjson")
+
+
+@pytest.mark.skipif(json_codec.orjson is not None, reason="orjson is installed")
+def test_orjson_missing():
+    with pytest.raises(RuntimeError):
+        json_codec.get_codec("orjson")
+
+
+@pytest.mark.skipif(json_codec.orjson is None, reason="orjson is not installed")
+def test_orjson_falls_back_to_json():
+    codec = json_codec.get_codec("orjson")
+    assert codec.loads(b'{"a": [1, "\xe3\x81\x82"]}') == {"a": [1, "あ"]}
+    assert codec.loads(b"[18446744073709551616, NaN]")[0] == 2**64
+    assert json.loads(codec.dumps({"a": 2**64})) == {"a": 2**64}
+    with pytest.raises(ValueError):
+        codec.loads(b"{")
+
+
+def test_loads_bytes():
+    codec = json_codec.JSONCodec()
+    assert codec.loads('{"a": "あ"}'.encode()) == {"a": "あ"}
+    assert codec.dumps({"a": "あ"}) == json.dumps({"a": "あ"}).encode()
+
+
+def test_iter_lines():
+    chunks = [b'{"a": 1}\n{"a"', b': "x\xe2\x80\xa8y"}\n\n', b'{"a": 3}']
+    lines = list(json_codec.iter_lines(chunks))
+    assert lines == [b'{"a": 1}', b'{"a": "x\xe2\x80\xa8y"}', b'{"a": 3}']
+    # U+2028 is a line separator for str.splitlines(), but not for JSON lines
+    assert json.loads(lines[1]) == {"a": "x y"}
+    assert list(json_codec.iter_lines([b"", b"\n"])) == []
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_array_parser(size):
+    items = [{"a": 1, "b": 'x"]}'}, 12345, -1.5e3, True, None, [], "あ"]
+    doc = {"count": 7, "skipped": [1, {"c": "]"}], "jobs": items, "after": 1}
+    body = json.dumps(doc).encode("utf-8")
+    chunks = [body[i : i + size] for i in range(0, len(body), size)]
+    assert list(json_codec.iter_array_items(chunks, "jobs")) == items
+    body = json.dumps(items).encode("utf-8")
+    chunks = [body[i : i + size] for i in range(0, len(body), size)]
+    assert list(json_codec.iter_array_items(chunks)) == items
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        (b'{"count": 0}', "Missing key: 'jobs'"),
+        (b'{"jobs": [1, 2', "Truncated JSON document"),
+        (b'{"jobs": [1 2]}', "Expecting ',' or ']'"),
+        (b'{"jobs": {}}', "Expecting '['"),
+        (b"[]", "Expecting '{'"),
+    ],
+)
+def test_array_parser_errors(body, message):
+    with pytest.raises(ValueError) as error:
+        list(json_codec.iter_array_items([body], "jobs"))
+    assert error.value.args == (message,)
+
+
+def test_array_parser_long_item():
+    item = {"query": 'SELECT "a\\", [b], {c}: 1' * 2000, "values": [[1, 2.5]] * 500}
+    body = json.dumps({"jobs": [item, 1.5, item]}).encode("utf-8")
+    chunks = [body[i : i + 16] for i in range(0, len(body), 16)]
+    parser = json_codec.JSONArrayParser("jobs")
+    decoder = json.JSONDecoder()
+    parser._decoder = mock.MagicMock(wraps=decoder)
+    items = [item for chunk in chunks for item in parser.feed(chunk)]
+    items.extend(parser.close())
+    assert items == [item, 1.5, item]
+    # an item is not decoded again on every chunk until it is complete
+    assert parser._decoder.raw_decode.call_count < 20
+
+
+def test_line_buffer_long_line():
+    line = b'{"a": "' + b"x" * 100000 + b'"}'
+    body = line + b"\n" + line
+    chunks = [body[i : i + 16] for i in range(0, len(body), 16)]
+    assert list(json_codec.iter_lines(chunks)) == [line, line]
+
+
+def test_array_parser_memory():
+    item = {"job_id": "12345", "query": "SELECT COUNT(1) FROM nasdaq" * 10}
+    body = json.dumps({"jobs": [item] * 20000}).encode("utf-8")
+    chunks = [body[i : i + 65536] for i in range(0, len(body), 65536)]
+    tracemalloc.start()
+    try:
+        count = sum(1 for _ in json_codec.iter_array_items(chunks, "jobs"))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert count == 20000
+    assert peak < len(body) / 10
+
+
+def test_api_uses_codec():
+    codec = json_codec.JSONCodec()
+    codec.loads = mock.MagicMock(wraps=codec.loads)
+    codec.dumps = mock.MagicMock(wraps=codec.dumps)
+    td = api.API("APIKEY", json_codec=codec)
+    assert td.json_codec is codec
+    td.post = mock.MagicMock(return_value=make_response(200, b'{"job_id": "1"}'))
+    assert td.connector_issue("db", "table", {"config": {}}) == "1"
+    codec.dumps.assert_called_with({"config": {}, "database": "db", "table": "table"})
+    codec.loads.assert_called_with(b'{"job_id": "1"}')
+
+
+def test_json_result_lines():
+    td = api.API("APIKEY")
+    body = '["x y", 1]\n["z", 2]\n'.encode()
+    td.get = mock.MagicMock(return_value=make_response(200, body))
+    assert list(td.job_result_format_each("12345", "json")) == [
+        ["x y", 1],
+        ["z", 2],
+    ]
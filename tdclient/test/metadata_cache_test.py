@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+from tdclient import metadata_cache
+from tdclient.test.test_helper import *
+
+
+def setup_function(function):
+    unset_environ()
+
+
+def test_ttl():
+    now = [0.0]
+    cache = metadata_cache.MetadataCache(ttl=10, clock=lambda: now[0])
+    loads = []
+
+    def load(db_name):
+        loads.append(db_name)
+        return {"t": {"count": len(loads)}}
+
+    assert cache.tables("db", load) == {"t": {"count": 1}}
+    now[0] = 9.9
+    assert cache.tables("db", load) == {"t": {"count": 1}}
+    now[0] = 10.0
+    assert cache.tables("db", load) == {"t": {"count": 2}}
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_listing_loaded_before_invalidation_is_not_stored():
+    cache = metadata_cache.MetadataCache(ttl=10, clock=lambda: 0.0)
+    versions = iter([{"old": {}}, {"new": {}}])
+
+    def load():
+        databases = next(versions)
+        if "old" in databases:
+            # changed by another thread while listing
+            cache.invalidate()
+        return databases
+
+    assert cache.databases(load) == {"old": {}}
+    assert cache.databases(load) == {"new": {}}
+    assert cache.databases(load) == {"new": {}}
+
+
+def test_invalidate_database():
+    cache = metadata_cache.MetadataCache(clock=lambda: 0.0)
+    cache.tables("db1", lambda db: {})
+    cache.tables("db2", lambda db: {})
+    cache.invalidate("db1")
+    assert cache.tables("db1", lambda db: {"t": {}}) == {"t": {}}
+    assert cache.tables("db2", lambda db: {"t": {}}) == {}
@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+
+import io
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from tdclient import api, errors, json_codec, parallel_import
+from tdclient.test.test_helper import *
+
+RECORDS = [
+    {"time": 1000 + i, "name": f"name {i}", "note": "line\nbreak" if i % 7 else ""}
+    for i in range(200)
+]
+
+
+def setup_function(function):
+    unset_environ()
+
+
+def collect(uploaded):
+    """Upload function recording chunks in msgpack.gz"""
+    lock = threading.Lock()
+
+    def upload(index, digest, data):
+        with lock:
+            uploaded.append((index, digest, data))
+        return index
+
+    return upload
+
+
+def records_of(uploaded):
+    return [
+        record
+        for _, _, data in sorted(uploaded, key=lambda part: part[0])
+        for record in msgunpackb(gunzipb(data))
+    ]
+
+
+def test_split_chunks_json():
+    data = jsonb(RECORDS)
+    chunks = list(parallel_import.split_chunks(io.BytesIO(data), "json", 500))
+    assert 1 < len(chunks)
+    assert b"".join(chunks) == data
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+
+
+def test_split_chunks_csv_quoted_newlines():
+    columns = ["time", "name", "note"]
+    data = csvb(RECORDS, columns=columns)
+    chunks = list(parallel_import.split_chunks(io.BytesIO(data), "csv", 300))
+    assert 1 < len(chunks)
+    assert b"".join(chunks) == data
+    # every chunk can be read on its own
+    records = [
+        record
+        for chunk in chunks
+        for record in parallel_import.read_chunk(
+            chunk, "csv", columns=columns, dtypes={"name": "str", "note": "str"}
+        )
+    ]
+    assert records == RECORDS
+
+
+def test_split_chunks_msgpack():
+    data = msgpackb(RECORDS)
+    chunks = list(parallel_import.split_chunks(io.BytesIO(data), "msgpack", 1000))
+    assert 1 < len(chunks)
+    assert b"".join(chunks) == data
+    assert sum(len(msgunpackb(chunk)) for chunk in chunks) == len(RECORDS)
+
+
+def test_split_chunks_truncated_msgpack():
+    data = msgpackb(RECORDS)[:-3]
+    with pytest.raises(ValueError):
+        list(parallel_import.split_chunks(io.BytesIO(data), "msgpack", 1000))
+
+
+def test_pack_chunk_is_deterministic():
+    data = jsonb(RECORDS[:10])
+    digest1, packed1 = parallel_import.pack_chunk(data, "json", "id:0")
+    digest2, packed2 = parallel_import.pack_chunk(data, "json", "id:0")
+    digest3, _ = parallel_import.pack_chunk(data, "json", "id:1")
+    assert (digest1, packed1) == (digest2, packed2)
+    assert digest1 != digest3
+    assert msgunpackb(gunzipb(packed1)) == RECORDS[:10]
+
+
+@pytest.mark.parametrize("fmt", ["json", "json.gz", "msgpack", "msgpack.gz"])
+def test_parallel_import(fmt):
+    data = jsonb(RECORDS) if fmt.startswith("json") else msgpackb(RECORDS)
+    if fmt.endswith(".gz"):
+        data = gzipb(data)
+    uploaded = []
+    results = parallel_import.parallel_import(
+        io.BytesIO(data),
+        fmt,
+        collect(uploaded),
+        chunk_size=1000,
+        num_processes=2,
+        num_threads=3,
+    )
+    assert results == list(range(len(uploaded)))
+    assert 1 < len(uploaded)
+    assert records_of(uploaded) == RECORDS
+    assert len({digest for _, digest, _ in uploaded}) == len(uploaded)
+
+
+def test_parallel_import_csv_with_header():
+    uploaded = []
+    parallel_import.parallel_import(
+        io.BytesIO(dcsvb(RECORDS)),
+        "csv",
+        collect(uploaded),
+        chunk_size=1000,
+        num_processes=2,
+        dtypes={"name": "str", "note": "str"},
+    )
+    assert records_of(uploaded) == RECORDS
+
+
+def test_parallel_import_with_unpicklable_converters():
+    uploaded = []
+    parallel_import.parallel_import(
+        io.BytesIO(dcsvb(RECORDS)),
+        "csv",
+        collect(uploaded),
+        chunk_size=1000,
+        converters={"name": lambda s: s.upper(), "note": lambda s: s},
+    )
+    assert [r["name"] for r in records_of(uploaded)] == [
+        r["name"].upper() for r in RECORDS
+    ]
+
+
+def test_parallel_import_digests_are_stable():
+    digests = []
+    for _ in range(2):
+        uploaded = []
+        parallel_import.parallel_import(
+            io.BytesIO(jsonb(RECORDS)),
+            "json",
+            collect(uploaded),
+            chunk_size=1000,
+            num_processes=0,
+        )
+        digests.append(sorted(uploaded))
+    assert digests[0] == digests[1]
+
+
+def test_parallel_import_retries_upload():
+    calls = []
+
+    def upload(index, digest, data):
+        calls.append(index)
+        if calls.count(index) == 1:
+            # as raised by `API.put` after a connection error
+            raise errors.APIError("Error: None") from ConnectionResetError("reset")
+        return index
+
+    with mock.patch("time.sleep") as t_sleep:
+        results = parallel_import.parallel_import(
+            io.BytesIO(jsonb(RECORDS)), "json", upload, chunk_size=4000, num_processes=0
+        )
+    assert results == list(range(len(results)))
+    assert len(calls) == 2 * len(results)
+    assert all(c.args[0] == 1 for c in t_sleep.call_args_list)
+
+
+def test_parallel_import_does_not_retry_client_errors():
+    calls = []
+
+    def upload(index, digest, data):
+        calls.append(index)
+        raise errors.APIError("422: invalid part", status=422)
+
+    with mock.patch("time.sleep") as t_sleep:
+        with pytest.raises(errors.APIError):
+            parallel_import.parallel_import(
+                io.BytesIO(jsonb(RECORDS)),
+                "json",
+                upload,
+                chunk_size=4000,
+                num_processes=0,
+                num_threads=1,
+            )
+    assert len(calls) == 1
+    assert not t_sleep.called
+
+
+def test_parallel_import_stops_on_error():
+    def upload(index, digest, data):
+        if index == 1:
+            raise errors.ForbiddenError("denied")
+        return index
+
+    with pytest.raises(errors.ForbiddenError):
+        parallel_import.parallel_import(
+            io.BytesIO(jsonb(RECORDS)),
+            "json",
+            upload,
+            chunk_size=100,
+            num_processes=0,
+            num_threads=1,
+        )
+
+
+def test_parallel_import_progress():
+    reports = []
+    data = jsonb(RECORDS)
+    parallel_import.parallel_import(
+        io.BytesIO(data),
+        "json",
+        lambda index, digest, data: time.sleep(0.001),
+        chunk_size=1000,
+        num_processes=0,
+        progress=lambda p: reports.append((p.parts_done, p.bytes_done, p.throughput)),
+    )
+    assert [parts for parts, _, _ in reports] == list(range(1, len(reports) + 1))
+    assert reports[-1][1] == len(data)
+    assert 0 < reports[-1][2]
+
+
+def test_import_file_in_chunks():
+    td = api.API("APIKEY")
+    td.import_data = mock.MagicMock(return_value=1.5)
+    elapsed = td.import_file(
+        "db",
+        "table",
+        "json",
+        io.BytesIO(jsonb(RECORDS)),
+        unique_id="batch",
+        chunk_size=4000,
+        num_processes=0,
+    )
+    calls = td.import_data.call_args_list
+    assert 1 < len(calls)
+    assert elapsed == 1.5 * len(calls)
+    for c in calls:
+        assert c.args[:3] == ("db", "table", "msgpack.gz")
+        assert len(c.args[3]) == c.args[4]
+        assert len(c.kwargs["unique_id"]) == 32
+
+
+def test_bulk_import_upload_file_in_chunks():
+    td = api.API("APIKEY")
+    td.bulk_import_upload_part = mock.MagicMock()
+    td.bulk_import_upload_file(
+        "name",
+        "part",
+        "json",
+        io.BytesIO(jsonb(RECORDS)),
+        chunk_size=4000,
+        num_processes=0,
+    )
+    calls = td.bulk_import_upload_part.call_args_list
+    assert sorted(c.args[1] for c in calls) == [f"part_{i}" for i in range(len(calls))]
+    assert [
+        record
+        for c in sorted(calls, key=lambda c: int(c.args[1][5:]))
+        for record in msgunpackb(gunzipb(c.args[2]))
+    ] == RECORDS
+
+
+def test_parallel_import_csv_compiled():
+    uploaded = []
+    parallel_import.parallel_import(
+        io.BytesIO(dcsvb(RECORDS)),
+        "csv",
+        collect(uploaded),
+        chunk_size=1000,
+        num_processes=0,
+        compiled=True,
+    )
+    assert records_of(uploaded) == [{**r, "note": r["note"] or None} for r in RECORDS]
+
+
+def test_parallel_import_csv_compiled_infers_types_once():
+    # "code" looks like a string in the first chunk and like an int later
+    lines = ["time,code"] + [f"{1000 + i},{'x' if i < 20 else i}" for i in range(200)]
+    uploaded = []
+    parallel_import.parallel_import(
+        io.BytesIO("\n".join(lines).encode() + b"\n"),
+        "csv",
+        collect(uploaded),
+        chunk_size=100,
+        num_processes=0,
+        compiled=True,
+        sample_size=10,
+    )
+    assert 2 < len(uploaded)
+    records = records_of(uploaded)
+    assert len(records) == 200
+    assert all(isinstance(r["code"], str) for r in records)
+    assert all(isinstance(r["time"], int) for r in records)
+
+
+def test_parallel_import_json_uses_codec():
+    class Codec(json_codec.JSONCodec):
+        def __init__(self):
+            self.calls = 0
+
+        def loads(self, data):
+            self.calls += 1
+            return super().loads(data)
+
+    codec = Codec()
+    uploaded = []
+    parallel_import.parallel_import(
+        io.BytesIO(jsonb(RECORDS)),
+        "json",
+        collect(uploaded),
+        chunk_size=4000,
+        num_processes=0,
+        json_codec=codec,
+    )
+    assert records_of(uploaded) == RECORDS
+    assert codec.calls == len(RECORDS)
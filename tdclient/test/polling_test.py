@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+
+import itertools
+from unittest import mock
+
+import pytest
+
+from tdclient import errors, polling, retry
+from tdclient.test.test_helper import *
+
+
+def setup_function(function):
+    unset_environ()
+
+
+def test_backoff_intervals():
+    backoff = polling.Backoff(initial=0.5, maximum=2.0, multiplier=2)
+    assert list(itertools.islice(backoff.intervals(), 5)) == [0.5, 1.0, 2.0, 2.0, 2.0]
+
+
+def test_backoff_jitter():
+    backoff = polling.Backoff(initial=1.0, maximum=1.0, jitter=0.2)
+    for interval in itertools.islice(backoff.intervals(), 100):
+        assert 0.8 <= interval <= 1.2
+
+
+def test_poll_with_backoff():
+    done = mock.MagicMock(side_effect=[False, False, False, True])
+    callback = mock.MagicMock()
+    with mock.patch("time.sleep") as t_sleep:
+        polling.poll(done, callback=callback)
+    assert [c.args[0] for c in t_sleep.call_args_list] == [0.5, 0.75, 1.125]
+    assert callback.call_count == 3
+
+
+def test_poll_with_fixed_interval():
+    done = mock.MagicMock(side_effect=[False, False, True])
+    with mock.patch("time.sleep") as t_sleep:
+        polling.poll(done, wait_interval=5)
+    assert [c.args[0] for c in t_sleep.call_args_list] == [5, 5]
+
+
+def test_poll_does_not_recurse():
+    done = mock.MagicMock(side_effect=[False] * 5000 + [True])
+    with mock.patch("time.sleep"):
+        polling.poll(done, wait_interval=1)
+    assert done.call_count == 5001
+
+
+class FakeClock(retry.Clock):
+    def __init__(self, times):
+        self.times = iter(times)
+        self.sleeps = []
+
+    def monotonic(self):
+        return next(self.times)
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+def test_poll_deadline():
+    done = mock.MagicMock(return_value=False)
+    clock = FakeClock([100.0, 108.0, 110.0])
+    with pytest.raises(errors.WaitTimeoutError):
+        polling.poll(done, timeout=10, wait_interval=5, clock=clock)
+    # the sleep is shortened so as not to pass the deadline
+    assert clock.sleeps == [2.0]
+
+
+def test_wait_timeout_error_is_compatible():
+    error = errors.WaitTimeoutError("Timed out")
+    assert isinstance(error, TimeoutError)
+    assert isinstance(error, RuntimeError)
+
+
+def test_poll_propagates_error():
+    done = mock.MagicMock(side_effect=ValueError("failed"))
+    with pytest.raises(ValueError):
+        polling.poll(done)
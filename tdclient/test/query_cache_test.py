@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tdclient import api, async_api, client, connection, errors
+from tdclient.fake_server import FakeServer
+from tdclient.query_cache import (
+    LocalBackend,
+    QueryCache,
+    SQLiteBackend,
+    normalize_query,
+    query_key,
+)
+from tdclient.test.test_helper import *
+
+ROWS = [[1, "a"], [2, "b"]]
+SCHEMA = [["id", "bigint"], ["name", "varchar"]]
+
+
+def setup_function(function):
+    unset_environ()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def issued(server):
+    return [path for _, path in server.requests if path.startswith("/v3/job/issue/")]
+
+
+def test_normalize_query():
+    assert normalize_query("  SELECT  *\n\tFROM t ;\n") == "SELECT * FROM t"
+    assert normalize_query("SELECT 'a  b', \"c  d\", `e  f`") == (
+        "SELECT 'a  b', \"c  d\", `e  f`"
+    )
+    assert normalize_query("SELECT 'it''s  x'") == "SELECT 'it''s  x'"
+    assert normalize_query("SELECT 1 -- a  comment\nFROM t") == (
+        "SELECT 1 -- a  comment\nFROM t"
+    )
+    assert normalize_query("SELECT /* a  b */ 1") == "SELECT /* a  b */ 1"
+    assert normalize_query("select 1") != normalize_query("SELECT 1")
+
+
+def test_query_key():
+    key = query_key("account", "SELECT 1", "presto", "db", {})
+    assert key == query_key("account", " SELECT   1;", "presto", "db", {})
+    assert key == query_key(
+        "account", "SELECT 1", "presto", "db", {"priority": 1, "retry_limit": 3}
+    )
+    assert key != query_key("other", "SELECT 1", "presto", "db", {})
+    assert key != query_key("account", "SELECT 1", "hive", "db", {})
+    assert key != query_key("account", "SELECT 1", "presto", "other", {})
+    assert key != query_key(
+        "account", "SELECT 1", "presto", "db", {"engine_version": "stable"}
+    )
+    assert "account" not in key
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "local":
+        return LocalBackend()
+    return SQLiteBackend(str(tmp_path / "queries.db"))
+
+
+def test_reuse_within_ttl(backend):
+    clock = FakeClock()
+    cache = QueryCache(ttl=60, backend=backend, clock=clock)
+    job_ids = iter(["1", "2"])
+    assert cache.get_or_issue("key", lambda: next(job_ids)) == "1"
+    clock.now += 59
+    assert cache.get_or_issue("key", lambda: next(job_ids)) == "1"
+    clock.now += 1
+    assert cache.get_or_issue("key", lambda: next(job_ids)) == "2"
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.clear()
+    with pytest.raises(StopIteration):
+        cache.get_or_issue("key", lambda: next(job_ids))
+
+
+def test_unusable_jobs_are_issued_again(backend):
+    cache = QueryCache(backend=backend)
+    assert cache.get_or_issue("key", lambda: "1") == "1"
+    assert cache.get_or_issue("key", lambda: "2", lambda job_id: False) == "2"
+    assert cache.get_or_issue("key", lambda: "3") == "2"
+
+
+def test_failed_issue_releases_the_claim(backend):
+    cache = QueryCache(backend=backend)
+
+    def fail():
+        raise errors.APIError("Query failed")
+
+    with pytest.raises(errors.APIError):
+        cache.get_or_issue("key", fail)
+    assert cache.get_or_issue("key", lambda: "1") == "1"
+
+
+def test_single_flight(backend):
+    cache = QueryCache(backend=backend)
+    calls = []
+
+    def issue():
+        calls.append(threading.get_ident())
+        time.sleep(0.1)
+        return "1"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_issue("k", issue)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["1"] * 8
+    assert len(calls) == 1
+
+
+def test_expired_claims_are_taken_over(backend):
+    clock = FakeClock()
+    cache = QueryCache(backend=backend, lease=10, clock=clock)
+    backend.claim("key", clock.now, cache.ttl, cache.lease)
+    clock.now += 10
+    assert cache.get_or_issue("key", lambda: "1") == "1"
+
+
+def test_sqlite_backend_is_shared(tmp_path):
+    path = str(tmp_path / "queries.db")
+    first = QueryCache(backend=SQLiteBackend(path))
+    second = QueryCache(backend=SQLiteBackend(path))
+    assert first.get_or_issue("key", lambda: "1") == "1"
+    assert second.get_or_issue("key", lambda: "2") == "1"
+
+
+@pytest.fixture
+def server():
+    with FakeServer() as server:
+        server.add_database("db")
+        server.add_result("SELECT 1", ROWS, SCHEMA)
+        yield server
+
+
+def test_api_query_reuses_jobs(server):
+    td = api.API("APIKEY", endpoint=server.endpoint, query_cache=QueryCache())
+    job_id = td.query("SELECT 1", type="presto", db="db")
+    assert td.query("  SELECT 1;", type="presto", db="db", priority=1) == job_id
+    assert td.query("SELECT 1", type="hive", db="db") != job_id
+    assert len(issued(server)) == 2
+    assert td.query_cache is not None
+    assert td.query_cache.hits == 1
+
+    # exports are always issued
+    td.query("SELECT 1", type="presto", db="db", result_url="td://@/db/t")
+    td.query("SELECT 1", type="presto", db="db", result_url="td://@/db/t")
+    assert len(issued(server)) == 4
+
+
+def test_api_query_does_not_reuse_failed_jobs(server):
+    td = api.API("APIKEY", endpoint=server.endpoint, query_cache=QueryCache())
+    job_id = td.query("SELECT 1", type="presto", db="db")
+    server.jobs[job_id].status = "error"
+    assert td.query("SELECT 1", type="presto", db="db") != job_id
+    assert len(issued(server)) == 2
+
+
+def test_api_query_is_not_shared_between_accounts(server):
+    cache = QueryCache()
+    first = api.API("APIKEY1", endpoint=server.endpoint, query_cache=cache)
+    second = api.API("APIKEY2", endpoint=server.endpoint, query_cache=cache)
+    assert first.query("SELECT 1", type="presto", db="db") != second.query(
+        "SELECT 1", type="presto", db="db"
+    )
+
+
+def test_client_and_cursor_reuse_jobs(server):
+    cache = QueryCache()
+    td = client.Client("APIKEY", endpoint=server.endpoint, query_cache=cache)
+    job = td.query("db", "SELECT 1", type="presto")
+    assert td.query("db", "SELECT 1", type="presto").job_id == job.job_id
+
+    conn = connection.Connection(
+        apikey="APIKEY",
+        endpoint=server.endpoint,
+        type="presto",
+        db="db",
+        wait_interval=0.01,
+        query_cache=cache,
+    )
+    cursor = conn.cursor()
+    assert cursor.execute("SELECT 1") == job.job_id
+    assert cursor.fetchall() == ROWS
+    assert len(issued(server)) == 1
+
+
+def test_async_api_query_reuses_jobs(server):
+    async def scenario():
+        async with async_api.AsyncAPI(
+            "APIKEY", endpoint=server.endpoint, query_cache=QueryCache()
+        ) as td:
+            return await asyncio.gather(
+                *[td.query("SELECT 1", type="presto", db="db") for _ in range(4)]
+            )
+
+    assert len(set(asyncio.run(scenario()))) == 1
+    assert len(issued(server)) == 1
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+import gc
+import json
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from tdclient import api, rate_limit
+from tdclient.test.test_helper import *
+
+
+def setup_function(function):
+    unset_environ()
+
+
+@pytest.mark.parametrize(
+    "method, url, family",
+    [
+        ("POST", "https://api.example.com/v3/job/issue/presto/db", "job_issue"),
+        ("GET", "https://api.example.com/v3/job/status/12345", "job_status"),
+        ("GET", "/v3/job/show/12345", "job_status"),
+        ("GET", "/v3/job/result/12345?format=msgpack", "result"),
+        ("PUT", "/v3/table/import/db/table/msgpack.gz", "import"),
+        ("PUT", "/v3/bulk_import/upload_part/name/part", "import"),
+        ("GET", "/v3/job/list?from=0", "list"),
+        ("GET", "/v3/table/list/db", "list"),
+        ("POST", "/v3/table/create/db/table/log", "other"),
+    ],
+)
+def test_route_family(method, url, family):
+    assert rate_limit.route_family(method, url) == family
+
+
+def test_route_family_with_endpoint_path():
+    base = "https://proxy.example.com/td/"
+    url = "https://proxy.example.com/td///v3/job/status/12345"
+    assert rate_limit.route_family("GET", url, base) == "job_status"
+    assert rate_limit.route_family("GET", url) == "other"
+    url = "https://api.example.com/v3/job/issue/presto/db"
+    assert rate_limit.route_family("POST", url, "https://api.example.com/") == (
+        "job_issue"
+    )
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        rate_limit.RouteLimit(rate=0)
+    with pytest.raises(ValueError):
+        rate_limit.RouteLimit(burst=0)
+    with pytest.raises(ValueError):
+        rate_limit.RouteLimit(max_in_flight=0)
+
+
+def test_rate():
+    limiter = rate_limit.RateLimiter(
+        {"job_status": rate_limit.RouteLimit(rate=100, burst=2)}
+    )
+    started_at = time.monotonic()
+    for _ in range(7):
+        with limiter.limit("job_status"):
+            pass
+    # 2 requests from the burst, then 5 at 100 per second
+    assert 0.045 <= time.monotonic() - started_at
+    # other families are not limited
+    started_at = time.monotonic()
+    for _ in range(100):
+        with limiter.limit("result"):
+            pass
+    assert time.monotonic() - started_at < 0.045
+
+
+def test_max_in_flight():
+    limiter = rate_limit.RateLimiter({"result": rate_limit.RouteLimit(max_in_flight=2)})
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def request():
+        with limiter.limit("result"):
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.005)
+            with lock:
+                in_flight.pop()
+
+    threads = [threading.Thread(target=request) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(peak) == 10
+    assert max(peak) == 2
+
+
+def test_fifo_order():
+    limiter = rate_limit.RateLimiter(
+        {"job_issue": rate_limit.RouteLimit(max_in_flight=1)}
+    )
+    order = []
+    threads = []
+
+    def request(i):
+        with limiter.limit("job_issue"):
+            order.append(i)
+
+    with limiter.limit("job_issue"):
+        for i in range(5):
+            t = threading.Thread(target=request, args=(i,))
+            t.start()
+            threads.append(t)
+            # wait until the thread has taken its ticket
+            while limiter._next_ticket["job_issue"] < i + 2:
+                time.sleep(0.001)
+    for t in threads:
+        t.join()
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_interrupted_waiter_does_not_block_others():
+    limiter = rate_limit.RateLimiter({"list": rate_limit.RouteLimit(max_in_flight=1)})
+    with limiter.limit("list"):
+        with (
+            mock.patch.object(limiter._cond, "wait", side_effect=KeyboardInterrupt),
+            pytest.raises(KeyboardInterrupt),
+        ):
+            with limiter.limit("list"):
+                pass
+    with limiter.limit("list"):
+        pass
+
+
+def test_file_lock_backend(tmp_path):
+    path = str(tmp_path / "limits.json")
+    limits = {"import": rate_limit.RouteLimit(max_in_flight=1)}
+    first = rate_limit.RateLimiter(limits, rate_limit.FileLockBackend(path))
+    second = rate_limit.RateLimiter(limits, rate_limit.FileLockBackend(path))
+    entered = threading.Event()
+
+    def request():
+        with second.limit("import"):
+            entered.set()
+
+    with first.limit("import"):
+        t = threading.Thread(target=request)
+        t.start()
+        assert not entered.wait(0.2)
+    assert entered.wait(5)
+    t.join()
+    with open(path) as f:
+        assert json.load(f)["import"]["in_flight"] == {}
+
+
+def test_file_lock_backend_ignores_dead_processes(tmp_path):
+    path = tmp_path / "limits.json"
+    path.write_text(json.dumps({"import": {"in_flight": {"999999999": 1}}}))
+    limiter = rate_limit.RateLimiter(
+        {"import": rate_limit.RouteLimit(max_in_flight=1)},
+        rate_limit.FileLockBackend(str(path)),
+    )
+    with limiter.limit("import"):
+        pass
+
+
+def test_api_limits_requests():
+    limiter = rate_limit.RateLimiter(
+        {"job_status": rate_limit.RouteLimit(max_in_flight=1)}
+    )
+    td = api.API("APIKEY", rate_limiter=limiter)
+    families = []
+    acquire = limiter.acquire
+
+    def spy(family):
+        families.append(family)
+        return acquire(family)
+
+    limiter.acquire = spy
+    td.http.request = mock.MagicMock(
+        return_value=make_raw_response(200, b'{"status": "running"}')
+    )
+    assert td.job_status("12345") == "running"
+    assert families == ["job_status"]
+    assert limiter.backend._in_flight == {"job_status": 0}
+
+
+def test_api_holds_slots_until_responses_are_closed():
+    limiter = rate_limit.RateLimiter({"result": rate_limit.RouteLimit(max_in_flight=1)})
+    td = api.API(
+        "APIKEY", endpoint="https://proxy.example.com/td/", rate_limiter=limiter
+    )
+    td.http.request = mock.MagicMock(
+        side_effect=lambda *args, **kwargs: make_raw_response(200, b"rows")
+    )
+    with td.get("/v3/job/result/12345") as res:
+        assert limiter.backend._in_flight == {"result": 1}
+        assert res.read() == b"rows"
+        assert limiter.backend._in_flight == {"result": 1}
+    assert limiter.backend._in_flight == {"result": 0}
+
+    # a response dropped without being closed frees its slot too
+    res = td.send_request("GET", "https://proxy.example.com/td/v3/job/result/1")
+    assert limiter.backend._in_flight == {"result": 1}
+    del res
+    gc.collect()
+    assert limiter.backend._in_flight == {"result": 0}
+
+
+def test_api_frees_slots_of_failed_requests():
+    limiter = rate_limit.RateLimiter(
+        {"job_issue": rate_limit.RouteLimit(max_in_flight=1)}
+    )
+    td = api.API("APIKEY", rate_limiter=limiter)
+    td.http.request = mock.MagicMock(
+        side_effect=lambda *args, **kwargs: make_raw_response(500, b"error")
+    )
+    with pytest.raises(api.APIError):
+        with td.post("/v3/job/issue/presto/db", {}):
+            pass
+    assert limiter.backend._in_flight == {"job_issue": 0}
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+
+import asyncio
+import gzip
+import os
+import threading
+import time
+
+import msgpack
+import pytest
+
+from tdclient import api, async_api, client, errors
+from tdclient.fake_server import FakeServer
+from tdclient.result_cache import STALE_AGE, ResultCache
+from tdclient.test.test_helper import *
+
+ROWS = [[i, f"user{i}", i * 0.5] for i in range(1000)]
+SCHEMA = [["id", "bigint"], ["name", "varchar"], ["value", "double"]]
+
+
+def setup_function(function):
+    unset_environ()
+
+
+def gzipped(rows):
+    return gzip.compress(b"".join(msgpack.packb(row) for row in rows))
+
+
+def writer(data, calls=None):
+    def download(path):
+        if calls is not None:
+            calls.append(path)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    return download
+
+
+def result_requests(server):
+    return [path for _, path in server.requests if path.startswith("/v3/job/result/")]
+
+
+def test_open_downloads_once(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    data = gzipped(ROWS)
+    calls = []
+    with cache.open("12345", len(data), writer(data, calls)) as f:
+        assert f.read() == data
+    with cache.open("12345", len(data), writer(data, calls)) as f:
+        assert f.read() == data
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert os.path.exists(cache.path("12345"))
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_broken_entries_are_downloaded_again(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    data = gzipped(ROWS)
+    with open(cache.path("12345"), "wb") as f:
+        f.write(data[:-10])
+    calls = []
+    with cache.open("12345", len(data), writer(data, calls)) as f:
+        assert f.read() == data
+    assert len(calls) == 1
+
+
+def test_verify_gzip(tmp_path):
+    cache = ResultCache(str(tmp_path), verify="gzip")
+    data = gzipped(ROWS)
+    with open(cache.path("12345"), "wb") as f:
+        f.write(data[:100] + b"\x00" * (len(data) - 100))
+    assert cache.get("12345", len(data)) is None
+    assert not os.path.exists(cache.path("12345"))
+    with cache.open("12345", len(data), writer(data)) as f:
+        pass
+    with cache.get("12345", len(data)) as f:
+        assert f.read() == data
+    with pytest.raises(ValueError):
+        ResultCache(str(tmp_path), verify="crc")
+
+
+def test_failed_downloads_are_not_cached(tmp_path):
+    cache = ResultCache(str(tmp_path))
+
+    def fail(path):
+        with open(path, "wb") as f:
+            f.write(b"partial")
+        raise errors.DownloadError("broken")
+
+    with pytest.raises(errors.DownloadError):
+        cache.open("12345", 100, fail)
+    with pytest.raises(errors.DownloadError):
+        cache.open("12345", 100, writer(b"short"))
+    assert [name for name in os.listdir(tmp_path) if not name.startswith(".lock")] == []
+
+
+def test_invalid_job_id(tmp_path):
+    with pytest.raises(ValueError):
+        ResultCache(str(tmp_path)).path("../12345")
+
+
+def test_evict_least_recently_read(tmp_path):
+    data = gzipped(ROWS)
+    cache = ResultCache(str(tmp_path), max_size=2 * len(data))
+    for i, job_id in enumerate(["1", "2"]):
+        cache.open(job_id, len(data), writer(data)).close()
+        os.utime(cache.path(job_id), (1000 + i, 1000 + i))
+    cache.get("1", len(data)).close()
+    cache.open("3", len(data), writer(data)).close()
+    assert cache.get("2", len(data)) is None
+    assert cache.get("1", len(data)) is not None
+    assert cache.size() == 2 * len(data)
+    cache.clear()
+    assert cache.size() == 0
+
+
+def test_evict_stale_temporary_files(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    stale = os.path.join(str(tmp_path), "1.msgpack.gz.1.1.tmp")
+    fresh = os.path.join(str(tmp_path), "2.msgpack.gz.1.1.tmp")
+    for path in [stale, fresh]:
+        with open(path, "wb") as f:
+            f.write(b"x")
+    old = time.time() - STALE_AGE - 1
+    os.utime(stale, (old, old))
+    cache.evict()
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
+
+
+def test_concurrent_readers_share_a_download(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    data = gzipped(ROWS)
+    calls = []
+
+    def slow_download(path):
+        calls.append(path)
+        time.sleep(0.1)
+        writer(data)(path)
+
+    results = []
+
+    def read():
+        with cache.open("12345", len(data), slow_download) as f:
+            results.append(f.read())
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [data] * 4
+    assert len(calls) == 1
+
+
+def test_downloads_of_different_jobs_do_not_wait(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    data = gzipped(ROWS)
+    started = threading.Barrier(2, timeout=5)
+
+    def download(path):
+        # fails with BrokenBarrierError unless both downloads run at once
+        started.wait()
+        writer(data)(path)
+
+    threads = [
+        threading.Thread(
+            target=lambda job_id=job_id: cache.open(job_id, len(data), download).close()
+        )
+        for job_id in ["1", "2"]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not started.broken
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert sorted(os.listdir(tmp_path)) == ["1.msgpack.gz", "2.msgpack.gz"]
+
+
+@pytest.fixture
+def server():
+    with FakeServer() as server:
+        yield server
+
+
+def test_api_reads_results_from_cache(server, tmp_path):
+    job_id = server.add_job(ROWS, SCHEMA)
+    td = api.API("APIKEY", endpoint=server.endpoint, result_cache=str(tmp_path))
+    assert isinstance(td.result_cache, ResultCache)
+    assert td.job_result(job_id) == ROWS
+    assert len(result_requests(server)) == 1
+    assert list(td.job_result_each(job_id)) == ROWS
+    assert list(td.job_result_format_each(job_id, "msgpack", store_tmpfile=True)) == (
+        ROWS
+    )
+    batches = list(td.job_result_columns(job_id))
+    assert list(batches[0]["id"]) == [row[0] for row in ROWS]
+    path = str(tmp_path / "out.msgpack.gz")
+    assert td.download_job_result(job_id, path)
+    with open(path, "rb") as f:
+        assert f.read() == server.jobs[job_id].result("msgpack.gz")
+    assert len(result_requests(server)) == 1
+    assert td.result_cache.hits == 4
+
+    # another client sharing the directory
+    other = api.API("APIKEY", endpoint=server.endpoint, result_cache=str(tmp_path))
+    assert other.job_result(job_id) == ROWS
+    assert len(result_requests(server)) == 1
+
+
+def test_cache_is_bypassed_for_json_and_unfinished_jobs(server, tmp_path):
+    job_id = server.add_job(ROWS, SCHEMA)
+    failed_job_id = server.add_job(ROWS, SCHEMA, status="error")
+    td = api.API("APIKEY", endpoint=server.endpoint, result_cache=str(tmp_path))
+    assert td.job_result_format(job_id, "json") == ROWS
+    with pytest.raises(errors.APIError):
+        td.job_result(failed_job_id)
+    assert len(result_requests(server)) == 2
+    assert td.result_cache.size() == 0
+
+
+def test_client_job_result(server, tmp_path):
+    server.add_database("db")
+    server.add_result("SELECT 1", ROWS, SCHEMA)
+    td = client.Client(
+        "APIKEY", endpoint=server.endpoint, result_cache=ResultCache(str(tmp_path))
+    )
+    job = td.query("db", "SELECT 1", type="presto")
+    job.wait(wait_interval=0.01)
+    assert list(job.result()) == ROWS
+    assert td.job_result(job.job_id) == ROWS
+    assert len(result_requests(server)) == 1
+
+
+def test_async_api_reads_results_from_cache(server, tmp_path):
+    job_id = server.add_job(ROWS, SCHEMA)
+
+    async def scenario():
+        async with async_api.AsyncAPI(
+            "APIKEY", endpoint=server.endpoint, result_cache=str(tmp_path)
+        ) as td:
+            return [await td.job_result(job_id), await td.job_result(job_id)]
+
+    assert asyncio.run(scenario()) == [ROWS, ROWS]
+    assert len(result_requests(server)) == 1
@@ -0,0 +1,368 @@
+#!/usr/bin/env python
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+
+import pytest
+import urllib3
+
+from tdclient import errors, result_download, retry
+from tdclient.test.test_helper import *
+
+
+def setup_function(function):
+    unset_environ()
+
+
+def make_fetch(data, requested, block_size=7):
+    def fetch(start, end):
+        requested.append((start, end))
+        body = data[start : end + 1]
+        for i in range(0, len(body), block_size):
+            yield body[i : i + block_size]
+
+    return fetch
+
+
+def test_ranges():
+    download = result_download.RangeDownload(lambda s, e: [], 25, chunk_size=10)
+    assert download.ranges == [(0, 9), (10, 19), (20, 24)]
+
+
+def test_download_to_file():
+    data = os.urandom(1000)
+    requested = []
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "result")
+        with result_download.RangeDownload(
+            make_fetch(data, requested), len(data), path=path, chunk_size=64
+        ) as download:
+            download.wait()
+            with open(path, "rb") as f:
+                assert f.read() == data
+            assert b"".join(download.chunks()) == data
+        assert sorted(requested) == download.ranges
+        assert os.listdir(tempdir) == ["result"]
+
+
+def test_download_in_memory_is_bounded():
+    data = os.urandom(1000)
+    requested = []
+    with result_download.RangeDownload(
+        make_fetch(data, requested),
+        len(data),
+        num_threads=4,
+        chunk_size=100,
+        memory_budget=200,
+    ) as download:
+        chunks = download.chunks()
+        assert next(chunks) == data[:100]
+        # only the ranges within the budget ahead of the reader are fetched
+        download._cond.acquire()
+        try:
+            while len(requested) < 3:
+                download._cond.wait()
+        finally:
+            download._cond.release()
+        assert len(requested) == 3
+        assert b"".join(chunks) == data[100:]
+    assert len(requested) == 10
+
+
+def test_download_yields_leading_range_before_completion():
+    data = os.urandom(300)
+    release = threading.Event()
+
+    def fetch(start, end):
+        if start != 0:
+            assert release.wait(5)
+        yield data[start : end + 1]
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "result")
+        with result_download.RangeDownload(
+            fetch, len(data), path=path, num_threads=3, chunk_size=100
+        ) as download:
+            chunks = download.chunks()
+            assert next(chunks) == data[:100]
+            release.set()
+            assert b"".join(chunks) == data[100:]
+
+
+def test_download_error():
+    def fetch(start, end):
+        if start == 100:
+            raise ValueError("broken")
+        yield b"x" * (end - start + 1)
+
+    with result_download.RangeDownload(fetch, 300, chunk_size=100) as download:
+        with pytest.raises(ValueError):
+            b"".join(download.chunks())
+
+
+def test_download_incomplete_range(monkeypatch):
+    def fetch(start, end):
+        yield b"x"
+
+    monkeypatch.setattr("time.sleep", lambda delay: None)
+    with result_download.RangeDownload(fetch, 300, chunk_size=100) as download:
+        with pytest.raises(errors.DownloadError):
+            download.wait()
+
+
+def test_gunzip_chunks():
+    data = gzip.compress(b"foo") + gzip.compress(b"bar")
+    chunks = [data[i : i + 5] for i in range(0, len(data), 5)]
+    assert b"".join(result_download.gunzip_chunks(chunks)) == b"foobar"
+
+
+def test_gunzip_chunks_truncated():
+    data = gzip.compress(os.urandom(100))
+    with pytest.raises(EOFError):
+        b"".join(result_download.gunzip_chunks([data[:-10]]))
+
+
+def test_unpack_chunks():
+    rows = [[i, str(i)] for i in range(100)]
+    data = msgpackb(rows)
+    chunks = [data[i : i + 3] for i in range(0, len(data), 3)]
+    assert list(result_download.unpack_chunks(chunks)) == rows
+
+
+class RecordingClock(retry.Clock):
+    def __init__(self):
+        self.sleeps = []
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+def test_download_retries_range():
+    data = os.urandom(300)
+    failures = [
+        ConnectionResetError("reset"),
+        urllib3.exceptions.ProtocolError("broken"),
+    ]
+    requested = []
+
+    def fetch(start, end):
+        requested.append(start)
+        if start == 100 and failures:
+            yield data[start : start + 10]
+            raise failures.pop(0)
+        yield data[start : end + 1]
+
+    clock = RecordingClock()
+    policy = retry.RetryPolicy(initial_delay=1, clock=clock)
+    with result_download.RangeDownload(
+        fetch, 300, chunk_size=100, retry_policy=policy
+    ) as download:
+        assert b"".join(download.chunks()) == data
+    assert clock.sleeps == [1, 2]
+    assert requested.count(100) == 3
+
+
+def test_download_retry_delays_are_jittered(monkeypatch):
+    def fetch(start, end):
+        yield b"x"
+
+    sleeps = []
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    with result_download.RangeDownload(
+        fetch, 100, chunk_size=100, retry_limit=3, retry_delay=1
+    ) as download:
+        with pytest.raises(errors.DownloadError):
+            download.wait()
+    assert len(sleeps) == 3
+    assert all(0 <= delay <= 2**i for i, delay in enumerate(sleeps))
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_download_does_not_retry_api_errors_again(status):
+    requested = []
+
+    def fetch(start, end):
+        requested.append(start)
+        raise errors.APIError(f"{status}: failed", status=status)
+        yield b""
+
+    clock = RecordingClock()
+    policy = retry.RetryPolicy(clock=clock)
+    with result_download.RangeDownload(
+        fetch, 100, chunk_size=100, retry_policy=policy
+    ) as download:
+        with pytest.raises(errors.APIError) as error:
+            download.wait()
+    assert error.value.status == status
+    assert requested == [0]
+    assert clock.sleeps == []
+
+
+def test_download_gives_up_after_retry_limit(monkeypatch):
+    def fetch(start, end):
+        yield b"x"
+
+    monkeypatch.setattr("time.sleep", lambda delay: None)
+    with result_download.RangeDownload(
+        fetch, 300, chunk_size=100, retry_limit=2
+    ) as download:
+        with pytest.raises(errors.DownloadError) as error:
+            download.wait()
+    assert "after 3 attempts" in str(error.value)
+
+
+@pytest.mark.parametrize("status", [400, 422])
+def test_download_does_not_retry_client_errors(monkeypatch, status):
+    requested = []
+
+    def fetch(start, end):
+        requested.append(start)
+        raise errors.APIError(f"{status}: invalid", status=status)
+
+    sleeps = []
+    monkeypatch.setattr("time.sleep", sleeps.append)
+    with result_download.RangeDownload(fetch, 100, chunk_size=100) as download:
+        with pytest.raises(errors.APIError) as error:
+            download.wait()
+    assert error.value.status == status
+    assert requested == [0]
+    assert sleeps == []
+
+
+@pytest.mark.parametrize(
+    "error, retryable",
+    [
+        (errors.APIError("400: bad request", status=400), False),
+        (errors.APIError("409: conflict", status=409), False),
+        (errors.APIError("422: unprocessable", status=422), False),
+        (errors.NotFoundError("no such job", status=404), False),
+        (errors.APIError("429: slow down", status=429), True),
+        (errors.APIError("500: failed", status=500), True),
+        (errors.APIError("503: unavailable", status=503), True),
+        (errors.APIError("Unexpected API response"), False),
+        (errors.DownloadError("incomplete"), True),
+        (ConnectionResetError("reset"), True),
+        (urllib3.exceptions.ProtocolError("broken"), True),
+        (ValueError("bug"), False),
+    ],
+)
+def test_is_retryable(error, retryable):
+    assert result_download.is_retryable(error) is retryable
+
+
+@pytest.mark.parametrize(
+    "error, retryable",
+    [
+        (errors.APIError("500: failed", status=500), False),
+        (errors.APIError("Error: reset"), False),
+        (errors.DownloadError("incomplete"), True),
+        (ConnectionResetError("reset"), True),
+        (EOFError("truncated"), True),
+        (urllib3.exceptions.ProtocolError("broken"), True),
+        (ValueError("bug"), False),
+    ],
+)
+def test_is_transport_error(error, retryable):
+    assert result_download.is_transport_error(error) is retryable
+
+
+def test_is_retryable_wrapped_connection_error():
+    try:
+        try:
+            raise ConnectionResetError("reset")
+        except OSError as e:
+            raise errors.APIError("Error: reset") from e
+    except errors.APIError as error:
+        assert result_download.is_retryable(error)
+
+
+def test_download_does_not_retry_not_found(monkeypatch):
+    requested = []
+
+    def fetch(start, end):
+        requested.append(start)
+        raise errors.NotFoundError("no such job")
+
+    monkeypatch.setattr("time.sleep", lambda delay: None)
+    with result_download.RangeDownload(fetch, 100, chunk_size=100) as download:
+        with pytest.raises(errors.NotFoundError):
+            download.wait()
+    assert requested == [0]
+
+
+def test_download_resumes_from_manifest():
+    data = os.urandom(500)
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "result")
+
+        def failing_fetch(start, end):
+            if start == 300:
+                raise errors.ForbiddenError("denied")
+            yield data[start : end + 1]
+
+        with result_download.RangeDownload(
+            failing_fetch,
+            len(data),
+            path=path,
+            num_threads=1,
+            chunk_size=100,
+            resume_key="1",
+        ) as download:
+            with pytest.raises(errors.ForbiddenError):
+                download.wait()
+        with open(path + ".manifest") as f:
+            assert json.load(f)["completed"] == [0, 1, 2]
+
+        requested = []
+        with result_download.RangeDownload(
+            make_fetch(data, requested),
+            len(data),
+            path=path,
+            chunk_size=100,
+            resume_key="1",
+        ) as download:
+            download.verify()
+        assert sorted(requested) == [(300, 399), (400, 499)]
+        assert not os.path.exists(path + ".manifest")
+        with open(path, "rb") as f:
+            assert f.read() == data
+
+
+def test_download_ignores_manifest_of_another_key():
+    data = os.urandom(200)
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "result")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 200)
+        with open(path + ".manifest", "w") as f:
+            json.dump({"key": "1", "size": 200, "chunk_size": 100, "completed": [0]}, f)
+        requested = []
+        with result_download.RangeDownload(
+            make_fetch(data, requested),
+            len(data),
+            path=path,
+            chunk_size=100,
+            resume_key="2",
+        ) as download:
+            download.verify()
+        assert sorted(requested) == [(0, 99), (100, 199)]
+        with open(path, "rb") as f:
+            assert f.read() == data
+
+
+def test_verify_corrupted_gzip():
+    data = bytearray(gzip.compress(os.urandom(1000)))
+    data[-5] ^= 0xFF
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "result")
+        requested = []
+        with result_download.RangeDownload(
+            make_fetch(bytes(data), requested), len(data), path=path, resume_key="1"
+        ) as download:
+            with pytest.raises(errors.DownloadError) as error:
+                download.verify(result_download.check_gzip)
+        assert "corrupted" in str(error.value)
+        assert not os.path.exists(path + ".manifest")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+
+import email.utils
+import random
+from unittest import mock
+
+import pytest
+
+from tdclient import api, errors, retry
+from tdclient.test.test_helper import *
+
+
+def setup_function(function):
+    unset_environ()
+
+
+class FakeClock(retry.Clock):
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def delays(policy, n, **kwargs):
+    state = policy.start("GET", "https://api.example.com/")
+    return [state.next_delay(**kwargs) for _ in range(n)]
+
+
+def test_exponential_delays():
+    policy = retry.RetryPolicy(clock=FakeClock())
+    assert delays(policy, 4) == [5, 10, 20, 40]
+
+
+def test_max_delay():
+    policy = retry.RetryPolicy(initial_delay=1, max_delay=3, clock=FakeClock())
+    assert delays(policy, 4) == [1, 2, 3, 3]
+
+
+def test_max_cumul_delay():
+    policy = retry.RetryPolicy(max_cumul_delay=30, clock=FakeClock())
+    state = policy.start("GET", "https://api.example.com/")
+    assert [state.next_delay() for _ in range(3)] == [5, 10, 20]
+    with pytest.raises(errors.APIError) as error:
+        state.next_delay()
+    assert error.value.args == (
+        "Retrying stopped after 30 seconds. (cumulative: 35/30)",
+    )
+
+
+def test_full_jitter():
+    policy = retry.RetryPolicy(jitter="full", rand=random.Random(1), clock=FakeClock())
+    for delay, ceiling in zip(delays(policy, 5), [5, 10, 20, 40, 80]):
+        assert 0 <= delay <= ceiling
+    other = retry.RetryPolicy(jitter="full", rand=random.Random(2), clock=FakeClock())
+    assert delays(policy, 5) != delays(other, 5)
+
+
+def test_decorrelated_jitter():
+    policy = retry.RetryPolicy(
+        jitter="decorrelated", max_delay=60, rand=random.Random(1), clock=FakeClock()
+    )
+    previous = 5
+    for delay in delays(policy, 10):
+        assert 5 <= delay <= min(60, previous * 3)
+        previous = delay
+
+
+def test_unknown_jitter():
+    with pytest.raises(ValueError):
+        retry.RetryPolicy(jitter="equal")
+
+
+def test_retry_after_seconds():
+    policy = retry.RetryPolicy(clock=FakeClock())
+    headers = {"Retry-After": "7"}
+    assert delays(policy, 2, status=429, headers=headers) == [7, 7]
+    # only 429 and 503 responses are expected to have it
+    assert delays(policy, 2, status=500, headers=headers) == [5, 10]
+    policy = retry.RetryPolicy(retry_after=False, clock=FakeClock())
+    assert delays(policy, 1, status=503, headers=headers) == [5]
+
+
+def test_retry_after_is_bounded():
+    policy = retry.RetryPolicy(max_delay=60, clock=FakeClock())
+    headers = {"Retry-After": "86400"}
+    assert delays(policy, 2, status=503, headers=headers) == [60, 60]
+
+    policy = retry.RetryPolicy(max_cumul_delay=600, clock=FakeClock())
+    state = policy.start("GET", "https://api.example.com/")
+    with pytest.raises(errors.APIError) as error:
+        state.next_delay(status=429, headers=headers)
+    assert "86400" in error.value.args[0]
+    assert state.cumul_delay == 0
+    assert state.attempt == 0
+
+
+def test_retry_after_uses_remaining_cumul_delay():
+    policy = retry.RetryPolicy(max_cumul_delay=30, clock=FakeClock())
+    state = policy.start("GET", "https://api.example.com/")
+    assert state.next_delay(status=429, headers={"Retry-After": "20"}) == 20
+    assert state.next_delay(status=429, headers={"Retry-After": "10"}) == 10
+    with pytest.raises(errors.APIError):
+        state.next_delay(status=429, headers={"Retry-After": "1"})
+
+
+def test_api_gives_up_on_huge_retry_after():
+    clock = FakeClock()
+    td = api.API(
+        "APIKEY", retry_policy=retry.RetryPolicy(max_cumul_delay=600, clock=clock)
+    )
+    throttled = make_raw_response(429, b"slow down")
+    throttled.headers = {"Retry-After": "86400"}
+    td.http.request = mock.MagicMock(return_value=throttled)
+    with pytest.raises(errors.APIError):
+        with td.get("/foo"):
+            pass
+    assert clock.sleeps == []
+
+
+def test_retry_after_date():
+    clock = FakeClock(now=1700000000.0)
+    date = email.utils.formatdate(1700000030.0, usegmt=True)
+    assert retry.parse_retry_after({"retry-after": date}, clock.time()) == 30
+    assert retry.parse_retry_after({"retry-after": "soon"}, clock.time()) is None
+    assert retry.parse_retry_after({}, clock.time()) is None
+
+
+def test_should_retry():
+    policy = retry.RetryPolicy()
+    assert policy.should_retry(True, 500)
+    assert not policy.should_retry(False, 500)
+    assert policy.should_retry(False, 429)
+    assert not retry.RetryPolicy(retry_throttled=False).should_retry(True, 429)
+
+
+def test_budget():
+    clock = FakeClock()
+    budget = retry.RetryBudget(capacity=2, ratio=0.5, per_second=0.1, clock=clock)
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    clock.now += 10
+    assert budget.tokens == pytest.approx(1)
+    clock.now += 100
+    assert budget.tokens == 2
+
+
+def test_budget_stops_retries():
+    clock = FakeClock()
+    budget = retry.RetryBudget(capacity=2, ratio=0, per_second=0, clock=clock)
+    policy = retry.RetryPolicy(budget=budget, clock=clock)
+    state = policy.start("GET", "https://api.example.com/")
+    state.next_delay()
+    other = policy.start("GET", "https://api.example.com/")
+    other.next_delay()
+    with pytest.raises(errors.APIError) as error:
+        state.next_delay()
+    assert "retry budget" in error.value.args[0]
+
+
+def test_on_retry():
+    attempts = []
+    policy = retry.RetryPolicy(on_retry=attempts.append, clock=FakeClock())
+    state = policy.start("GET", "https://api.example.com/")
+    state.next_delay(status=500)
+    error = OSError("reset")
+    state.next_delay(error=error)
+    assert [(a.attempt, a.delay, a.cumul_delay) for a in attempts] == [
+        (1, 5, 0),
+        (2, 10, 5),
+    ]
+    assert attempts[0].status == 500
+    assert attempts[1].error is error
+    assert attempts[1].method == "GET"
+
+
+def test_on_retry_error_is_ignored():
+    policy = retry.RetryPolicy(on_retry=lambda attempt: 1 / 0, clock=FakeClock())
+    assert delays(policy, 1) == [5]
+
+
+def test_api_retries_with_policy():
+    clock = FakeClock()
+    attempts = []
+    policy = retry.RetryPolicy(initial_delay=1, on_retry=attempts.append, clock=clock)
+    td = api.API("APIKEY", retry_policy=policy)
+    throttled = make_raw_response(429, b"slow down")
+    throttled.headers = {"Retry-After": "3"}
+    td.http.request = mock.MagicMock(
+        side_effect=[
+            throttled,
+            make_raw_response(502, b"bad gateway"),
+            OSError("connection reset"),
+            make_raw_response(200, b"ok"),
+        ]
+    )
+    with mock.patch("time.sleep") as t_sleep:
+        with td.get("/foo") as response:
+            assert response.read() == b"ok"
+    assert not t_sleep.called
+    assert clock.sleeps == [3, 2, 4]
+    assert [a.status for a in attempts] == [429, 502, None]
+
+
+def test_api_post_retries_throttled_only():
+    clock = FakeClock()
+    td = api.API("APIKEY", retry_policy=retry.RetryPolicy(clock=clock))
+    td.http.request = mock.MagicMock(
+        side_effect=[
+            make_raw_response(429, b"slow down"),
+            make_raw_response(200, b"ok"),
+        ]
+    )
+    with td.post("/foo", {}) as response:
+        assert response.read() == b"ok"
+    assert clock.sleeps == [5]
+
+    td.http.request = mock.MagicMock(return_value=make_raw_response(500, b"error"))
+    with pytest.raises(errors.APIError) as error:
+        with td.post("/foo", {}):
+            pass
+    assert error.value.args == ("Retrying stopped by retry_post_requests == False",)
+
+
+def test_api_returns_throttled_response_if_not_retried():
+    policy = retry.RetryPolicy(retry_throttled=False, clock=FakeClock())
+    td = api.API("APIKEY", retry_policy=policy)
+    td.http.request = mock.MagicMock(return_value=make_raw_response(429, b"slow down"))
+    with td.get("/foo") as response:
+        assert response.status == 429
+
+
+def test_default_policy_has_budget():
+    td = api.API("APIKEY", max_cumul_retry_delay=60)
+    assert td.retry_policy.max_cumul_delay == 60
+    assert td.retry_policy.budget is not None
+    assert td.retry_policy.jitter == "none"
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import json
 from unittest import mock
 
 import pytest
@@ -39,6 +40,33 @@ def test_list_tables_failure():
     assert error.value.args == ("500: List tables failed: error",)
 
 
+def test_list_tables_each():
+    td = api.API("APIKEY")
+    body = json.dumps(
+        {
+            "database": "sample_datasets",
+            "tables": [
+                {"id": i, "name": f"t{i}", "estimated_storage_size": i, "schema": "[]"}
+                for i in range(3)
+            ],
+        }
+    ).encode("utf-8")
+    td.get = mock.MagicMock(return_value=make_response(200, body))
+    tables = list(td.list_tables_each("sample_datasets"))
+    td.get.assert_called_with("/v3/table/list/sample_datasets")
+    td.get = mock.MagicMock(return_value=make_response(200, body))
+    assert tables == list(td.list_tables("sample_datasets").values())
+
+    td.get = mock.MagicMock(return_value=make_response(500, b"error"))
+    with pytest.raises(api.APIError) as error:
+        list(td.list_tables_each("sample_datasets"))
+    assert error.value.args == ("500: List tables failed: error",)
+    td.get = mock.MagicMock(return_value=make_response(200, b'{"database": "db"}'))
+    with pytest.raises(api.APIError) as error:
+        list(td.list_tables_each("db"))
+    assert error.value.args == ("Unexpected API response: Missing key: 'tables'",)
+
+
 def test_create_log_table_success():
     td = api.API("APIKEY")
     td.post = mock.MagicMock(return_value=make_response(200, b""))
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+import subprocess
+import sys
+
+import pytest
+
+import tdclient
+from tdclient import async_client, client, version
+from tdclient.test.test_helper import *
+
+
+def setup_function(function):
+    unset_environ()
+
+
+def loaded_modules(statement):
+    """Return the modules loaded by a statement in a fresh interpreter
+
+    Modules loaded by the interpreter before running anything, e.g. by ``.pth``
+    files of site-packages, are excluded.
+    """
+
+    def run(statement):
+        proc = subprocess.run(
+            [sys.executable, "-c", f"{statement}\nimport sys\nprint(*sys.modules)"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return set(proc.stdout.split())
+
+    return run(statement) - run("pass")
+
+
+def test_import_is_lazy():
+    modules = loaded_modules("import tdclient")
+    assert "tdclient.errors" in modules
+    for name in [
+        "asyncio",
+        "urllib3",
+        "certifi",
+        "msgpack",
+        "dateutil",
+        "numpy",
+        "pyarrow",
+        "tempfile",
+        "tdclient.api",
+        "tdclient.models",
+        "tdclient.version",
+    ]:
+        assert name not in modules
+
+
+def test_client_does_not_load_optional_machinery():
+    modules = loaded_modules(
+        "import tdclient\n"
+        "tdclient.Client\n"
+        "tdclient.util.parse_date('2019-01-30 05:34:42')"
+    )
+    assert "tdclient.api" in modules
+    for name in [
+        "asyncio",
+        "numpy",
+        "pyarrow",
+        "dateutil",
+        "tempfile",
+        "sqlite3",
+        "tdclient.query_cache",
+        "multiprocessing",
+        "tdclient.parallel_import",
+    ]:
+        assert name not in modules
+
+
+def test_dateutil_parser_is_loaded_on_fallback():
+    modules = loaded_modules(
+        "import tdclient.util\ntdclient.util.parse_date('2019-01-30T05:34:42Z')"
+    )
+    assert "dateutil.tz" in modules
+    assert "dateutil.parser" not in modules
+    modules = loaded_modules("import tdclient.util\ntdclient.util.parse_date('Jan 30')")
+    assert "dateutil.parser" in modules
+
+
+def test_lazy_attributes():
+    assert tdclient.Client is client.Client
+    assert tdclient.AsyncClient is async_client.AsyncClient
+    assert tdclient.__version__ == version.__version__
+    assert tdclient.connection.Connection is not None
+    assert "Client" in dir(tdclient)
+    with pytest.raises(AttributeError):
+        tdclient.no_such_module
+    with pytest.raises(AttributeError):
+        tdclient._private
@@ -2,9 +2,11 @@
 
 import contextlib
 import csv
+import http.server
 import io
 import json
 import os
+import threading
 import zlib
 from unittest import mock
 
@@ -51,6 +53,7 @@ def make_raw_response(status, body, headers={}):
 
     response.read.side_effect = read
     response.stream.side_effect = stream
+    response.tell.side_effect = lambda: min(response.pos, len(response.body))
     return response
 
 
@@ -137,3 +140,59 @@ def gunzipb(bytes):
     """bytes -> bytes"""
     decompress = zlib.decompressobj(zlib.MAX_WBITS | 16)
     return decompress.decompress(bytes) + decompress.flush()
+
+
+class StubHTTPServer:
+    """Local HTTP server for tests talking to a real socket
+
+    `handler` is called as ``handler(method, path, headers, body)`` and must
+    return a tuple of ``(status, headers, body)``. Every request is recorded in
+    `requests` as ``(method, path, headers, body)``.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("content-length") or 0)
+                body = self.rfile.read(length) if 0 < length else b""
+                headers = {k.lower(): v for (k, v) in self.headers.items()}
+                stub.requests.append((self.command, self.path, headers, body))
+                status, res_headers, res_body = stub.handler(
+                    self.command, self.path, headers, body
+                )
+                self.send_response(status)
+                for k, v in res_headers.items():
+                    self.send_header(k, v)
+                self.send_header("content-length", str(len(res_body)))
+                self.end_headers()
+                self.wfile.write(res_body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        )
+
+    @property
+    def endpoint(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
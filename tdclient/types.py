@@ -38,6 +38,23 @@ DataFormat: TypeAlias = Literal[
 ResultFormat: TypeAlias = Literal["msgpack", "json", "csv", "tsv"]
 """Type for query result formats."""
 
+ColumnOutput: TypeAlias = Literal["array", "numpy", "arrow"]
+"""Type for batches of columns of a query result."""
+
+ReturnWhen: TypeAlias = Literal["FIRST_COMPLETED", "FIRST_ERROR", "ALL_COMPLETED"]
+"""Type for the condition to stop waiting for watched jobs."""
+
+JSONBackend: TypeAlias = Literal["auto", "json", "orjson"]
+"""Type for the libraries decoding and encoding JSON."""
+
+RetryJitter: TypeAlias = Literal["none", "full", "decorrelated"]
+"""Type for the randomization of delays between retries."""
+
+RouteFamily: TypeAlias = Literal[
+    "job_issue", "job_status", "result", "import", "list", "other"
+]
+"""Type for the families of API routes limited together."""
+
 # Utility types for CSV parsing and data processing
 CSVValue: TypeAlias = int | float | str | bool | None
 """Type for values parsed from CSV files."""
@@ -1,19 +1,35 @@
 import csv
+import functools
 import io
+import itertools
 import logging
+import queue
+import re
+import threading
 import warnings
-from collections.abc import Iterator
-from datetime import datetime
-from typing import Any, BinaryIO
+from collections.abc import Iterable, Iterator
+from datetime import datetime, tzinfo
+from typing import Any, BinaryIO, TypeVar
 from urllib.parse import quote as urlquote
 
-import dateutil.parser
 import msgpack
 
 from tdclient.types import Converter, CSVValue, Record
 
 log = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+class URLPath(str):
+    """Path made by :func:`create_url`, which keeps the template it was made of
+
+    Requests are told apart by the template in metrics, rather than by paths
+    which differ by every job ID or table name.
+    """
+
+    template: str
+
 
 def create_url(tmpl: str, **values: Any) -> str:
     """Create url with values
@@ -21,9 +37,14 @@ def create_url(tmpl: str, **values: Any) -> str:
     Args:
         tmpl (str): url template
         values (dict): values for url
+
+    Returns:
+        str: a :class:`URLPath`
     """
     quoted_values = {k: urlquote(str(v), safe="") for k, v in values.items()}
-    return tmpl.format(**quoted_values)
+    url = URLPath(tmpl.format(**quoted_values))
+    url.template = tmpl
+    return url
 
 
 def validate_record(record: Record) -> bool:
@@ -249,6 +270,132 @@ def read_csv_records(
         yield record
 
 
+def _int_or_guess(s: str) -> CSVValue:
+    try:
+        return int(s)
+    except ValueError:
+        return guess_csv_value(s)
+
+
+def _float_or_guess(s: str) -> CSVValue:
+    try:
+        return float(s)
+    except ValueError:
+        return guess_csv_value(s)
+
+
+_BOOLS = {"true": True, "false": False}
+
+
+def _bool_or_guess(s: str) -> CSVValue:
+    value = _BOOLS.get(s.lower())
+    return guess_csv_value(s) if value is None else value
+
+
+_NULLS = frozenset(("", "none", "null"))
+
+
+def _str_or_null(s: str) -> CSVValue:
+    return None if len(s) <= 4 and s.lower() in _NULLS else s
+
+
+# Converters of columns whose values in a sample have all been guessed as a type
+INFERRED_CONVERTERS: dict[type, Converter] = {
+    int: _int_or_guess,
+    float: _float_or_guess,
+    bool: _bool_or_guess,
+    str: _str_or_null,
+}
+
+
+def infer_csv_converters(
+    columns: list[str],
+    sample: list[list[str]],
+    dtypes: dict[str, str] | None = None,
+    converters: dict[str, Converter] | None = None,
+) -> tuple[Converter, ...]:
+    """Choose a converter for each column from `dtypes`, `converters` or a sample
+
+    A column which is not in `dtypes` or `converters` gets a converter for the
+    type which `tdclient.util.guess_csv_value`_ guesses for all non-null values
+    of the column in `sample`:
+
+    * int: ``int``. Other values are guessed, e.g. "1.5" is read as a float.
+    * float (or a mix of int and float): ``float``, so "2" is read as 2.0.
+    * bool: "true" and "false" in any case.
+    * str: the value itself, so "10" is read as a string. "", "none" and
+      "null" in any case are read as None.
+
+    A column with values of different types, or without non-null values, in
+    `sample` is read by `tdclient.util.guess_csv_value`_.
+
+    Args:
+        columns (list of str): names of columns
+        sample (list of list of str): rows of the first values of columns
+        dtypes (optional dict): as for `tdclient.util.merge_dtypes_and_converters`_
+        converters (optional dict): as for
+            `tdclient.util.merge_dtypes_and_converters`_
+
+    Returns:
+        a tuple of callables indexed by the position of columns
+    """
+    given = merge_dtypes_and_converters(dtypes, converters)
+    result: list[Converter] = []
+    for i, column in enumerate(columns):
+        if column in given:
+            result.append(given[column])
+            continue
+        kinds = {type(guess_csv_value(row[i])) for row in sample if i < len(row)}
+        kinds.discard(type(None))
+        if len(kinds) == 1:
+            result.append(INFERRED_CONVERTERS[kinds.pop()])
+        elif kinds == {int, float}:
+            result.append(_float_or_guess)
+        else:
+            result.append(guess_csv_value)
+    return tuple(result)
+
+
+def read_csv_batches(
+    rows: Iterable[list[str]],
+    columns: list[str],
+    dtypes: dict[str, str] | None = None,
+    converters: dict[str, Converter] | None = None,
+    sample_size: int = 1000,
+    batch_size: int = 10000,
+) -> Iterator[list[Record]]:
+    """Read records from CSV rows with converters compiled for their columns
+
+    This is a faster alternative to `tdclient.util.read_csv_records`_. The
+    converter of each column is chosen once by
+    `tdclient.util.infer_csv_converters`_ from the first `sample_size` rows,
+    instead of looking it up and guessing the type for every value, and the
+    "time" column is checked once in `columns` instead of in every record.
+
+    Args:
+        rows (iterable of list of str): rows from :func:`csv.reader`
+        columns (list of str): names of columns. Values out of them are ignored.
+        dtypes (optional dict): as for `tdclient.util.merge_dtypes_and_converters`_
+        converters (optional dict): as for
+            `tdclient.util.merge_dtypes_and_converters`_
+        sample_size (int): number of rows to infer types of columns from
+        batch_size (int): maximum number of records in a batch
+
+    Yields:
+        lists of records
+    """
+    validate_record(dict.fromkeys(columns))
+    rows = iter(rows)
+    batch = list(itertools.islice(rows, max(sample_size, batch_size)))
+    funcs = infer_csv_converters(columns, batch[:sample_size], dtypes, converters)
+    while batch:
+        yield [
+            {c: f(v) for c, f, v in zip(columns, funcs, row, strict=False)}
+            for row in batch
+        ]
+        batch = list(itertools.islice(rows, batch_size))
+
+
 def create_msgpack(items: list[dict[str, Any]]) -> bytes:
     """Create msgpack streaming bytes from list
 
@@ -350,26 +497,140 @@ def get_or_else(
             return default_value
 
 
-def parse_date(s: str | None) -> datetime | None:
-    """Parse date from str to datetime
+#: number of distinct date strings whose parsed values are memoized
+DATE_MEMO_SIZE = 4096
+
+# shapes of dates returned by the API, e.g. "2019-01-30T05:34:42Z" or
+# "2019-01-30 05:34:42 UTC"
+_DATE_PATTERN = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?"
+    r"(?: ?(Z|UTC|[+-]\d{2}:?\d{2}))?"
+)
+
+
+def _parse_date_fast(s: str) -> datetime | None:
+    m = _DATE_PATTERN.fullmatch(s)
+    if m is None:
+        return None
+    year, month, day, hour, minute, second, fraction, zone = m.groups()
+    tz: tzinfo | None = None
+    if zone is not None:
+        # dateutil is loaded on the first date with a zone, not on import
+        import dateutil.tz
+
+        if zone in ("Z", "UTC"):
+            tz = dateutil.tz.UTC
+        else:
+            offset = int(zone[1:3]) * 3600 + int(zone[-2:]) * 60
+            if zone[0] == "-":
+                offset = -offset
+            tz = dateutil.tz.UTC if offset == 0 else dateutil.tz.tzoffset(None, offset)
+    try:
+        return datetime(
+            int(year),
+            int(month),
+            int(day),
+            int(hour),
+            int(minute),
+            int(second),
+            int(fraction.ljust(6, "0")) if fraction else 0,
+            tzinfo=tz,
+        )
+    except ValueError:
+        return None
+
+
+def _parse_date(s: str) -> datetime | None:
+    parsed = _parse_date_fast(s)
+    if parsed is not None:
+        return parsed
+    import dateutil.parser
+
+    try:
+        return dateutil.parser.parse(s)
+    except ValueError:
+        log.warning("Failed to parse date string: %s", s)
+        return None
+
+
+_parse_date_memo = functools.lru_cache(maxsize=DATE_MEMO_SIZE)(_parse_date)
 
-    TODO: parse datetime using an optional format string
 
-    For now, this does not use a format string since API may return date in ambiguous format :(
+def parse_date(s: str | None, memo: bool = True) -> datetime | None:
+    """Parse date from str to datetime
+
+    Dates in the shapes returned by the API, e.g. "2019-01-30T05:34:42Z" or
+    "2019-01-30 05:34:42 UTC", are parsed by a precompiled pattern. Other
+    strings are parsed by `dateutil`, since API may return date in ambiguous
+    format :(
 
     Args:
        s (str | None): target str, or None
+       memo (bool): reuse the values of the last :data:`DATE_MEMO_SIZE` distinct
+           strings, which are often repeated in listings. Default is `True`.
 
     Returns:
        datetime or None
     """
     if s is None:
         return None
+    if memo:
+        return _parse_date_memo(s)
+    return _parse_date(s)
+
+
+def read_ahead(iterable: Iterable[T], depth: int) -> Iterator[T]:
+    """Iterate `iterable` on a background thread, buffering up to `depth` items
+
+    This lets a slow producer (e.g. network reads of a response body) run
+    concurrently with a slow consumer (e.g. decoding of the chunks read).
+    Exceptions raised by `iterable` are re-raised to the consumer. When the
+    consumer stops early, the background thread stops after the item it is
+    currently producing.
+
+    Args:
+        iterable: source of items. It is consumed on a background thread.
+        depth (int): maximum number of items buffered ahead of the consumer.
+
+    Yields:
+        items of `iterable` in order
+    """
+    buf: queue.Queue[tuple[bool, Any]] = queue.Queue(maxsize=max(1, depth))
+    stopped = threading.Event()
+
+    def put(item: tuple[bool, Any]) -> bool:
+        while not stopped.is_set():
+            try:
+                buf.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+        except BaseException as error:
+            put((False, error))
+        else:
+            put((False, None))
+
+    thread = threading.Thread(target=produce, name="tdclient-read-ahead", daemon=True)
+    thread.start()
     try:
-        return dateutil.parser.parse(s)
-    except ValueError:
-        log.warning("Failed to parse date string: %s", s)
-        return None
+        while True:
+            ok, item = buf.get()
+            if ok:
+                yield item
+            elif item is None:
+                return
+            else:
+                raise item
+    finally:
+        stopped.set()
+        thread.join()
 
 
 def normalize_connector_config(config: dict[str, Any]) -> dict[str, Any]: